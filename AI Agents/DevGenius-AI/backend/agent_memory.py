@@ -9,29 +9,42 @@ from motor.motor_asyncio import AsyncIOMotorClient
 import logging
 import os
 
+from error_index import ErrorIndex, EmbedManyFn
+
 logger = logging.getLogger(__name__)
 
 class AgentMemory:
     """Manages agent learning, error tracking, and knowledge base"""
     
-    def __init__(self, db):
+    def __init__(self, db, embed_many: Optional[EmbedManyFn] = None):
         """
         Initialize agent memory system
         
         Args:
             db: MongoDB database instance
+            embed_many: Optional async batch embedder used to re-rank similar errors
         """
         self.db = db
         self.memory_collection = db.agent_memory
         self.preferences_collection = db.user_preferences
+        self.error_index = ErrorIndex(self.memory_collection, db.agent_memory_tokens,
+                                      embed_many=embed_many)
         logger.info("Agent memory system initialized")
     
+    async def ensure_indexes(self):
+        """Create the error resolution indexes and index resolutions stored before them"""
+        await self.error_index.ensure_indexes()
+        await self.error_index.backfill()
+    
     async def store_error_resolution(self, agent_type: str, error_pattern: str, 
                                      resolution: str, conversation_id: str,
                                      success: bool = True, metadata: Optional[Dict] = None):
         """
         Store an error pattern and its resolution for learning
         
+        Errors with the same fingerprint (stack frames, paths and numbers
+        stripped) are counted as one pattern.
+        
         Args:
             agent_type: Type of agent (programming, website, etc.)
             error_pattern: Description or pattern of the error
@@ -41,44 +54,13 @@ class AgentMemory:
             metadata: Additional context (error message, stack trace, etc.)
         """
         try:
-            memory_entry = {
-                "type": "error_resolution",
-                "agent_type": agent_type,
-                "error_pattern": error_pattern,
-                "resolution": resolution,
-                "conversation_id": conversation_id,
-                "success": success,
-                "metadata": metadata or {},
-                "created_at": datetime.now(timezone.utc).isoformat(),
-                "times_encountered": 1,
-                "times_resolved": 1 if success else 0
-            }
-            
-            # Check if similar error exists
-            existing = await self.memory_collection.find_one({
-                "type": "error_resolution",
-                "agent_type": agent_type,
-                "error_pattern": error_pattern
-            })
-            
-            if existing:
-                # Update existing entry
-                await self.memory_collection.update_one(
-                    {"_id": existing["_id"]},
-                    {"$inc": {
-                        "times_encountered": 1,
-                        "times_resolved": 1 if success else 0
-                    },
-                     "$set": {
-                        "last_encountered": datetime.now(timezone.utc).isoformat(),
-                        "latest_resolution": resolution
-                    }}
-                )
-                logger.info(f"Updated existing error pattern for {agent_type}")
-            else:
-                # Insert new entry
-                await self.memory_collection.insert_one(memory_entry)
+            created = await self.error_index.record(
+                agent_type, error_pattern, resolution, conversation_id, success, metadata
+            )
+            if created:
                 logger.info(f"Stored new error pattern for {agent_type}")
+            else:
+                logger.info(f"Updated existing error pattern for {agent_type}")
                 
         except Exception as e:
             logger.error(f"Failed to store error resolution: {str(e)}")
@@ -94,37 +76,11 @@ class AgentMemory:
             limit: Maximum number of results
             
         Returns:
-            List of similar error resolutions
+            List of similar error resolutions, best first, each with a
+            relevance_score (1.0 for the same normalized error)
         """
         try:
-            # Simple keyword matching for now (can be enhanced with embeddings)
-            keywords = error_pattern.lower().split()[:5]  # First 5 significant words
-            
-            pipeline = [
-                {
-                    "$match": {
-                        "type": "error_resolution",
-                        "agent_type": agent_type,
-                        "success": True
-                    }
-                },
-                {
-                    "$addFields": {
-                        "relevance_score": {
-                            "$sum": [
-                                1 if keyword in "$error_pattern" else 0
-                                for keyword in keywords
-                            ]
-                        }
-                    }
-                },
-                {"$match": {"relevance_score": {"$gt": 0}}},
-                {"$sort": {"relevance_score": -1, "times_resolved": -1}},
-                {"$limit": limit}
-            ]
-            
-            results = await self.memory_collection.aggregate(pipeline).to_list(limit)
-            return results
+            return await self.error_index.search(agent_type, error_pattern, limit)
             
         except Exception as e:
             logger.error(f"Failed to retrieve similar errors: {str(e)}")
@@ -383,9 +339,10 @@ class AgentMemory:
 # Global instance
 _agent_memory = None
 
-async def get_agent_memory(db) -> AgentMemory:
+async def get_agent_memory(db, embed_many: Optional[EmbedManyFn] = None) -> AgentMemory:
     """Get or create global agent memory instance"""
     global _agent_memory
     if _agent_memory is None:
-        _agent_memory = AgentMemory(db)
+        _agent_memory = AgentMemory(db, embed_many=embed_many)
+        await _agent_memory.ensure_indexes()
     return _agent_memory
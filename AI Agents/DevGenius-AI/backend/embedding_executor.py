@@ -0,0 +1,219 @@
+"""
+Embedding Executor
+Micro-batched, cached text encoding on a dedicated worker thread, plus a batched vector store writer
+"""
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EncodeFn = Callable[[List[str]], List[List[float]]]
+WriteFn = Callable[[List[str], List[List[float]], List[str], List[Dict]], Any]
+
+# How often the batcher checks for more texts while a batch is filling
+POLL_SECONDS = 0.001
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+async def _fill_batch(queue: asyncio.Queue, first: Any, max_items: int, max_wait: float) -> List[Any]:
+    """The first item plus whatever else arrives within max_wait, up to max_items"""
+    batch = [first]
+    deadline = asyncio.get_running_loop().time() + max_wait
+    while len(batch) < max_items:
+        try:
+            batch.append(queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(remaining, POLL_SECONDS))
+    return batch
+
+
+class EmbeddingExecutor:
+    """Encodes texts off the event loop in micro-batches
+
+    Callers await embed()/embed_many(); pending texts are collected for up
+    to `max_wait` seconds or `max_batch` texts and encoded with one call to
+    `encode` on a dedicated worker thread. Embeddings are cached by content
+    hash, and a text already being encoded is not queued twice. The queue is
+    bounded, so when encoding falls behind callers wait instead of piling up
+    work in memory.
+    """
+
+    def __init__(self, encode: EncodeFn, max_batch: int = 32, max_wait: float = 0.005,
+                 max_queue: int = 1024, cache_size: int = 10000):
+        """
+        Args:
+            encode: Synchronous batch encoder, list of texts -> list of vectors
+            max_batch: Most texts per encode call
+            max_wait: Seconds to wait for more texts once one is queued
+            max_queue: Texts waiting to be encoded before callers block
+            cache_size: Embeddings kept by content hash
+        """
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self._queue: "asyncio.Queue[Tuple[str, str, asyncio.Future]]" = asyncio.Queue(max_queue)
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._encoding: Dict[str, asyncio.Future] = {}
+        self._batcher: Optional[asyncio.Task] = None
+        self.stats = {"batches": 0, "encoded": 0, "cache_hits": 0}
+
+    def _ensure_started(self):
+        if self._batcher is None or self._batcher.done():
+            self._batcher = asyncio.get_running_loop().create_task(self._batch_loop())
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run a blocking call (e.g. a vector store query) on the embedding thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._thread, fn, *args)
+
+    async def embed(self, text: str) -> List[float]:
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        results: List[Any] = []
+        for text in texts:
+            key = content_hash(text)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                results.append(cached)
+                continue
+            future = self._encoding.get(key)
+            if future is None:
+                future = loop.create_future()
+                # Shared only once queued, so a caller cancelled while waiting
+                # for room leaves no future behind that nothing will resolve
+                await self._queue.put((key, text, future))
+                self._encoding.setdefault(key, future)
+            results.append(future)
+        # Futures are shared between callers: one being cancelled must not cancel them for the rest
+        return [await asyncio.shield(item) if isinstance(item, asyncio.Future) else item for item in results]
+
+    async def _batch_loop(self):
+        while True:
+            first = await self._queue.get()
+            batch = await _fill_batch(self._queue, first, self.max_batch, self.max_wait)
+            try:
+                vectors = await self.run(self.encode, [text for _, text, _ in batch])
+            except Exception as e:
+                logger.error(f"Batch embedding failed: {str(e)}")
+                for key, _, future in batch:
+                    self._encoding.pop(key, None)
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.stats["batches"] += 1
+            self.stats["encoded"] += len(batch)
+            for (key, _, future), vector in zip(batch, vectors):
+                vector = list(vector)
+                self._cache[key] = vector
+                self._encoding.pop(key, None)
+                if not future.done():
+                    future.set_result(vector)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def aclose(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+            self._batcher = None
+        for future in self._encoding.values():
+            if not future.done():
+                future.cancel()
+        self._encoding.clear()
+        self._thread.shutdown(wait=False)
+
+
+class BatchedEmbeddingWriter:
+    """Embeds and writes documents to a vector store in batches
+
+    submit() returns as soon as the document is queued (or, when the queue
+    is full, once there is room again); embedding and the store write happen
+    later, one `write` call per batch on the executor's thread.
+    """
+
+    def __init__(self, executor: EmbeddingExecutor, write: WriteFn, max_batch: int = 64,
+                 max_wait: float = 0.05, max_queue: int = 2048):
+        """
+        Args:
+            executor: EmbeddingExecutor used to encode the documents
+            write: Synchronous store write, (ids, embeddings, documents, metadatas)
+            max_batch: Most documents per write
+            max_wait: Seconds to wait for more documents once one is queued
+            max_queue: Documents waiting to be written before submit() blocks
+        """
+        self.executor = executor
+        self.write = write
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: "asyncio.Queue[Tuple[str, str, Dict]]" = asyncio.Queue(max_queue)
+        self._writer: Optional[asyncio.Task] = None
+        self.stats = {"writes": 0, "written": 0, "failed": 0}
+
+    async def submit(self, item_id: str, document: str, metadata: Dict):
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._write_loop())
+        await self._queue.put((item_id, document, metadata))
+
+    async def flush(self):
+        """Wait until everything submitted so far has been written"""
+        await self._queue.join()
+
+    async def _write_loop(self):
+        while True:
+            first = await self._queue.get()
+            batch = await _fill_batch(self._queue, first, self.max_batch, self.max_wait)
+            try:
+                embeddings = await self.executor.embed_many([document for _, document, _ in batch])
+                await self.executor.run(
+                    self.write,
+                    [item_id for item_id, _, _ in batch],
+                    embeddings,
+                    [document for _, document, _ in batch],
+                    [metadata for _, _, metadata in batch]
+                )
+                self.stats["writes"] += 1
+                self.stats["written"] += len(batch)
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
+                # An embedding cancelled by EmbeddingExecutor.aclose(); the writer keeps going
+                self.stats["failed"] += len(batch)
+                logger.error(f"Embedding cancelled for {len(batch)} message embeddings")
+            except Exception as e:
+                self.stats["failed"] += len(batch)
+                logger.error(f"Failed to store {len(batch)} message embeddings: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def aclose(self, timeout: float = 5.0):
+        """Write what is queued, waiting at most `timeout` seconds, then stop"""
+        if self._writer is None:
+            return
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropped {self._queue.qsize()} unwritten message embeddings on shutdown")
+        self._writer.cancel()
+        await asyncio.gather(self._writer, return_exceptions=True)
+        self._writer = None
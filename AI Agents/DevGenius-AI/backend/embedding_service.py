@@ -10,6 +10,8 @@ from typing import List, Dict, Tuple, Optional
 import logging
 from datetime import datetime
 
+from embedding_executor import EmbeddingExecutor, BatchedEmbeddingWriter
+
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
@@ -38,6 +40,10 @@ class EmbeddingService:
                 metadata={"description": "Conversation messages for semantic search"}
             )
             
+            # Encoding and vector store calls run on one worker thread, in batches
+            self.executor = EmbeddingExecutor(self._encode)
+            self.writer = BatchedEmbeddingWriter(self.executor, self._add)
+            
             logger.info("Embedding service initialized successfully")
             
         except Exception as e:
@@ -78,10 +84,27 @@ class EmbeddingService:
             logger.error(f"Batch embedding failed: {str(e)}")
             return []
     
-    def store_message(self, conversation_id: str, message_id: str, role: str, content: str, 
-                     metadata: Optional[Dict] = None):
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Batch encoder run by the executor's worker thread"""
+        return self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False).tolist()
+    
+    def _add(self, ids: List[str], embeddings: List[List[float]], documents: List[str],
+             metadatas: List[Dict]):
+        """One ChromaDB write for a batch of messages, run by the executor's worker thread"""
+        self.conversations_collection.add(
+            embeddings=embeddings,
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids
+        )
+    
+    async def store_message(self, conversation_id: str, message_id: str, role: str, content: str, 
+                            metadata: Optional[Dict] = None):
         """
-        Store a message with its embedding for later retrieval
+        Queue a message to be embedded and stored for later retrieval
+        
+        Returns once the message is queued; it is embedded and written to
+        ChromaDB in a later batch. Only waits when the write queue is full.
         
         Args:
             conversation_id: ID of the conversation
@@ -94,12 +117,6 @@ class EmbeddingService:
             if not content.strip():
                 return
             
-            embedding = self.embed_text(content)
-            
-            if not embedding:
-                logger.warning(f"Failed to generate embedding for message {message_id}")
-                return
-            
             meta = metadata or {}
             meta.update({
                 'conversation_id': conversation_id,
@@ -107,19 +124,13 @@ class EmbeddingService:
                 'timestamp': datetime.now().isoformat()
             })
             
-            self.conversations_collection.add(
-                embeddings=[embedding],
-                documents=[content],
-                metadatas=[meta],
-                ids=[message_id]
-            )
-            
-            logger.debug(f"Stored message {message_id} in vector database")
+            await self.writer.submit(message_id, content, meta)
+            logger.debug(f"Queued message {message_id} for the vector database")
             
         except Exception as e:
             logger.error(f"Failed to store message: {str(e)}")
     
-    def semantic_search(self, query: str, conversation_id: str, top_k: int = 5, 
+    async def semantic_search(self, query: str, conversation_id: str, top_k: int = 5, 
                        exclude_recent: int = 3) -> List[Dict]:
         """
         Perform semantic search for relevant messages in a conversation
@@ -134,17 +145,17 @@ class EmbeddingService:
             List of relevant messages with similarity scores
         """
         try:
-            query_embedding = self.embed_text(query)
+            query_embedding = await self.executor.embed(query)
             
             if not query_embedding:
                 return []
             
             # Search in the specific conversation
-            results = self.conversations_collection.query(
+            results = await self.executor.run(lambda: self.conversations_collection.query(
                 query_embeddings=[query_embedding],
                 n_results=top_k + exclude_recent,  # Get extra to filter recent ones
                 where={"conversation_id": conversation_id}
-            )
+            ))
             
             if not results['documents'] or not results['documents'][0]:
                 return []
@@ -178,7 +189,7 @@ class EmbeddingService:
             logger.error(f"Semantic search failed: {str(e)}")
             return []
     
-    def detect_redundant_messages(self, messages: List[Dict], threshold: float = 0.95) -> List[int]:
+    async def detect_redundant_messages(self, messages: List[Dict], threshold: float = 0.95) -> List[int]:
         """
         Detect redundant/duplicate messages based on semantic similarity
         
@@ -193,9 +204,9 @@ class EmbeddingService:
             if len(messages) < 2:
                 return []
             
-            # Extract content and generate embeddings
+            # Extract content and generate embeddings (stored messages are cached)
             contents = [msg['content'] for msg in messages]
-            embeddings = self.embed_batch(contents)
+            embeddings = await self.executor.embed_many(contents)
             
             if not embeddings or len(embeddings) != len(messages):
                 return []
@@ -228,7 +239,7 @@ class EmbeddingService:
             logger.error(f"Redundancy detection failed: {str(e)}")
             return []
     
-    def get_smart_context(self, conversation_id: str, recent_messages: List[Dict], 
+    async def get_smart_context(self, conversation_id: str, recent_messages: List[Dict], 
                          current_message: str, max_context_messages: int = 8) -> List[Dict]:
         """
         Get smart context combining recent messages and semantically similar past messages
@@ -251,7 +262,7 @@ class EmbeddingService:
             
             if remaining_slots > 0:
                 # Search for relevant past messages
-                relevant = self.semantic_search(
+                relevant = await self.semantic_search(
                     query=current_message,
                     conversation_id=conversation_id,
                     top_k=remaining_slots,
@@ -268,7 +279,7 @@ class EmbeddingService:
             
             # Remove redundant messages from context
             if len(context) > 3:
-                redundant_indices = self.detect_redundant_messages(context, threshold=0.92)
+                redundant_indices = await self.detect_redundant_messages(context, threshold=0.92)
                 if redundant_indices:
                     logger.info(f"Removing {len(redundant_indices)} redundant messages from context")
                     context = [msg for i, msg in enumerate(context) if i not in redundant_indices]
@@ -278,6 +289,11 @@ class EmbeddingService:
         except Exception as e:
             logger.error(f"Smart context generation failed: {str(e)}")
             return recent_messages  # Fallback to recent messages only
+    
+    async def aclose(self):
+        """Write queued messages and stop the worker thread"""
+        await self.writer.aclose()
+        await self.executor.aclose()
 
 # Global instance
 _embedding_service = None
@@ -0,0 +1,271 @@
+"""
+Error Resolution Index
+Fingerprint and token index for looking up past error resolutions
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EmbedManyFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+# Stack frame lines dropped before fingerprinting (Python frames with their
+# source lines, JS/Java/C#, Go/Rust)
+_FRAME_LINES = re.compile(
+    r'^\s*(?:file "[^"]*", line \d+[^\n]*(?:\n[ \t]{4,}[^\n]*)*'
+    r'|at [^\n(]+ \(.*\)'
+    r'|at .*[:(]\d+(?::\d+)?\)?'
+    r'|at .* in .*:line \d+'
+    r'|traceback \(most recent call last\):'
+    r'|[\w./\\-]+\.(?:go|rs):\d+.*'
+    r'|\^+|~+)\s*$',
+    re.IGNORECASE | re.MULTILINE
+)
+_VOLATILE = [
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"), " <id> "),
+    (re.compile(r"\b0x[0-9a-f]+\b"), " <addr> "),
+    (re.compile(r"(?:[a-z]:)?(?:[\\/][\w.@~+-]+)+[\\/]?"), " <path> "),
+    (re.compile(r"\b\d+(?:\.\d+)*\b"), " <n> "),
+]
+_TOKEN = re.compile(r"[a-z_][a-z0-9_]{2,}")
+STOPWORDS = {
+    "the", "and", "for", "not", "was", "are", "has", "had", "have", "with", "this", "that",
+    "from", "but", "its", "can", "cannot", "could", "when", "while", "into", "got", "all",
+    "any", "you", "your", "use", "line", "file", "error", "exception", "failed", "traceback",
+}
+MAX_TOKENS = 32
+# Pseudo-token in the document-frequency collection counting indexed errors
+_TOTAL = "*"
+
+_PROJECTION = {"_id": 0, "tokens": 0, "expires_at": 0}
+_CANDIDATE_PROJECTION = {"_id": 0, "expires_at": 0}
+
+
+def normalize_error(text: str) -> str:
+    """Lowercase an error and strip stack frames, paths, addresses and numbers"""
+    text = _FRAME_LINES.sub(" ", text.lower())
+    for pattern, replacement in _VOLATILE:
+        text = pattern.sub(replacement, text)
+    return " ".join(text.split())
+
+
+def error_fingerprint(text: str) -> str:
+    return hashlib.sha1(normalize_error(text).encode("utf-8")).hexdigest()
+
+
+def error_tokens(text: str) -> List[str]:
+    """Distinct significant words of a normalized error, in order of appearance"""
+    tokens = []
+    for token in _TOKEN.findall(normalize_error(text)):
+        if token not in STOPWORDS and token not in tokens:
+            tokens.append(token)
+            if len(tokens) == MAX_TOKENS:
+                break
+    return tokens
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ErrorIndex:
+    """Exact and fuzzy lookup of error resolutions in agent_memory
+
+    Each resolution carries a fingerprint (hash of the normalized error) for
+    exact matches through an index, and its normalized tokens in a multikey
+    index for fuzzy matches. A fuzzy search only queries the rarest of the
+    error's tokens, using per-agent document frequencies kept in a separate
+    collection, and scores the candidates by IDF-weighted overlap, optionally
+    blended with embedding similarity. `times_resolved` counts for less as
+    the last resolution ages, and resolutions not encountered for `ttl_days`
+    expire through a TTL index. Document frequencies are not decremented when
+    entries expire; they only steer which tokens are queried.
+    """
+
+    def __init__(self, collection, frequencies, ttl_days: int = 180, half_life_days: float = 30.0,
+                 query_tokens: int = 4, candidate_limit: int = 200,
+                 embed_many: Optional[EmbedManyFn] = None, embedding_weight: float = 0.5):
+        """
+        Args:
+            collection: agent_memory collection
+            frequencies: Collection of per-agent token document frequencies
+            ttl_days: Days after the last encounter before a resolution expires
+            half_life_days: Age of the last resolution at which times_resolved counts half
+            query_tokens: Rarest tokens of the error used to select candidates
+            candidate_limit: Most candidates scored per search
+            embed_many: Optional async batch embedder used to re-rank candidates
+            embedding_weight: Share of the embedding similarity in the re-ranked score
+        """
+        self.collection = collection
+        self.frequencies = frequencies
+        self.ttl = timedelta(days=ttl_days)
+        self.half_life_days = half_life_days
+        self.query_tokens = query_tokens
+        self.candidate_limit = candidate_limit
+        self.embed_many = embed_many
+        self.embedding_weight = embedding_weight
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("type", 1), ("agent_type", 1), ("fingerprint", 1)])
+        await self.collection.create_index([("type", 1), ("agent_type", 1), ("tokens", 1)])
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+        await self.frequencies.create_index([("agent_type", 1), ("token", 1)], unique=True)
+
+    async def record(self, agent_type: str, error_pattern: str, resolution: str,
+                     conversation_id: str, success: bool = True, metadata: Optional[Dict] = None) -> bool:
+        """
+        Insert a resolution, or count another encounter of the same error
+
+        Returns:
+            True if the error had not been seen before
+        """
+        now = datetime.now(timezone.utc)
+        tokens = error_tokens(error_pattern)
+        update = {
+            "$inc": {"times_encountered": 1, "times_resolved": 1 if success else 0},
+            "$set": {
+                "last_encountered": now.isoformat(),
+                "latest_resolution": resolution,
+                # BSON date for the TTL index; refreshed on every encounter
+                "expires_at": now + self.ttl,
+            },
+            "$setOnInsert": {
+                "error_pattern": error_pattern,
+                "resolution": resolution,
+                "conversation_id": conversation_id,
+                "metadata": metadata or {},
+                "created_at": now.isoformat(),
+                "tokens": tokens,
+            },
+        }
+        if success:
+            update["$set"].update({"success": True, "last_resolved": now.isoformat()})
+        else:
+            update["$setOnInsert"]["success"] = False
+
+        result = await self.collection.update_one(
+            {"type": "error_resolution", "agent_type": agent_type,
+             "fingerprint": error_fingerprint(error_pattern)},
+            update,
+            upsert=True
+        )
+        if result.upserted_id is None:
+            return False
+        await self._count_tokens(agent_type, tokens)
+        return True
+
+    async def _count_tokens(self, agent_type: str, tokens: List[str]):
+        await asyncio.gather(*(
+            self.frequencies.update_one({"agent_type": agent_type, "token": token},
+                                        {"$inc": {"df": 1}}, upsert=True)
+            for token in tokens + [_TOTAL]
+        ))
+
+    async def search(self, agent_type: str, error_pattern: str, limit: int = 5) -> List[Dict]:
+        """
+        Resolved errors most similar to `error_pattern`, best first
+
+        An exact fingerprint match always comes first. Each result has a
+        `relevance_score` between 0 and 1 and a `resolution_weight`, the
+        decayed times_resolved used to order results of equal relevance.
+        """
+        base = {"type": "error_resolution", "agent_type": agent_type, "times_resolved": {"$gt": 0}}
+        fingerprint = error_fingerprint(error_pattern)
+        exact = await self.collection.find_one({**base, "fingerprint": fingerprint}, _PROJECTION)
+
+        tokens = error_tokens(error_pattern)
+        candidates = []
+        idf: Dict[str, float] = {}
+        if tokens and limit > (1 if exact else 0):
+            counts = await self.frequencies.find(
+                {"agent_type": agent_type, "token": {"$in": tokens + [_TOTAL]}},
+                {"_id": 0, "token": 1, "df": 1}
+            ).to_list(len(tokens) + 1)
+            df = {doc["token"]: doc["df"] for doc in counts}
+            total = df.pop(_TOTAL, 0)
+            # Tokens no stored error contains cannot match; they still count against recall
+            idf = {token: math.log(1 + (total + 1) / (df.get(token, 0) + 1)) for token in tokens}
+            rarest = sorted((token for token in tokens if token in df), key=df.get)[:self.query_tokens]
+            if rarest:
+                candidates = await self.collection.find(
+                    {**base, "tokens": {"$in": rarest}, "fingerprint": {"$ne": fingerprint}},
+                    _CANDIDATE_PROJECTION
+                ).limit(self.candidate_limit).to_list(self.candidate_limit)
+
+        query_weight = sum(idf.values())
+        for candidate in candidates:
+            candidate_tokens = candidate.pop("tokens", None) or []
+            shared = set(tokens).intersection(candidate_tokens)
+            recall = sum(idf[token] for token in shared) / query_weight if query_weight else 0.0
+            precision = len(shared) / len(candidate_tokens) if candidate_tokens else 0.0
+            candidate["relevance_score"] = 0.7 * recall + 0.3 * precision
+            candidate["match"] = "fuzzy"
+
+        if candidates and self.embed_many is not None:
+            await self._rerank(error_pattern, candidates)
+
+        now = datetime.now(timezone.utc)
+        for candidate in candidates:
+            candidate["relevance_score"] = round(candidate["relevance_score"], 3)
+            candidate["resolution_weight"] = self._resolution_weight(candidate, now)
+        candidates.sort(key=lambda doc: (doc["relevance_score"], doc["resolution_weight"]), reverse=True)
+
+        if exact:
+            exact.update({"relevance_score": 1.0, "match": "exact",
+                          "resolution_weight": self._resolution_weight(exact, now)})
+            candidates.insert(0, exact)
+        return candidates[:limit]
+
+    async def _rerank(self, error_pattern: str, candidates: List[Dict]):
+        try:
+            vectors = await self.embed_many([error_pattern] + [doc["error_pattern"] for doc in candidates])
+        except Exception as e:
+            logger.warning(f"Embedding re-rank skipped: {str(e)}")
+            return
+        query = vectors[0]
+        for candidate, vector in zip(candidates, vectors[1:]):
+            similarity = max(_cosine(query, vector), 0.0)
+            candidate["relevance_score"] = ((1 - self.embedding_weight) * candidate["relevance_score"]
+                                            + self.embedding_weight * similarity)
+
+    def _resolution_weight(self, doc: Dict, now: datetime) -> float:
+        """times_resolved, halved for every half_life_days since the last resolution"""
+        last = doc.get("last_resolved") or doc.get("last_encountered") or doc.get("created_at")
+        try:
+            age_days = max((now - datetime.fromisoformat(last)).total_seconds() / 86400, 0.0)
+        except (TypeError, ValueError):
+            age_days = 0.0
+        return round((doc.get("times_resolved") or 0) * 0.5 ** (age_days / self.half_life_days), 3)
+
+    async def backfill(self, batch_size: int = 500) -> int:
+        """Fingerprint and tokenize resolutions stored before the index existed"""
+        indexed = 0
+        expires_at = datetime.now(timezone.utc) + self.ttl
+        while True:
+            batch = await self.collection.find(
+                {"type": "error_resolution", "fingerprint": {"$exists": False}},
+                {"_id": 1, "agent_type": 1, "error_pattern": 1}
+            ).limit(batch_size).to_list(batch_size)
+            if not batch:
+                break
+            for doc in batch:
+                pattern = doc.get("error_pattern") or ""
+                tokens = error_tokens(pattern)
+                await self.collection.update_one(
+                    {"_id": doc["_id"]},
+                    {"$set": {"fingerprint": error_fingerprint(pattern), "tokens": tokens,
+                              "expires_at": expires_at}}
+                )
+                await self._count_tokens(doc.get("agent_type"), tokens)
+            indexed += len(batch)
+        if indexed:
+            logger.info(f"Indexed {indexed} stored error resolutions")
+        return indexed
@@ -0,0 +1,146 @@
+"""
+Recent Conversation History Window
+Loads the last N messages of a conversation and keeps them in a per-conversation ring buffer
+"""
+
+import logging
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHAT_ROLES = ["user", "assistant"]
+
+
+class _Window:
+    __slots__ = ("messages", "total")
+
+    def __init__(self, messages: List[Dict], total: int, size: int):
+        self.messages = deque(messages, maxlen=size)
+        # All user/assistant messages in the conversation, not just those in the window
+        self.total = total
+
+
+class HistoryWindow:
+    """Per-conversation ring buffer of the most recent chat messages
+
+    A cold load reads the newest `size` messages through the
+    (conversation_id, timestamp) index in descending order, with only the
+    fields the chat path needs, and reverses them in memory. After that the
+    chat path appends each new user and assistant message, so a warm turn
+    reads nothing from MongoDB.
+
+    Each server process holds its own cache; deleting a conversation must
+    call invalidate().
+    """
+
+    def __init__(self, db, size: int = 50, max_conversations: int = 1000):
+        """
+        Args:
+            db: MongoDB database instance
+            size: Messages kept per conversation
+            max_conversations: Conversations cached before the least recently used is dropped
+        """
+        self.db = db
+        self.size = size
+        self.max_conversations = max_conversations
+        self._windows: "OrderedDict[str, _Window]" = OrderedDict()
+        # Loads in flight per conversation; a write while one is running marks
+        # it stale so its possibly outdated result is not cached
+        self._loading: Dict[str, List[Dict]] = {}
+        self.stats = {"hits": 0, "loads": 0}
+
+    async def ensure_indexes(self):
+        await self.db.chat_messages.create_index([("conversation_id", 1), ("timestamp", 1)])
+
+    async def load(self, conversation_id: str) -> Tuple[List[Dict], int]:
+        """
+        Most recent messages of a conversation, oldest first
+
+        Returns:
+            Up to `size` messages with role, content and timestamp, and the
+            number of user/assistant messages in the whole conversation
+        """
+        window = await self._window(conversation_id)
+        return list(window.messages), window.total
+
+    async def _window(self, conversation_id: str) -> _Window:
+        window = self._windows.get(conversation_id)
+        if window is not None:
+            self._windows.move_to_end(conversation_id)
+            self.stats["hits"] += 1
+            return window
+
+        load = {"stale": False}
+        self._loading.setdefault(conversation_id, []).append(load)
+        try:
+            query = {"conversation_id": conversation_id, "role": {"$in": CHAT_ROLES}}
+            newest = await self.db.chat_messages.find(
+                query,
+                {"_id": 0, "role": 1, "content": 1, "timestamp": 1}
+            ).sort("timestamp", -1).limit(self.size).to_list(self.size)
+            newest.reverse()
+            total = len(newest)
+            if total == self.size:
+                total = await self.db.chat_messages.count_documents(query)
+            self.stats["loads"] += 1
+        finally:
+            loads = self._loading[conversation_id]
+            loads.remove(load)
+            if not loads:
+                del self._loading[conversation_id]
+
+        window = _Window(newest, total, self.size)
+        if not load["stale"]:
+            self._windows[conversation_id] = window
+            while len(self._windows) > self.max_conversations:
+                self._windows.popitem(last=False)
+        return window
+
+    def append(self, conversation_id: str, message: Dict):
+        """
+        Add a message that has just been written to chat_messages
+
+        Conversations that are not cached are left alone; their next load
+        reads the message from MongoDB.
+        """
+        self._mark_stale(conversation_id)
+        window = self._windows.get(conversation_id)
+        if window is not None and message.get("role") in CHAT_ROLES:
+            window.messages.append({
+                "role": message["role"],
+                "content": message["content"],
+                "timestamp": message.get("timestamp")
+            })
+            window.total += 1
+
+    def invalidate(self, conversation_id: str):
+        self._mark_stale(conversation_id)
+        self._windows.pop(conversation_id, None)
+
+    def _mark_stale(self, conversation_id: str):
+        for load in self._loading.get(conversation_id, ()):
+            load["stale"] = True
+
+    def snapshot(self) -> Dict:
+        return {**self.stats, "conversations": len(self._windows)}
+
+
+def recent_messages_after_watermark(messages: List[Dict], total: int, watermark: Optional[int],
+                                    minimum: int = 6) -> List[Dict]:
+    """
+    The tail of a history window that a summary does not cover yet
+
+    Capped at the window: while the summary lags further behind than the
+    window reaches, the messages in between wait for the summary to catch up
+    rather than growing the prompt without bound.
+
+    Args:
+        messages: History window, oldest first
+        total: Messages in the whole conversation
+        watermark: The conversation's messages_summarized
+        minimum: Messages to keep even if the summary already covers them
+    """
+    unsummarized = max(total - (watermark or 0), 0)
+    keep = min(max(unsummarized, minimum), len(messages))
+    return messages[len(messages) - keep:]
@@ -0,0 +1,407 @@
+"""
+LLM Provider Clients
+Shared per-provider clients with concurrency limits, timeouts and streaming statistics
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCAL_ENDPOINT = "http://localhost:8080"
+
+
+class LLMProviderError(Exception):
+    """The provider could not be called or returned an error"""
+
+
+class LLMTimeoutError(LLMProviderError):
+    """No first token, or no complete answer, within the configured time"""
+
+
+def provider_kind(provider: Dict) -> str:
+    name = provider["name"].lower()
+    if name == "openai":
+        return "openai"
+    if name in ("claude", "anthropic"):
+        return "anthropic"
+    if name in ("google", "gemini"):
+        return "gemini"
+    if name == "local":
+        return "local"
+    raise LLMProviderError(f"Unknown provider: {name}")
+
+
+def credentials_hash(provider: Dict) -> str:
+    """Hash of everything a client is built from; a changed key or endpoint gets a new client"""
+    material = "\0".join(str(provider.get(field) or "") for field in ("name", "api_key", "endpoint"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def transcript_prompt(messages: List[Dict], system_message: str, role_names: Optional[Dict[str, str]] = None) -> str:
+    """Single prompt string for completion-style models"""
+    parts = [system_message + "\n\n"]
+    for msg in messages:
+        role = (role_names or {}).get(msg["role"]) or msg["role"].capitalize()
+        parts.append(f"{role}: {msg['content']}\n")
+    parts.append("Assistant: ")
+    return "".join(parts)
+
+
+class _Client:
+    __slots__ = ("provider_id", "kind", "credentials", "client", "semaphore", "active", "retired")
+
+    def __init__(self, provider_id: str, kind: str, credentials: str, client: Any, concurrency: int):
+        self.provider_id = provider_id
+        self.kind = kind
+        self.credentials = credentials
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.active = 0
+        # Replaced after a credentials change; closed once its last request finishes
+        self.retired = False
+
+
+class _ProviderStats:
+    __slots__ = ("name", "counts", "ttft", "tokens_per_second")
+
+    def __init__(self, name: str, window: int):
+        self.name = name
+        self.counts = {"requests": 0, "completed": 0, "failures": 0, "timeouts": 0,
+                       "cancelled": 0, "in_flight": 0, "tokens": 0}
+        self.ttft: Deque[float] = deque(maxlen=window)
+        self.tokens_per_second: Deque[float] = deque(maxlen=window)
+
+
+def _percentile(samples: List[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class ProviderClients:
+    """Registry of LLM clients shared for the lifetime of the app
+
+    One client per provider ID and credentials hash, reused by every request
+    instead of being built per call. Each provider has a semaphore limiting
+    its concurrent requests. Every call streams: complete() joins the
+    streamed chunks, so time-to-first-token and generation speed are recorded
+    for all providers. The synchronous Gemini SDK runs on a thread pool.
+
+    A request fails with LLMTimeoutError when no token arrives within
+    `first_token_timeout` or the whole answer takes longer than
+    `request_timeout`. When the consumer stops iterating (e.g. StreamingResponse
+    cancels the generator on client disconnect) the upstream stream is closed
+    and the provider's slot released.
+    """
+
+    def __init__(self, max_concurrency: int = 4, request_timeout: float = 300.0,
+                 first_token_timeout: float = 60.0, gemini_workers: int = 4, stats_window: int = 256):
+        """
+        Args:
+            max_concurrency: Concurrent requests per provider, unless the provider sets max_concurrency
+            request_timeout: Seconds allowed for a whole answer
+            first_token_timeout: Seconds allowed until the first token
+            gemini_workers: Threads running synchronous Gemini calls
+            stats_window: Recent requests per provider kept for latency statistics
+        """
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        self.first_token_timeout = first_token_timeout
+        self.stats_window = stats_window
+        self._clients: Dict[str, _Client] = {}
+        self._stats: Dict[str, _ProviderStats] = {}
+        self._gemini_pool = ThreadPoolExecutor(max_workers=gemini_workers, thread_name_prefix="gemini")
+        # genai.configure() is process-wide: with more than one Gemini key in
+        # use, configuring and calling must not interleave between threads
+        self._gemini_lock = threading.Lock()
+        self._gemini_configure_lock = threading.Lock()
+        # Gemini clients not yet closed -> their API key; a rotated key stops
+        # counting once the last request on it finishes
+        self._gemini_keys: Dict[_Client, str] = {}
+        self._gemini_configured: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, environ: Dict[str, str]) -> "ProviderClients":
+        return cls(
+            max_concurrency=int(environ.get("LLM_MAX_CONCURRENCY", 4)),
+            request_timeout=float(environ.get("LLM_REQUEST_TIMEOUT", 300)),
+            first_token_timeout=float(environ.get("LLM_FIRST_TOKEN_TIMEOUT", 60)),
+        )
+
+    def _client(self, provider: Dict) -> _Client:
+        provider_id = provider.get("id") or provider["name"]
+        credentials = credentials_hash(provider)
+        current = self._clients.get(provider_id)
+        if current is not None and current.credentials == credentials:
+            return current
+
+        kind = provider_kind(provider)
+        entry = _Client(provider_id, kind, credentials, self._build(kind, provider),
+                        provider.get("max_concurrency") or self.max_concurrency)
+        if kind == "gemini":
+            self._gemini_keys[entry] = provider["api_key"]
+        self._clients[provider_id] = entry
+        if current is not None:
+            self._retire(current)
+        return entry
+
+    def _build(self, kind: str, provider: Dict) -> Any:
+        # SDKs are imported on first use, so only the ones in use need to load
+        if kind == "openai":
+            import openai
+            return openai.AsyncOpenAI(api_key=provider["api_key"], timeout=self.request_timeout)
+        if kind == "anthropic":
+            import anthropic
+            return anthropic.AsyncAnthropic(api_key=provider["api_key"], timeout=self.request_timeout)
+        if kind == "gemini":
+            return None
+        import aiohttp
+        concurrency = provider.get("max_concurrency") or self.max_concurrency
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=concurrency),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=10)
+        )
+
+    def _retire(self, entry: _Client):
+        entry.retired = True
+        if entry.active == 0:
+            asyncio.get_running_loop().create_task(self._close(entry))
+
+    async def _close(self, entry: _Client):
+        self._gemini_keys.pop(entry, None)
+        try:
+            if entry.client is not None:
+                await entry.client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close {entry.kind} client for {entry.provider_id}: {str(e)}")
+
+    def forget(self, provider_id: str):
+        """Drop the client of a deleted provider"""
+        entry = self._clients.pop(provider_id, None)
+        if entry is not None:
+            self._retire(entry)
+        self._stats.pop(provider_id, None)
+
+    async def complete(self, provider: Dict, messages: List[Dict], system_message: str) -> str:
+        return "".join([chunk async for chunk in self.stream(provider, messages, system_message)])
+
+    async def stream(self, provider: Dict, messages: List[Dict], system_message: str) -> AsyncIterator[str]:
+        """
+        Stream an answer as text chunks
+
+        Raises:
+            LLMProviderError: Unknown provider or provider error
+            LLMTimeoutError: First token or whole answer took too long
+        """
+        entry = self._client(provider)
+        stats = self._stats.get(entry.provider_id)
+        if stats is None:
+            stats = self._stats[entry.provider_id] = _ProviderStats(provider["name"], self.stats_window)
+
+        # Both timeouts run from the call, so time spent queued for a slot counts
+        loop = asyncio.get_running_loop()
+        called = loop.time()
+        try:
+            async with asyncio.timeout_at(called + min(self.first_token_timeout, self.request_timeout)):
+                await entry.semaphore.acquire()
+        except TimeoutError:
+            stats.counts["requests"] += 1
+            stats.counts["timeouts"] += 1
+            raise LLMTimeoutError(f"{provider['name']} timed out waiting for a free request slot") from None
+
+        try:
+            entry.active += 1
+            stats.counts["requests"] += 1
+            stats.counts["in_flight"] += 1
+            usage: Dict[str, int] = {}
+            chunks = self._chunks(entry, provider, messages, system_message, usage)
+            started = loop.time()
+            first_token = None
+            count = 0
+            outcome = "failures"
+            try:
+                while True:
+                    deadline = called + self.request_timeout
+                    if first_token is None:
+                        deadline = min(deadline, called + self.first_token_timeout)
+                    try:
+                        async with asyncio.timeout_at(deadline):
+                            chunk = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    except TimeoutError:
+                        outcome = "timeouts"
+                        waited = "first token" if first_token is None else "answer"
+                        raise LLMTimeoutError(f"{provider['name']} timed out waiting for the {waited}")
+                    if not chunk:
+                        continue
+                    if first_token is None:
+                        first_token = loop.time()
+                    count += 1
+                    yield chunk
+                outcome = "completed"
+            except (asyncio.CancelledError, GeneratorExit):
+                outcome = "cancelled"
+                raise
+            finally:
+                await chunks.aclose()
+                finished = loop.time()
+                stats.counts[outcome] += 1
+                stats.counts["in_flight"] -= 1
+                tokens = usage.get("completion_tokens") or count
+                stats.counts["tokens"] += tokens
+                if first_token is not None:
+                    stats.ttft.append(first_token - started)
+                    if outcome == "completed" and tokens > 1 and finished > first_token:
+                        stats.tokens_per_second.append((tokens - 1) / (finished - first_token))
+                entry.active -= 1
+                if entry.retired and entry.active == 0:
+                    loop.create_task(self._close(entry))
+        finally:
+            entry.semaphore.release()
+
+    def _chunks(self, entry: _Client, provider: Dict, messages: List[Dict], system_message: str,
+                usage: Dict[str, int]) -> AsyncIterator[str]:
+        if entry.kind == "openai":
+            return self._openai_chunks(entry.client, provider, messages, system_message, usage)
+        if entry.kind == "anthropic":
+            return self._anthropic_chunks(entry.client, provider, messages, system_message, usage)
+        if entry.kind == "gemini":
+            return self._gemini_chunks(provider, messages, system_message)
+        return self._local_chunks(entry.client, provider, messages, system_message, usage)
+
+    async def _openai_chunks(self, client, provider, messages, system_message, usage):
+        stream = await client.chat.completions.create(
+            model=provider["model"],
+            messages=[{"role": "system", "content": system_message}] + messages,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        try:
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    usage["completion_tokens"] = chunk.usage.completion_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+    async def _anthropic_chunks(self, client, provider, messages, system_message, usage):
+        async with client.messages.stream(
+            model=provider["model"],
+            max_tokens=4096,
+            system=system_message,
+            messages=messages
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+            final = await stream.get_final_message()
+            usage["completion_tokens"] = final.usage.output_tokens
+
+    async def _local_chunks(self, session, provider, messages, system_message, usage):
+        """llama.cpp server /completion, streamed as SSE `data:` lines or bare JSON lines"""
+        endpoint = (provider.get("endpoint") or DEFAULT_LOCAL_ENDPOINT).rstrip("/")
+        payload = {
+            "prompt": transcript_prompt(messages, system_message),
+            "n_predict": 2048,
+            "temperature": 0.7,
+            "stop": ["User:", "\nUser"],
+            "stream": True
+        }
+        async with session.post(f"{endpoint}/completion", json=payload) as resp:
+            if resp.status != 200:
+                raise LLMProviderError(f"Local model error: HTTP {resp.status}")
+            async for line in resp.content:
+                line = line.strip()
+                if line.startswith(b"data:"):
+                    line = line[5:].strip()
+                if not line:
+                    continue
+                try:
+                    data = json.loads(line.decode("utf-8"))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if data.get("content"):
+                    yield data["content"]
+                if data.get("stop"):
+                    if data.get("tokens_predicted"):
+                        usage["completion_tokens"] = data["tokens_predicted"]
+                    break
+
+    async def _gemini_chunks(self, provider, messages, system_message):
+        """Run the synchronous Gemini stream on the thread pool and hand chunks back to the loop"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+        prompt = transcript_prompt(messages, system_message, {"user": "User", "assistant": "Assistant"})
+        # With a single key in use, configure once and let calls run in parallel
+        serialize = len(set(self._gemini_keys.values())) > 1
+
+        def put(item):
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        def run():
+            import google.generativeai as genai
+            key = provider["api_key"]
+            try:
+                with self._gemini_lock if serialize else nullcontext():
+                    with self._gemini_configure_lock:
+                        if self._gemini_configured != key:
+                            genai.configure(api_key=key)
+                            self._gemini_configured = key
+                    response = genai.GenerativeModel(provider["model"]).generate_content(prompt, stream=True)
+                    for part in response:
+                        if stop.is_set():
+                            break
+                        text = getattr(part, "text", "")
+                        if text:
+                            put(text)
+                put(done)
+            except Exception as e:
+                put(e)
+
+        future = loop.run_in_executor(self._gemini_pool, run)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise LLMProviderError(str(item)) from item
+                yield item
+        finally:
+            # A call still running on the pool stops at its next chunk
+            stop.set()
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def snapshot(self) -> Dict[str, Dict]:
+        result = {}
+        for provider_id, stats in self._stats.items():
+            ttft = list(stats.ttft)
+            speeds = list(stats.tokens_per_second)
+            p50 = _percentile(ttft, 0.5)
+            p95 = _percentile(ttft, 0.95)
+            result[provider_id] = {
+                "name": stats.name,
+                **stats.counts,
+                "ttft_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "ttft_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "tokens_per_second": round(sum(speeds) / len(speeds), 1) if speeds else None,
+            }
+        return result
+
+    async def aclose(self):
+        entries = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(*(self._close(entry) for entry in entries))
+        self._gemini_pool.shutdown(wait=False, cancel_futures=True)
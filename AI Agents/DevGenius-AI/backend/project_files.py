@@ -0,0 +1,255 @@
+"""
+Code Project File Storage
+One document per project file, with a manifest of paths, sizes and hashes on the project
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import posixpath
+import tarfile
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Concurrent writes when storing many files at once
+WRITE_CONCURRENCY = 32
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def manifest_key(path: str) -> str:
+    """Manifest field name for a path; paths contain dots, which MongoDB reads as nesting"""
+    return hashlib.sha1(path.encode("utf-8")).hexdigest()
+
+
+def manifest_entries(project: Dict) -> List[Dict]:
+    """The project's manifest as a list of {path, size, hash}, sorted by path"""
+    return sorted((project.get("manifest") or {}).values(), key=lambda entry: entry["path"])
+
+
+def normalize_path(path: str) -> Optional[str]:
+    """A relative POSIX path inside the project, or None for paths that escape it"""
+    path = posixpath.normpath(path.replace("\\", "/").lstrip("/"))
+    if path in ("", ".") or path == ".." or path.startswith("../"):
+        return None
+    return path
+
+
+class _TarSink:
+    """Write-only file object that hands tarfile's output back in chunks"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _read_members(archive: tarfile.TarFile, count: int, max_file_bytes: int) -> Tuple[List[Tuple[str, str]], List[str], bool]:
+    """Up to `count` text files from an open archive, the names skipped, and whether it is exhausted"""
+    files, skipped = [], []
+    while len(files) < count:
+        member = archive.next()
+        if member is None:
+            return files, skipped, True
+        if not member.isfile():
+            continue
+        path = normalize_path(member.name)
+        if path is None or member.size > max_file_bytes:
+            skipped.append(member.name)
+            continue
+        try:
+            files.append((path, archive.extractfile(member).read().decode("utf-8")))
+        except UnicodeDecodeError:
+            skipped.append(member.name)
+    return files, skipped, False
+
+
+class ProjectFiles:
+    """File contents of code projects, stored per (project_id, path)
+
+    Saving or deleting a file writes only that file's document and one
+    manifest entry on the project, instead of rewriting every file in the
+    project document. The manifest maps each path to its size and content
+    hash, so listings never read file contents.
+    """
+
+    def __init__(self, db, max_file_bytes: int = 8 * 1024 * 1024):
+        """
+        Args:
+            db: MongoDB database instance
+            max_file_bytes: Largest file accepted from an imported archive
+        """
+        self.db = db
+        self.files = db.code_project_files
+        self.projects = db.code_projects
+        self.max_file_bytes = max_file_bytes
+
+    async def ensure_indexes(self):
+        await self.files.create_index([("project_id", 1), ("path", 1)], unique=True)
+
+    async def put(self, project_id: str, path: str, content: str) -> Optional[Dict]:
+        """
+        Create or replace one file
+
+        Returns:
+            The manifest entry, or None if the project does not exist
+        """
+        entries = await self.put_many(project_id, {path: content})
+        return entries[0] if entries else None
+
+    async def put_many(self, project_id: str, files: Dict[str, str]) -> List[Dict]:
+        """
+        Create or replace several files, with one manifest update for all of them
+
+        Returns:
+            The manifest entries written, or [] if the project does not exist
+        """
+        if not files:
+            return []
+        now = datetime.now(timezone.utc).isoformat()
+        entries = [{"path": path, "size": len(content.encode("utf-8")), "hash": content_hash(content)}
+                   for path, content in files.items()]
+        semaphore = asyncio.Semaphore(WRITE_CONCURRENCY)
+
+        async def write(entry: Dict):
+            async with semaphore:
+                await self.files.update_one(
+                    {"project_id": project_id, "path": entry["path"]},
+                    {"$set": {"content": files[entry["path"]], "size": entry["size"],
+                              "hash": entry["hash"], "updated_at": now}},
+                    upsert=True
+                )
+
+        await asyncio.gather(*(write(entry) for entry in entries))
+        result = await self.projects.update_one(
+            {"id": project_id},
+            {"$set": {"updated_at": now,
+                      **{f"manifest.{manifest_key(entry['path'])}": entry for entry in entries}}}
+        )
+        if result.matched_count == 0:
+            # The project was deleted (or never existed): do not leave its files behind
+            await self.files.delete_many({"project_id": project_id})
+            return []
+        return entries
+
+    async def get(self, project_id: str, path: str) -> Optional[str]:
+        doc = await self.files.find_one({"project_id": project_id, "path": path}, {"_id": 0, "content": 1})
+        return doc["content"] if doc else None
+
+    async def delete(self, project_id: str, path: str) -> bool:
+        result = await self.files.delete_one({"project_id": project_id, "path": path})
+        if result.deleted_count == 0:
+            return False
+        await self.projects.update_one(
+            {"id": project_id},
+            {"$unset": {f"manifest.{manifest_key(path)}": ""},
+             "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}}
+        )
+        return True
+
+    async def replace_all(self, project_id: str, files: Dict[str, str]):
+        """Make `files` the project's complete set of files"""
+        project = await self.projects.find_one({"id": project_id}, {"_id": 0, "manifest": 1})
+        if project is None:
+            return
+        stale = [entry["path"] for entry in manifest_entries(project) if entry["path"] not in files]
+        await self.put_many(project_id, files)
+        if stale:
+            await self.files.delete_many({"project_id": project_id, "path": {"$in": stale}})
+            await self.projects.update_one(
+                {"id": project_id},
+                {"$unset": {f"manifest.{manifest_key(path)}": "" for path in stale}}
+            )
+
+    async def read_all(self, project_id: str) -> Dict[str, str]:
+        files = {}
+        async for doc in self.files.find({"project_id": project_id}, {"_id": 0, "path": 1, "content": 1}):
+            files[doc["path"]] = doc["content"]
+        return files
+
+    async def delete_project(self, project_id: str):
+        await self.files.delete_many({"project_id": project_id})
+
+    async def export_tar(self, project_id: str) -> AsyncIterator[bytes]:
+        """Stream the project's files as an uncompressed tar archive, one file at a time"""
+        sink = _TarSink()
+        archive = tarfile.open(fileobj=sink, mode="w|", format=tarfile.PAX_FORMAT)
+        mtime = int(time.time())
+        cursor = self.files.find({"project_id": project_id}, {"_id": 0, "path": 1, "content": 1}).sort("path", 1)
+        async for doc in cursor:
+            data = doc["content"].encode("utf-8")
+            info = tarfile.TarInfo(doc["path"])
+            info.size = len(data)
+            info.mtime = mtime
+            info.mode = 0o644
+            archive.addfile(info, io.BytesIO(data))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        archive.close()
+        yield sink.drain()
+
+    async def import_tar(self, project_id: str, fileobj, replace: bool = False,
+                         batch_size: int = 200) -> Dict:
+        """
+        Store the text files of a tar archive (optionally compressed)
+
+        Args:
+            project_id: Project to import into
+            fileobj: Seekable binary file holding the archive
+            replace: Delete project files that are not in the archive
+            batch_size: Files read and written per batch
+
+        Returns:
+            Counts of imported files and the archive members that were skipped
+            (unsafe paths, binary or oversized files)
+        """
+        archive = await asyncio.to_thread(tarfile.open, fileobj=fileobj, mode="r:*")
+        imported: List[str] = []
+        skipped: List[str] = []
+        try:
+            done = False
+            while not done:
+                files, batch_skipped, done = await asyncio.to_thread(
+                    _read_members, archive, batch_size, self.max_file_bytes
+                )
+                skipped.extend(batch_skipped)
+                if files and not await self.put_many(project_id, dict(files)):
+                    raise LookupError(project_id)
+                imported.extend(path for path, _ in files)
+        finally:
+            archive.close()
+
+        if replace:
+            project = await self.projects.find_one({"id": project_id}, {"_id": 0, "manifest": 1}) or {}
+            kept = set(imported)
+            stale = [entry["path"] for entry in manifest_entries(project) if entry["path"] not in kept]
+            for path in stale:
+                await self.delete(project_id, path)
+        return {"imported": len(imported), "skipped": skipped}
+
+    async def migrate(self) -> int:
+        """Move files embedded in project documents into the files collection"""
+        migrated = 0
+        async for project in self.projects.find({"files": {"$exists": True}}, {"_id": 0, "id": 1, "files": 1}):
+            files = project.get("files") or {}
+            if files:
+                await self.put_many(project["id"], files)
+            await self.projects.update_one({"id": project["id"]}, {"$unset": {"files": ""}})
+            migrated += 1
+        if migrated:
+            logger.info(f"Moved the files of {migrated} code projects to code_project_files")
+        return migrated
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Body
+from fastapi import FastAPI, APIRouter, HTTPException, Body, Request
 from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -13,13 +13,15 @@ from datetime import datetime, timezone
 import json
 import asyncio
 import subprocess
+import tarfile
 import tempfile
-import openai
-import anthropic
-import google.generativeai as genai
 from system_prompts import SYSTEM_MESSAGES
 from embedding_service import get_embedding_service
 from agent_memory import get_agent_memory
+from summary_worker import SummaryWorker
+from history_window import HistoryWindow, recent_messages_after_watermark
+from project_files import ProjectFiles, manifest_entries
+from llm_clients import ProviderClients, LLMTimeoutError
 
 
 ROOT_DIR = Path(__file__).parent
@@ -30,6 +32,15 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Recent messages per conversation, kept in memory and appended to by /chat
+history_window = HistoryWindow(db, size=int(os.environ.get('HISTORY_WINDOW_SIZE', 50)))
+
+# Code project file contents, one document per (project_id, path)
+project_files = ProjectFiles(db)
+
+# LLM clients shared across requests, one per provider and credentials
+llm_clients = ProviderClients.from_env(os.environ)
+
 # Initialize services
 embedding_service = None
 agent_memory = None
@@ -41,10 +52,16 @@ app = FastAPI()
 async def startup_event():
     """Initialize services on startup"""
     global embedding_service, agent_memory
+    await history_window.ensure_indexes()
+    await project_files.ensure_indexes()
+    await project_files.migrate()
+    summary_worker.start()
     try:
         logging.info("Initializing AI services...")
         embedding_service = get_embedding_service()
-        agent_memory = await get_agent_memory(db)
+        agent_memory = await get_agent_memory(
+            db, embed_many=embedding_service.executor.embed_many if embedding_service else None
+        )
         logging.info("AI services initialized successfully")
     except Exception as e:
         logging.error(f"Failed to initialize AI services: {str(e)}")
@@ -66,6 +83,8 @@ class LLMProvider(BaseModel):
     api_key: str
     endpoint: Optional[str] = None
     is_active: bool = True
+    # Concurrent requests sent to this provider; LLM_MAX_CONCURRENCY if unset
+    max_concurrency: Optional[int] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class LLMProviderCreate(BaseModel):
@@ -74,6 +93,7 @@ class LLMProviderCreate(BaseModel):
     api_key: str
     endpoint: Optional[str] = None
     is_active: bool = True
+    max_concurrency: Optional[int] = None
 
 class ChatMessage(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -173,6 +193,8 @@ class CodeProject(BaseModel):
     language: str
     framework: Optional[str] = None
     files: Dict[str, str] = {}
+    # {path, size, hash} of every file; contents live in code_project_files
+    manifest: List[Dict[str, Any]] = []
     file_tree: Optional[Dict] = {}
     active_files: List[str] = []
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -469,71 +491,90 @@ async def summarize_conversation(provider: dict, messages: list) -> str:
     return summary
 
 
-# Helper function to call LLMs
-async def call_llm(provider: dict, messages: list, system_message: str) -> str:
-    provider_name = provider['name'].lower()
-    
-    try:
-        if provider_name == "openai":
-            client_obj = openai.AsyncOpenAI(api_key=provider['api_key'])
-            response = await client_obj.chat.completions.create(
-                model=provider['model'],
-                messages=[{"role": "system", "content": system_message}] + messages,
-                stream=False
-            )
-            return response.choices[0].message.content
+def extract_learnings(messages: list) -> list:
+    """
+    Find assistant messages describing an error that a later message reports as fixed
+    """
+    learnings = []
+    for i, msg in enumerate(messages):
+        content_lower = msg['content'].lower()
         
-        elif provider_name in ["claude", "anthropic"]:
-            client_obj = anthropic.AsyncAnthropic(api_key=provider['api_key'])
-            response = await client_obj.messages.create(
-                model=provider['model'],
-                max_tokens=4096,
-                system=system_message,
-                messages=messages
+        # Detect error patterns
+        if msg['role'] == 'assistant' and any(
+            keyword in content_lower 
+            for keyword in ['error', 'issue', 'problem', 'bug', 'fail']
+        ):
+            # Check if next few messages contain resolution
+            resolution_found = any(
+                keyword in messages[j]['content'].lower()
+                for j in range(i+1, min(i+4, len(messages)))
+                for keyword in ['fix', 'solved', 'resolved', 'working']
             )
-            return response.content[0].text
-        
-        elif provider_name in ["google", "gemini"]:
-            genai.configure(api_key=provider['api_key'])
-            model = genai.GenerativeModel(provider['model'])
-            
-            prompt_parts = [system_message + "\\n\\n"]
-            for msg in messages:
-                role = "User" if msg["role"] == "user" else "Assistant"
-                prompt_parts.append(f"{role}: {msg['content']}\\n")
-            prompt_parts.append("Assistant: ")
-            
-            response = model.generate_content("".join(prompt_parts))
-            return response.text
-        
-        elif provider_name == "local":
-            import aiohttp
-            endpoint = provider.get('endpoint', 'http://localhost:8080')
+            if resolution_found:
+                learnings.append({
+                    'error': msg['content'][:200],
+                    'resolved': True
+                })
+    return learnings
+
+
+async def summarize_in_background(conversation: dict, provider: dict, messages: list, existing_summary: Optional[str]):
+    """
+    Summarization pass run by summary_worker: fold new messages into the
+    existing summary and record any error resolutions they contain
+    """
+    summary, metadata = await summarize_conversation_progressive(
+        provider=provider,
+        messages=messages,
+        existing_summary=existing_summary,
+        embedding_svc=embedding_service,
+        max_context_tokens=4000
+    )
+    logging.info(f"Summarization metadata: {metadata}")
+    
+    if agent_memory:
+        try:
+            learnings = extract_learnings(messages[-15:])
+            for learning in learnings[:3]:  # Top 3 learnings
+                try:
+                    await agent_memory.store_error_resolution(
+                        agent_type=conversation['agent_type'],
+                        error_pattern=learning['error'][:100],
+                        resolution="Resolved in conversation",
+                        conversation_id=conversation['id'],
+                        success=learning['resolved']
+                    )
+                except Exception as le:
+                    logging.error(f"Failed to store learning: {str(le)}")
             
-            async with aiohttp.ClientSession() as session:
-                prompt_parts = [system_message + "\\n\\n"]
-                for msg in messages:
-                    role = msg["role"].capitalize()
-                    prompt_parts.append(f"{role}: {msg['content']}\\n")
-                prompt_parts.append("Assistant: ")
-                
-                payload = {
-                    "prompt": "".join(prompt_parts),
-                    "n_predict": 2048,
-                    "temperature": 0.7,
-                    "stop": ["User:", "\\nUser"]
-                }
-                
-                async with session.post(f"{endpoint}/completion", json=payload) as resp:
-                    if resp.status == 200:
-                        result = await resp.json()
-                        return result.get('content', '')
-                    else:
-                        raise HTTPException(status_code=500, detail="Local model error")
-        
-        else:
-            raise HTTPException(status_code=400, detail=f"Unknown provider: {provider_name}")
+            if learnings:
+                summary += "\n\n💡 LEARNINGS:\n" + "\n".join([
+                    f"- Resolved: {learning['error'][:150]}..."
+                    for learning in learnings[:2]
+                ])
+        except Exception as e:
+            logging.error(f"Failed to extract learnings: {str(e)}")
     
+    return summary, metadata
+
+
+# Conversation summaries are built in the background; chat turns use the last committed one
+summary_worker = SummaryWorker(
+    db,
+    summarize_in_background,
+    debounce_seconds=float(os.environ.get('SUMMARY_DEBOUNCE_SECONDS', 2)),
+    min_new_messages=int(os.environ.get('SUMMARY_MIN_NEW_MESSAGES', 10)),
+    keep_recent=6
+)
+
+
+# Helper function to call LLMs
+async def call_llm(provider: dict, messages: list, system_message: str) -> str:
+    try:
+        return await llm_clients.complete(provider, messages, system_message)
+    except LLMTimeoutError as e:
+        logging.error(f"LLM call timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logging.error(f"LLM call error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -541,72 +582,12 @@ async def call_llm(provider: dict, messages: list, system_message: str) -> str:
 
 # Helper function for streaming
 async def call_llm_stream(provider: dict, messages: list, system_message: str):
-    provider_name = provider['name'].lower()
-    
     try:
-        if provider_name == "openai":
-            client_obj = openai.AsyncOpenAI(api_key=provider['api_key'])
-            stream = await client_obj.chat.completions.create(
-                model=provider['model'],
-                messages=[{"role": "system", "content": system_message}] + messages,
-                stream=True
-            )
-            
-            async for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
-        
-        elif provider_name in ["claude", "anthropic"]:
-            client_obj = anthropic.AsyncAnthropic(api_key=provider['api_key'])
-            
-            async with client_obj.messages.stream(
-                model=provider['model'],
-                max_tokens=4096,
-                system=system_message,
-                messages=messages
-            ) as stream:
-                async for text in stream.text_stream:
-                    yield text
-        
-        elif provider_name in ["google", "gemini"]:
-            response_text = await call_llm(provider, messages, system_message)
-            yield response_text
-        
-        elif provider_name == "local":
-            import aiohttp
-            endpoint = provider.get('endpoint', 'http://localhost:8080')
-            
-            prompt_parts = [system_message + "\\n\\n"]
-            for msg in messages:
-                role = msg["role"].capitalize()
-                prompt_parts.append(f"{role}: {msg['content']}\\n")
-            prompt_parts.append("Assistant: ")
-            
-            payload = {
-                "prompt": "".join(prompt_parts),
-                "n_predict": 2048,
-                "temperature": 0.7,
-                "stop": ["User:", "\\nUser"],
-                "stream": True
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(f"{endpoint}/completion", json=payload) as resp:
-                    if resp.status == 200:
-                        async for line in resp.content:
-                            if line:
-                                try:
-                                    data = json.loads(line.decode('utf-8').strip())
-                                    if 'content' in data:
-                                        yield data['content']
-                                except (json.JSONDecodeError, UnicodeDecodeError):
-                                    pass
-                    else:
-                        raise HTTPException(status_code=500, detail="Local model error")
-        
-        else:
-            raise HTTPException(status_code=400, detail=f"Unknown provider: {provider_name}")
-    
+        async for chunk in llm_clients.stream(provider, messages, system_message):
+            yield chunk
+    except LLMTimeoutError as e:
+        logging.error(f"LLM stream timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logging.error(f"LLM streaming error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -649,8 +630,14 @@ async def delete_provider(provider_id: str):
     result = await db.llm_providers.delete_one({"id": provider_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Provider not found")
+    llm_clients.forget(provider_id)
     return {"message": "Provider deleted"}
 
+@api_router.get("/provider-stats")
+async def get_provider_stats():
+    """Per-provider request counts, time to first token and tokens per second"""
+    return llm_clients.snapshot()
+
 
 # Conversation endpoints
 @api_router.post("/conversations", response_model=Conversation)
@@ -680,6 +667,8 @@ async def delete_conversation(conversation_id: str):
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     await db.chat_messages.delete_many({"conversation_id": conversation_id})
+    history_window.invalidate(conversation_id)
+    summary_worker.forget(conversation_id)
     return {"message": "Conversation deleted"}
 
 
@@ -694,43 +683,26 @@ async def summarize_conversation_endpoint(conversation_id: str):
     if not provider:
         raise HTTPException(status_code=404, detail="Provider not found")
     
-    # Get conversation history
-    history = await db.chat_messages.find(
-        {"conversation_id": conversation_id},
-        {"_id": 0}
-    ).sort("timestamp", 1).to_list(1000)
-    
-    messages = [{"role": msg["role"], "content": msg["content"]} 
-                for msg in history if msg["role"] in ["user", "assistant"]]
-    
-    if len(messages) < 3:
+    message_count = await db.chat_messages.count_documents(
+        {"conversation_id": conversation_id, "role": {"$in": ["user", "assistant"]}}
+    )
+    if message_count < 3:
         return {"message": "Conversation too short to summarize", "summary": None, "metadata": {}}
     
     try:
-        # Use enhanced progressive summarization
-        existing_summary = conversation.get('summary')
-        summary, metadata = await summarize_conversation_progressive(
-            provider=provider,
-            messages=messages,
-            existing_summary=existing_summary,
-            embedding_svc=embedding_service,
-            max_context_tokens=4000
-        )
-        
-        await db.conversations.update_one(
-            {"id": conversation_id},
-            {"$set": {
-                "summary": summary,
-                "summary_at": datetime.now(timezone.utc).isoformat(),
-                "messages_summarized": len(messages),
-                "summary_metadata": metadata
-            }}
-        )
+        # Fold in everything after the watermark, joining a background pass if one is running
+        result = await summary_worker.run(conversation_id, force=True)
+        if result is None:
+            return {
+                "message": "Summary is already up to date",
+                "summary": conversation.get('summary'),
+                "metadata": conversation.get('summary_metadata', {})
+            }
         
         return {
             "message": "Conversation summarized with enhanced intelligence", 
-            "summary": summary,
-            "metadata": metadata
+            "summary": result['summary'],
+            "metadata": result['metadata']
         }
     except Exception as e:
         logging.error(f"Manual summarization failed: {str(e)}")
@@ -767,27 +739,31 @@ async def chat(request: ChatRequest):
     user_doc = user_message.model_dump()
     user_doc['timestamp'] = user_doc['timestamp'].isoformat()
     await db.chat_messages.insert_one(user_doc)
+    history_window.append(conversation_id, user_doc)
     
-    history = await db.chat_messages.find(
-        {"conversation_id": conversation_id},
-        {"_id": 0}
-    ).sort("timestamp", 1).to_list(100)
-    
-    conversation_doc = await db.conversations.find_one({"id": conversation_id}, {"_id": 0})
+    # Last N messages (oldest first) and the summary covering everything before the watermark
+    history, total_messages = await history_window.load(conversation_id)
+    conversation_doc = await db.conversations.find_one(
+        {"id": conversation_id},
+        {"_id": 0, "summary": 1, "messages_summarized": 1}
+    ) or {}
     
-    messages = [{"role": msg["role"], "content": msg["content"]} 
-                for msg in history if msg["role"] in ["user", "assistant"]]
+    messages = [{"role": msg["role"], "content": msg["content"]} for msg in history]
     
     # Add project context if available
     project_context = ""
     if request.project_id:
-        project = await db.code_projects.find_one({"id": request.project_id}, {"_id": 0})
+        project = await db.code_projects.find_one(
+            {"id": request.project_id},
+            {"_id": 0, "name": 1, "language": 1, "framework": 1, "manifest": 1}
+        )
         if project:
-            files_list = list(project.get('files', {}).keys())[:10]
+            manifest = manifest_entries(project)
+            files_list = [entry['path'] for entry in manifest[:10]]
             project_context = f"""
 CURRENT PROJECT: {project['name']}
 Language: {project['language']}, Framework: {project.get('framework', 'None')}
-Files: {len(project.get('files', {}))} files - {', '.join(files_list)}
+Files: {len(manifest)} files - {', '.join(files_list)}
 You have full file access (read/create/modify/delete).
 """
     
@@ -795,11 +771,11 @@ You have full file access (read/create/modify/delete).
     messages_to_send = messages
     recent_message_content = request.message
     
-    # Store message embeddings if service is available
+    # Queue message embeddings if service is available; only retrieval below waits on the encoder
     if embedding_service:
         try:
             # Store user message for future semantic search
-            embedding_service.store_message(
+            await embedding_service.store_message(
                 conversation_id=conversation_id,
                 message_id=user_message.id,
                 role="user",
@@ -809,144 +785,33 @@ You have full file access (read/create/modify/delete).
         except Exception as e:
             logging.error(f"Failed to store message embedding: {str(e)}")
     
-    # ENHANCED INTELLIGENT SUMMARIZATION
-    # More aggressive: triggers after 10 messages (was 15) and updates more frequently
-    if len(messages) > 10:
-        existing_summary = conversation_doc.get('summary')
-        messages_since_last_summary = len(messages) - conversation_doc.get('messages_summarized', 0)
-        
-        # Trigger summarization if:
-        # 1. No summary exists yet, OR
-        # 2. More than 10 new messages since last summary, OR
-        # 3. More than 25 messages total (aggressive summarization for long conversations)
-        should_summarize = (
-            not existing_summary or 
-            messages_since_last_summary > 10 or
-            len(messages) > 25
-        )
-        
-        if should_summarize:
-            # Progressive summarization: update existing summary with new context
-            try:
-                # For progressive update, use existing summary + recent messages
-                # For new summary, use all messages except last 6 (keep for immediate context)
-                if existing_summary and messages_since_last_summary <= 15:
-                    # Progressive update: only summarize new messages
-                    messages_to_summarize = messages[conversation_doc.get('messages_summarized', 0):-6]
-                    logging.info(f"Progressive summary update: {len(messages_to_summarize)} new messages")
-                else:
-                    # Full re-summarization for very long conversations or first summary
-                    messages_to_summarize = messages[:-6]
-                    existing_summary = None  # Force new summary
-                    logging.info(f"Full summarization: {len(messages_to_summarize)} messages")
-                
-                # Use enhanced progressive summarization
-                summary, metadata = await summarize_conversation_progressive(
-                    provider=provider,
-                    messages=messages_to_summarize,
-                    existing_summary=existing_summary,
-                    embedding_svc=embedding_service,
-                    max_context_tokens=4000
-                )
-                
-                logging.info(f"Summarization metadata: {metadata}")
-                
-                # Get learnings from agent memory if available
-                learnings_text = ""
-                if agent_memory:
-                    try:
-                        # Extract learnings with improved intelligence
-                        learnings = []
-                        
-                        # Look for error resolutions in recent messages
-                        for i, msg in enumerate(messages[-15:]):
-                            content_lower = msg['content'].lower()
-                            
-                            # Detect error patterns
-                            if msg['role'] == 'assistant' and any(
-                                keyword in content_lower 
-                                for keyword in ['error', 'issue', 'problem', 'bug', 'fail']
-                            ):
-                                # Check if next few messages contain resolution
-                                resolution_found = False
-                                for j in range(i+1, min(i+4, len(messages[-15:]))):
-                                    if any(keyword in messages[-15:][j]['content'].lower() 
-                                           for keyword in ['fix', 'solved', 'resolved', 'working']):
-                                        resolution_found = True
-                                        break
-                                
-                                if resolution_found:
-                                    learnings.append({
-                                        'error': msg['content'][:200],
-                                        'resolved': True
-                                    })
-                        
-                        # Store learnings in agent memory
-                        if learnings:
-                            for learning in learnings[:3]:  # Top 3 learnings
-                                try:
-                                    await agent_memory.store_error_resolution(
-                                        agent_type=request.agent_type,
-                                        error_pattern=learning['error'][:100],
-                                        resolution="Resolved in conversation",
-                                        conversation_id=conversation_id,
-                                        success=learning['resolved']
-                                    )
-                                except Exception as le:
-                                    logging.error(f"Failed to store learning: {str(le)}")
-                            
-                            learnings_text = "\n\n💡 LEARNINGS:\n" + "\n".join([
-                                f"- Resolved: {learning['error'][:150]}..."
-                                for learning in learnings[:2]
-                            ])
-                    
-                    except Exception as e:
-                        logging.error(f"Failed to extract learnings: {str(e)}")
-                
-                # Update conversation with enhanced summary and metadata
-                await db.conversations.update_one(
-                    {"id": conversation_id},
-                    {"$set": {
-                        "summary": summary + learnings_text,
-                        "summary_at": datetime.now(timezone.utc).isoformat(),
-                        "messages_summarized": len(messages) - 6,  # Exclude recent messages
-                        "summary_metadata": metadata
-                    }}
-                )
-                
-                # Build context with summary + recent messages
-                summary_context = f"📝 CONVERSATION SUMMARY:\n{summary}{learnings_text}\n\n"
-                if project_context:
-                    summary_context = project_context + "\n\n" + summary_context
-                
-                # Use last 6 messages for immediate context (was 8, now more aggressive)
-                messages_to_send = messages[-6:]
-                if messages_to_send and messages_to_send[0]["role"] != "system":
-                    messages_to_send.insert(0, {"role": "system", "content": summary_context})
-                
-                logging.info(f"Using summary + {len(messages_to_send)-1} recent messages")
-                
-            except Exception as e:
-                logging.error(f"Enhanced summarization failed: {str(e)}")
-                # Fallback: More aggressive truncation - keep last 10 messages
-                messages_to_send = messages[-10:]
-                if project_context:
-                    messages_to_send.insert(0, {"role": "system", "content": project_context})
-        else:
-            # Use existing summary + recent messages
-            recent_messages = messages[-6:]  # More aggressive: 6 instead of 8
+    # Summaries are maintained by summary_worker in the background; the chat
+    # turn only uses the last committed one and never waits for a new one
+    summary_worker.notify(conversation_id)
+    if total_messages > 10:
+        if conversation_doc.get('summary'):
+            # Messages the summary does not cover yet, never fewer than 6 and never
+            # more than the history window, however far the summary lags behind
+            recent_messages = recent_messages_after_watermark(
+                messages, total_messages, conversation_doc.get('messages_summarized'), minimum=6
+            )
             summary_message = {
                 "role": "system",
                 "content": f"📝 CONVERSATION SUMMARY:\n{conversation_doc['summary']}\n\n{project_context if project_context else ''}"
             }
             messages_to_send = [summary_message] + recent_messages
             logging.info(f"Using existing summary + {len(recent_messages)} recent messages")
+        else:
+            # No summary committed yet: keep the last 10 messages
+            messages_to_send = messages[-10:]
+            if project_context:
+                messages_to_send.insert(0, {"role": "system", "content": project_context})
     
     # Use smart context with embeddings if available and conversation is long
     elif embedding_service and len(messages) > 8:
         try:
             recent_messages = messages[-5:]  # Keep last 5 messages
-            smart_context = embedding_service.get_smart_context(
+            smart_context = await embedding_service.get_smart_context(
                 conversation_id=conversation_id,
                 recent_messages=recent_messages,
                 current_message=recent_message_content,
@@ -986,11 +851,12 @@ You have full file access (read/create/modify/delete).
             assistant_doc = assistant_message.model_dump()
             assistant_doc['timestamp'] = assistant_doc['timestamp'].isoformat()
             await db.chat_messages.insert_one(assistant_doc)
+            history_window.append(conversation_id, assistant_doc)
             
             # Store assistant message embedding
             if embedding_service:
                 try:
-                    embedding_service.store_message(
+                    await embedding_service.store_message(
                         conversation_id=conversation_id,
                         message_id=assistant_message.id,
                         role="assistant",
@@ -1004,6 +870,7 @@ You have full file access (read/create/modify/delete).
                 {"id": conversation_id},
                 {"$set": {"updated_at": datetime.now(timezone.utc).isoformat()}}
             )
+            summary_worker.notify(conversation_id)
             
             yield json.dumps({
                 "type": "done",
@@ -1214,143 +1081,162 @@ async def execute_api_request(request_id: str, env_vars: Optional[Dict[str, str]
 
 
 # Code Project endpoints
+def project_response(project: dict, files: Optional[Dict[str, str]] = None) -> CodeProject:
+    if isinstance(project['created_at'], str):
+        project['created_at'] = datetime.fromisoformat(project['created_at'])
+    if isinstance(project['updated_at'], str):
+        project['updated_at'] = datetime.fromisoformat(project['updated_at'])
+    project['manifest'] = manifest_entries(project)
+    project['files'] = files or {}
+    return CodeProject(**project)
+
 @api_router.post("/code-projects", response_model=CodeProject)
 async def create_code_project(input: CodeProjectCreate):
     project = CodeProject(**input.model_dump())
-    doc = project.model_dump()
+    doc = project.model_dump(exclude={"files", "manifest"})
     doc['created_at'] = doc['created_at'].isoformat()
     doc['updated_at'] = doc['updated_at'].isoformat()
     await db.code_projects.insert_one(doc)
+    entries = await project_files.put_many(project.id, project.files)
+    project.manifest = sorted(entries, key=lambda entry: entry['path'])
     return project
 
 @api_router.get("/code-projects", response_model=List[CodeProject])
 async def get_code_projects():
-    projects = await db.code_projects.find({}, {"_id": 0}).to_list(1000)
-    for proj in projects:
-        if isinstance(proj['created_at'], str):
-            proj['created_at'] = datetime.fromisoformat(proj['created_at'])
-        if isinstance(proj['updated_at'], str):
-            proj['updated_at'] = datetime.fromisoformat(proj['updated_at'])
-    return projects
+    # Projects only; file contents are fetched per file
+    projects = await db.code_projects.find({}, {"_id": 0, "files": 0}).to_list(1000)
+    return [project_response(proj) for proj in projects]
 
 @api_router.get("/code-projects/{project_id}", response_model=CodeProject)
-async def get_code_project(project_id: str):
-    project = await db.code_projects.find_one({"id": project_id}, {"_id": 0})
+async def get_code_project(project_id: str, include_files: bool = True):
+    project = await db.code_projects.find_one({"id": project_id}, {"_id": 0, "files": 0})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    if isinstance(project['created_at'], str):
-        project['created_at'] = datetime.fromisoformat(project['created_at'])
-    if isinstance(project['updated_at'], str):
-        project['updated_at'] = datetime.fromisoformat(project['updated_at'])
-    return CodeProject(**project)
+    files = await project_files.read_all(project_id) if include_files else None
+    return project_response(project, files)
 
 @api_router.put("/code-projects/{project_id}", response_model=CodeProject)
 async def update_code_project(project_id: str, input: CodeProjectCreate):
-    doc = input.model_dump()
+    doc = input.model_dump(exclude={"files"})
     doc['updated_at'] = datetime.now(timezone.utc).isoformat()
     
     result = await db.code_projects.update_one(
         {"id": project_id},
         {"$set": doc}
     )
-    if result.modified_count == 0:
+    if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
+    if "files" in input.model_fields_set:
+        await project_files.replace_all(project_id, input.files or {})
     
-    updated = await db.code_projects.find_one({"id": project_id}, {"_id": 0})
-    if isinstance(updated['created_at'], str):
-        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
-    if isinstance(updated['updated_at'], str):
-        updated['updated_at'] = datetime.fromisoformat(updated['updated_at'])
-    return CodeProject(**updated)
+    updated = await db.code_projects.find_one({"id": project_id}, {"_id": 0, "files": 0})
+    return project_response(updated, await project_files.read_all(project_id))
 
 @api_router.delete("/code-projects/{project_id}")
 async def delete_code_project(project_id: str):
     result = await db.code_projects.delete_one({"id": project_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
+    await project_files.delete_project(project_id)
     return {"message": "Project deleted"}
 
 
 # File Management endpoints
 @api_router.post("/code-projects/{project_id}/files")
 async def create_file(project_id: str, file_path: str = Body(...), content: str = Body(default="")):
-    project = await db.code_projects.find_one({"id": project_id}, {"_id": 0})
-    if not project:
+    entry = await project_files.put(project_id, file_path, content)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    files = project.get('files', {})
-    files[file_path] = content
-    
-    await db.code_projects.update_one(
-        {"id": project_id},
-        {"$set": {
-            "files": files,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
-    
-    return {"message": "File created/updated", "file_path": file_path}
+    return {"message": "File created/updated", "file_path": file_path, "size": entry["size"], "hash": entry["hash"]}
 
 
 @api_router.get("/code-projects/{project_id}/files/{file_path:path}")
 async def get_file(project_id: str, file_path: str):
-    project = await db.code_projects.find_one({"id": project_id}, {"_id": 0})
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    files = project.get('files', {})
-    if file_path not in files:
+    content = await project_files.get(project_id, file_path)
+    if content is None:
+        if not await db.code_projects.find_one({"id": project_id}, {"_id": 0, "id": 1}):
+            raise HTTPException(status_code=404, detail="Project not found")
         raise HTTPException(status_code=404, detail="File not found")
     
-    return {"file_path": file_path, "content": files[file_path]}
+    return {"file_path": file_path, "content": content}
 
 
 @api_router.delete("/code-projects/{project_id}/files/{file_path:path}")
 async def delete_file(project_id: str, file_path: str):
-    project = await db.code_projects.find_one({"id": project_id}, {"_id": 0})
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    files = project.get('files', {})
-    if file_path not in files:
+    if not await project_files.delete(project_id, file_path):
+        if not await db.code_projects.find_one({"id": project_id}, {"_id": 0, "id": 1}):
+            raise HTTPException(status_code=404, detail="Project not found")
         raise HTTPException(status_code=404, detail="File not found")
     
-    del files[file_path]
-    
-    await db.code_projects.update_one(
-        {"id": project_id},
-        {"$set": {
-            "files": files,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
-    
     return {"message": "File deleted"}
 
 
 @api_router.get("/code-projects/{project_id}/file-tree")
 async def get_file_tree(project_id: str):
-    project = await db.code_projects.find_one({"id": project_id}, {"_id": 0})
+    project = await db.code_projects.find_one({"id": project_id}, {"_id": 0, "manifest": 1})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    files = project.get('files', {})
+    manifest = manifest_entries(project)
     
     tree = {}
-    for file_path in files.keys():
+    for entry in manifest:
+        file_path = entry["path"]
         parts = file_path.split('/')
         current = tree
         
         for i, part in enumerate(parts):
             if i == len(parts) - 1:
-                current[part] = {"type": "file", "path": file_path}
+                current[part] = {"type": "file", "path": file_path, "size": entry["size"]}
             else:
                 if part not in current:
                     current[part] = {"type": "directory", "children": {}}
                 current = current[part]["children"]
     
-    return {"tree": tree, "files": list(files.keys())}
+    return {"tree": tree, "files": [entry["path"] for entry in manifest]}
+
+
+@api_router.get("/code-projects/{project_id}/export")
+async def export_code_project(project_id: str):
+    project = await db.code_projects.find_one({"id": project_id}, {"_id": 0, "name": 1})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    filename = "".join(c if c.isalnum() or c in "-_" else "_" for c in project["name"]) or project_id
+    return StreamingResponse(
+        project_files.export_tar(project_id),
+        media_type="application/x-tar",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.tar"'}
+    )
+
+
+@api_router.post("/code-projects/{project_id}/import")
+async def import_code_project(project_id: str, request: Request, replace: bool = False):
+    """Import files from a tar (or .tar.gz/.tar.bz2) archive sent as the request body"""
+    if not await db.code_projects.find_one({"id": project_id}, {"_id": 0, "id": 1}):
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    max_bytes = int(os.environ.get('PROJECT_IMPORT_MAX_BYTES', 200 * 1024 * 1024))
+    # Spooled to disk past 8 MB, so large archives are never held in memory
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                raise HTTPException(status_code=413, detail="Archive too large")
+            spool.write(chunk)
+        spool.seek(0)
+        
+        try:
+            result = await project_files.import_tar(project_id, spool, replace=replace)
+        except LookupError:
+            raise HTTPException(status_code=404, detail="Project not found")
+        except tarfile.TarError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid archive: {str(e)}")
+    
+    return {"message": "Files imported", **result}
 
 
 @api_router.post("/code-projects/{project_id}/active-files")
@@ -1730,4 +1616,8 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await summary_worker.stop()
+    await llm_clients.aclose()
+    if embedding_service:
+        await embedding_service.aclose()
     client.close()
@@ -0,0 +1,220 @@
+"""
+Background Conversation Summarization
+Folds new messages into each conversation's summary off the chat request path
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SummarizeFn = Callable[[Dict, Dict, List[Dict], Optional[str]], Awaitable[Tuple[str, Dict]]]
+
+
+class SummaryWorker:
+    """Debounced, single-flight summarization queue
+
+    The chat path only calls notify(); it never waits for a summary and
+    always uses the last one committed to the conversation. The conversation's
+    `messages_summarized` field is the watermark: each pass reads only the
+    user/assistant messages after it, folds them into the existing summary and
+    advances it, leaving the most recent `keep_recent` messages unsummarized
+    because they are still sent verbatim.
+    """
+
+    def __init__(self, db, summarize: SummarizeFn, debounce_seconds: float = 2.0,
+                 max_delay_seconds: float = 10.0, min_new_messages: int = 10,
+                 keep_recent: int = 6, batch_limit: int = 200, concurrency: int = 2):
+        """
+        Args:
+            db: MongoDB database instance
+            summarize: async (conversation, provider, messages, existing_summary) -> (summary, metadata)
+            debounce_seconds: Quiet period after the last notify() before a pass starts
+            max_delay_seconds: Longest a pass is postponed by a steady stream of notify() calls
+            min_new_messages: Unsummarized messages (beyond keep_recent) needed to start a pass
+            keep_recent: Newest messages left out of the summary
+            batch_limit: Most messages folded in by one pass
+            concurrency: Conversations summarized at the same time
+        """
+        self.db = db
+        self.summarize = summarize
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.min_new_messages = min_new_messages
+        self.keep_recent = keep_recent
+        self.batch_limit = batch_limit
+        self.concurrency = concurrency
+
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._queued: Set[str] = set()
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._first_notified: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Conversations notified while a pass was running
+        self._dirty: Set[str] = set()
+        self._workers: List[asyncio.Task] = []
+        self.stats = {"passes": 0, "messages_folded": 0, "conflicts": 0, "failures": 0}
+
+    def start(self):
+        """Start the background worker tasks"""
+        if not self._workers:
+            loop = asyncio.get_running_loop()
+            self._workers = [loop.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        self._dirty.clear()
+        for handle in self._timers.values():
+            handle.cancel()
+        self._timers.clear()
+        for task in self._workers + list(self._inflight.values()):
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._inflight.values(), return_exceptions=True)
+        self._workers = []
+
+    def notify(self, conversation_id: str):
+        """
+        Record that a conversation has new messages; never blocks
+
+        The pass starts once the conversation has been quiet for
+        debounce_seconds, or max_delay_seconds after the first notify.
+        """
+        if conversation_id in self._inflight:
+            self._dirty.add(conversation_id)
+            return
+        if conversation_id in self._queued:
+            return
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        first = self._first_notified.setdefault(conversation_id, now)
+        delay = min(self.debounce_seconds, max(first + self.max_delay_seconds - now, 0))
+        handle = self._timers.pop(conversation_id, None)
+        if handle is not None:
+            handle.cancel()
+        self._timers[conversation_id] = loop.call_later(delay, self._enqueue, conversation_id)
+
+    def _enqueue(self, conversation_id: str):
+        self._timers.pop(conversation_id, None)
+        self._first_notified.pop(conversation_id, None)
+        if conversation_id not in self._queued:
+            self._queued.add(conversation_id)
+            self._queue.put_nowait(conversation_id)
+
+    async def _work(self):
+        while True:
+            conversation_id = await self._queue.get()
+            self._queued.discard(conversation_id)
+            try:
+                result = await self.run(conversation_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.error(f"Background summarization failed for {conversation_id}: {str(e)}")
+                result = None
+
+            if result and result.get("more"):
+                self._enqueue(conversation_id)
+
+    def forget(self, conversation_id: str):
+        """Drop any scheduled pass for a deleted conversation"""
+        handle = self._timers.pop(conversation_id, None)
+        if handle is not None:
+            handle.cancel()
+        self._first_notified.pop(conversation_id, None)
+        self._dirty.discard(conversation_id)
+
+    async def run(self, conversation_id: str, force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Run one summarization pass now, joining a pass already in flight
+
+        Args:
+            conversation_id: Conversation to summarize
+            force: Fold in every message after the watermark, including the
+                   most recent ones, regardless of min_new_messages
+
+        Returns:
+            The committed summary, metadata and new watermark, or None if
+            there was nothing to fold in
+        """
+        task = self._inflight.get(conversation_id)
+        if task is not None:
+            result = await asyncio.shield(task)
+            if not force:
+                return result
+
+        task = asyncio.get_running_loop().create_task(self._summarize_pass(conversation_id, force))
+        self._inflight[conversation_id] = task
+        task.add_done_callback(lambda done: self._finished(conversation_id, done))
+        # Shielded so a cancelled request does not abandon a half-finished pass
+        return await asyncio.shield(task)
+
+    def _finished(self, conversation_id: str, task: asyncio.Task):
+        if self._inflight.get(conversation_id) is task:
+            del self._inflight[conversation_id]
+        if conversation_id in self._dirty:
+            self._dirty.discard(conversation_id)
+            self.notify(conversation_id)
+
+    async def _summarize_pass(self, conversation_id: str, force: bool) -> Optional[Dict[str, Any]]:
+        conversation = await self.db.conversations.find_one(
+            {"id": conversation_id},
+            {"_id": 0, "id": 1, "provider_id": 1, "agent_type": 1, "summary": 1, "messages_summarized": 1}
+        )
+        if not conversation:
+            return None
+        provider = await self.db.llm_providers.find_one({"id": conversation["provider_id"]}, {"_id": 0})
+        if not provider:
+            return None
+
+        watermark = conversation.get("messages_summarized") or 0
+        keep_recent = 0 if force else self.keep_recent
+        fetch = self.batch_limit + keep_recent
+        history = await self.db.chat_messages.find(
+            {"conversation_id": conversation_id, "role": {"$in": ["user", "assistant"]}},
+            {"_id": 0, "role": 1, "content": 1}
+        ).sort("timestamp", 1).skip(watermark).limit(fetch).to_list(fetch)
+
+        pending = history[:max(len(history) - keep_recent, 0)]
+        if not pending or (not force and len(pending) < min(self.min_new_messages, self.batch_limit)):
+            return None
+
+        summary, metadata = await self.summarize(conversation, provider, pending, conversation.get("summary"))
+
+        # Only commit over the watermark this pass started from, so a manual
+        # summarize racing this one cannot fold the same messages in twice
+        new_watermark = watermark + len(pending)
+        result = await self.db.conversations.update_one(
+            {"id": conversation_id,
+             "messages_summarized": watermark if watermark else {"$in": [0, None]}},
+            {"$set": {
+                "summary": summary,
+                "summary_at": datetime.now(timezone.utc).isoformat(),
+                "messages_summarized": new_watermark,
+                "summary_metadata": metadata
+            }}
+        )
+        if result.modified_count == 0:
+            self.stats["conflicts"] += 1
+            logger.info(f"Summary for {conversation_id} changed during the pass; discarded")
+            return None
+
+        self.stats["passes"] += 1
+        self.stats["messages_folded"] += len(pending)
+        logger.info(f"Folded {len(pending)} messages into the summary of {conversation_id}")
+        return {
+            "summary": summary,
+            "metadata": metadata,
+            "messages_summarized": new_watermark,
+            "more": len(history) == fetch,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queued": len(self._queued),
+            "scheduled": len(self._timers),
+            "in_flight": len(self._inflight),
+        }
@@ -0,0 +1,246 @@
+"""
+Benchmark similar-error lookup over stored error resolutions.
+
+Seeds a scratch database with generated resolutions, then times the old
+AgentMemory.get_similar_errors aggregation against ErrorIndex.search. Queries
+are stored errors seen again with a different stack trace, paths and numbers
+(exact) and errors of the same kind with different names (fuzzy). A query
+counts as a hit when the top result belongs to the same kind of error.
+
+For each path it reports median and p95 latency, hit rate, and the documents
+MongoDB examined for one query. The scratch database is dropped afterwards.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python error_index_benchmark.py [--resolutions 100000] [--queries 200]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from error_index import ErrorIndex, _TOTAL, error_fingerprint, error_tokens  # noqa: E402
+
+AGENT_TYPE = "programming"
+
+KINDS = [
+    "TypeError: unsupported operand type(s) for {op}: '{a}' and '{b}'",
+    "AttributeError: '{a}' object has no attribute '{name}'",
+    "KeyError: '{name}' while building {a} payload",
+    "ModuleNotFoundError: No module named '{name}'",
+    "ImportError: cannot import name '{name}' from '{a}'",
+    "NameError: name '{name}' is not defined",
+    "ValueError: invalid literal for int() with base {n}: '{name}'",
+    "IndexError: list index out of range in {name} at position {n}",
+    "psycopg2.errors.UndefinedTable: relation \"{name}\" does not exist",
+    "pymongo.errors.DuplicateKeyError: E11000 duplicate key error collection: {a}.{name} index: {b}_1",
+    "Error: ENOENT: no such file or directory, open '/srv/{a}/{name}.json'",
+    "TypeError: Cannot read properties of undefined (reading '{name}')",
+    "ReferenceError: {name} is not defined",
+    "SyntaxError: Unexpected token '{op}' in {name}.js",
+    "java.lang.NullPointerException: Cannot invoke \"{a}.{name}()\" because \"{b}\" is null",
+    "error[E0382]: borrow of moved value: `{name}`",
+    "panic: runtime error: index out of range [{n}] with length {n}",
+    "sqlalchemy.exc.OperationalError: no such column: {a}.{name}",
+    "RecursionError: maximum recursion depth exceeded while calling {name}",
+    "PermissionError: [Errno 13] Permission denied: '/var/{a}/{name}.log'",
+    "ZeroDivisionError: division by zero in {name}",
+    "UnicodeDecodeError: 'utf-8' codec can't decode byte 0x{n} in {name}",
+    "ConnectionRefusedError: connect ECONNREFUSED {a} for {name}",
+    "TimeoutError: {name} request to {a} timed out",
+    "CORS policy: No 'Access-Control-Allow-Origin' header on {name} from {a}",
+    "Warning: Each child in a list should have a unique \"key\" prop. Check the render method of `{name}`",
+    "fatal: refusing to merge unrelated histories in {name}",
+    "docker: Error response from daemon: Conflict. The container name \"/{name}\" is already in use",
+    "yaml.scanner.ScannerError: mapping values are not allowed here in {name}.yaml",
+    "jwt.exceptions.ExpiredSignatureError: Signature has expired for {name}",
+]
+TYPES = ["int", "str", "NoneType", "list", "dict", "float", "tuple", "bytes"]
+OPS = ["+", "-", "*", "/", "%"]
+
+
+def make_words(count, rng):
+    syllables = ["ka", "lo", "mi", "ven", "tor", "rix", "sal", "dun", "pe", "qua", "zor", "bel", "nim", "for"]
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def render(kind, words, rng):
+    return KINDS[kind].format(op=rng.choice(OPS), a=rng.choice(TYPES + words[:50]), b=rng.choice(TYPES),
+                              name=rng.choice(words), n=rng.randint(2, 4096))
+
+
+def with_traceback(error, rng):
+    frames = "".join(
+        f'  File "/home/{rng.choice(["ann", "bo"])}/app/module{rng.randint(1, 99)}.py", '
+        f'line {rng.randint(1, 999)}, in handler\n    call()\n'
+        for _ in range(rng.randint(1, 4))
+    )
+    return f"Traceback (most recent call last):\n{frames}{error}\n"
+
+
+async def seed(db, count, rng, words):
+    now = datetime.now(timezone.utc)
+    kinds = {}
+    frequencies = Counter()
+    batch = []
+    i = 0
+    while len(kinds) < count:
+        kind = i % len(KINDS)
+        i += 1
+        pattern = render(kind, words, rng)
+        fingerprint = error_fingerprint(pattern)
+        if fingerprint in kinds:
+            continue
+        kinds[fingerprint] = kind
+        tokens = error_tokens(pattern)
+        frequencies.update(tokens)
+        resolved = rng.randint(0, 5)
+        batch.append({
+            "type": "error_resolution", "agent_type": AGENT_TYPE, "error_pattern": pattern,
+            "resolution": f"kind-{kind}", "conversation_id": f"c{i}", "success": resolved > 0,
+            "metadata": {}, "created_at": now.isoformat(), "times_encountered": resolved + 1,
+            "times_resolved": resolved, "fingerprint": fingerprint, "tokens": tokens,
+            "last_resolved": (now - timedelta(days=rng.randint(0, 120))).isoformat(),
+            "expires_at": now + timedelta(days=180),
+        })
+        if len(batch) == 5000:
+            await db.agent_memory.insert_many(batch)
+            batch = []
+    if batch:
+        await db.agent_memory.insert_many(batch)
+    frequencies[_TOTAL] = len(kinds)
+    await db.agent_memory_tokens.insert_many(
+        [{"agent_type": AGENT_TYPE, "token": token, "df": df} for token, df in frequencies.items()]
+    )
+    return kinds
+
+
+async def old_search(db, error_pattern, limit=5):
+    """The aggregation get_similar_errors ran before ErrorIndex"""
+    keywords = error_pattern.lower().split()[:5]
+    pipeline = [
+        {"$match": {"type": "error_resolution", "agent_type": AGENT_TYPE, "success": True}},
+        {"$addFields": {"relevance_score": {"$sum": [
+            1 if keyword in "$error_pattern" else 0 for keyword in keywords
+        ]}}},
+        {"$match": {"relevance_score": {"$gt": 0}}},
+        {"$sort": {"relevance_score": -1, "times_resolved": -1}},
+        {"$limit": limit},
+    ]
+    return await db.agent_memory.aggregate(pipeline).to_list(limit)
+
+
+def make_queries(db_docs, count, rng, words):
+    queries = []
+    for doc in rng.sample(db_docs, count // 2):
+        queries.append(("exact", with_traceback(doc["error_pattern"], rng), int(doc["resolution"][5:])))
+    for _ in range(count - len(queries)):
+        kind = rng.randrange(len(KINDS))
+        queries.append(("fuzzy", render(kind, words, rng), kind))
+    return queries
+
+
+async def measure(search, queries):
+    latencies = []
+    hits = Counter()
+    for label, text, kind in queries:
+        started = time.perf_counter()
+        results = await search(text)
+        latencies.append(time.perf_counter() - started)
+        if results and results[0].get("resolution") == f"kind-{kind}":
+            hits[label] += 1
+    latencies.sort()
+    return {
+        "median_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[max(math.ceil(len(latencies) * 0.95) - 1, 0)] * 1000,
+        "hits": hits,
+    }
+
+
+async def docs_examined(db, command):
+    try:
+        explain = await db.command({"explain": command, "verbosity": "executionStats"})
+    except Exception:
+        return None
+    stats = explain.get("executionStats") or {}
+    if "totalDocsExamined" in stats:
+        return stats["totalDocsExamined"]
+    stages = explain.get("stages") or []
+    cursor = stages[0].get("$cursor", {}) if stages else {}
+    return cursor.get("executionStats", {}).get("totalDocsExamined")
+
+
+async def run(db, resolutions, query_count, rng_seed=7):
+    rng = random.Random(rng_seed)
+    words = make_words(4000, rng)
+    index = ErrorIndex(db.agent_memory, db.agent_memory_tokens)
+    await index.ensure_indexes()
+
+    started = time.perf_counter()
+    kinds = await seed(db, resolutions, rng, words)
+    print(f"seeded {len(kinds)} resolutions in {time.perf_counter() - started:.1f}s")
+
+    resolved = await db.agent_memory.find({"times_resolved": {"$gt": 0}},
+                                          {"_id": 0, "error_pattern": 1, "resolution": 1}).to_list(None)
+    queries = make_queries(resolved, query_count, rng, words)
+    totals = Counter(label for label, _, _ in queries)
+
+    results = {
+        "old aggregation": await measure(lambda text: old_search(db, text), queries),
+        "ErrorIndex.search": await measure(lambda text: index.search(AGENT_TYPE, text), queries),
+    }
+    sample = queries[-1][1]
+    rarest = error_tokens(sample)[:index.query_tokens]
+    examined = {
+        "old aggregation": await docs_examined(db, {
+            "aggregate": "agent_memory", "cursor": {},
+            "pipeline": [{"$match": {"type": "error_resolution", "agent_type": AGENT_TYPE, "success": True}}],
+        }),
+        "ErrorIndex.search": await docs_examined(db, {
+            "find": "agent_memory", "limit": index.candidate_limit,
+            "filter": {"type": "error_resolution", "agent_type": AGENT_TYPE,
+                       "times_resolved": {"$gt": 0}, "tokens": {"$in": rarest}},
+        }),
+    }
+
+    print(f"{'path':<20}{'median ms':>10}{'p95 ms':>10}{'exact hits':>12}{'fuzzy hits':>12}{'docs examined':>15}")
+    for name, result in results.items():
+        hits = result["hits"]
+        print(f"{name:<20}{result['median_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+              f"{hits['exact']:>7}/{totals['exact']:<4}{hits['fuzzy']:>7}/{totals['fuzzy']:<4}"
+              f"{examined[name] if examined[name] is not None else '-':>15}")
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--resolutions", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--db", default="devgenius_error_index_benchmark")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    await client.drop_database(args.db)
+    try:
+        await run(client[args.db], args.resolutions, args.queries)
+    finally:
+        await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from embedding_executor import BatchedEmbeddingWriter, EmbeddingExecutor, content_hash
+
+
+class HashingEmbedder:
+    """Deterministic stand-in for a sentence-transformers model; records each encode call."""
+
+    def __init__(self, latency=0.0, gate=None):
+        self.latency = latency
+        self.gate = gate
+        self.calls = []
+        self.threads = set()
+
+    def vector(self, text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [byte / 255 for byte in digest[:8]]
+
+    def __call__(self, texts):
+        if self.gate is not None:
+            self.gate.wait()
+        self.threads.add(threading.current_thread().name)
+        self.calls.append(list(texts))
+        time.sleep(self.latency)
+        return [self.vector(text) for text in texts]
+
+
+def test_concurrent_embeds_are_batched_off_the_loop_and_cached():
+    embedder = HashingEmbedder(latency=0.005)
+    executor = EmbeddingExecutor(embedder, max_batch=16, max_wait=0.01)
+    texts = [f"message {i}" for i in range(64)]
+
+    async def main():
+        vectors = await asyncio.gather(*(executor.embed(text) for text in texts))
+        encode_calls = len(embedder.calls)
+        again = await executor.embed_many(texts[:10] + texts[:10])
+        await executor.aclose()
+        return vectors, encode_calls, again
+
+    vectors, encode_calls, again = asyncio.run(main())
+    assert vectors == [embedder.vector(text) for text in texts]
+    assert encode_calls == 4 and all(len(call) == 16 for call in embedder.calls)
+    assert embedder.threads and all(name.startswith("embedding") for name in embedder.threads)
+    # Cached by content: no further encode calls
+    assert again == vectors[:10] * 2
+    assert len(embedder.calls) == 4
+    assert executor.stats["cache_hits"] == 20
+
+
+def test_duplicate_texts_in_flight_are_encoded_once():
+    embedder = HashingEmbedder()
+    executor = EmbeddingExecutor(embedder, max_batch=32, max_wait=0.005)
+
+    async def main():
+        results = await asyncio.gather(*(executor.embed("same text") for _ in range(10)))
+        await executor.aclose()
+        return results
+
+    results = asyncio.run(main())
+    assert embedder.calls == [["same text"]]
+    assert results == [embedder.vector("same text")] * 10
+
+
+def test_bounded_queue_applies_backpressure():
+    gate = threading.Event()
+    embedder = HashingEmbedder(gate=gate)
+    executor = EmbeddingExecutor(embedder, max_batch=4, max_wait=0, max_queue=8)
+
+    async def main():
+        # The first batch blocks the encoder; the next 8 texts fill the queue
+        first = asyncio.ensure_future(executor.embed_many([f"t{i}" for i in range(4)]))
+        await asyncio.sleep(0.02)
+        filling = asyncio.ensure_future(executor.embed_many([f"t{i}" for i in range(4, 12)]))
+        await asyncio.sleep(0.02)
+        blocked = asyncio.ensure_future(executor.embed("t12"))
+        await asyncio.sleep(0.02)
+        queued = executor._queue.qsize()
+        was_blocked = not blocked.done()
+        gate.set()
+        await asyncio.gather(first, filling, blocked)
+        await executor.aclose()
+        return queued, was_blocked
+
+    queued, was_blocked = asyncio.run(main())
+    assert queued == 8 and was_blocked
+    assert sorted(text for call in embedder.calls for text in call) == sorted(f"t{i}" for i in range(13))
+
+
+def test_cancelling_one_waiter_leaves_the_shared_encode_to_the_others():
+    gate = threading.Event()
+    embedder = HashingEmbedder(gate=gate)
+    executor = EmbeddingExecutor(embedder, max_wait=0)
+    writes = []
+    writer = BatchedEmbeddingWriter(executor, lambda *args: writes.append(args), max_wait=0)
+
+    async def main():
+        first = asyncio.ensure_future(executor.embed("shared"))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(executor.embed("shared"))
+        await writer.submit("id1", "shared", {})
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        gate.set()
+        vector = await asyncio.wait_for(second, 1)
+        await asyncio.wait_for(writer.flush(), 1)
+        writer_alive = not writer._writer.done()
+        await writer.aclose()
+        await executor.aclose()
+        return first.cancelled(), vector, writer_alive
+
+    first_cancelled, vector, writer_alive = asyncio.run(main())
+    assert first_cancelled
+    assert vector == embedder.vector("shared")
+    assert embedder.calls == [["shared"]]
+    assert writer_alive and writer.stats == {"writes": 1, "written": 1, "failed": 0}
+    assert writes[0][:3] == (["id1"], [vector], ["shared"])
+
+
+def test_caller_cancelled_while_waiting_for_room_leaves_nothing_behind():
+    gate = threading.Event()
+    embedder = HashingEmbedder(gate=gate)
+    executor = EmbeddingExecutor(embedder, max_batch=1, max_wait=0, max_queue=1)
+
+    async def main():
+        running = asyncio.ensure_future(executor.embed("running"))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(executor.embed("queued"))
+        await asyncio.sleep(0.01)
+        blocked = asyncio.ensure_future(executor.embed("late"))
+        await asyncio.sleep(0.01)
+        blocked.cancel()
+        await asyncio.sleep(0)
+        pending = dict(executor._encoding)
+        gate.set()
+        retried = await asyncio.wait_for(executor.embed("late"), 1)
+        await asyncio.gather(running, queued)
+        await executor.aclose()
+        return blocked.cancelled(), pending, retried
+
+    cancelled, pending, retried = asyncio.run(main())
+    assert cancelled
+    assert content_hash("late") not in pending
+    assert retried == embedder.vector("late")
+
+
+def test_writer_stores_batches_with_one_write_each():
+    embedder = HashingEmbedder(latency=0.002)
+    executor = EmbeddingExecutor(embedder, max_batch=32, max_wait=0.002)
+    writes = []
+
+    def write(ids, embeddings, documents, metadatas):
+        assert threading.current_thread().name.startswith("embedding")
+        writes.append((ids, embeddings, documents, metadatas))
+
+    writer = BatchedEmbeddingWriter(executor, write, max_batch=25, max_wait=0.01)
+
+    async def main():
+        started = time.perf_counter()
+        for i in range(100):
+            await writer.submit(f"id{i}", f"doc {i}", {"n": i})
+        submit_seconds = time.perf_counter() - started
+        await writer.flush()
+        # Already stored messages are embedded from the cache, e.g. for redundancy checks
+        calls_before = len(embedder.calls)
+        await executor.embed_many([f"doc {i}" for i in range(100)])
+        cached = len(embedder.calls) == calls_before
+        await writer.aclose()
+        await executor.aclose()
+        return submit_seconds, cached
+
+    submit_seconds, cached = asyncio.run(main())
+    assert submit_seconds < 0.05  # queuing does not wait for encoding
+    assert cached
+    assert len(writes) == 4 and [len(ids) for ids, *_ in writes] == [25] * 4
+    ids = [item for ids, *_ in writes for item in ids]
+    assert ids == [f"id{i}" for i in range(100)]
+    for batch_ids, embeddings, documents, metadatas in writes:
+        for item_id, embedding, document, metadata in zip(batch_ids, embeddings, documents, metadatas):
+            assert document == f"doc {metadata['n']}" and item_id == f"id{metadata['n']}"
+            assert embedding == embedder.vector(document)
+    assert writer.stats == {"writes": 4, "written": 100, "failed": 0}
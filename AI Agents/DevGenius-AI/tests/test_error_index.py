@@ -0,0 +1,156 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from error_index import ErrorIndex, error_fingerprint, error_tokens, normalize_error
+
+PYTHON_TRACEBACK = '''Traceback (most recent call last):
+  File "/app/backend/server.py", line 812, in chat
+    total = count + label
+            ~~~~~~^~~~~~~
+TypeError: unsupported operand type(s) for +: 'int' and 'str'
+'''
+
+NODE_TRACEBACK = '''Error: ENOENT: no such file or directory, open '/home/dev/app/config/local.json'
+    at Object.openSync (node:fs:601:3)
+    at Module._compile (node:internal/modules/cjs/loader:1256:14)
+    at new Promise (<anonymous>)
+'''
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def limit(self, count):
+        self.cursor = self.cursor.limit(count)
+        return self
+
+    async def to_list(self, length):
+        return list(self.cursor)[:length]
+
+
+class AsyncCollection:
+    """Motor-style awaitable facade over a mongomock collection that records queries."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.finds = []
+
+    def find(self, query, projection=None):
+        self.finds.append(query)
+        return AsyncCursor(self.collection.find(query, projection))
+
+    async def find_one(self, query, projection=None):
+        self.finds.append(query)
+        return self.collection.find_one(query, projection)
+
+    async def update_one(self, query, update, upsert=False):
+        return self.collection.update_one(query, update, upsert=upsert)
+
+    async def create_index(self, keys, **kwargs):
+        return self.collection.create_index(keys, **kwargs)
+
+
+@pytest.fixture
+def index():
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().db
+    return ErrorIndex(AsyncCollection(db.agent_memory), AsyncCollection(db.agent_memory_tokens))
+
+
+def test_normalization_strips_frames_paths_and_numbers():
+    assert normalize_error(PYTHON_TRACEBACK) == "typeerror: unsupported operand type(s) for +: 'int' and 'str'"
+    assert error_fingerprint(PYTHON_TRACEBACK) == error_fingerprint(
+        PYTHON_TRACEBACK.replace("812", "90").replace("/app/backend", "/srv/other")
+    )
+    assert normalize_error(NODE_TRACEBACK) == "error: enoent: no such file or directory, open ' <path> '"
+    assert normalize_error("KeyError at 0x7f3a while reading row 4312") == "keyerror at <addr> while reading row <n>"
+    assert error_tokens(PYTHON_TRACEBACK) == ["typeerror", "unsupported", "operand", "type", "int", "str"]
+
+
+def test_exact_and_fuzzy_matches_rank_above_unrelated_errors(index):
+    async def main():
+        await index.ensure_indexes()
+        await index.record("programming", PYTHON_TRACEBACK, "Cast label with str()", "c1")
+        await index.record("programming", "TypeError: unsupported operand type(s) for -: 'int' and 'NoneType'",
+                           "Default to 0", "c2")
+        await index.record("programming", NODE_TRACEBACK, "Create config/local.json", "c3")
+        for i in range(50):
+            await index.record("programming", f"ImportError: cannot import name 'widget{i}' from 'ui'",
+                               "Fix import", f"c{i + 10}")
+        await index.record("programming", "ModuleNotFoundError: No module named 'requests'",
+                           "pip install requests", "c4", success=False)
+        await index.record("website", PYTHON_TRACEBACK, "Other agent", "c5")
+
+        exact = await index.search("programming", PYTHON_TRACEBACK.replace("812", "77"))
+        fuzzy = await index.search("programming", "TypeError: unsupported operand type(s) for *: 'int' and 'str'")
+        unresolved = await index.search("programming", "ModuleNotFoundError: No module named 'requests'")
+        return exact, fuzzy, unresolved
+
+    exact, fuzzy, unresolved = asyncio.run(main())
+    assert exact[0]["match"] == "exact" and exact[0]["relevance_score"] == 1.0
+    assert exact[0]["resolution"] == "Cast label with str()"
+    assert exact[1]["resolution"] == "Default to 0"
+    assert all(result["agent_type"] == "programming" for result in exact)
+    assert "_id" not in exact[0] and "tokens" not in exact[0] and "tokens" not in exact[1]
+
+    assert [result["match"] for result in fuzzy[:2]] == ["fuzzy", "fuzzy"]
+    assert fuzzy[0]["resolution"] == "Cast label with str()"
+    assert fuzzy[0]["relevance_score"] > fuzzy[1]["relevance_score"] > 0
+    assert all("ImportError" not in result["error_pattern"] for result in fuzzy)
+    # Never resolved, so never suggested
+    assert unresolved == []
+
+
+def test_repeat_encounters_are_counted_once_and_decay_with_age(index):
+    async def main():
+        for _ in range(3):
+            await index.record("programming", PYTHON_TRACEBACK, "Cast label with str()", "c1")
+        await index.record("programming", "TypeError: unsupported operand type(s) for +: 'int' and 'list'",
+                           "Wrap in list", "c2")
+        # Last resolved two half-lives ago
+        old = (datetime.now(timezone.utc) - timedelta(days=60)).isoformat()
+        index.collection.collection.update_one({"resolution": "Cast label with str()"},
+                                               {"$set": {"last_resolved": old}})
+        return await index.search("programming", "TypeError: unsupported operand type(s) for +: 'int' and 'dict'")
+
+    results = asyncio.run(main())
+    docs = list(index.collection.collection.find({"resolution": "Cast label with str()"}))
+    assert len(docs) == 1
+    assert docs[0]["times_encountered"] == 3 and docs[0]["times_resolved"] == 3
+    assert docs[0]["expires_at"] > datetime.now() + timedelta(days=179)
+    weights = {result["resolution"]: result["resolution_weight"] for result in results}
+    assert weights["Cast label with str()"] == pytest.approx(0.75, abs=0.01)
+    assert weights["Wrap in list"] == pytest.approx(1.0, abs=0.01)
+    # Equal relevance: the fresher resolution comes first
+    assert results[0]["resolution"] == "Wrap in list"
+
+
+def test_embedding_rerank_and_backfill(index):
+    async def embed_many(texts):
+        return [[1.0, 0.0] if "str" in text else [0.0, 1.0] for text in texts]
+
+    async def main():
+        legacy = index.collection.collection
+        legacy.insert_one({"type": "error_resolution", "agent_type": "programming",
+                           "error_pattern": "ValueError: invalid literal for int() with base 10: 'abc'",
+                           "resolution": "Validate input", "times_resolved": 2, "times_encountered": 2})
+        legacy.insert_one({"type": "error_resolution", "agent_type": "programming",
+                           "error_pattern": "ValueError: invalid literal for int() with base 16: 'str'",
+                           "resolution": "Use base 16", "times_resolved": 1, "times_encountered": 1})
+        assert await index.backfill(batch_size=1) == 2
+        plain = await index.search("programming", "ValueError: invalid literal for int() with base 8: 'str'")
+        index.embed_many = embed_many
+        reranked = await index.search("programming", "ValueError: invalid literal for int() with base 8: 'str'")
+        return plain, reranked
+
+    plain, reranked = asyncio.run(main())
+    assert {result["resolution"] for result in plain} == {"Validate input", "Use base 16"}
+    assert reranked[0]["resolution"] == "Use base 16"
+    assert reranked[0]["relevance_score"] > reranked[1]["relevance_score"]
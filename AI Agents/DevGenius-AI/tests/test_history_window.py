@@ -0,0 +1,156 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from history_window import HistoryWindow, recent_messages_after_watermark
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, key, direction):
+        self.cursor = self.cursor.sort(key, direction)
+        return self
+
+    def limit(self, count):
+        self.cursor = self.cursor.limit(count)
+        return self
+
+    async def to_list(self, length):
+        await asyncio.sleep(0)
+        return list(self.cursor)[:length]
+
+
+class AsyncCollection:
+    """Motor-style awaitable facade over a mongomock collection that counts reads."""
+
+    def __init__(self, collection, reads):
+        self.collection = collection
+        self.reads = reads
+
+    def find(self, *args):
+        self.reads.append("find")
+        return AsyncCursor(self.collection.find(*args))
+
+    async def count_documents(self, query):
+        self.reads.append("count")
+        return self.collection.count_documents(query)
+
+    async def insert_one(self, doc):
+        return self.collection.insert_one(dict(doc))
+
+    async def create_index(self, keys):
+        return self.collection.create_index(keys)
+
+
+class AsyncDatabase:
+    def __init__(self):
+        mongomock = pytest.importorskip("mongomock")
+        self.reads = []
+        self.sync = mongomock.MongoClient().db
+        self.chat_messages = AsyncCollection(self.sync.chat_messages, self.reads)
+
+
+def message(conversation_id, index, role=None):
+    return {
+        "id": f"{conversation_id}-{index}",
+        "conversation_id": conversation_id,
+        "role": role or ("user" if index % 2 == 0 else "assistant"),
+        "content": f"{conversation_id} message {index}",
+        "provider_id": "p1",
+        "timestamp": (START + timedelta(seconds=index)).isoformat(),
+    }
+
+
+@pytest.fixture
+def db():
+    db = AsyncDatabase()
+    # Inserted out of order, with other conversations and a non-chat role mixed in
+    docs = [message("c1", i) for i in range(120)] + [message("c2", i) for i in range(30)]
+    docs.append(message("c1", 200, role="system"))
+    for doc in reversed(docs):
+        db.sync.chat_messages.insert_one(doc)
+    return db
+
+
+def test_cold_load_selects_the_newest_messages_oldest_first(db):
+    window = HistoryWindow(db, size=50)
+    asyncio.run(window.ensure_indexes())
+    messages, total = asyncio.run(window.load("c1"))
+
+    assert total == 120
+    assert [m["content"] for m in messages] == [f"c1 message {i}" for i in range(70, 120)]
+    assert set(messages[0]) == {"role", "content", "timestamp"}
+    assert any(index["key"] == [("conversation_id", 1), ("timestamp", 1)]
+               for index in db.sync.chat_messages.index_information().values())
+
+    short, short_total = asyncio.run(HistoryWindow(db, size=50).load("c2"))
+    assert short_total == 30 and len(short) == 30
+
+
+def test_warm_turns_read_nothing_and_match_the_database(db):
+    window = HistoryWindow(db, size=20)
+
+    async def main():
+        await window.load("c1")
+        cold_reads = len(db.reads)
+        for i in range(120, 320):
+            doc = message("c1", i)
+            await db.chat_messages.insert_one(doc)
+            window.append("c1", doc)
+            messages, total = await window.load("c1")
+        return cold_reads, messages, total
+
+    cold_reads, messages, total = asyncio.run(main())
+    assert cold_reads == 2  # the tail and the total count, once
+    assert len(db.reads) == cold_reads
+    assert total == 320
+    assert [m["content"] for m in messages] == [f"c1 message {i}" for i in range(300, 320)]
+
+    fresh, fresh_total = asyncio.run(HistoryWindow(db, size=20).load("c1"))
+    assert (fresh, fresh_total) == (messages, total)
+
+
+def test_invalidate_and_writes_during_a_load(db):
+    window = HistoryWindow(db, size=10)
+
+    async def main():
+        await window.load("c1")
+        window.invalidate("c1")
+        await window.load("c1")
+        reloads = db.reads.count("find")
+
+        window.invalidate("c1")
+        loading = asyncio.create_task(window.load("c1"))
+        await asyncio.sleep(0)
+        # Written after the load read the collection: the stale result is not cached
+        doc = message("c1", 500)
+        await db.chat_messages.insert_one(doc)
+        window.append("c1", doc)
+        await loading
+        messages, _ = await window.load("c1")
+        return reloads, messages
+
+    reloads, messages = asyncio.run(main())
+    assert reloads == 2
+    assert messages[-1]["content"] == "c1 message 500"
+
+
+def test_recent_messages_after_watermark():
+    messages = [{"content": str(i)} for i in range(40, 50)]
+    # 50 messages, summary covers the first 45: the last 5 are unsummarized, but keep at least 6
+    assert [m["content"] for m in recent_messages_after_watermark(messages, 50, 45)] == \
+        [str(i) for i in range(44, 50)]
+    assert len(recent_messages_after_watermark(messages, 50, 42)) == 8
+    # Never more than the window holds
+    assert len(recent_messages_after_watermark(messages, 50, 0)) == 10
+    assert len(recent_messages_after_watermark(messages, 50, None)) == 10
+
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from llm_clients import LLMTimeoutError, ProviderClients, transcript_prompt
+
+WORDS = ["Hello", " from", " a", " local", " model"]
+
+
+class FakeLlamaServer:
+    """llama.cpp-style /completion endpoint streaming SSE `data:` lines."""
+
+    def __init__(self, first_token_delay=0.0, token_delay=0.005):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.active = 0
+        self.peak = 0
+        self.requests = []
+        self.disconnects = 0
+        self.completed = 0
+
+    async def completion(self, request):
+        web = pytest.importorskip("aiohttp.web")
+        self.requests.append(await request.json())
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        try:
+            await asyncio.sleep(self.first_token_delay)
+            for word in WORDS:
+                await response.write(f"data: {json.dumps({'content': word, 'stop': False})}\n\n".encode())
+                await asyncio.sleep(self.token_delay)
+            await response.write(b'data: {"content": "", "stop": true, "tokens_predicted": 5}\n\n')
+            self.completed += 1
+        except (ConnectionResetError, asyncio.CancelledError):
+            self.disconnects += 1
+            raise
+        finally:
+            self.active -= 1
+        return response
+
+    async def __aenter__(self):
+        web = pytest.importorskip("aiohttp.web")
+        app = web.Application()
+        app.router.add_post("/completion", self.completion)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.endpoint = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+def local_provider(server, provider_id="local-1", **extra):
+    return {"id": provider_id, "name": "local", "model": "llama", "api_key": "", "endpoint": server.endpoint, **extra}
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_streams_through_one_shared_client_and_records_stats():
+    pytest.importorskip("aiohttp")
+
+    async def main():
+        clients = ProviderClients()
+        async with FakeLlamaServer() as server:
+            provider = local_provider(server)
+            chunks = [chunk async for chunk in clients.stream(provider, MESSAGES, "Be brief.")]
+            session = clients._clients["local-1"].client
+            answer = await clients.complete(provider, MESSAGES, "Be brief.")
+            shared = clients._clients["local-1"].client is session
+            await clients.aclose()
+            return chunks, answer, shared, server.requests, clients.snapshot(), session.closed
+
+    chunks, answer, shared, requests, stats, closed = asyncio.run(main())
+    assert chunks == WORDS
+    assert answer == "".join(WORDS)
+    assert shared and closed
+    assert requests[0]["stream"] is True
+    assert requests[0]["prompt"] == transcript_prompt(MESSAGES, "Be brief.") == "Be brief.\n\nUser: hi\nAssistant: "
+    local = stats["local-1"]
+    assert local["requests"] == local["completed"] == 2 and local["tokens"] == 10
+    assert local["in_flight"] == 0 and local["failures"] == 0
+    assert local["ttft_p50_ms"] is not None and local["tokens_per_second"] > 0
+
+
+def test_concurrency_is_limited_per_provider():
+    pytest.importorskip("aiohttp")
+
+    async def main():
+        clients = ProviderClients(max_concurrency=4)
+        async with FakeLlamaServer(token_delay=0.01) as server:
+            limited = local_provider(server, "limited", max_concurrency=2)
+            answers = await asyncio.gather(*(clients.complete(limited, MESSAGES, "") for _ in range(6)))
+            limited_peak = server.peak
+            server.peak = 0
+            default = local_provider(server, "default")
+            await asyncio.gather(*(clients.complete(default, MESSAGES, "") for _ in range(8)))
+            await clients.aclose()
+            return answers, limited_peak, server.peak
+
+    answers, limited_peak, default_peak = asyncio.run(main())
+    assert answers == ["".join(WORDS)] * 6
+    assert limited_peak == 2
+    assert default_peak == 4
+
+
+def test_first_token_timeout():
+    pytest.importorskip("aiohttp")
+
+    async def main():
+        clients = ProviderClients(first_token_timeout=0.05)
+        async with FakeLlamaServer(first_token_delay=0.2) as server:
+            with pytest.raises(LLMTimeoutError):
+                await clients.complete(local_provider(server), MESSAGES, "")
+            # The server notices on its next write
+            await asyncio.sleep(0.3)
+            disconnects = server.disconnects
+            await clients.aclose()
+            return clients.snapshot(), disconnects
+
+    stats, disconnects = asyncio.run(main())
+    assert stats["local-1"]["timeouts"] == 1 and stats["local-1"]["in_flight"] == 0
+    # The upstream request was abandoned rather than left generating
+    assert disconnects == 1
+
+
+def test_time_queued_for_a_slot_counts_towards_the_timeout():
+    pytest.importorskip("aiohttp")
+
+    async def main():
+        clients = ProviderClients(max_concurrency=1, first_token_timeout=0.3)
+        async with FakeLlamaServer(first_token_delay=0.2, token_delay=0.05) as server:
+            provider = local_provider(server)
+            first = asyncio.create_task(clients.complete(provider, MESSAGES, ""))
+            await asyncio.sleep(0.05)
+            started = asyncio.get_running_loop().time()
+            with pytest.raises(LLMTimeoutError, match="free request slot"):
+                await clients.complete(provider, MESSAGES, "")
+            waited = asyncio.get_running_loop().time() - started
+            answer = await first
+            await clients.aclose()
+            return waited, answer, len(server.requests), clients.snapshot()
+
+    waited, answer, sent, stats = asyncio.run(main())
+    assert waited < 0.4
+    assert answer == "".join(WORDS)
+    # The queued request never reached the server
+    assert sent == 1
+    local = stats["local-1"]
+    assert local["requests"] == 2 and local["timeouts"] == 1 and local["completed"] == 1
+    assert local["in_flight"] == 0
+
+
+def test_cancelled_consumer_closes_the_upstream_stream():
+    pytest.importorskip("aiohttp")
+
+    async def main():
+        clients = ProviderClients(max_concurrency=1)
+        async with FakeLlamaServer(token_delay=0.05) as server:
+            provider = local_provider(server)
+            received = []
+
+            async def consume():
+                async for chunk in clients.stream(provider, MESSAGES, ""):
+                    received.append(chunk)
+
+            task = asyncio.create_task(consume())
+            while len(received) < 2:
+                await asyncio.sleep(0.01)
+            # What StreamingResponse does when the HTTP client disconnects
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0.1)
+            disconnects, completed = server.disconnects, server.completed
+            # The provider's only slot was released
+            answer = await asyncio.wait_for(clients.complete(provider, MESSAGES, ""), 2)
+            await clients.aclose()
+            return disconnects, completed, answer, clients.snapshot()
+
+    disconnects, completed, answer, stats = asyncio.run(main())
+    assert disconnects == 1 and completed == 0
+    assert answer == "".join(WORDS)
+    assert stats["local-1"]["cancelled"] == 1 and stats["local-1"]["completed"] == 1
+
+
+def test_changed_credentials_get_a_new_client():
+    pytest.importorskip("aiohttp")
+
+    async def main():
+        clients = ProviderClients()
+        async with FakeLlamaServer() as server:
+            provider = local_provider(server)
+            await clients.complete(provider, MESSAGES, "")
+            old = clients._clients["local-1"].client
+            moved = {**provider, "endpoint": server.endpoint + "/"}
+            await clients.complete(moved, MESSAGES, "")
+            new = clients._clients["local-1"].client
+            await asyncio.sleep(0)
+            old_closed = old.closed
+            clients.forget("local-1")
+            await asyncio.sleep(0)
+            return old is not new, old_closed, new.closed, clients.snapshot()
+
+    replaced, old_closed, new_closed, stats = asyncio.run(main())
+    assert replaced and old_closed and new_closed
+    assert stats == {}
+
+
+def test_rotated_gemini_key_stops_serializing_once_closed():
+    async def main():
+        clients = ProviderClients()
+        gemini = {"id": "gemini-1", "name": "gemini", "model": "gemini-pro", "api_key": "old"}
+        old = clients._client(gemini)
+        old.active = 1
+        clients._client({**gemini, "api_key": "new"})
+        # A request is still running on the old key
+        during = sorted(clients._gemini_keys.values())
+        old.active = 0
+        await clients._close(old)
+        after = sorted(clients._gemini_keys.values())
+        clients.forget("gemini-1")
+        await asyncio.sleep(0)
+        return during, after, clients._gemini_keys
+
+    during, after, remaining = asyncio.run(main())
+    assert during == ["new", "old"]
+    assert after == ["new"]
+    assert remaining == {}
@@ -0,0 +1,187 @@
+import asyncio
+import io
+import sys
+import tarfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from project_files import ProjectFiles, content_hash, manifest_entries, normalize_path
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, key, direction):
+        self.cursor = self.cursor.sort(key, direction)
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.cursor:
+            await asyncio.sleep(0)
+            yield doc
+
+
+class AsyncCollection:
+    """Motor-style awaitable facade over a mongomock collection that counts writes."""
+
+    def __init__(self, collection, writes):
+        self.collection = collection
+        self.writes = writes
+
+    def find(self, *args):
+        return AsyncCursor(self.collection.find(*args))
+
+    async def find_one(self, *args):
+        return self.collection.find_one(*args)
+
+    async def insert_one(self, doc):
+        return self.collection.insert_one(dict(doc))
+
+    async def update_one(self, query, update, upsert=False):
+        self.writes.append((self.collection.name, update))
+        return self.collection.update_one(query, update, upsert=upsert)
+
+    async def delete_one(self, query):
+        return self.collection.delete_one(query)
+
+    async def delete_many(self, query):
+        return self.collection.delete_many(query)
+
+    async def create_index(self, keys, **kwargs):
+        return self.collection.create_index(keys, **kwargs)
+
+
+class AsyncDatabase:
+    def __init__(self):
+        mongomock = pytest.importorskip("mongomock")
+        self.writes = []
+        self.sync = mongomock.MongoClient().db
+        self.code_projects = AsyncCollection(self.sync.code_projects, self.writes)
+        self.code_project_files = AsyncCollection(self.sync.code_project_files, self.writes)
+
+
+@pytest.fixture
+def db():
+    db = AsyncDatabase()
+    db.sync.code_projects.insert_one({"id": "p1", "name": "Shop", "language": "python"})
+    db.sync.code_projects.insert_one({"id": "p2", "name": "Empty", "language": "python"})
+    return db
+
+
+def project(db, project_id="p1"):
+    return db.sync.code_projects.find_one({"id": project_id}, {"_id": 0})
+
+
+def test_saving_one_file_writes_only_that_file(db):
+    store = ProjectFiles(db)
+    big = "x" * 1_000_000
+
+    async def main():
+        await store.ensure_indexes()
+        await store.put_many("p1", {f"src/module{i}.py": big for i in range(20)})
+        db.writes.clear()
+        entry = await store.put("p1", "src/app.config.js", "export default {}\n")
+        saved = list(db.writes)
+        await store.put("p1", "src/app.config.js", "export default { debug: true }\n")
+        deleted = await store.delete("p1", "src/module3.py")
+        missing = await store.delete("p1", "src/module3.py")
+        content = await store.get("p1", "src/app.config.js")
+        return entry, saved, deleted, missing, content
+
+    entry, saved, deleted, missing, content = asyncio.run(main())
+    assert entry == {"path": "src/app.config.js", "size": 18, "hash": content_hash("export default {}\n")}
+    # One file document and one manifest entry; nothing close to the megabytes in the project
+    assert [name for name, _ in saved] == ["code_project_files", "code_projects"]
+    assert sum(len(str(update)) for _, update in saved) < 1000
+    assert deleted and not missing
+    assert content == "export default { debug: true }\n"
+
+    doc = project(db)
+    assert "files" not in doc
+    manifest = manifest_entries(doc)
+    assert [e["path"] for e in manifest] == sorted(["src/app.config.js"] + [f"src/module{i}.py" for i in range(20) if i != 3])
+    assert manifest[0]["hash"] == content_hash(content) and manifest[-1]["size"] == 1_000_000
+    assert db.sync.code_project_files.count_documents({"project_id": "p1"}) == 20
+
+
+def test_missing_project_and_replace_all(db):
+    store = ProjectFiles(db)
+
+    async def main():
+        orphan = await store.put("nope", "a.py", "print(1)")
+        await store.put_many("p2", {"a.py": "a", "b.py": "b", "c/d.py": "d"})
+        await store.replace_all("p2", {"b.py": "B", "e.py": "e"})
+        return orphan, await store.read_all("p2")
+
+    orphan, files = asyncio.run(main())
+    assert orphan is None
+    assert db.sync.code_project_files.count_documents({"project_id": "nope"}) == 0
+    assert files == {"b.py": "B", "e.py": "e"}
+    assert [e["path"] for e in manifest_entries(project(db, "p2"))] == ["b.py", "e.py"]
+
+
+def test_migration_moves_embedded_files(db):
+    db.sync.code_projects.insert_one({"id": "legacy", "name": "Old", "language": "js",
+                                      "files": {"index.js": "console.log(1)", "lib/util.js": "export {}"}})
+    store = ProjectFiles(db)
+
+    async def main():
+        first = await store.migrate()
+        second = await store.migrate()
+        return first, second, await store.read_all("legacy")
+
+    first, second, files = asyncio.run(main())
+    assert (first, second) == (1, 0)
+    assert files == {"index.js": "console.log(1)", "lib/util.js": "export {}"}
+    doc = project(db, "legacy")
+    assert "files" not in doc
+    assert [e["path"] for e in manifest_entries(doc)] == ["index.js", "lib/util.js"]
+
+
+def test_tar_export_and_import(db):
+    store = ProjectFiles(db)
+    files = {"README.md": "# Shop\n", "src/main.py": "print('hi')\n", "src/pkg/__init__.py": "",
+             "data/fixtures.json": "[" + ",".join(["{}"] * 50000) + "]"}
+
+    async def main():
+        await store.put_many("p1", files)
+        chunks = [chunk async for chunk in store.export_tar("p1")]
+
+        extra = io.BytesIO()
+        with tarfile.open(fileobj=extra, mode="w:gz") as archive:
+            for name, data in [("./docs/guide.md", b"guide"), ("../evil.sh", b"rm -rf /"),
+                               ("logo.png", b"\x89PNG\r\n\x1a\n\xff\xfe")]:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        extra.seek(0)
+
+        await store.put("p2", "stale.txt", "old")
+        imported = await store.import_tar("p2", io.BytesIO(b"".join(chunks)), replace=True)
+        merged = await store.import_tar("p2", extra)
+        return chunks, imported, merged, await store.read_all("p2")
+
+    chunks, imported, merged, result = asyncio.run(main())
+    # Streamed file by file rather than built in one piece
+    assert len(chunks) > 1 and max(map(len, chunks)) < len(b"".join(chunks))
+    with tarfile.open(fileobj=io.BytesIO(b"".join(chunks))) as archive:
+        assert sorted(archive.getnames()) == sorted(files)
+
+    assert imported == {"imported": 4, "skipped": []}
+    assert merged == {"imported": 1, "skipped": ["../evil.sh", "logo.png"]}
+    assert result == {**files, "docs/guide.md": "guide"}
+
+
+def test_normalize_path():
+    assert normalize_path("./src//a.py") == "src/a.py"
+    assert normalize_path("/etc/passwd") == "etc/passwd"
+    assert normalize_path("src\\win.py") == "src/win.py"
+    assert normalize_path("a/../../b") is None
+    assert normalize_path("..") is None
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark the in-process file tools against the shell commands they replaced.
+
+Builds a synthetic tree (100k small text files by default, spread over
+nested directories, one flat directory holding a fifth of them, a large log
+file and some binary files), then times each tool both ways:
+the shell command the tool used to run through execute_shell_command, and
+the native implementation now behind the tool.
+
+Reports median and p95 latency per operation. The tree is removed afterwards
+unless --keep is given.
+
+Usage:
+    python fs_benchmark.py [--files 100000] [--repeat 20] [--root /tmp/fs-bench]
+"""
+import argparse
+import asyncio
+import logging
+import math
+import os
+import random
+import shlex
+import shutil
+import statistics
+import tempfile
+import time
+
+from tools.file_tools import read_file
+from tools.filesystem_tools import file_info, find_files, list_directory
+from tools.shell_tools import execute_shell_command
+from tools.text_tools import grep_search
+
+WORDS = ["alpha", "beta", "gamma", "delta", "kernel", "socket", "buffer", "thread", "packet", "route"]
+
+
+def build_tree(root: str, files: int, rng: random.Random) -> dict:
+    """Create the synthetic tree and return the paths the benchmarks use."""
+    flat = os.path.join(root, "flat")
+    os.makedirs(flat)
+    flat_count = files // 5
+    for i in range(flat_count):
+        with open(os.path.join(flat, f"file{i:06d}.txt"), "w") as f:
+            f.write(" ".join(rng.choice(WORDS) for _ in range(20)) + "\n")
+
+    nested = os.path.join(root, "nested")
+    for i in range(files - flat_count):
+        directory = os.path.join(nested, f"d{i % 50:02d}", f"e{i % 997 % 20:02d}")
+        os.makedirs(directory, exist_ok=True)
+        suffix = ".py" if i % 10 == 0 else ".txt"
+        with open(os.path.join(directory, f"f{i:06d}{suffix}"), "w") as f:
+            for line in range(rng.randint(1, 8)):
+                text = " ".join(rng.choice(WORDS) for _ in range(12))
+                if i % 997 == 0 and line == 0:
+                    text += " FATAL needle"
+                f.write(text + "\n")
+        if i % 5000 == 0:
+            with open(os.path.join(directory, f"blob{i}.bin"), "wb") as f:
+                f.write(b"\x00FATAL needle" + os.urandom(4096))
+
+    log = os.path.join(root, "big.log")
+    with open(log, "w") as f:
+        for line in range(2_000_000):
+            f.write(f"{line} {rng.choice(WORDS)} request handled in {rng.randint(1, 999)}ms\n")
+    return {"root": root, "flat": flat, "nested": nested, "log": log}
+
+
+def shell(command: str) -> tuple:
+    return execute_shell_command, {"command": command, "timeout": 600}
+
+
+def cases(paths: dict) -> list[tuple[str, tuple, tuple]]:
+    """(name, old shell call, native tool call) per benchmarked operation."""
+    q = shlex.quote
+    return [
+        ("read_file head 20",
+         shell(f"head -n 20 {q(paths['log'])}"),
+         (read_file, {"path": paths["log"], "mode": "head", "lines": 20})),
+        ("read_file tail 20",
+         shell(f"tail -n 20 {q(paths['log'])}"),
+         (read_file, {"path": paths["log"], "mode": "tail", "lines": 20})),
+        ("read_file lines 1000-1100",
+         shell(f"sed -n '1000,1100p' {q(paths['log'])}"),
+         (read_file, {"path": paths["log"], "start_line": 1000, "end_line": 1100})),
+        ("read_file 64K byte range",
+         shell(f"tail -c +1000001 {q(paths['log'])} | head -c 65536"),
+         (read_file, {"path": paths["log"], "offset": 1000000, "length": 65536})),
+        ("list_directory flat (page of 1000)",
+         shell(f"ls -l -h {q(paths['flat'])}"),
+         (list_directory, {"path": paths["flat"]})),
+        ("find_files *.py",
+         shell(f"find {q(paths['root'])} -name '*.py' -type f"),
+         (find_files, {"path": paths["root"], "name_pattern": "*.py", "file_type": "f", "limit": 1000000})),
+        ("file_info",
+         shell(f"file {q(paths['log'])} && echo '---' && stat {q(paths['log'])} && echo '---' && ls -lhd {q(paths['log'])}"),
+         (file_info, {"path": paths["log"]})),
+        ("grep_search -r needle",
+         shell(f"grep -r -n needle {q(paths['nested'])}"),
+         (grep_search, {"pattern": "needle", "path": paths["nested"], "recursive": True})),
+        ("grep_search -r first 10 matches",
+         shell(f"grep -r -n -m 10 FATAL {q(paths['nested'])} | head -n 10"),
+         (grep_search, {"pattern": "FATAL", "path": paths["nested"], "recursive": True, "max_matches": 10})),
+    ]
+
+
+async def measure(call: tuple, repeat: int) -> dict:
+    function, arguments = call
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await function(dict(arguments))
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "median_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[max(math.ceil(len(latencies) * 0.95) - 1, 0)] * 1000,
+    }
+
+
+async def run(paths: dict, repeat: int):
+    print(f"{'operation':<36}{'shell median':>14}{'native median':>15}{'shell p95':>11}{'native p95':>12}{'speedup':>9}")
+    for name, old, new in cases(paths):
+        # One untimed pass each so both paths start with a warm page cache
+        await old[0](dict(old[1]))
+        await new[0](dict(new[1]))
+        before = await measure(old, repeat)
+        after = await measure(new, repeat)
+        print(f"{name:<36}{before['median_ms']:>12.2f}ms{after['median_ms']:>13.2f}ms"
+              f"{before['p95_ms']:>9.2f}ms{after['p95_ms']:>10.2f}ms"
+              f"{before['median_ms'] / after['median_ms']:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--root", help="Directory to build the tree in (default: a new temp dir)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated tree")
+    args = parser.parse_args()
+    # The tools log every call
+    logging.basicConfig(level=logging.WARNING)
+
+    root = args.root or tempfile.mkdtemp(prefix="fs-bench-")
+    os.makedirs(root, exist_ok=True)
+    try:
+        started = time.perf_counter()
+        paths = build_tree(root, args.files, random.Random(7))
+        print(f"built {args.files} files under {root} in {time.perf_counter() - started:.1f}s")
+        asyncio.run(run(paths, args.repeat))
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,30 +4,16 @@ MCP Server for Kali Linux - Complete Edition
 Provides comprehensive Linux system management capabilities.
 """
 import asyncio
+import json
 from typing import Any
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
 from mcp.server.stdio import stdio_server
-from mcp.types import TextContent
+from mcp.types import Resource, TextContent
 import logging
 
-# Import tool modules
-from tools import (
-    register_shell_tools,
-    handle_shell_tools,
-    register_file_tools,
-    handle_file_tools,
-    register_filesystem_tools,
-    handle_filesystem_tools,
-    register_text_tools,
-    handle_text_tools,
-    register_network_tools,
-    handle_network_tools,
-    register_archive_tools,
-    handle_archive_tools,
-    register_system_tools,
-    handle_system_tools,
-)
+from tools import ToolRegistry, close_shell_sessions
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,61 +22,45 @@ logger = logging.getLogger("mcp-kali-server")
 # Create server instance
 server = Server("kali-linux-tools")
 
+# Every tool, its handler, argument validator and limits, built once at startup
+registry = ToolRegistry()
+
+METRICS_URI = "metrics://tools"
+
 
 @server.list_tools()
 async def handle_list_tools():
     """List all available tools from all modules."""
-    tools = []
-    
-    # Collect tools from all modules
-    tools.extend(register_shell_tools())
-    tools.extend(register_file_tools())
-    tools.extend(register_filesystem_tools())
-    tools.extend(register_text_tools())
-    tools.extend(register_network_tools())
-    tools.extend(register_archive_tools())
-    tools.extend(register_system_tools())
-    
-    logger.info(f"Registered {len(tools)} tools")
-    return tools
+    return registry.tools()
 
 
-@server.call_tool()
+# The registry validates arguments with validators compiled at startup
+@server.call_tool(validate_input=False)
 async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
-    """Route tool calls to appropriate handler."""
+    """Dispatch a tool call through the registry."""
     logger.info(f"Tool called: {name}")
-    
-    # Try each module's handler
-    result = await handle_shell_tools(name, arguments)
-    if result is not None:
-        return result
-    
-    result = await handle_file_tools(name, arguments)
-    if result is not None:
-        return result
-    
-    result = await handle_filesystem_tools(name, arguments)
-    if result is not None:
-        return result
-    
-    result = await handle_text_tools(name, arguments)
-    if result is not None:
-        return result
-    
-    result = await handle_network_tools(name, arguments)
-    if result is not None:
-        return result
-    
-    result = await handle_archive_tools(name, arguments)
-    if result is not None:
-        return result
-    
-    result = await handle_system_tools(name, arguments)
-    if result is not None:
-        return result
-    
-    # Tool not found
-    raise ValueError(f"Unknown tool: {name}")
+    return await registry.call(name, arguments)
+
+
+@server.list_resources()
+async def handle_list_resources() -> list[Resource]:
+    """List the server's own resources."""
+    return [
+        Resource(
+            uri=METRICS_URI,
+            name="tool-metrics",
+            description="Per-tool call counts, errors, timeouts, concurrency and latency percentiles",
+            mimeType="application/json",
+        )
+    ]
+
+
+@server.read_resource()
+async def handle_read_resource(uri) -> list[ReadResourceContents]:
+    """Read a server resource."""
+    if str(uri) != METRICS_URI:
+        raise ValueError(f"Unknown resource: {uri}")
+    return [ReadResourceContents(content=json.dumps(registry.metrics(), indent=2), mime_type="application/json")]
 
 
 async def main():
@@ -108,19 +78,22 @@ async def main():
     logger.info("  • System Tools (ps/kill/systemctl/resources)")
     logger.info("=" * 70)
     
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="kali-linux-tools",
-                server_version="4.0.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={}
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="kali-linux-tools",
+                    server_version="4.0.0",
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={}
+                    )
                 )
             )
-        )
+    finally:
+        await close_shell_sessions()
 
 
 if __name__ == "__main__":
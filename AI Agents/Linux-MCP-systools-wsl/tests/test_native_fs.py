@@ -0,0 +1,165 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+pytest.importorskip("mcp")
+
+from tools import native_fs
+from tools.file_tools import read_file
+from tools.filesystem_tools import list_directory
+from tools.text_tools import grep_search
+
+pytestmark = pytest.mark.skipif(shutil.which("grep") is None, reason="needs coreutils and grep")
+
+
+def bash(command):
+    """What the tools used to run, with C collation so ls sorts like the native listing."""
+    return subprocess.run(["bash", "-c", command], capture_output=True, check=True,
+                          env={**os.environ, "LC_ALL": "C"}).stdout.decode("utf-8", errors="replace")
+
+
+def tool(handler, **arguments):
+    return asyncio.run(handler(arguments))[0].text
+
+
+def grep_rows(path, pattern, **arguments):
+    """grep_search output without its summary line, as grep would print it."""
+    text = tool(grep_search, pattern=pattern, path=str(path), **arguments)
+    return text.rsplit("\n", 1)[0] + "\n" if "\n" in text else ""
+
+
+@pytest.fixture
+def numbered(tmp_path):
+    """Lines larger than the first read, with blank lines and a trailing line without newline."""
+    lines = []
+    for n in range(1, 12001):
+        lines.append("" if n % 7 == 0 else f"line{n:06d}")
+    path = tmp_path / "numbered.txt"
+    path.write_text("\n".join(lines) + "\nno newline at the end")
+    assert path.stat().st_size > native_fs.FIRST_READ
+    return path
+
+
+@pytest.mark.parametrize("arguments, command", [
+    ({}, "cat {path}"),
+    ({"mode": "head", "lines": 25}, "head -n 25 {path}"),
+    ({"mode": "tail", "lines": 25}, "tail -n 25 {path}"),
+    ({"mode": "tail", "lines": 1}, "tail -n 1 {path}"),
+    ({"start_line": 6990, "end_line": 7010}, "sed -n '6990,7010p' {path}"),
+    ({"start_line": 11995}, "sed -n '11995,$p' {path}"),
+    ({"offset": 70000, "length": 300}, "tail -c +70001 {path} | head -c 300"),
+])
+def test_read_file_matches_coreutils(numbered, arguments, command):
+    expected = bash(command.format(path=numbered))
+    assert tool(read_file, path=str(numbered), max_bytes=10 ** 6, **arguments).startswith(expected)
+    if "offset" not in arguments:
+        assert tool(read_file, path=str(numbered), max_bytes=10 ** 6, **arguments) == expected
+
+
+def test_tail_of_a_file_ending_in_blank_lines(tmp_path):
+    path = tmp_path / "blank.txt"
+    path.write_text("a\nb\n\n\n")
+    for count in (1, 2, 3, 10):
+        assert tool(read_file, path=str(path), mode="tail", lines=count) == bash(f"tail -n {count} {path}")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    for directory in ["b", "a/nested", "a/nested/deeper", "C", ".hidden"]:
+        (root / directory).mkdir(parents=True)
+    for name in ["z.txt", "B.md", "a/one", "a/nested/two", "a/nested/deeper/three", ".dotfile", ".hidden/x"]:
+        (root / name).write_text(name)
+    return root
+
+
+def test_list_directory_matches_ls(tree):
+    assert tool(list_directory, path=str(tree), long_format=False) == bash(f"ls -1 {tree}").rstrip("\n")
+    assert tool(list_directory, path=str(tree), long_format=False, show_hidden=True) == \
+        bash(f"ls -1A {tree}").rstrip("\n")
+
+
+def test_recursive_listing_matches_ls_R(tree):
+    # The native listing also ends its last directory with a blank line
+    native = tool(list_directory, path=str(tree), long_format=False, recursive=True)
+    assert native.rstrip("\n") == bash(f"ls -1R {tree}").rstrip("\n")
+
+
+def test_long_listing_names_and_sizes_match_ls(tree):
+    native = tool(list_directory, path=str(tree), human_readable=False).splitlines()
+    shell = bash(f"ls -l {tree}").splitlines()[1:]
+    # Column widths differ; mode, links, size and name must agree
+    fields = lambda line: (line.split()[0], line.split()[1], line.split()[4], line.split()[-1])
+    assert [fields(line) for line in native] == [fields(line) for line in shell]
+
+
+def test_list_directory_pages_through_the_ls_order(tree):
+    names = bash(f"ls -1A {tree}").split()
+    first = tool(list_directory, path=str(tree), long_format=False, show_hidden=True, limit=3).splitlines()
+    assert first[:-1] == names[:3]
+    assert first[-1] == f"[entries 1-3 of {len(names)}; next page: offset=3]"
+    rest = tool(list_directory, path=str(tree), long_format=False, show_hidden=True, offset=3, limit=100)
+    assert rest.splitlines() == names[3:]
+
+
+@pytest.mark.parametrize("pattern, arguments, flags", [
+    ("line0000[0-9]5", {}, ""),
+    ("^$", {"max_matches": 50}, "-m 50"),
+    ("LINE00595", {"ignore_case": True}, "-i"),
+    ("line0059(55|65)", {"context_lines": 2}, "-C 2"),
+    ("line0059(55|65)", {"context_lines": 3}, "-C 3"),
+    ("line01[01]", {"context_lines": 1, "max_matches": 5}, "-C 1 -m 5"),
+    ("no newline", {"context_lines": 2}, "-C 2"),
+    ("line00", {"invert_match": True, "context_lines": 1, "max_matches": 10 ** 5}, "-v -C 1"),
+])
+def test_grep_matches_gnu_grep(numbered, pattern, arguments, flags):
+    expected = bash(f"grep -n -E {flags} '{pattern}' {numbered} || true")
+    assert grep_rows(numbered, pattern, **arguments) == expected
+
+
+def test_context_before_a_match_keeps_blank_lines(tmp_path):
+    # The first read ends in three blank lines and has no match, so it is skipped whole
+    lines = [f"line{n:06d}" for n in range(1, (native_fs.FIRST_READ - 3) // 11 + 1)]
+    padding = native_fs.FIRST_READ - 3 - 11 * len(lines) - 1
+    head = "\n".join(lines + ["x" * padding, "", "", ""]) + "\n"
+    assert len(head) == native_fs.FIRST_READ
+    path = tmp_path / "blanks.txt"
+    path.write_text(head + "MATCH\nafter\n")
+
+    expected = bash(f"grep -n -C 5 MATCH {path}")
+    assert expected.splitlines()[2:5] == [f"{len(lines) + n}-" for n in (2, 3, 4)]
+    assert grep_rows(path, "MATCH", context_lines=5) == expected
+
+
+def test_recursive_grep_matches_gnu_grep(monkeypatch, tree, numbered):
+    (tree / "a" / "nested" / "copy.txt").write_bytes(numbered.read_bytes())
+    monkeypatch.chdir(tree)
+
+    # Paths are named relative to the root given, like grep; file order may differ
+    expected = bash("grep -rn -E 'line00000[1-3]|one|three' . | sort")
+    native = grep_rows(".", "line00000[1-3]|one|three", recursive=True)
+    assert sorted(native.splitlines()) == expected.splitlines()
+
+
+def test_binary_files_are_skipped_like_grep_I(monkeypatch, tmp_path):
+    binary = tmp_path / "data.bin"
+    binary.write_bytes(b"match\x00\x01\x02\nmatch again\n")
+    text = tmp_path / "text.txt"
+    text.write_text("match\n")
+
+    assert bash(f"grep -c match {binary}") == "2\n"
+    assert bash(f"grep -I -n match {binary} || true") == ""
+    assert grep_rows(binary, "match") == ""
+    assert "1 binary files skipped" in tool(grep_search, pattern="match", path=str(binary))
+
+    monkeypatch.chdir(tmp_path)
+    expected = bash("grep -rIn match . | sort")
+    assert sorted(grep_rows(".", "match", recursive=True).splitlines()) == expected.splitlines()
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+pytest.importorskip("mcp")
+
+from tools import native_net
+from tools.network_tools import dns_lookup, ping_host, port_scan
+
+
+def free_port() -> int:
+    """A localhost port nothing listens on (connects are refused)."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def listeners():
+    """A server that greets like SSH and one that waits for the client to speak."""
+    async def greet(reader, writer):
+        writer.write(b"SSH-2.0-TestServer\r\n")
+        await writer.drain()
+        await reader.read()
+        writer.close()
+
+    async def silent(reader, writer):
+        await reader.read()
+        writer.close()
+
+    greeter = await asyncio.start_server(greet, "127.0.0.1", 0)
+    quiet = await asyncio.start_server(silent, "127.0.0.1", 0)
+    return greeter, quiet, greeter.sockets[0].getsockname()[1], quiet.sockets[0].getsockname()[1]
+
+
+def test_parse_ports():
+    assert native_net.parse_ports("80") == [80]
+    assert native_net.parse_ports("22, 80,8000-8002,80") == [22, 80, 8000, 8001, 8002]
+    assert len(native_net.parse_ports("1-65535")) == 65535
+    for spec in ["", "0", "65536", "90-80", "http", "1-2-3", "80,x"]:
+        with pytest.raises(ValueError):
+            native_net.parse_ports(spec)
+
+
+def test_scan_reports_open_closed_and_banners():
+    async def main():
+        greeter, quiet, greeting_port, quiet_port = await listeners()
+        closed_port = free_port()
+        try:
+            spec = f"{greeting_port},{quiet_port},{closed_port}"
+            result = await port_scan({"host": "127.0.0.1", "ports": spec, "grab_banners": True,
+                                      "banner_timeout": 0.3, "show_closed": True})
+            return json.loads(result[0].text), greeting_port, quiet_port, closed_port
+        finally:
+            greeter.close()
+            quiet.close()
+
+    report, greeting_port, quiet_port, closed_port = asyncio.run(main())
+    assert (report["host"], report["address"], report["ports_scanned"]) == ("127.0.0.1", "127.0.0.1", 3)
+    open_ports = {entry["port"]: entry for entry in report["open"]}
+    assert set(open_ports) == {greeting_port, quiet_port}
+    assert open_ports[greeting_port]["banner"] == "SSH-2.0-TestServer"
+    assert "banner" not in open_ports[quiet_port]
+    assert all(entry["state"] == "open" and entry["latency_ms"] >= 0 for entry in report["open"])
+    assert report["closed"] == [closed_port]
+    assert report["filtered"] == []
+    assert report["counts"] == {"open": 2, "closed": 1, "filtered": 0, "error": 0}
+
+
+def test_scan_of_a_range_with_more_ports_than_workers():
+    async def main():
+        greeter, quiet, greeting_port, quiet_port = await listeners()
+        try:
+            low = min(greeting_port, quiet_port)
+            ports = sorted({greeting_port, quiet_port, *range(low, min(low + 300, 65536))})
+            return await native_net.scan("127.0.0.1", ports, concurrency=16, timeout=1.0), greeting_port, quiet_port, ports
+        finally:
+            greeter.close()
+            quiet.close()
+
+    report, greeting_port, quiet_port, ports = asyncio.run(main())
+    assert report["ports_scanned"] == len(ports)
+    found = [entry["port"] for entry in report["open"]]
+    # Other processes may listen in the range too; ours must be there, in port order
+    assert {greeting_port, quiet_port} <= set(found)
+    assert found == sorted(found)
+    assert sum(report["counts"].values()) == len(ports)
+    assert "closed" not in report
+
+
+def test_port_scan_rejects_bad_ranges():
+    with pytest.raises(ValueError):
+        asyncio.run(port_scan({"host": "127.0.0.1", "ports": "70000"}))
+
+
+def test_unresolvable_host_is_an_error_result():
+    # An over-long label fails to encode before any query is sent
+    result = asyncio.run(port_scan({"host": "a" * 64 + ".example", "ports": "80"}))
+    assert result[0].text.startswith("Error resolving")
+
+
+def test_tcp_ping_counts_answers():
+    async def main():
+        greeter, quiet, greeting_port, _ = await listeners()
+        try:
+            up = await ping_host({"host": "127.0.0.1", "method": "tcp", "port": greeting_port, "count": 3})
+            refused = await ping_host({"host": "127.0.0.1", "method": "tcp", "port": free_port(), "count": 2})
+            return json.loads(up[0].text), json.loads(refused[0].text)
+        finally:
+            greeter.close()
+            quiet.close()
+
+    up, refused = asyncio.run(main())
+    assert (up["sent"], up["received"], up["loss_percent"]) == (3, 3, 0.0)
+    assert [probe["seq"] for probe in up["probes"]] == [1, 2, 3]
+    assert up["rtt_ms"]["min"] <= up["rtt_ms"]["avg"] <= up["rtt_ms"]["max"]
+    # A refused connect still means the host is up
+    assert refused["received"] == 2
+    assert all(probe["state"] == "closed" for probe in refused["probes"])
+
+
+def test_batched_resolution():
+    hosts = ["localhost", "127.0.0.1", "a" * 64 + ".example", "::1"]
+    result = asyncio.run(dns_lookup({"domains": hosts, "record_type": "A"}))
+    records = json.loads(result[0].text)
+    assert [record["host"] for record in records] == hosts
+    localhost, literal, bad, ipv6_literal = records
+    assert {"address": "127.0.0.1", "family": "IPv4"} in localhost["addresses"]
+    assert literal["addresses"] == [{"address": "127.0.0.1", "family": "IPv4"}]
+    assert "error" in bad and "addresses" not in bad
+    # An IPv6 literal has no A record
+    assert "error" in ipv6_literal
+
+    result = asyncio.run(dns_lookup({"domain": "::1", "record_type": "AAAA"}))
+    assert json.loads(result[0].text)[0]["addresses"] == [{"address": "::1", "family": "IPv6"}]
+
+
+def test_dns_lookup_requires_a_domain():
+    with pytest.raises(ValueError):
+        asyncio.run(dns_lookup({"domains": []}))
@@ -0,0 +1,228 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+pytest.importorskip("mcp")
+pytest.importorskip("jsonschema")
+
+from jsonschema.exceptions import SchemaError
+from mcp.types import TextContent, Tool
+
+from tools import registry as registry_module
+from tools.registry import TOOL_LIMITS, ToolRegistry
+
+ECHO_SCHEMA = {
+    "type": "object",
+    "properties": {"text": {"type": "string"}, "times": {"type": "integer", "minimum": 1}},
+    "required": ["text"],
+}
+
+
+def definition(name, schema=None):
+    return Tool(name=name, description=name, inputSchema=schema or {"type": "object", "properties": {}})
+
+
+def text(value):
+    return [TextContent(type="text", text=value)]
+
+
+class Handlers:
+    """A category of fake tools recording the calls they get."""
+
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    async def echo(self, arguments):
+        self.calls.append(("echo", arguments))
+        return text(arguments["text"] * arguments.get("times", 1))
+
+    async def slow(self, arguments):
+        self.calls.append(("slow", arguments))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(arguments.get("seconds", 0.05))
+        finally:
+            self.active -= 1
+        return text("done")
+
+    async def broken(self, arguments):
+        raise RuntimeError("boom")
+
+    async def failing(self, arguments):
+        return text("Error: nothing to do")
+
+    def category(self):
+        tools = [definition("echo", ECHO_SCHEMA), definition("slow"), definition("broken"), definition("failing")]
+        return (lambda: tools, lambda: {tool.name: getattr(self, tool.name) for tool in tools})
+
+
+def make_registry(handlers, limits=None):
+    return ToolRegistry([handlers.category()], limits={} if limits is None else limits)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_default_registry_lists_every_tool_once():
+    registry = ToolRegistry()
+    names = [tool.name for tool in registry.tools()]
+
+    expected = [tool.name for register, _ in registry_module.CATEGORIES for tool in register()]
+    assert names == expected
+    assert len(set(names)) == len(names)
+    # Limits for a misspelled tool name would silently never apply
+    assert set(TOOL_LIMITS) <= set(names)
+
+
+def test_default_registry_dispatches_by_name(tmp_path):
+    path = tmp_path / "hello.txt"
+    path.write_text("hello\n")
+    registry = ToolRegistry()
+
+    result = run(registry.call("read_file", {"path": str(path)}))
+
+    assert result[0].text == "hello\n"
+    assert registry.metrics()["read_file"]["completed"] == 1
+
+
+def test_calls_reach_the_named_handler():
+    handlers = Handlers()
+    registry = make_registry(handlers)
+
+    assert run(registry.call("echo", {"text": "ab", "times": 2}))[0].text == "abab"
+    assert run(registry.call("slow", {"seconds": 0}))[0].text == "done"
+    assert handlers.calls == [("echo", {"text": "ab", "times": 2}), ("slow", {"seconds": 0})]
+    assert [tool.name for tool in registry.tools()] == ["echo", "slow", "broken", "failing"]
+
+
+def test_unknown_tool_is_an_error():
+    handlers = Handlers()
+    registry = make_registry(handlers)
+
+    with pytest.raises(ValueError, match="Unknown tool: nope"):
+        run(registry.call("nope", {}))
+    assert handlers.calls == []
+    assert registry.metrics() == {}
+
+
+@pytest.mark.parametrize("tools, handlers, message", [
+    (["a", "a"], ["a"], "Duplicate tool: a"),
+    (["a", "b"], ["a"], "Tool has no handler: b"),
+    (["a"], ["a", "z", "y"], "Handlers without a tool definition: y, z"),
+])
+def test_mismatched_definitions_fail_at_startup(tools, handlers, message):
+    async def handler(arguments):
+        return text("")
+
+    category = (lambda: [definition(name) for name in tools], lambda: {name: handler for name in handlers})
+    with pytest.raises(ValueError, match=message):
+        ToolRegistry([category], limits={})
+
+
+def test_invalid_schema_fails_at_startup():
+    async def handler(arguments):
+        return text("")
+
+    category = (lambda: [definition("bad", {"type": "no such type"})], lambda: {"bad": handler})
+    with pytest.raises(SchemaError):
+        ToolRegistry([category], limits={})
+
+
+@pytest.mark.parametrize("arguments, message", [
+    ({}, "'text' is a required property"),
+    ({"text": 5}, "text: 5 is not of type 'string'"),
+    ({"text": "a", "times": 0}, "times: 0 is less than the minimum of 1"),
+])
+def test_arguments_are_validated_against_the_schema(arguments, message):
+    handlers = Handlers()
+    registry = make_registry(handlers)
+
+    with pytest.raises(ValueError) as error:
+        run(registry.call("echo", arguments))
+
+    assert str(error.value) == f"Invalid arguments for echo: {message}"
+    assert handlers.calls == []
+    stats = registry.metrics()["echo"]
+    assert (stats["calls"], stats["invalid_arguments"], stats["completed"]) == (1, 1, 0)
+
+
+def test_real_tool_schemas_reject_bad_arguments():
+    registry = ToolRegistry()
+
+    with pytest.raises(ValueError, match="Invalid arguments for read_file: path: 5 is not of type 'string'"):
+        run(registry.call("read_file", {"path": 5}))
+
+
+def test_per_tool_timeout():
+    handlers = Handlers()
+    registry = make_registry(handlers, {"slow": {"timeout": 0.05}})
+
+    result = run(registry.call("slow", {"seconds": 1}))
+
+    assert result[0].text == "Error: slow timed out after 0.05 seconds"
+    assert handlers.active == 0
+    stats = registry.metrics()["slow"]
+    assert (stats["timeouts"], stats["completed"], stats["in_flight"]) == (1, 0, 0)
+    # Other tools keep the default limit
+    assert run(registry.call("echo", {"text": "x"}))[0].text == "x"
+
+
+def test_timeout_can_depend_on_the_arguments():
+    handlers = Handlers()
+    registry = make_registry(handlers, {"slow": {"timeout": lambda args: args["seconds"] + 0.2}})
+
+    assert run(registry.call("slow", {"seconds": 0.05}))[0].text == "done"
+    assert registry.metrics()["slow"]["timeouts"] == 0
+    # Shell commands get their own timeout plus the grace period
+    execute_bash = ToolRegistry()._tools["execute_bash"]
+    assert execute_bash.timeout_for({"timeout": 5}) == 5 + registry_module.TIMEOUT_GRACE
+    assert execute_bash.timeout_for({}) == 30 + registry_module.TIMEOUT_GRACE
+
+
+def test_concurrency_is_limited_per_tool():
+    handlers = Handlers()
+    registry = make_registry(handlers, {"slow": {"concurrency": 2}})
+
+    async def main():
+        calls = [asyncio.create_task(registry.call("slow", {"seconds": 0.05})) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        queued = registry.metrics()["slow"]
+        await asyncio.gather(*calls)
+        return queued
+
+    queued = run(main())
+    assert handlers.peak == 2
+    assert (queued["in_flight"], queued["waiting"]) == (2, 3)
+    assert registry.metrics()["slow"]["concurrency"] == 2
+
+
+def test_metrics_count_outcomes_and_latency():
+    handlers = Handlers()
+    registry = make_registry(handlers)
+
+    for _ in range(3):
+        run(registry.call("echo", {"text": "x"}))
+    with pytest.raises(RuntimeError):
+        run(registry.call("broken", {}))
+    run(registry.call("failing", {}))
+
+    metrics = registry.metrics()
+    assert set(metrics) == {"echo", "broken", "failing"}
+    echo = metrics["echo"]
+    assert (echo["calls"], echo["completed"], echo["errors"], echo["timeouts"]) == (3, 3, 0, 0)
+    assert echo["latency_p50_ms"] is not None and echo["latency_p50_ms"] <= echo["latency_max_ms"]
+    assert echo["concurrency"] == registry_module.DEFAULT_LIMITS["concurrency"]
+    # A raised exception is an error that did not complete
+    assert (metrics["broken"]["errors"], metrics["broken"]["completed"]) == (1, 0)
+    # A handled failure reported as "Error..." completes and counts as an error
+    assert (metrics["failing"]["errors"], metrics["failing"]["completed"]) == (1, 1)
+    assert all(entry["in_flight"] == 0 and entry["waiting"] == 0 for entry in metrics.values())
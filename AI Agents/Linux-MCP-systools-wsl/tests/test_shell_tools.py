@@ -0,0 +1,201 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+pytest.importorskip("mcp")
+
+from mcp.server.lowlevel.server import request_ctx
+from mcp.shared.context import RequestContext
+from mcp.types import RequestParams
+
+from tools import shell_tools
+from tools.shell_tools import BoundedOutput, close_shell_sessions, execute_shell_command
+
+GIB = 1024 ** 3
+
+
+def run(arguments, shell="bash"):
+    return asyncio.run(execute_shell_command(arguments, shell=shell))[0].text
+
+
+def test_bounded_output_keeps_head_and_tail():
+    output = BoundedOutput(4, 6)
+    for piece in [b"ab", b"cdef", b"x" * 1000, b"123456"]:
+        output.write(piece)
+    assert output.total == 1012
+    assert output.text() == "abcd\n... [1002 bytes elided; 1012 bytes total] ...\n123456"
+
+    short = BoundedOutput(4, 6)
+    short.write(b"abcdefgh")
+    assert short.text() == "abcdefgh"
+
+
+def test_one_gigabyte_of_output_under_a_flat_memory_ceiling():
+    # A fresh interpreter, so ru_maxrss is this command's peak and not the test run's
+    script = textwrap.dedent(f"""
+        import asyncio, resource, sys
+        sys.path.insert(0, {str(ROOT)!r})
+        from tools.shell_tools import execute_shell_command
+
+        async def main():
+            before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            result = await execute_shell_command({{
+                "command": "head -c {GIB} /dev/zero | tr '\\\\0' x; head -c {GIB} /dev/zero | tr '\\\\0' y >&2",
+                "timeout": 300,
+                "max_output_bytes": 1000,
+            }})
+            after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            print(after - before)
+            print(result[0].text)
+
+        asyncio.run(main())
+    """)
+    completed = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=600)
+    assert completed.returncode == 0, completed.stderr
+    growth_kb, text = completed.stdout.split("\n", 1)
+    # 2 GiB passed through; peak memory grew by a few MB at most
+    assert int(growth_kb) < 32 * 1024
+    assert text.startswith("Exit Code: 0")
+    assert f"STDOUT:\n{'x' * 500}\n... [{GIB - 1000} bytes elided; {GIB} bytes total] ...\n{'x' * 500}\n" in text
+    assert f"STDERR:\n{'y' * 500}\n... [{GIB - 1000} bytes elided" in text
+
+
+def test_timeout_kills_the_whole_process_group(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    started = time.monotonic()
+    text = run({"command": f"echo started; sleep 300 & echo $! > {pid_file}; wait", "timeout": 1})
+    assert time.monotonic() - started < 10
+    assert text.startswith("Error: Command timed out after 1 seconds (process group killed)")
+    assert "STDOUT:\nstarted" in text
+
+    child = int(pid_file.read_text())
+    time.sleep(0.2)
+    with pytest.raises(ProcessLookupError):
+        os.kill(child, 0)
+
+
+def test_cancelled_call_kills_the_process_group(tmp_path):
+    pid_file = tmp_path / "child.pid"
+
+    async def main():
+        task = asyncio.create_task(execute_shell_command(
+            {"command": f"sleep 300 & echo $! > {pid_file}; wait", "timeout": 60}))
+        while not pid_file.exists() or not pid_file.read_text().strip():
+            await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    time.sleep(0.2)
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+
+def test_session_keeps_directory_and_environment(tmp_path):
+    async def main():
+        try:
+            results = []
+            for arguments in [
+                {"command": f"cd {tmp_path} && export GREETING=hello && counter=41", "session": "s1"},
+                {"command": "pwd; echo $GREETING $((counter + 1))", "session": "s1"},
+                {"command": "if then", "session": "s1"},
+                {"command": "printf 'no newline'; echo oops >&2; false", "session": "s1"},
+                {"command": "pwd", "session": "other"},
+                {"command": "echo $GREETING", "session": "s1", "reset_session": True},
+                {"command": "exit 3", "session": "s1"},
+                {"command": "echo $GREETING; sleep 5", "session": "s1", "timeout": 1},
+            ]:
+                result = await execute_shell_command(arguments)
+                results.append(result[0].text)
+            return results, list(shell_tools._sessions)
+        finally:
+            await close_shell_sessions()
+
+    results, open_sessions = asyncio.run(main())
+    setup, recall, syntax_error, failing, other, reset, exited, timed_out = results
+    assert setup == "Exit Code: 0\n\n"
+    assert recall == f"Exit Code: 0\n\nSTDOUT:\n{tmp_path}\nhello 42\n\n"
+    # A syntax error is reported and the session carries on
+    assert syntax_error.startswith("Exit Code: 2") and "syntax error" in syntax_error
+    assert failing == "Exit Code: 1\n\nSTDOUT:\nno newline\nSTDERR:\noops\n\n"
+    assert str(tmp_path) not in other
+    assert reset == "Exit Code: 0\n\nSTDOUT:\n\n\n"
+    assert "Session 's1' ended" in exited
+    assert timed_out.startswith("Error: Command timed out after 1 seconds (process group killed; the session was reset)")
+    assert open_sessions == [("bash", "other")]
+
+
+def test_concurrent_calls_share_one_session(monkeypatch):
+    started = []
+    start = shell_tools.ShellSession.start
+
+    async def recording_start(shell, use_login_shell=False):
+        session = await start(shell, use_login_shell)
+        started.append(session)
+        return session
+
+    monkeypatch.setattr(shell_tools.ShellSession, "start", staticmethod(recording_start))
+
+    async def main():
+        try:
+            first = await asyncio.gather(*[
+                execute_shell_command({"command": f"echo $$ {i}", "session": "s1"}) for i in range(5)
+            ])
+            # A reset arriving while a command runs waits for it instead of killing the shell under it
+            slow = asyncio.create_task(execute_shell_command({"command": "sleep 0.5; echo finished", "session": "s1"}))
+            await asyncio.sleep(0.1)
+            reset = await execute_shell_command({"command": "echo $$", "session": "s1", "reset_session": True})
+            return [result[0].text for result in first], (await slow)[0].text, reset[0].text, list(shell_tools._sessions)
+        finally:
+            await close_shell_sessions()
+
+    first, slow, reset, open_sessions = asyncio.run(main())
+    pids = {text.split("STDOUT:\n")[1].split()[0] for text in first}
+    assert len(started) == 2 and pids == {str(started[0].process.pid)}
+    assert sorted(text.split()[-1] for text in first) == ["0", "1", "2", "3", "4"]
+    assert slow == "Exit Code: 0\n\nSTDOUT:\nfinished\n\n"
+    assert reset == f"Exit Code: 0\n\nSTDOUT:\n{started[1].process.pid}\n\n"
+    assert open_sessions == [("bash", "s1")]
+    assert not any(session.alive for session in started)
+
+
+class RecordingSession:
+    def __init__(self):
+        self.notifications = []
+
+    async def send_progress_notification(self, token, progress, total=None, message=None):
+        self.notifications.append((token, progress, message))
+
+
+def test_progress_notifications_carry_partial_output(monkeypatch):
+    monkeypatch.setattr(shell_tools, "PROGRESS_INTERVAL", 0.1)
+    session = RecordingSession()
+
+    async def main():
+        request_ctx.set(RequestContext(request_id=1, meta=RequestParams.Meta(progressToken="tok"),
+                                       session=session, lifespan_context=None))
+        return await execute_shell_command({"command": "for i in 1 2 3; do echo step $i; sleep 0.3; done"})
+
+    text = asyncio.run(main())[0].text
+    assert text == "Exit Code: 0\n\nSTDOUT:\nstep 1\nstep 2\nstep 3\n\n"
+    assert len(session.notifications) >= 2
+    assert all(token == "tok" for token, _, _ in session.notifications)
+    progress = [value for _, value, _ in session.notifications]
+    assert progress == sorted(progress)
+    assert "".join(message for _, _, message in session.notifications).startswith("step 1\nstep 2\n")
+
+
+def test_no_progress_without_a_token():
+    # Outside a request (or without progressToken) nothing is reported
+    assert shell_tools.progress_reporter() is None
+    assert run({"command": "echo hi"}) == "Exit Code: 0\n\nSTDOUT:\nhi\n\n"
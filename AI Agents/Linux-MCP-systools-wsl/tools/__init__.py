@@ -3,17 +3,19 @@ MCP Tools Package
 Contains all tool implementations organized by category.
 """
 
-from .shell_tools import register_shell_tools, handle_shell_tools
+from .shell_tools import register_shell_tools, handle_shell_tools, close_shell_sessions
 from .file_tools import register_file_tools, handle_file_tools
 from .filesystem_tools import register_filesystem_tools, handle_filesystem_tools
 from .text_tools import register_text_tools, handle_text_tools
 from .network_tools import register_network_tools, handle_network_tools
 from .archive_tools import register_archive_tools, handle_archive_tools
 from .system_tools import register_system_tools, handle_system_tools
+from .registry import ToolRegistry
 
 __all__ = [
     'register_shell_tools',
     'handle_shell_tools',
+    'close_shell_sessions',
     'register_file_tools',
     'handle_file_tools',
     'register_filesystem_tools',
@@ -26,4 +28,5 @@ __all__ = [
     'handle_archive_tools',
     'register_system_tools',
     'handle_system_tools',
+    'ToolRegistry',
 ]
@@ -2,7 +2,7 @@
 Archive tools: tar, zip, unzip, gzip, etc.
 """
 import shlex
-from typing import Any
+from typing import Any, Awaitable, Callable
 from mcp.types import Tool, TextContent
 from .shell_tools import execute_shell_command
 import logging
@@ -147,17 +147,20 @@ def register_archive_tools() -> list[Tool]:
     ]
 
 
-async def handle_archive_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
-    """Handle archive tool execution."""
-    handlers = {
+def archive_tool_handlers() -> dict[str, Callable[[dict[str, Any]], Awaitable[list[TextContent]]]]:
+    """Map each archive tool name to its implementation."""
+    return {
         "create_archive": create_archive,
         "extract_archive": extract_archive,
         "list_archive": list_archive,
         "compress_file": compress_file,
         "decompress_file": decompress_file,
     }
-    
-    handler = handlers.get(name)
+
+
+async def handle_archive_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
+    """Handle archive tool execution."""
+    handler = archive_tool_handlers().get(name)
     if handler:
         return await handler(arguments)
     return None
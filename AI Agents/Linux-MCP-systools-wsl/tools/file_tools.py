@@ -1,22 +1,27 @@
 """
 File operations tools: read, write, delete, copy, move, etc.
 """
+import asyncio
 import os
 import shlex
-from typing import Any
+from typing import Any, Awaitable, Callable
 from mcp.types import Tool, TextContent
+from . import native_fs
 from .shell_tools import execute_shell_command
 import logging
 
 logger = logging.getLogger("mcp-file-tools")
 
+# Largest read returned in one call; ranged reads page through bigger files
+DEFAULT_MAX_BYTES = 1024 * 1024
+
 
 def register_file_tools() -> list[Tool]:
     """Register all file operation tools."""
     return [
         Tool(
             name="read_file",
-            description="Read and display file contents (cat, head, tail commands). Supports reading entire files or specific portions.",
+            description="Read and display file contents (cat, head, tail). Supports reading entire files, line ranges or byte ranges.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -39,6 +44,27 @@ def register_file_tools() -> list[Tool]:
                         "type": "boolean",
                         "description": "Follow file updates (tail -f mode, use with caution)",
                         "default": False
+                    },
+                    "start_line": {
+                        "type": "integer",
+                        "description": "First line of a line range to read (1-based, overrides mode)"
+                    },
+                    "end_line": {
+                        "type": "integer",
+                        "description": "Last line of the line range (inclusive, default: end of file)"
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Byte offset of a byte range to read (negative counts from the end, overrides mode)"
+                    },
+                    "length": {
+                        "type": "integer",
+                        "description": "Number of bytes to read from offset (default: max_bytes)"
+                    },
+                    "max_bytes": {
+                        "type": "integer",
+                        "description": "Maximum bytes returned; larger reads are truncated (default: 1048576)",
+                        "default": 1048576
                     }
                 },
                 "required": ["path"]
@@ -283,9 +309,9 @@ def register_file_tools() -> list[Tool]:
     ]
 
 
-async def handle_file_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
-    """Handle file tool execution."""
-    handlers = {
+def file_tool_handlers() -> dict[str, Callable[[dict[str, Any]], Awaitable[list[TextContent]]]]:
+    """Map each file operation tool name to its implementation."""
+    return {
         "read_file": read_file,
         "write_file": write_file,
         "delete_file": delete_file,
@@ -297,8 +323,11 @@ async def handle_file_tools(name: str, arguments: dict[str, Any]) -> list[TextCo
         "disk_usage": disk_usage,
         "compare_files": compare_files,
     }
-    
-    handler = handlers.get(name)
+
+
+async def handle_file_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
+    """Handle file tool execution."""
+    handler = file_tool_handlers().get(name)
     if handler:
         return await handler(arguments)
     return None
@@ -309,33 +338,73 @@ async def handle_file_tools(name: str, arguments: dict[str, Any]) -> list[TextCo
 # ============================================================================
 
 async def read_file(arguments: dict[str, Any]) -> list[TextContent]:
-    """Read file contents using cat, head, or tail."""
+    """Read file contents: whole, head, tail, a line range or a byte range."""
     path = arguments.get("path")
     mode = arguments.get("mode", "cat")
     lines = arguments.get("lines", 10)
     follow = arguments.get("follow", False)
+    start_line = arguments.get("start_line")
+    end_line = arguments.get("end_line")
+    offset = arguments.get("offset")
+    length = arguments.get("length")
+    max_bytes = arguments.get("max_bytes", DEFAULT_MAX_BYTES)
     
     if not path:
         raise ValueError("Path is required")
+    if mode not in ("cat", "head", "tail"):
+        raise ValueError(f"Unknown mode: {mode}")
     
     logger.info(f"Reading file: {path} (mode: {mode})")
     
-    if mode == "cat":
-        command = f"cat {shlex.quote(path)}"
-    elif mode == "head":
-        command = f"head -n {lines} {shlex.quote(path)}"
-    elif mode == "tail":
-        if follow:
-            command = f"timeout 5 tail -f -n {lines} {shlex.quote(path)}"
+    try:
+        if offset is not None or length is not None:
+            length = min(length if length is not None else max_bytes, max_bytes)
+            data, size = await asyncio.to_thread(native_fs.read_bytes, path, offset or 0, length)
+            text = data.decode("utf-8", errors="replace")
+            start = (offset or 0) if (offset or 0) >= 0 else max(size + offset, 0)
+            if start + len(data) < size:
+                text += f"\n[bytes {start}-{start + len(data)} of {size}; read more with offset={start + len(data)}]"
+        elif start_line is not None or end_line is not None or mode == "head":
+            if start_line is None and end_line is None:
+                first, last = 1, lines
+            else:
+                first, last = start_line or 1, end_line
+            chunk, truncated = await asyncio.to_thread(native_fs.read_line_range, path, first, last, max_bytes)
+            text = b"".join(chunk).decode("utf-8", errors="replace")
+            if truncated:
+                text += f"\n[truncated at {max_bytes} bytes; next line is {first + len(chunk)}]"
+        elif mode == "tail":
+            data, size = await asyncio.to_thread(native_fs.read_tail, path, lines)
+            text = data.decode("utf-8", errors="replace")
+            if follow:
+                text += await follow_file(path, size)
         else:
-            command = f"tail -n {lines} {shlex.quote(path)}"
-    else:
-        raise ValueError(f"Unknown mode: {mode}")
-    
-    return await execute_shell_command(
-        {"command": command, "timeout": 30},
-        shell="bash"
-    )
+            data, size = await asyncio.to_thread(native_fs.read_bytes, path, 0, max_bytes)
+            text = data.decode("utf-8", errors="replace")
+            if len(data) < size:
+                text += f"\n[truncated: showing {len(data)} of {size} bytes; read more with offset={len(data)}]"
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading file: {str(e)}")
+        return [TextContent(type="text", text=f"Error reading file: {str(e)}")]
+    
+    return [TextContent(type="text", text=text)]
+
+
+async def follow_file(path: str, position: int, duration: float = 5.0, interval: float = 0.25) -> str:
+    """What gets appended to a file over `duration` seconds (tail -f with a time limit)."""
+    appended = []
+    deadline = asyncio.get_running_loop().time() + duration
+    while asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(interval)
+        size = os.stat(path).st_size
+        if size < position:
+            # Truncated: start again from the beginning, like tail -f
+            position = 0
+        if size > position:
+            data, _ = await asyncio.to_thread(native_fs.read_bytes, path, position, size - position)
+            appended.append(data)
+            position += len(data)
+    return b"".join(appended).decode("utf-8", errors="replace")
 
 
 async def write_file(arguments: dict[str, Any]) -> list[TextContent]:
@@ -1,10 +1,11 @@
 """
 Filesystem tools: ls, find, file info, etc.
 """
-import shlex
-from typing import Any
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
 from mcp.types import Tool, TextContent
-from .shell_tools import execute_shell_command
+from . import native_fs
 import logging
 
 logger = logging.getLogger("mcp-filesystem-tools")
@@ -15,7 +16,7 @@ def register_filesystem_tools() -> list[Tool]:
     return [
         Tool(
             name="list_directory",
-            description="List contents of a directory (ls command). Returns detailed file information including permissions, size, and modification time.",
+            description="List contents of a directory (ls). Returns detailed file information including permissions, size, and modification time, paged for large directories.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -43,6 +44,16 @@ def register_filesystem_tools() -> list[Tool]:
                         "type": "boolean",
                         "description": "Print sizes in human readable format (e.g., 1K, 234M, 2G)",
                         "default": True
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Number of entries to skip, for paging through large directories",
+                        "default": 0
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum entries to return (default: 1000)",
+                        "default": 1000
                     }
                 },
                 "required": []
@@ -79,6 +90,11 @@ def register_filesystem_tools() -> list[Tool]:
                     "size": {
                         "type": "string",
                         "description": "File size criteria (e.g., '+10M' larger than 10MB, '-1G' smaller than 1GB)"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Stop after this many results (default: 10000)",
+                        "default": 10000
                     }
                 },
                 "required": ["path"]
@@ -86,7 +102,7 @@ def register_filesystem_tools() -> list[Tool]:
         ),
         Tool(
             name="file_info",
-            description="Get detailed file or directory information (stat, file commands). Shows size, permissions, timestamps, and file type.",
+            description="Get detailed file or directory information (like stat and file). Shows size, permissions, timestamps, and file type.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -106,15 +122,18 @@ def register_filesystem_tools() -> list[Tool]:
     ]
 
 
-async def handle_filesystem_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
-    """Handle filesystem tool execution."""
-    handlers = {
+def filesystem_tool_handlers() -> dict[str, Callable[[dict[str, Any]], Awaitable[list[TextContent]]]]:
+    """Map each filesystem tool name to its implementation."""
+    return {
         "list_directory": list_directory,
         "find_files": find_files,
         "file_info": file_info,
     }
-    
-    handler = handlers.get(name)
+
+
+async def handle_filesystem_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
+    """Handle filesystem tool execution."""
+    handler = filesystem_tool_handlers().get(name)
     if handler:
         return await handler(arguments)
     return None
@@ -125,64 +144,87 @@ async def handle_filesystem_tools(name: str, arguments: dict[str, Any]) -> list[
 # ============================================================================
 
 async def list_directory(arguments: dict[str, Any]) -> list[TextContent]:
-    """List directory contents using ls command."""
+    """List directory contents like ls, one page at a time."""
     path = arguments.get("path", ".")
     show_hidden = arguments.get("show_hidden", False)
     long_format = arguments.get("long_format", True)
     recursive = arguments.get("recursive", False)
     human_readable = arguments.get("human_readable", True)
+    offset = max(arguments.get("offset", 0), 0)
+    limit = max(arguments.get("limit", 1000), 1)
     
     logger.info(f"Listing directory: {path}")
     
-    cmd_parts = ["ls"]
-    if long_format:
-        cmd_parts.append("-l")
-    if show_hidden:
-        cmd_parts.append("-a")
-    if recursive:
-        cmd_parts.append("-R")
-    if human_readable and long_format:
-        cmd_parts.append("-h")
-    cmd_parts.append(shlex.quote(path))
+    def format_entry(entry) -> str:
+        if not long_format:
+            return entry.name
+        return native_fs.long_entry(entry.path, entry.name, entry.stat(follow_symlinks=False), human_readable, now)
+    
+    def listing() -> str:
+        if not recursive:
+            entries, total = native_fs.list_page(path, show_hidden, offset, limit)
+            lines = [format_entry(entry) for entry in entries]
+            if offset + len(entries) < total:
+                lines.append(f"[entries {offset + 1}-{offset + len(entries)} of {total}; "
+                             f"next page: offset={offset + len(entries)}]")
+            return "\n".join(lines)
+        
+        # Recursive listings are paged over the entries of all directories in ls -R order
+        lines, position, more = [], 0, False
+        for directory, entries in native_fs.walk_listing(path, show_hidden):
+            if position < offset and position + len(entries) <= offset:
+                position += len(entries)
+                continue
+            if position >= offset + limit:
+                more = True
+                break
+            page = entries[max(offset - position, 0):offset + limit - position]
+            lines.append(f"{directory}:")
+            lines.extend(format_entry(entry) for entry in page)
+            lines.append("")
+            if max(offset - position, 0) + len(page) < len(entries):
+                more = True
+            position += len(entries)
+            if more:
+                break
+        if more:
+            lines.append(f"[next page: offset={offset + limit}]")
+        return "\n".join(lines)
     
-    command = " ".join(cmd_parts)
+    now = time.time()
+    try:
+        text = await asyncio.to_thread(listing)
+    except OSError as e:
+        logger.error(f"Error listing directory: {str(e)}")
+        return [TextContent(type="text", text=f"Error listing directory: {str(e)}")]
     
-    return await execute_shell_command(
-        {"command": command, "timeout": 30},
-        shell="bash"
-    )
+    return [TextContent(type="text", text=text)]
 
 
 async def find_files(arguments: dict[str, Any]) -> list[TextContent]:
-    """Search for files using find command."""
+    """Search for files like find, without following symlinks."""
     path = arguments.get("path", ".")
     name_pattern = arguments.get("name_pattern")
     file_type = arguments.get("file_type")
     max_depth = arguments.get("max_depth")
     modified_within = arguments.get("modified_within")
     size = arguments.get("size")
+    limit = max(arguments.get("limit", 10000), 1)
     
     logger.info(f"Finding files in: {path}")
     
-    cmd_parts = ["find", shlex.quote(path)]
+    try:
+        results, truncated = await asyncio.to_thread(
+            native_fs.find, path, name_pattern, file_type, max_depth, modified_within, size, limit
+        )
+    except (OSError, ValueError) as e:
+        logger.error(f"Error finding files: {str(e)}")
+        return [TextContent(type="text", text=f"Error finding files: {str(e)}")]
     
-    if max_depth is not None:
-        cmd_parts.extend(["-maxdepth", str(max_depth)])
-    if name_pattern:
-        cmd_parts.extend(["-name", shlex.quote(name_pattern)])
-    if file_type:
-        cmd_parts.extend(["-type", file_type])
-    if modified_within:
-        cmd_parts.extend(["-mtime", f"-{modified_within}"])
-    if size:
-        cmd_parts.extend(["-size", shlex.quote(size)])
-    
-    command = " ".join(cmd_parts)
-    
-    return await execute_shell_command(
-        {"command": command, "timeout": 60},
-        shell="bash"
-    )
+    text = "\n".join(results)
+    if truncated:
+        text += f"\n[stopped after {limit} results]"
+    return [TextContent(type="text", text=text)]
 
 
 async def file_info(arguments: dict[str, Any]) -> list[TextContent]:
@@ -195,16 +237,10 @@ async def file_info(arguments: dict[str, Any]) -> list[TextContent]:
     
     logger.info(f"Getting info for: {path}")
     
-    stat_flag = "" if follow_symlinks else "-L"
-    commands = [
-        f"file {shlex.quote(path)}",
-        f"stat {stat_flag} {shlex.quote(path)}",
-        f"ls -lhd {shlex.quote(path)}"
-    ]
-    
-    command = " && echo '---' && ".join(commands)
+    try:
+        text = await asyncio.to_thread(native_fs.file_details, path, follow_symlinks)
+    except OSError as e:
+        logger.error(f"Error getting file info: {str(e)}")
+        return [TextContent(type="text", text=f"Error getting file info: {str(e)}")]
     
-    return await execute_shell_command(
-        {"command": command, "timeout": 30},
-        shell="bash"
-    )
+    return [TextContent(type="text", text=text)]
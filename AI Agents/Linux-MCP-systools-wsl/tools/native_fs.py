@@ -0,0 +1,546 @@
+"""
+In-process filesystem primitives: ranged reads, paged listings, find and grep.
+Built on os.scandir/os.stat so file tools do not spawn a shell per call.
+"""
+import fnmatch
+import grp
+import os
+import pwd
+import re
+import stat
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Iterator
+
+# Block size for streaming reads
+READ_BLOCK = 1024 * 1024
+
+# Bytes sniffed for a NUL to decide a file is binary (what grep does)
+BINARY_SNIFF = 8192
+
+# First read of each searched file; most source files fit in it
+FIRST_READ = 64 * 1024
+
+# Files per grep worker task
+GREP_BATCH = 64
+
+SIZE_UNITS = {"c": 1, "b": 512, "k": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+TIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+MAGIC = [
+    (b"\x7fELF", "ELF executable"),
+    (b"\x1f\x8b", "gzip compressed data"),
+    (b"PK\x03\x04", "Zip archive data"),
+    (b"BZh", "bzip2 compressed data"),
+    (b"\xfd7zXZ\x00", "XZ compressed data"),
+    (b"\x89PNG\r\n\x1a\n", "PNG image data"),
+    (b"\xff\xd8\xff", "JPEG image data"),
+    (b"GIF8", "GIF image data"),
+    (b"%PDF", "PDF document"),
+    (b"#!", "script text executable"),
+]
+
+
+# ============================================================================
+# Formatting helpers
+# ============================================================================
+
+def human_size(size: int) -> str:
+    """Size the way `ls -h` prints it: 900, 1.5K, 12M."""
+    if size < 1024:
+        return str(size)
+    value = float(size)
+    for unit in "KMGTPE":
+        value /= 1024
+        if value < 1024 or unit == "E":
+            break
+    return f"{value:.1f}{unit}" if value < 10 else f"{value:.0f}{unit}"
+
+
+@lru_cache(maxsize=256)
+def user_name(uid: int) -> str:
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+@lru_cache(maxsize=256)
+def group_name(gid: int) -> str:
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        return str(gid)
+
+
+def format_mtime(mtime: float, now: float) -> str:
+    """`ls -l` timestamp: time of day for the last six months, year otherwise."""
+    if now - mtime < 182 * 86400 and mtime <= now + 3600:
+        return time.strftime("%b %d %H:%M", time.localtime(mtime))
+    return time.strftime("%b %d  %Y", time.localtime(mtime))
+
+
+def long_entry(path: str, name: str, st: os.stat_result, human_readable: bool, now: float) -> str:
+    """One `ls -l` line for an entry."""
+    size = human_size(st.st_size) if human_readable else str(st.st_size)
+    line = (f"{stat.filemode(st.st_mode)} {st.st_nlink:>3} {user_name(st.st_uid):<8} "
+            f"{group_name(st.st_gid):<8} {size:>6} {format_mtime(st.st_mtime, now)} {name}")
+    if stat.S_ISLNK(st.st_mode):
+        try:
+            line += f" -> {os.readlink(path)}"
+        except OSError:
+            pass
+    return line
+
+
+# ============================================================================
+# Reading
+# ============================================================================
+
+def read_bytes(path: str, offset: int, length: int) -> tuple[bytes, int]:
+    """Up to `length` bytes starting at `offset` (negative counts from the end), and the file size."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if offset < 0:
+            offset = max(size + offset, 0)
+        f.seek(offset)
+        return f.read(length), size
+
+
+def read_line_range(path: str, start: int, end: int | None, max_bytes: int) -> tuple[list[bytes], bool]:
+    """
+    Lines `start`..`end` (1-based, inclusive) without reading past `end`.
+
+    Returns:
+        The lines, and whether max_bytes cut the range short
+    """
+    lines, total = [], 0
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            if number < start:
+                continue
+            if end is not None and number > end:
+                break
+            total += len(line)
+            if total > max_bytes:
+                return lines, True
+            lines.append(line)
+    return lines, False
+
+
+def read_tail(path: str, count: int) -> tuple[bytes, int]:
+    """The last `count` lines, reading backwards from the end, and the file size."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if count <= 0:
+            return b"", size
+        position, data = size, b""
+        # A trailing newline ends the last line rather than starting an empty one
+        wanted = count + 1 if size and _last_byte(f, size) == b"\n" else count
+        while position > 0 and data.count(b"\n") < wanted:
+            step = min(READ_BLOCK // 16, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = data.split(b"\n")
+    if data.endswith(b"\n"):
+        return b"\n".join(lines[-count - 1:]), size
+    return b"\n".join(lines[-count:]), size
+
+
+def _last_byte(f, size: int) -> bytes:
+    f.seek(size - 1)
+    return f.read(1)
+
+
+# ============================================================================
+# Listing and finding
+# ============================================================================
+
+def _visible(name: str, show_hidden: bool) -> bool:
+    return show_hidden or not name.startswith(".")
+
+
+def list_page(path: str, show_hidden: bool, offset: int, limit: int) -> tuple[list[os.DirEntry], int]:
+    """
+    One page of a directory sorted by name; only the page's entries get stat'ed.
+
+    Returns:
+        The page's entries and the number of entries in the directory
+    """
+    with os.scandir(path) as it:
+        entries = [entry for entry in it if _visible(entry.name, show_hidden)]
+    entries.sort(key=lambda entry: entry.name)
+    return entries[offset:offset + limit], len(entries)
+
+
+def walk_listing(path: str, show_hidden: bool) -> Iterator[tuple[str, list[os.DirEntry]]]:
+    """(directory, sorted entries) pairs in `ls -R` order."""
+    pending = [path]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted((entry for entry in it if _visible(entry.name, show_hidden)),
+                                 key=lambda entry: entry.name)
+        except OSError:
+            continue
+        yield directory, entries
+        pending.extend(reversed([entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]))
+
+
+def parse_size_filter(spec: str):
+    """A predicate on byte sizes from find's `-size` syntax: +10M, -1G, 100k, 20c."""
+    match = re.fullmatch(r"([+-]?)(\d+)([cbkMG]?)", spec.strip())
+    if not match:
+        raise ValueError(f"Invalid size: {spec}")
+    sign, amount, unit = match.group(1), int(match.group(2)), SIZE_UNITS[match.group(3) or "b"]
+    if sign == "+":
+        return lambda size: -(-size // unit) > amount
+    if sign == "-":
+        return lambda size: -(-size // unit) < amount
+    return lambda size: -(-size // unit) == amount
+
+
+def parse_age(spec: str) -> float:
+    """Seconds in a `modified_within` value: '1' (days), '24h', '30m', '7d', '2w'."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw]?)", spec.strip())
+    if not match:
+        raise ValueError(f"Invalid time period: {spec}")
+    return float(match.group(1)) * TIME_UNITS[match.group(2) or "d"]
+
+
+def _type_matches(entry: os.DirEntry, file_type: str | None) -> bool:
+    if file_type is None:
+        return True
+    if file_type == "l":
+        return entry.is_symlink()
+    if file_type == "d":
+        return entry.is_dir(follow_symlinks=False)
+    return entry.is_file(follow_symlinks=False)
+
+
+def find(root: str, name_pattern: str | None = None, file_type: str | None = None,
+         max_depth: int | None = None, modified_within: str | None = None,
+         size: str | None = None, limit: int = 10000) -> tuple[list[str], bool]:
+    """
+    `find`-style search: depth-first, without following symlinks.
+
+    Returns:
+        Matching paths, and whether the search stopped at `limit`
+    """
+    name_matches = re.compile(fnmatch.translate(name_pattern)).match if name_pattern else None
+    size_matches = parse_size_filter(size) if size else None
+    newer_than = time.time() - parse_age(modified_within) if modified_within else None
+    needs_stat = size_matches is not None or newer_than is not None
+    results: list[str] = []
+
+    def stat_matches(st: os.stat_result) -> bool:
+        if size_matches and not size_matches(st.st_size):
+            return False
+        return newer_than is None or st.st_mtime >= newer_than
+
+    root_stat = os.lstat(root)
+    root_type = {"d": stat.S_ISDIR, "f": stat.S_ISREG, "l": stat.S_ISLNK}.get(file_type)
+    if ((root_type is None or root_type(root_stat.st_mode))
+            and (name_matches is None or name_matches(os.path.basename(root.rstrip("/")) or root))
+            and stat_matches(root_stat)):
+        results.append(root)
+
+    pending = [(root, 0)] if stat.S_ISDIR(root_stat.st_mode) else []
+    while pending:
+        directory, depth = pending.pop()
+        if max_depth is not None and depth >= max_depth:
+            continue
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if is_dir:
+                        pending.append((entry.path, depth + 1))
+                    if name_matches is not None and name_matches(entry.name) is None:
+                        continue
+                    if file_type is not None and not _type_matches(entry, file_type):
+                        continue
+                    if needs_stat and not stat_matches(entry.stat(follow_symlinks=False)):
+                        continue
+                    results.append(entry.path)
+                    if len(results) >= limit:
+                        return results, True
+        except OSError:
+            continue
+    return results, False
+
+
+# ============================================================================
+# File information
+# ============================================================================
+
+def describe_content(path: str, st: os.stat_result) -> str:
+    """A `file`-style description from the mode and the first bytes."""
+    if stat.S_ISDIR(st.st_mode):
+        return "directory"
+    if stat.S_ISLNK(st.st_mode):
+        return f"symbolic link to {os.readlink(path)}"
+    if not stat.S_ISREG(st.st_mode):
+        return {stat.S_IFCHR: "character special", stat.S_IFBLK: "block special",
+                stat.S_IFIFO: "fifo (named pipe)", stat.S_IFSOCK: "socket"}.get(stat.S_IFMT(st.st_mode), "special")
+    if st.st_size == 0:
+        return "empty"
+    try:
+        with open(path, "rb") as f:
+            head = f.read(BINARY_SNIFF)
+    except OSError as e:
+        return f"cannot open ({e.strerror})"
+    for magic, description in MAGIC:
+        if head.startswith(magic):
+            return description
+    if b"\x00" in head:
+        return "data"
+    try:
+        head.decode("ascii")
+        return "ASCII text"
+    except UnicodeDecodeError:
+        pass
+    try:
+        # The sniffed block may end inside a multi-byte character
+        head.decode("utf-8") if len(head) < BINARY_SNIFF else head[:-3].decode("utf-8")
+        return "UTF-8 Unicode text"
+    except UnicodeDecodeError:
+        return "data"
+
+
+def file_details(path: str, follow_symlinks: bool) -> str:
+    """What `file`, `stat` and `ls -ld` together report for one path."""
+    st = os.stat(path) if follow_symlinks else os.lstat(path)
+    times = {label: time.strftime("%Y-%m-%d %H:%M:%S %z", time.localtime(value))
+             for label, value in (("Access", st.st_atime), ("Modify", st.st_mtime), ("Change", st.st_ctime))}
+    lines = [
+        f"{path}: {describe_content(path, st)}",
+        "---",
+        f"  File: {path}",
+        f"  Size: {st.st_size:<15} Blocks: {st.st_blocks:<10} IO Block: {st.st_blksize}",
+        f"Device: {st.st_dev:x}h/{st.st_dev}d  Inode: {st.st_ino:<11} Links: {st.st_nlink}",
+        f"Access: ({stat.S_IMODE(st.st_mode):04o}/{stat.filemode(st.st_mode)})  "
+        f"Uid: ({st.st_uid:>5}/{user_name(st.st_uid):>8})   Gid: ({st.st_gid:>5}/{group_name(st.st_gid):>8})",
+        *(f"{label}: {value}" for label, value in times.items()),
+        "---",
+        long_entry(path, path, st, True, time.time()),
+    ]
+    return "\n".join(lines)
+
+
+# ============================================================================
+# Grep
+# ============================================================================
+
+def compile_pattern(pattern: str, ignore_case: bool) -> re.Pattern:
+    """
+    The search pattern as a bytes regex, so files are searched without decoding
+
+    MULTILINE lets ^ and $ anchor at line boundaries when a whole block is
+    checked for a match at once.
+    """
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    try:
+        return re.compile(pattern.encode("utf-8"), flags)
+    except re.error as e:
+        raise ValueError(f"Invalid pattern: {e}")
+
+
+def _line_blocks(fd: int, first: bytes) -> Iterator[bytes]:
+    """The file in pieces that each end on a line boundary, starting with the already-read `first`."""
+    if len(first) < FIRST_READ:
+        # A short first read is the whole file
+        if first:
+            yield first
+        return
+    rest, block = b"", first
+    while block:
+        block = rest + block
+        cut = block.rfind(b"\n") + 1
+        rest = block[cut:]
+        if cut:
+            yield block[:cut]
+        block = os.read(fd, READ_BLOCK)
+    if rest:
+        yield rest
+
+
+def grep_file(path: str, regex: re.Pattern, invert: bool, context: int, budget: int,
+              stop: threading.Event) -> tuple[list[tuple[int, bytes, bool]], int] | None:
+    """
+    Matching lines of one file, with context lines
+
+    Small files are read in a single short read, which also serves the
+    binary check. Blocks without a match are skipped with one regex scan
+    instead of a per-line loop.
+
+    Returns:
+        (line number, line, is match) rows and the number of matches (at
+        most `budget`), or None for a binary file
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        first = os.read(fd, FIRST_READ)
+        if b"\x00" in first[:BINARY_SNIFF]:
+            return None
+        rows: list[tuple[int, bytes, bool]] = []
+        before: deque = deque(maxlen=context)
+        after = 0
+        matched = 0
+        number = 0
+        last_row = 0
+        for block in _line_blocks(fd, first):
+            if stop.is_set():
+                break
+            if not invert and after == 0 and regex.search(block) is None:
+                count = block.count(b"\n") + (not block.endswith(b"\n"))
+                number += count
+                if context:
+                    # Drop only the final newline; blank lines are context too
+                    body = block[:-1] if block.endswith(b"\n") else block
+                    tail = body.rsplit(b"\n", context)[-context:]
+                    before.extend(zip(range(number - len(tail) + 1, number + 1), tail))
+                continue
+            lines = block.split(b"\n")
+            if block.endswith(b"\n"):
+                lines.pop()
+            for line in lines:
+                number += 1
+                hit = (regex.search(line) is not None) != invert
+                if hit and matched < budget:
+                    rows.extend((n, text, False) for n, text in before if n > last_row)
+                    before.clear()
+                    rows.append((number, line, True))
+                    last_row = number
+                    matched += 1
+                    after = context
+                elif after:
+                    # Like grep -m, trailing context after the last match is printed even if it matches
+                    rows.append((number, line, False))
+                    last_row = number
+                    after -= 1
+                elif matched >= budget:
+                    return rows, matched
+                elif context:
+                    before.append((number, line))
+            if matched >= budget and not after:
+                break
+        return rows, matched
+    finally:
+        os.close(fd)
+
+
+def grep_paths(root: str, recursive: bool) -> Iterator[str]:
+    """Files to search under `root`, in a stable depth-first order."""
+    if not os.path.isdir(root):
+        yield root
+        return
+    if not recursive:
+        return
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                yield entry.path
+        pending.extend(reversed([entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]))
+
+
+def _batches(paths: Iterator[str], size: int) -> Iterator[list[str]]:
+    batch = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def grep(root: str, pattern: str, recursive: bool = False, ignore_case: bool = False,
+         invert: bool = False, context: int = 0, max_matches: int = 1000,
+         workers: int | None = None, all_files: bool = False) -> dict:
+    """
+    Search files with one compiled regex across a pool of worker threads
+
+    Files are handed to the workers in batches and reported in walk order,
+    so the matches returned are the first `max_matches` a sequential grep
+    would find. Walking and searching stop once that many have been found.
+
+    Returns:
+        {"files": [(path, rows, match count)] for files with matches (every
+         text file with `all_files`), "binary": skipped binary files,
+         "errors": [(path, message)], "matches": total, "truncated": bool}
+    """
+    regex = compile_pattern(pattern, ignore_case)
+    workers = workers or min(8, os.cpu_count() or 1)
+    stop = threading.Event()
+    result = {"files": [], "binary": [], "errors": [], "matches": 0, "truncated": False}
+
+    def search(batch: list[str]) -> list[tuple[str, str, Any]]:
+        found = []
+        for path in batch:
+            if stop.is_set():
+                break
+            try:
+                value = grep_file(path, regex, invert, context, max_matches, stop)
+                if value is None:
+                    found.append((path, "binary", None))
+                elif value[1] or all_files:
+                    found.append((path, "ok", value))
+            except OSError as e:
+                found.append((path, "error", e.strerror or str(e)))
+        return found
+
+    def collect(future):
+        for path, status, value in future.result():
+            if result["truncated"]:
+                return
+            if status == "binary":
+                result["binary"].append(path)
+            elif status == "error":
+                result["errors"].append((path, value))
+            else:
+                rows, matched = value
+                remaining = max_matches - result["matches"]
+                if matched > remaining:
+                    rows, matched = _first_matches(rows, remaining), remaining
+                result["files"].append((path, rows, matched))
+                result["matches"] += matched
+                if result["matches"] >= max_matches:
+                    result["truncated"] = True
+                    stop.set()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="grep") as pool:
+        in_flight: deque = deque()
+        for batch in _batches(grep_paths(root, recursive), GREP_BATCH):
+            if stop.is_set():
+                break
+            in_flight.append(pool.submit(search, batch))
+            if len(in_flight) >= workers * 2:
+                collect(in_flight.popleft())
+        while in_flight:
+            collect(in_flight.popleft())
+    return result
+
+
+def _first_matches(rows: list[tuple[int, bytes, bool]], count: int) -> list[tuple[int, bytes, bool]]:
+    """Rows up to and including the `count`-th match, plus its trailing context."""
+    kept, seen = [], 0
+    for row in rows:
+        if row[2]:
+            if seen == count:
+                break
+            seen += 1
+        kept.append(row)
+    return kept
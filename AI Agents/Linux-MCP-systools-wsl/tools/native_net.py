@@ -0,0 +1,239 @@
+"""
+In-process network primitives: TCP connect scans, TCP ping and name resolution.
+Built on asyncio sockets and loop.getaddrinfo so network tools do not depend
+on nc, nmap, ping or dig being installed, and probe many targets at once.
+"""
+import asyncio
+import socket
+import statistics
+import time
+from typing import Any
+
+# Ports probed at once by default
+DEFAULT_CONCURRENCY = 256
+MAX_CONCURRENCY = 4096
+
+# Bytes kept from a service's greeting
+BANNER_BYTES = 256
+
+FAMILIES = {"any": socket.AF_UNSPEC, "ipv4": socket.AF_INET, "ipv6": socket.AF_INET6}
+FAMILY_NAMES = {socket.AF_INET: "IPv4", socket.AF_INET6: "IPv6"}
+
+
+def parse_ports(spec: str) -> list[int]:
+    """
+    Ports from a spec like "80", "1-1024" or "22,80,8000-8100"
+
+    Returns:
+        Sorted, de-duplicated port numbers
+
+    Raises:
+        ValueError: Malformed spec or a port outside 1-65535
+    """
+    ports: set[int] = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, dash, last = part.partition("-")
+        try:
+            low = int(first)
+            high = int(last) if dash else low
+        except ValueError:
+            raise ValueError(f"Invalid port range: {part!r}") from None
+        if not 1 <= low <= high <= 65535:
+            raise ValueError(f"Invalid port range: {part!r} (ports are 1-65535, low to high)")
+        ports.update(range(low, high + 1))
+    if not ports:
+        raise ValueError("No ports given")
+    return sorted(ports)
+
+
+def service_name(port: int) -> str | None:
+    try:
+        return socket.getservbyport(port, "tcp")
+    except OSError:
+        return None
+
+
+async def resolve_one(host: str, family: int = socket.AF_UNSPEC, port: int | None = None) -> list[tuple]:
+    """getaddrinfo for TCP, one entry per distinct address, in resolver order."""
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, port, family=family, type=socket.SOCK_STREAM)
+    seen = set()
+    unique = []
+    for info in infos:
+        if info[4][0] not in seen:
+            seen.add(info[4][0])
+            unique.append(info)
+    return unique
+
+
+async def resolve(hosts: list[str], family: str = "any", timeout: float = 10,
+                  concurrency: int = 32) -> list[dict[str, Any]]:
+    """
+    Resolve many host names at once with the system resolver
+
+    Returns:
+        One {"host", "addresses": [{"address", "family"}], "elapsed_ms"}
+        per host, in the order given, with "error" instead of addresses
+        for names that did not resolve
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup(host: str) -> dict[str, Any]:
+        async with semaphore:
+            started = time.perf_counter()
+            result: dict[str, Any] = {"host": host}
+            try:
+                infos = await asyncio.wait_for(resolve_one(host, FAMILIES[family]), timeout=timeout)
+                result["addresses"] = [
+                    {"address": info[4][0], "family": FAMILY_NAMES.get(info[0], str(info[0]))} for info in infos
+                ]
+            except asyncio.TimeoutError:
+                result["error"] = f"timed out after {timeout} seconds"
+            except (socket.gaierror, UnicodeError) as e:
+                result["error"] = str(e)
+            result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return result
+
+    return list(await asyncio.gather(*(lookup(host) for host in hosts)))
+
+
+async def probe(address: str, port: int, timeout: float, banner_timeout: float) -> dict[str, Any]:
+    """
+    Try one TCP connect, and read the service's greeting if it sends one
+
+    Returns:
+        {"port", "state": open|closed|filtered|error}, "latency_ms" when
+        the host answered, "banner" for open ports that spoke first and
+        "error" for errors
+    """
+    started = time.perf_counter()
+    result: dict[str, Any] = {"port": port}
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout=timeout)
+    except asyncio.TimeoutError:
+        result["state"] = "filtered"
+        return result
+    except ConnectionRefusedError:
+        result["state"] = "closed"
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+    except OSError as e:
+        result["state"] = "error"
+        result["error"] = e.strerror or str(e)
+        return result
+
+    result["state"] = "open"
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    try:
+        if banner_timeout > 0:
+            try:
+                data = await asyncio.wait_for(reader.read(BANNER_BYTES), timeout=banner_timeout)
+            except (asyncio.TimeoutError, OSError):
+                data = b""
+            if data:
+                result["banner"] = data.decode("utf-8", errors="replace").strip()
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+    return result
+
+
+async def scan(host: str, ports: list[int], concurrency: int = DEFAULT_CONCURRENCY, timeout: float = 1.0,
+               banner_timeout: float = 0.0, show_closed: bool = False) -> dict[str, Any]:
+    """
+    TCP connect scan of one host
+
+    The host is resolved once and a fixed pool of `concurrency` workers
+    takes ports from a shared iterator, so memory does not grow with the
+    size of the range.
+
+    Returns:
+        {"host", "address", "ports_scanned", "open": [...], "counts",
+         "elapsed_ms"}, with "closed" and "filtered" port lists when
+        show_closed is set and "errors" when any connect failed otherwise
+
+    Raises:
+        socket.gaierror: The host did not resolve
+    """
+    started = time.perf_counter()
+    address = (await resolve_one(host))[0][4][0]
+    pending = iter(ports)
+    results: list[dict[str, Any]] = []
+
+    async def worker():
+        for port in pending:
+            results.append(await probe(address, port, timeout, banner_timeout))
+
+    await asyncio.gather(*(worker() for _ in range(min(max(concurrency, 1), MAX_CONCURRENCY, len(ports)))))
+    results.sort(key=lambda result: result["port"])
+
+    counts = {"open": 0, "closed": 0, "filtered": 0, "error": 0}
+    report: dict[str, Any] = {"host": host, "address": address, "ports_scanned": len(ports), "open": []}
+    closed, filtered, errors = [], [], []
+    for result in results:
+        counts[result["state"]] += 1
+        if result["state"] == "open":
+            report["open"].append({"service": service_name(result["port"]), **result})
+        elif result["state"] == "closed":
+            closed.append(result["port"])
+        elif result["state"] == "filtered":
+            filtered.append(result["port"])
+        else:
+            errors.append({"port": result["port"], "error": result["error"]})
+    report["counts"] = counts
+    if show_closed:
+        report["closed"] = closed
+        report["filtered"] = filtered
+    if errors:
+        report["errors"] = errors
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return report
+
+
+async def tcp_ping(host: str, port: int, count: int = 4, timeout: float = 5,
+                   interval: float = 0.2) -> dict[str, Any]:
+    """
+    Measure TCP connect latency to host:port, like ping without raw sockets
+
+    Returns:
+        {"host", "address", "port", "sent", "received", "loss_percent",
+         "rtt_ms": {"min", "avg", "max", "stdev"} | None, "probes": [...]}
+
+    Raises:
+        socket.gaierror: The host did not resolve
+    """
+    address = (await resolve_one(host))[0][4][0]
+    probes = []
+    for sequence in range(count):
+        if sequence:
+            await asyncio.sleep(interval)
+        result = await probe(address, port, timeout, 0)
+        probes.append({
+            "seq": sequence + 1,
+            # A refused connection still proves the host answered
+            "reachable": result["state"] in ("open", "closed"),
+            **result,
+        })
+    latencies = [result["latency_ms"] for result in probes if "latency_ms" in result]
+    received = sum(1 for result in probes if result["reachable"])
+    return {
+        "host": host,
+        "address": address,
+        "port": port,
+        "sent": count,
+        "received": received,
+        "loss_percent": round(100 * (count - received) / count, 1) if count else 0.0,
+        "rtt_ms": {
+            "min": min(latencies),
+            "avg": round(statistics.fmean(latencies), 2),
+            "max": max(latencies),
+            "stdev": round(statistics.pstdev(latencies), 2),
+        } if latencies else None,
+        "probes": probes,
+    }
@@ -1,10 +1,15 @@
 """
 Network tools: curl, wget, ping, netstat, etc.
 """
+import asyncio
+import json
 import shlex
-from typing import Any
+import shutil
+import socket
+from typing import Any, Awaitable, Callable
 from mcp.types import Tool, TextContent
 from .shell_tools import execute_shell_command
+from . import native_net
 import logging
 
 logger = logging.getLogger("mcp-network-tools")
@@ -90,7 +95,7 @@ def register_network_tools() -> list[Tool]:
         ),
         Tool(
             name="ping_host",
-            description="Ping a host to check connectivity and measure latency.",
+            description="Ping a host to check connectivity and measure latency. Uses ICMP ping when installed, otherwise (or with method 'tcp') times TCP connects to a port and returns JSON statistics.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -107,6 +112,17 @@ def register_network_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Timeout in seconds",
                         "default": 5
+                    },
+                    "method": {
+                        "type": "string",
+                        "enum": ["auto", "icmp", "tcp"],
+                        "description": "'icmp' runs ping, 'tcp' times TCP connects to `port`, 'auto' uses ping if it is installed",
+                        "default": "auto"
+                    },
+                    "port": {
+                        "type": "integer",
+                        "description": "Port for TCP ping",
+                        "default": 80
                     }
                 },
                 "required": ["host"]
@@ -130,7 +146,7 @@ def register_network_tools() -> list[Tool]:
         ),
         Tool(
             name="dns_lookup",
-            description="Perform DNS lookups (dig, nslookup, host commands).",
+            description="Perform DNS lookups. A and AAAA lookups of one or many names go through the system resolver in-process and return JSON; other record types and specific nameservers use dig/nslookup.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -138,6 +154,11 @@ def register_network_tools() -> list[Tool]:
                         "type": "string",
                         "description": "Domain name to lookup"
                     },
+                    "domains": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Several domain names to look up at once"
+                    },
                     "record_type": {
                         "type": "string",
                         "enum": ["A", "AAAA", "MX", "NS", "TXT", "CNAME", "SOA", "ANY"],
@@ -149,12 +170,12 @@ def register_network_tools() -> list[Tool]:
                         "description": "Specific nameserver to query (optional)"
                     }
                 },
-                "required": ["domain"]
+                "required": []
             }
         ),
         Tool(
             name="port_scan",
-            description="Scan ports on a host using nc (netcat) or nmap.",
+            description="Scan TCP ports on a host with concurrent connects, optionally reading service banners. Returns JSON. Set use_nmap for an nmap scan instead.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -167,9 +188,34 @@ def register_network_tools() -> list[Tool]:
                         "description": "Port(s) to scan (e.g., '80', '1-1000', '80,443,8080')",
                         "default": "1-1000"
                     },
+                    "concurrency": {
+                        "type": "integer",
+                        "description": "Connects in flight at once",
+                        "default": native_net.DEFAULT_CONCURRENCY
+                    },
+                    "timeout": {
+                        "type": "number",
+                        "description": "Seconds to wait for each connect before reporting the port as filtered",
+                        "default": 1.0
+                    },
+                    "grab_banners": {
+                        "type": "boolean",
+                        "description": "Read the greeting of open ports that send one (SSH, SMTP, FTP...)",
+                        "default": False
+                    },
+                    "banner_timeout": {
+                        "type": "number",
+                        "description": "Seconds to wait for a banner",
+                        "default": 1.0
+                    },
+                    "show_closed": {
+                        "type": "boolean",
+                        "description": "List closed and filtered ports as well as open ones",
+                        "default": False
+                    },
                     "use_nmap": {
                         "type": "boolean",
-                        "description": "Use nmap if available (more detailed)",
+                        "description": "Use nmap if available (more detailed); falls back to the built-in scanner",
                         "default": False
                     }
                 },
@@ -179,9 +225,9 @@ def register_network_tools() -> list[Tool]:
     ]
 
 
-async def handle_network_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
-    """Handle network tool execution."""
-    handlers = {
+def network_tool_handlers() -> dict[str, Callable[[dict[str, Any]], Awaitable[list[TextContent]]]]:
+    """Map each network tool name to its implementation."""
+    return {
         "http_request": http_request,
         "download_file": download_file,
         "ping_host": ping_host,
@@ -189,8 +235,11 @@ async def handle_network_tools(name: str, arguments: dict[str, Any]) -> list[Tex
         "dns_lookup": dns_lookup,
         "port_scan": port_scan,
     }
-    
-    handler = handlers.get(name)
+
+
+async def handle_network_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
+    """Handle network tool execution."""
+    handler = network_tool_handlers().get(name)
     if handler:
         return await handler(arguments)
     return None
@@ -281,15 +330,28 @@ async def download_file(arguments: dict[str, Any]) -> list[TextContent]:
 
 
 async def ping_host(arguments: dict[str, Any]) -> list[TextContent]:
-    """Ping a host."""
+    """Ping a host with ICMP, or time TCP connects when ping is unavailable."""
     host = arguments.get("host")
     count = arguments.get("count", 4)
     timeout = arguments.get("timeout", 5)
+    method = arguments.get("method", "auto")
     
     if not host:
         raise ValueError("Host is required")
     
-    logger.info(f"Pinging {host}")
+    if method == "auto":
+        method = "icmp" if shutil.which("ping") else "tcp"
+    
+    logger.info(f"Pinging {host} ({method})")
+    
+    if method == "tcp":
+        port = arguments.get("port", 80)
+        try:
+            report = await native_net.tcp_ping(host, port, count, timeout)
+        except (socket.gaierror, UnicodeError) as e:
+            logger.error(f"Error resolving {host}: {str(e)}")
+            return [TextContent(type="text", text=f"Error resolving {host}: {str(e)}")]
+        return [TextContent(type="text", text=json.dumps(report, indent=2))]
     
     command = f"ping -c {count} -W {timeout} {shlex.quote(host)}"
     
@@ -323,15 +385,35 @@ async def network_info(arguments: dict[str, Any]) -> list[TextContent]:
 
 
 async def dns_lookup(arguments: dict[str, Any]) -> list[TextContent]:
-    """Perform DNS lookup."""
-    domain = arguments.get("domain")
+    """Perform DNS lookups, in-process for address records."""
+    domains = list(arguments.get("domains") or [])
+    if arguments.get("domain"):
+        domains.insert(0, arguments["domain"])
     record_type = arguments.get("record_type", "A")
     nameserver = arguments.get("nameserver")
     
-    if not domain:
+    if not domains:
         raise ValueError("Domain is required")
     
-    logger.info(f"DNS lookup for {domain} ({record_type})")
+    logger.info(f"DNS lookup for {', '.join(domains)} ({record_type})")
+    
+    # The system resolver answers address queries; other record types and
+    # specific nameservers still need dig
+    if record_type in ("A", "AAAA") and not nameserver:
+        family = "ipv4" if record_type == "A" else "ipv6"
+        results = await native_net.resolve(domains, family)
+        return [TextContent(type="text", text=json.dumps(results, indent=2))]
+    
+    if len(domains) > 1:
+        outputs = await asyncio.gather(*(
+            dns_lookup({"domain": domain, "record_type": record_type, "nameserver": nameserver})
+            for domain in domains
+        ))
+        return [TextContent(
+            type="text",
+            text="\n".join(f"; {domain}\n{output[0].text}" for domain, output in zip(domains, outputs))
+        )]
+    domain = domains[0]
     
     if nameserver:
         command = f"dig @{shlex.quote(nameserver)} {shlex.quote(domain)} {record_type} +short || nslookup -type={record_type} {shlex.quote(domain)} {shlex.quote(nameserver)}"
@@ -345,7 +427,7 @@ async def dns_lookup(arguments: dict[str, Any]) -> list[TextContent]:
 
 
 async def port_scan(arguments: dict[str, Any]) -> list[TextContent]:
-    """Scan ports on a host."""
+    """Scan TCP ports on a host with concurrent connects (or nmap)."""
     host = arguments.get("host")
     ports = arguments.get("ports", "1-1000")
     use_nmap = arguments.get("use_nmap", False)
@@ -355,13 +437,30 @@ async def port_scan(arguments: dict[str, Any]) -> list[TextContent]:
     
     logger.info(f"Scanning ports on {host}: {ports}")
     
-    if use_nmap:
-        command = f"nmap -p {shlex.quote(ports)} {shlex.quote(host)} || echo 'nmap not available, falling back to nc'"
-    else:
-        # Use netcat for basic scan
-        command = f"nc -zv {shlex.quote(host)} {shlex.quote(ports)} 2>&1"
+    if use_nmap and not shutil.which("nmap"):
+        logger.warning("nmap not available, falling back to the built-in scanner")
+        use_nmap = False
     
-    return await execute_shell_command(
-        {"command": command, "timeout": 120},
-        shell="bash"
-    )
+    if use_nmap:
+        command = f"nmap -p {shlex.quote(ports)} {shlex.quote(host)}"
+        return await execute_shell_command(
+            {"command": command, "timeout": 120},
+            shell="bash"
+        )
+    
+    port_list = native_net.parse_ports(ports)
+    try:
+        report = await native_net.scan(
+            host,
+            port_list,
+            concurrency=arguments.get("concurrency", native_net.DEFAULT_CONCURRENCY),
+            timeout=arguments.get("timeout", 1.0),
+            banner_timeout=arguments.get("banner_timeout", 1.0) if arguments.get("grab_banners", False) else 0,
+            show_closed=arguments.get("show_closed", False),
+        )
+    except (socket.gaierror, UnicodeError) as e:
+        logger.error(f"Error resolving {host}: {str(e)}")
+        return [TextContent(type="text", text=f"Error resolving {host}: {str(e)}")]
+    
+    logger.info(f"Scanned {len(port_list)} ports on {host}: {report['counts']['open']} open")
+    return [TextContent(type="text", text=json.dumps(report, indent=2))]
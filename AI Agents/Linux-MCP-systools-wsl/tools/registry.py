@@ -0,0 +1,207 @@
+"""
+Tool registry: one name -> handler table built at startup.
+Validates arguments against precompiled schemas, limits concurrency and
+time per tool, and keeps per-tool latency and error metrics.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+from mcp.types import Tool, TextContent
+import logging
+
+from .shell_tools import register_shell_tools, shell_tool_handlers
+from .file_tools import register_file_tools, file_tool_handlers
+from .filesystem_tools import register_filesystem_tools, filesystem_tool_handlers
+from .text_tools import register_text_tools, text_tool_handlers
+from .network_tools import register_network_tools, network_tool_handlers
+from .archive_tools import register_archive_tools, archive_tool_handlers
+from .system_tools import register_system_tools, system_tool_handlers
+
+logger = logging.getLogger("mcp-tool-registry")
+
+Handler = Callable[[dict[str, Any]], Awaitable[list[TextContent]]]
+
+# (tool definitions, implementations) for every category, in listing order
+CATEGORIES = [
+    (register_shell_tools, shell_tool_handlers),
+    (register_file_tools, file_tool_handlers),
+    (register_filesystem_tools, filesystem_tool_handlers),
+    (register_text_tools, text_tool_handlers),
+    (register_network_tools, network_tool_handlers),
+    (register_archive_tools, archive_tool_handlers),
+    (register_system_tools, system_tool_handlers),
+]
+
+# Seconds allowed on top of a tool's own timeout before the registry gives up on it
+TIMEOUT_GRACE = 10
+
+DEFAULT_LIMITS = {"concurrency": 16, "timeout": 60 + TIMEOUT_GRACE}
+
+# Per-tool overrides. "timeout" is in seconds, or a function of the call's
+# arguments for tools that take their own timeout or duration.
+TOOL_LIMITS = {
+    "execute_bash": {"concurrency": 8, "timeout": lambda args: args.get("timeout", 30) + TIMEOUT_GRACE},
+    "execute_zsh": {"concurrency": 8, "timeout": lambda args: args.get("timeout", 30) + TIMEOUT_GRACE},
+    # Creating a venv and installing packages come before the code's own timeout
+    "execute_python": {"concurrency": 4, "timeout": lambda args: args.get("timeout", 60) + 360 + TIMEOUT_GRACE},
+    "http_request": {"concurrency": 8, "timeout": lambda args: args.get("timeout", 30) + 5 + TIMEOUT_GRACE},
+    "download_file": {"concurrency": 4, "timeout": 300 + TIMEOUT_GRACE},
+    "ping_host": {"concurrency": 8,
+                  "timeout": lambda args: args.get("timeout", 5) * args.get("count", 4) + 5 + TIMEOUT_GRACE},
+    # A full 65535-port range against a host that drops packets needs a few minutes
+    "port_scan": {"concurrency": 2, "timeout": 600 + TIMEOUT_GRACE},
+    "create_archive": {"concurrency": 2, "timeout": 300 + TIMEOUT_GRACE},
+    "extract_archive": {"concurrency": 2, "timeout": 300 + TIMEOUT_GRACE},
+    "compress_file": {"concurrency": 2, "timeout": 300 + TIMEOUT_GRACE},
+    "decompress_file": {"concurrency": 2, "timeout": 300 + TIMEOUT_GRACE},
+    "monitor_system": {"concurrency": 2, "timeout": lambda args: args.get("duration", 5) + 5 + TIMEOUT_GRACE},
+}
+
+
+class ToolStats:
+    """Counters and a window of recent latencies for one tool."""
+
+    def __init__(self, window: int = 256):
+        self.calls = 0
+        self.completed = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.invalid = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.latencies: deque = deque(maxlen=window)
+
+    def snapshot(self) -> dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float | None:
+            if not ordered:
+                return None
+            return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000, 2)
+
+        return {
+            "calls": self.calls,
+            "completed": self.completed,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "invalid_arguments": self.invalid,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "latency_p50_ms": percentile(0.5),
+            "latency_p95_ms": percentile(0.95),
+            "latency_max_ms": round(ordered[-1] * 1000, 2) if ordered else None,
+        }
+
+
+class RegisteredTool:
+    """A tool definition with its handler, compiled validator, limits and stats."""
+
+    def __init__(self, tool: Tool, handler: Handler, limits: dict[str, Any]):
+        self.tool = tool
+        self.handler = handler
+        schema = tool.inputSchema
+        validator_class = validator_for(schema)
+        validator_class.check_schema(schema)
+        self.validator = validator_class(schema)
+        self.concurrency = limits["concurrency"]
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.timeout = limits["timeout"]
+        self.stats = ToolStats()
+
+    def timeout_for(self, arguments: dict[str, Any]) -> float:
+        return self.timeout(arguments) if callable(self.timeout) else self.timeout
+
+
+class ToolRegistry:
+    """
+    Dispatches tool calls by name in one dictionary lookup
+
+    Built once from the register_*_tools definitions and the matching
+    handler maps, so a tool listed to clients without an implementation
+    (or the reverse) fails at startup instead of on first use.
+    """
+
+    def __init__(self, categories=CATEGORIES, limits: dict[str, dict[str, Any]] | None = None):
+        """
+        Args:
+            categories: (register function, handler map function) pairs
+            limits: Per-tool {"concurrency", "timeout"} overrides
+        """
+        limits = TOOL_LIMITS if limits is None else limits
+        self._tools: dict[str, RegisteredTool] = {}
+        for register, handler_map in categories:
+            handlers = handler_map()
+            for tool in register():
+                if tool.name in self._tools:
+                    raise ValueError(f"Duplicate tool: {tool.name}")
+                if tool.name not in handlers:
+                    raise ValueError(f"Tool has no handler: {tool.name}")
+                self._tools[tool.name] = RegisteredTool(
+                    tool, handlers.pop(tool.name), {**DEFAULT_LIMITS, **limits.get(tool.name, {})}
+                )
+            if handlers:
+                raise ValueError(f"Handlers without a tool definition: {', '.join(sorted(handlers))}")
+        self._listing = [entry.tool for entry in self._tools.values()]
+        logger.info(f"Registered {len(self._tools)} tools")
+
+    def tools(self) -> list[Tool]:
+        return self._listing
+
+    async def call(self, name: str, arguments: dict[str, Any]) -> list[TextContent]:
+        """
+        Validate and run one tool call within the tool's concurrency limit and timeout
+
+        Raises:
+            ValueError: Unknown tool or arguments that do not match its schema
+        """
+        entry = self._tools.get(name)
+        if entry is None:
+            raise ValueError(f"Unknown tool: {name}")
+        stats = entry.stats
+        stats.calls += 1
+
+        error = best_match(entry.validator.iter_errors(arguments))
+        if error is not None:
+            stats.invalid += 1
+            location = ".".join(str(part) for part in error.absolute_path)
+            raise ValueError(f"Invalid arguments for {name}: {f'{location}: ' if location else ''}{error.message}")
+
+        timeout = entry.timeout_for(arguments)
+        started = time.perf_counter()
+        stats.waiting += 1
+        try:
+            await entry.semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+        stats.in_flight += 1
+        try:
+            result = await asyncio.wait_for(entry.handler(arguments), timeout=timeout)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            logger.error(f"Tool {name} timed out after {timeout} seconds")
+            return [TextContent(type="text", text=f"Error: {name} timed out after {timeout} seconds")]
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            entry.semaphore.release()
+            stats.latencies.append(time.perf_counter() - started)
+
+        stats.completed += 1
+        # Tools report failures they handled as an "Error..." text result
+        if result and isinstance(result[0], TextContent) and result[0].text.startswith("Error"):
+            stats.errors += 1
+        return result
+
+    def metrics(self) -> dict[str, Any]:
+        """Per-tool counters, limits and latency percentiles for tools that have been called."""
+        return {
+            name: {**entry.stats.snapshot(), "concurrency": entry.concurrency}
+            for name, entry in self._tools.items()
+            if entry.stats.calls
+        }
@@ -3,15 +3,36 @@ Shell execution tools: bash, zsh, and Python.
 """
 import asyncio
 import os
+import signal
 import tempfile
 import shlex
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator, Awaitable, Callable
+from mcp.server.lowlevel.server import request_ctx
 from mcp.types import Tool, TextContent
 import logging
 
 logger = logging.getLogger("mcp-shell-tools")
 
+SHELLS = {"bash": "/bin/bash", "zsh": "/bin/zsh"}
+
+# Output kept per stream (stdout, stderr): half from the start, half from the end
+DEFAULT_MAX_OUTPUT_BYTES = 128 * 1024
+READ_CHUNK = 64 * 1024
+
+# Progress notifications: how often, and how much of the newest output each carries
+PROGRESS_INTERVAL = 1.0
+PROGRESS_MESSAGE_BYTES = 2048
+
+# Seconds between SIGTERM and SIGKILL when killing a timed-out process group
+KILL_GRACE = 2
+
+# Persistent shell sessions kept open; the least recently used is closed beyond this
+MAX_SESSIONS = 8
+
 
 def register_shell_tools() -> list[Tool]:
     """Register all shell execution tools."""
@@ -34,6 +55,20 @@ def register_shell_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Command timeout in seconds (default: 30)",
                         "default": 30
+                    },
+                    "max_output_bytes": {
+                        "type": "integer",
+                        "description": "Output kept per stream (default: 131072). Longer output keeps its first and last halves with the middle elided",
+                        "default": 131072
+                    },
+                    "session": {
+                        "type": "string",
+                        "description": "Name of a persistent shell session to run in. The working directory, environment and shell variables carry over between calls with the same name"
+                    },
+                    "reset_session": {
+                        "type": "boolean",
+                        "description": "Start the named session afresh before running the command",
+                        "default": False
                     }
                 },
                 "required": ["command"]
@@ -62,6 +97,20 @@ def register_shell_tools() -> list[Tool]:
                         "type": "boolean",
                         "description": "If true, executes as a login shell (loads ~/.zshrc). Default: false",
                         "default": False
+                    },
+                    "max_output_bytes": {
+                        "type": "integer",
+                        "description": "Output kept per stream (default: 131072). Longer output keeps its first and last halves with the middle elided",
+                        "default": 131072
+                    },
+                    "session": {
+                        "type": "string",
+                        "description": "Name of a persistent shell session to run in. The working directory, environment and shell variables carry over between calls with the same name"
+                    },
+                    "reset_session": {
+                        "type": "boolean",
+                        "description": "Start the named session afresh before running the command",
+                        "default": False
                     }
                 },
                 "required": ["command"]
@@ -107,86 +156,394 @@ def register_shell_tools() -> list[Tool]:
     ]
 
 
+def shell_tool_handlers() -> dict[str, Callable[[dict[str, Any]], Awaitable[list[TextContent]]]]:
+    """Map each shell tool name to its implementation."""
+    return {
+        "execute_bash": execute_bash_command,
+        "execute_zsh": execute_zsh_command,
+        "execute_python": execute_python_code,
+    }
+
+
 async def handle_shell_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
     """Handle shell tool execution."""
-    if name == "execute_bash":
-        return await execute_bash_command(arguments)
-    elif name == "execute_zsh":
-        return await execute_zsh_command(arguments)
-    elif name == "execute_python":
-        return await execute_python_code(arguments)
+    handler = shell_tool_handlers().get(name)
+    if handler:
+        return await handler(arguments)
     return None
 
 
+# ============================================================================
+# Output Capture
+# ============================================================================
+
+class BoundedOutput:
+    """
+    Keeps the first and last bytes of a stream, however much passes through
+
+    Memory stays at about head_limit + 2 * tail_limit. The text shows what
+    was kept with a marker in place of the elided middle.
+    """
+
+    def __init__(self, head_limit: int, tail_limit: int):
+        self.head_limit = head_limit
+        self.tail_limit = tail_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.latest = bytearray()
+        self.total = 0
+
+    def write(self, data: bytes):
+        self.total += len(data)
+        self.latest += data
+        if len(self.latest) > 2 * PROGRESS_MESSAGE_BYTES:
+            del self.latest[:-PROGRESS_MESSAGE_BYTES]
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data and self.tail_limit:
+            self.tail += data
+            if len(self.tail) > 2 * self.tail_limit:
+                del self.tail[:-self.tail_limit]
+
+    def take_latest(self) -> str:
+        """Output written since the last call (at most its last few KB), for progress messages."""
+        latest = bytes(self.latest[-PROGRESS_MESSAGE_BYTES:])
+        self.latest.clear()
+        return latest.decode("utf-8", errors="replace")
+
+    def text(self) -> str:
+        tail = bytes(self.tail[-self.tail_limit:]) if self.tail_limit else b""
+        elided = self.total - len(self.head) - len(tail)
+        head = self.head.decode("utf-8", errors="replace")
+        if elided <= 0:
+            return (bytes(self.head) + tail).decode("utf-8", errors="replace")
+        return (f"{head}\n... [{elided} bytes elided; {self.total} bytes total] ...\n"
+                f"{tail.decode('utf-8', errors='replace')}")
+
+
+def output_limits(arguments: dict[str, Any]) -> tuple[int, int]:
+    """(head, tail) bytes kept per stream, from the max_output_bytes argument."""
+    limit = max(arguments.get("max_output_bytes", DEFAULT_MAX_OUTPUT_BYTES), 0)
+    return limit - limit // 2, limit // 2
+
+
+def progress_reporter() -> Callable[[int, str], Awaitable[None]] | None:
+    """Sends progress notifications for the current request, if the client asked for them."""
+    try:
+        ctx = request_ctx.get()
+    except LookupError:
+        return None
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return None
+
+    async def report(progress: int, message: str):
+        await ctx.session.send_progress_notification(token, progress, message=message)
+
+    return report
+
+
+async def report_progress(report, outputs: list[BoundedOutput]):
+    """Report bytes captured so far and the newest output every PROGRESS_INTERVAL seconds."""
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL)
+        message = "".join(output.take_latest() for output in outputs)
+        if message:
+            try:
+                await report(sum(output.total for output in outputs), message)
+            except Exception as e:
+                logger.warning(f"Could not send progress notification: {str(e)}")
+                return
+
+
+async def pump(stream: asyncio.StreamReader, output: BoundedOutput):
+    while chunk := await stream.read(READ_CHUNK):
+        output.write(chunk)
+
+
+def signal_group(pgid: int, sig: int):
+    try:
+        os.killpg(pgid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def kill_process_group(process: asyncio.subprocess.Process):
+    """SIGTERM the process's group, then SIGKILL it if it has not exited after KILL_GRACE seconds."""
+    signal_group(process.pid, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), timeout=KILL_GRACE)
+    except asyncio.TimeoutError:
+        pass
+    # Children that ignored SIGTERM, even once the leader is gone
+    signal_group(process.pid, signal.SIGKILL)
+    await process.wait()
+
+
+async def run_captured(process: asyncio.subprocess.Process, timeout: float,
+                       stdout: BoundedOutput, stderr: BoundedOutput) -> bool:
+    """
+    Read a process's output as it arrives until it exits
+
+    The process must lead its own process group (start_new_session=True):
+    on timeout or cancellation the whole group is killed, so children it
+    started do not outlive the call.
+
+    Returns:
+        True if the command timed out
+    """
+    report = progress_reporter()
+    progress = asyncio.create_task(report_progress(report, [stdout, stderr])) if report else None
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(pump(process.stdout, stdout), pump(process.stderr, stderr), process.wait()),
+            timeout=timeout
+        )
+        return False
+    except asyncio.TimeoutError:
+        await kill_process_group(process)
+        return True
+    except asyncio.CancelledError:
+        signal_group(process.pid, signal.SIGKILL)
+        # Reap it so its transport is not left to the garbage collector
+        await process.wait()
+        raise
+    finally:
+        if progress:
+            progress.cancel()
+
+
+def format_result(exit_code: int | None, stdout: BoundedOutput, stderr: BoundedOutput) -> str:
+    response = f"Exit Code: {exit_code}\n\n"
+    if stdout.total:
+        response += f"STDOUT:\n{stdout.text()}\n"
+    if stderr.total:
+        response += f"STDERR:\n{stderr.text()}\n"
+    return response
+
+
+# ============================================================================
+# Persistent Shell Sessions
+# ============================================================================
+
+class ShellSession:
+    """
+    A long-lived shell that runs commands one at a time
+
+    Commands run through `eval` in the shell itself, so `cd`, `export` and
+    shell variables carry over to the next call, and a syntax error does
+    not end the session. Each command's end is marked on stdout (with its
+    exit status) and on stderr by a line with a per-session random marker.
+    """
+
+    def __init__(self, shell: str, process: asyncio.subprocess.Process):
+        self.shell = shell
+        self.process = process
+        self.marker = f"__MCP_END_{uuid.uuid4().hex}__"
+
+    @classmethod
+    async def start(cls, shell: str, use_login_shell: bool = False) -> "ShellSession":
+        argv = [SHELLS["zsh"], "-l", "-s"] if shell == "zsh" and use_login_shell else [SHELLS[shell], "-s"]
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+        return cls(shell, process)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def run(self, command: str, working_dir: str | None, timeout: float,
+                  stdout: BoundedOutput, stderr: BoundedOutput) -> tuple[int | None, bool]:
+        """
+        Run one command in the session
+
+        Returns:
+            The exit code (None if the shell exited or was killed) and
+            whether the command timed out
+        """
+        prefix = f"cd {shlex.quote(working_dir)} && " if working_dir else ""
+        script = (f"{prefix}eval {shlex.quote(command)} < /dev/null\n"
+                  f"printf '\\n%s %d\\n' {self.marker} $?\n"
+                  f"printf '\\n%s\\n' {self.marker} >&2\n")
+        marker = f"\n{self.marker}".encode()
+        report = progress_reporter()
+        progress = asyncio.create_task(report_progress(report, [stdout, stderr])) if report else None
+        try:
+            self.process.stdin.write(script.encode())
+            await self.process.stdin.drain()
+            status, _ = await asyncio.wait_for(
+                asyncio.gather(read_until_marker(self.process.stdout, stdout, marker),
+                               read_until_marker(self.process.stderr, stderr, marker)),
+                timeout=timeout
+            )
+            return (int(status) if status is not None else None), False
+        except asyncio.TimeoutError:
+            await kill_process_group(self.process)
+            return None, True
+        except (BrokenPipeError, ConnectionResetError):
+            await self.process.wait()
+            return None, False
+        except asyncio.CancelledError:
+            signal_group(self.process.pid, signal.SIGKILL)
+            await self.process.wait()
+            raise
+        finally:
+            if progress:
+                progress.cancel()
+
+    async def close(self):
+        if self.alive:
+            await kill_process_group(self.process)
+
+
+async def read_until_marker(stream: asyncio.StreamReader, output: BoundedOutput, marker: bytes) -> str | None:
+    """
+    Copy a session's output into `output` up to the end marker
+
+    Returns:
+        The rest of the marker line (the exit status on stdout), or None
+        if the shell exited first
+    """
+    pending = b""
+    keep = len(marker) - 1
+    while True:
+        chunk = await stream.read(READ_CHUNK)
+        if not chunk:
+            output.write(pending)
+            return None
+        pending += chunk
+        index = pending.find(marker)
+        if index >= 0:
+            output.write(pending[:index])
+            rest = pending[index + len(marker):]
+            while b"\n" not in rest:
+                more = await stream.read(64)
+                if not more:
+                    return None
+                rest += more
+            return rest.split(b"\n", 1)[0].decode().strip()
+        # Hold back what could be the start of a marker split across reads
+        output.write(pending[:-keep])
+        pending = pending[-keep:]
+
+
+class SessionSlot:
+    """A session name's shell and the lock held by every call that uses it"""
+
+    __slots__ = ("lock", "session", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.session: ShellSession | None = None
+        # Calls holding or waiting for the lock; a slot in use is never evicted
+        self.users = 0
+
+
+# Session slots by (shell, name), least recently used first
+_sessions: OrderedDict[tuple[str, str], SessionSlot] = OrderedDict()
+
+
+@asynccontextmanager
+async def use_session(shell: str, name: str, use_login_shell: bool, reset: bool) -> AsyncIterator[SessionSlot]:
+    """
+    Hold a named session for one command, starting or resetting its shell first
+
+    Lookup, start, reset and the command itself all run under the name's
+    lock, so concurrent first calls start a single shell and a reset never
+    kills a shell another call is running a command in. Setting
+    slot.session to None drops the shell from the session table.
+    """
+    key = (shell, name)
+    slot = _sessions.get(key)
+    if slot is None:
+        slot = _sessions[key] = SessionSlot()
+    _sessions.move_to_end(key)
+    slot.users += 1
+    try:
+        async with slot.lock:
+            if slot.session is not None and (reset or not slot.session.alive):
+                await slot.session.close()
+                slot.session = None
+            if slot.session is None:
+                await evict_idle_sessions()
+                slot.session = await ShellSession.start(shell, use_login_shell)
+                logger.info(f"Started {shell} session '{name}'")
+            yield slot
+    finally:
+        slot.users -= 1
+        if slot.session is None and not slot.users and _sessions.get(key) is slot:
+            del _sessions[key]
+
+
+async def evict_idle_sessions():
+    """Close the least recently used idle shells until one more fits under MAX_SESSIONS."""
+    while sum(slot.session is not None for slot in _sessions.values()) >= MAX_SESSIONS:
+        idle = next((key for key, slot in _sessions.items() if slot.session is not None and not slot.users), None)
+        if idle is None:
+            # Every shell is running a command; go over the limit rather than kill one
+            return
+        await _sessions.pop(idle).session.close()
+
+
+async def close_shell_sessions():
+    """Kill every persistent shell session (on server shutdown)."""
+    while _sessions:
+        _, slot = _sessions.popitem()
+        if slot.session is not None:
+            await slot.session.close()
+
+
 # ============================================================================
 # Shell Execution Implementation
 # ============================================================================
 
 async def execute_shell_command(arguments: dict[str, Any], shell: str = "bash") -> list[TextContent]:
-    """Execute a shell command (bash or zsh)."""
+    """Execute a shell command (bash or zsh), streaming its output into bounded buffers."""
     command = arguments.get("command")
     working_dir = arguments.get("working_directory")
     timeout = arguments.get("timeout", 30)
     use_login_shell = arguments.get("use_login_shell", False)
-    
+    session_name = arguments.get("session")
+
     if not command:
         raise ValueError("Command is required")
-    
+
     logger.info(f"Executing {shell} command: {command}")
-    
+
+    stdout, stderr = BoundedOutput(*output_limits(arguments)), BoundedOutput(*output_limits(arguments))
+
     try:
-        # Determine shell executable
-        if shell == "zsh":
-            if use_login_shell:
-                shell_cmd = f"zsh -l -c {shlex.quote(command)}"
-            else:
-                shell_cmd = f"zsh -c {shlex.quote(command)}"
-        else:  # bash
-            shell_cmd = command
-        
-        # Execute command
-        process = await asyncio.create_subprocess_shell(
-            shell_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=working_dir,
-            executable="/bin/zsh" if shell == "zsh" else "/bin/bash"
-        )
-        
-        # Wait for completion with timeout
-        stdout, stderr = await asyncio.wait_for(
-            process.communicate(),
-            timeout=timeout
-        )
-        
-        # Decode output
-        stdout_text = stdout.decode('utf-8', errors='replace')
-        stderr_text = stderr.decode('utf-8', errors='replace')
-        exit_code = process.returncode
-        
-        # Format response
-        response = f"Exit Code: {exit_code}\n\n"
-        
-        if stdout_text:
-            response += f"STDOUT:\n{stdout_text}\n"
-        
-        if stderr_text:
-            response += f"STDERR:\n{stderr_text}\n"
-        
-        if exit_code == 0:
-            logger.info(f"{shell.upper()} command executed successfully")
+        if session_name:
+            async with use_session(shell, session_name, use_login_shell,
+                                   arguments.get("reset_session", False)) as slot:
+                exit_code, timed_out = await slot.session.run(command, working_dir, timeout, stdout, stderr)
+                if timed_out or exit_code is None:
+                    slot.session = None
         else:
-            logger.warning(f"{shell.upper()} command failed with exit code {exit_code}")
-        
-        return [TextContent(type="text", text=response)]
-        
-    except asyncio.TimeoutError:
-        logger.error(f"Command timed out after {timeout} seconds")
-        return [TextContent(
-            type="text",
-            text=f"Error: Command timed out after {timeout} seconds"
-        )]
-    
+            if shell == "zsh" and use_login_shell:
+                argv = [SHELLS["zsh"], "-l", "-c", command]
+            else:
+                argv = [SHELLS[shell], "-c", command]
+
+            # Own session and process group, so a timeout can kill everything the command started
+            process = await asyncio.create_subprocess_exec(
+                *argv,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=working_dir,
+                start_new_session=True
+            )
+            timed_out = await run_captured(process, timeout, stdout, stderr)
+            exit_code = process.returncode
+
     except Exception as e:
         logger.error(f"Error executing command: {str(e)}")
         return [TextContent(
@@ -194,6 +551,26 @@ async def execute_shell_command(arguments: dict[str, Any], shell: str = "bash")
             text=f"Error executing command: {str(e)}"
         )]
 
+    if timed_out:
+        logger.error(f"Command timed out after {timeout} seconds")
+        note = "; the session was reset" if session_name else ""
+        return [TextContent(
+            type="text",
+            text=f"Error: Command timed out after {timeout} seconds (process group killed{note})\n\n"
+                 + format_result(None, stdout, stderr)
+        )]
+
+    response = format_result(exit_code, stdout, stderr)
+    if session_name and exit_code is None:
+        response += f"\nSession '{session_name}' ended (the shell exited)\n"
+
+    if exit_code == 0:
+        logger.info(f"{shell.upper()} command executed successfully")
+    else:
+        logger.warning(f"{shell.upper()} command failed with exit code {exit_code}")
+
+    return [TextContent(type="text", text=response)]
+
 
 async def execute_bash_command(arguments: dict[str, Any]) -> list[TextContent]:
     """Execute a bash command."""
@@ -315,6 +692,8 @@ async def execute_python_code(arguments: dict[str, Any]) -> list[TextContent]:
                 return [TextContent(type="text", text="\n".join(response_parts))]
         
         # Execute code
+        stdout = BoundedOutput(DEFAULT_MAX_OUTPUT_BYTES // 2, DEFAULT_MAX_OUTPUT_BYTES // 2)
+        stderr = BoundedOutput(DEFAULT_MAX_OUTPUT_BYTES // 2, DEFAULT_MAX_OUTPUT_BYTES // 2)
         if script_mode or "\n" in code:
             with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
                 f.write(code)
@@ -323,15 +702,14 @@ async def execute_python_code(arguments: dict[str, Any]) -> list[TextContent]:
             try:
                 process = await asyncio.create_subprocess_exec(
                     python_cmd, script_path,
+                    stdin=asyncio.subprocess.DEVNULL,
                     stdout=asyncio.subprocess.PIPE,
                     stderr=asyncio.subprocess.PIPE,
-                    cwd=working_dir
+                    cwd=working_dir,
+                    start_new_session=True
                 )
                 
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=timeout
-                )
+                timed_out = await run_captured(process, timeout, stdout, stderr)
             finally:
                 try:
                     os.unlink(script_path)
@@ -340,19 +718,20 @@ async def execute_python_code(arguments: dict[str, Any]) -> list[TextContent]:
         else:
             process = await asyncio.create_subprocess_exec(
                 python_cmd, "-c", code,
+                stdin=asyncio.subprocess.DEVNULL,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                cwd=working_dir
+                cwd=working_dir,
+                start_new_session=True
             )
             
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout
-            )
+            timed_out = await run_captured(process, timeout, stdout, stderr)
         
-        # Decode output
-        stdout_text = stdout.decode('utf-8', errors='replace')
-        stderr_text = stderr.decode('utf-8', errors='replace')
+        if timed_out:
+            raise asyncio.TimeoutError()
+        
+        stdout_text = stdout.text() if stdout.total else ""
+        stderr_text = stderr.text() if stderr.total else ""
         exit_code = process.returncode
         
         # Format response
@@ -2,7 +2,7 @@
 Process and system tools: ps, kill, top, uptime, free, etc.
 """
 import shlex
-from typing import Any
+from typing import Any, Awaitable, Callable
 from mcp.types import Tool, TextContent
 from .shell_tools import execute_shell_command
 import logging
@@ -163,9 +163,9 @@ def register_system_tools() -> list[Tool]:
     ]
 
 
-async def handle_system_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
-    """Handle system tool execution."""
-    handlers = {
+def system_tool_handlers() -> dict[str, Callable[[dict[str, Any]], Awaitable[list[TextContent]]]]:
+    """Map each system tool name to its implementation."""
+    return {
         "list_processes": list_processes,
         "kill_process": kill_process,
         "system_info": system_info,
@@ -174,8 +174,11 @@ async def handle_system_tools(name: str, arguments: dict[str, Any]) -> list[Text
         "service_control": service_control,
         "environment_info": environment_info,
     }
-    
-    handler = handlers.get(name)
+
+
+async def handle_system_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
+    """Handle system tool execution."""
+    handler = system_tool_handlers().get(name)
     if handler:
         return await handler(arguments)
     return None
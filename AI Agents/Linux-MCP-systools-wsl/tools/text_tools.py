@@ -1,9 +1,12 @@
 """
 Text processing tools: grep, sed, awk, cut, sort, etc.
 """
+import asyncio
+import os
 import shlex
-from typing import Any
+from typing import Any, Awaitable, Callable
 from mcp.types import Tool, TextContent
+from . import native_fs
 from .shell_tools import execute_shell_command
 import logging
 
@@ -15,13 +18,13 @@ def register_text_tools() -> list[Tool]:
     return [
         Tool(
             name="grep_search",
-            description="Search for patterns in files (grep command). Supports regular expressions and various search options.",
+            description="Search for patterns in files (like grep). Supports Python regular expressions and various search options; binary files are skipped.",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "pattern": {
                         "type": "string",
-                        "description": "Search pattern (supports regular expressions)"
+                        "description": "Search pattern (Python regular expression syntax)"
                     },
                     "path": {
                         "type": "string",
@@ -55,6 +58,11 @@ def register_text_tools() -> list[Tool]:
                     "context_lines": {
                         "type": "integer",
                         "description": "Number of context lines to show around matches"
+                    },
+                    "max_matches": {
+                        "type": "integer",
+                        "description": "Stop searching after this many matching lines (default: 1000)",
+                        "default": 1000
                     }
                 },
                 "required": ["pattern", "path"]
@@ -153,15 +161,18 @@ def register_text_tools() -> list[Tool]:
     ]
 
 
-async def handle_text_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
-    """Handle text processing tool execution."""
-    handlers = {
+def text_tool_handlers() -> dict[str, Callable[[dict[str, Any]], Awaitable[list[TextContent]]]]:
+    """Map each text processing tool name to its implementation."""
+    return {
         "grep_search": grep_search,
         "text_transform": text_transform,
         "sort_text": sort_text,
     }
-    
-    handler = handlers.get(name)
+
+
+async def handle_text_tools(name: str, arguments: dict[str, Any]) -> list[TextContent] | None:
+    """Handle text processing tool execution."""
+    handler = text_tool_handlers().get(name)
     if handler:
         return await handler(arguments)
     return None
@@ -172,7 +183,7 @@ async def handle_text_tools(name: str, arguments: dict[str, Any]) -> list[TextCo
 # ============================================================================
 
 async def grep_search(arguments: dict[str, Any]) -> list[TextContent]:
-    """Search for patterns in files using grep."""
+    """Search for patterns in files with a compiled regex on worker threads."""
     pattern = arguments.get("pattern")
     path = arguments.get("path")
     recursive = arguments.get("recursive", False)
@@ -180,36 +191,53 @@ async def grep_search(arguments: dict[str, Any]) -> list[TextContent]:
     line_numbers = arguments.get("line_numbers", True)
     count_only = arguments.get("count_only", False)
     invert_match = arguments.get("invert_match", False)
-    context_lines = arguments.get("context_lines")
+    context_lines = arguments.get("context_lines") or 0
+    max_matches = max(arguments.get("max_matches", 1000), 1)
     
     if not pattern or not path:
         raise ValueError("Pattern and path are required")
     
     logger.info(f"Searching for pattern '{pattern}' in {path}")
     
-    cmd_parts = ["grep"]
-    if recursive:
-        cmd_parts.append("-r")
-    if ignore_case:
-        cmd_parts.append("-i")
-    if line_numbers and not count_only:
-        cmd_parts.append("-n")
-    if count_only:
-        cmd_parts.append("-c")
-    if invert_match:
-        cmd_parts.append("-v")
-    if context_lines is not None:
-        cmd_parts.extend(["-C", str(context_lines)])
+    if not os.path.exists(path):
+        return [TextContent(type="text", text=f"Error: {path}: No such file or directory")]
+    if os.path.isdir(path) and not recursive:
+        return [TextContent(type="text", text=f"Error: {path}: Is a directory (set recursive to search it)")]
     
-    cmd_parts.append(shlex.quote(pattern))
-    cmd_parts.append(shlex.quote(path))
+    result = await asyncio.to_thread(
+        native_fs.grep, path, pattern, recursive, ignore_case, invert_match,
+        0 if count_only else context_lines, max_matches, None, count_only
+    )
     
-    command = " ".join(cmd_parts)
+    # Like grep, name the file on each line when searching more than one
+    show_path = recursive
+    lines = []
+    previous = None
+    for file_path, rows, matched in result["files"]:
+        if count_only:
+            lines.append(f"{file_path}:{matched}" if show_path else str(matched))
+            continue
+        for number, text, is_match in rows:
+            if context_lines and previous is not None and previous != (file_path, number - 1):
+                lines.append("--")
+            separator = ":" if is_match else "-"
+            location = f"{file_path}{separator}" if show_path else ""
+            if line_numbers:
+                location += f"{number}{separator}"
+            lines.append(location + text.decode("utf-8", errors="replace"))
+            previous = (file_path, number)
     
-    return await execute_shell_command(
-        {"command": command, "timeout": 60},
-        shell="bash"
-    )
+    summary = [f"{result['matches']} matching lines"]
+    if result["truncated"]:
+        summary.append(f"stopped at max_matches={max_matches}")
+    if result["binary"]:
+        summary.append(f"{len(result['binary'])} binary files skipped")
+    if result["errors"]:
+        summary.append(f"{len(result['errors'])} files unreadable")
+    lines.extend(f"Error: {file_path}: {message}" for file_path, message in result["errors"][:20])
+    lines.append(f"[{'; '.join(summary)}]")
+    
+    return [TextContent(type="text", text="\n".join(lines))]
 
 
 async def text_transform(arguments: dict[str, Any]) -> list[TextContent]:
@@ -0,0 +1,135 @@
+"""
+Parsed Source Cache Benchmark
+
+Runs a full project analysis (quality monitor, dead code detector, bloat
+detector, file splitter, refactoring analyzer, codebase indexer and call
+graph builder) over a synthetic project, once with the shared cache
+effectively disabled and once with it enabled.
+
+Usage:
+    python scripts/benchmarks/benchmark_source_cache.py [file_count]
+"""
+
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.utils import source_cache
+from src.utils.source_cache import ParsedSourceCache
+from src.modules.quality_monitor import QualityMonitor
+from src.modules.dead_code_detector import DeadCodeDetector
+from src.modules.bloat_detector import BloatDetector
+from src.modules.file_splitter import FileSplitter
+from src.modules.refactorer.analyzer import CodeAnalyzer
+from src.modules.codebase_indexer import CodebaseIndexer
+
+try:
+    from src.modules.context_manager.graph_retriever import CallGraphBuilder
+except ImportError:  # context_manager needs the optional embedding stack
+    CallGraphBuilder = None
+
+
+MODULE_TEMPLATE = '''"""
+Synthetic module {index}
+"""
+
+import os
+from typing import List
+
+
+class Service{index}:
+    """Service {index}"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items: List[int] = []
+
+{methods}
+
+def helper_{index}(values):
+    total = 0
+    for value in values:
+        if value % 2:
+            total += value
+        else:
+            total -= value
+    return total
+'''
+
+METHOD_TEMPLATE = '''    def method_{n}(self, value: int) -> int:
+        if value > {n}:
+            self.items.append(value)
+            return helper_{index}(self.items)
+        return value * {n}
+'''
+
+
+def create_project(root: Path, file_count: int):
+    """Write a synthetic package of mid-sized modules."""
+    package = root / "pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("from .module_0 import Service0\n")
+    for index in range(file_count):
+        methods = "\n".join(METHOD_TEMPLATE.format(n=n, index=index) for n in range(40))
+        (package / f"module_{index}.py").write_text(
+            MODULE_TEMPLATE.format(index=index, methods=methods)
+        )
+
+
+def run_analysis(project: Path):
+    """Run every analyzer over the project."""
+    files = sorted(project.rglob("*.py"))
+
+    QualityMonitor(str(project)).get_project_quality_report()
+    DeadCodeDetector(str(project)).analyze_project()
+    BloatDetector(str(project)).detect_all()
+
+    splitter = FileSplitter(max_lines=200)
+    for item in splitter.detect_large_files(str(project)):
+        splitter.suggest_split_points(str(project / item['path']))
+
+    analyzer = CodeAnalyzer(max_lines=200)
+    for file_path in files:
+        analyzer.analyze_code(str(file_path))
+
+    CodebaseIndexer(str(project)).index_project()
+
+    if CallGraphBuilder is not None:
+        builder = CallGraphBuilder()
+        for file_path in files:
+            builder.build_from_file(str(file_path))
+
+
+def measure(project: Path, cache: ParsedSourceCache):
+    """Time one full analysis with the given process-wide cache."""
+    source_cache._default_cache = cache
+    start = time.perf_counter()
+    run_analysis(project)
+    elapsed = time.perf_counter() - start
+    return elapsed, cache.get_stats()
+
+
+def main(file_count: int = 200):
+    """Run the benchmark and print timings."""
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = Path(tmpdir)
+        create_project(project, file_count)
+
+        # max_bytes=0 keeps only the last file, so every pass re-reads and re-parses
+        before, before_stats = measure(project, ParsedSourceCache(max_bytes=0))
+        after, after_stats = measure(project, ParsedSourceCache())
+
+    print(f"files analyzed:          {file_count + 1}")
+    print(f"without shared cache:    {before:7.2f} s ({before_stats['misses']} reads)")
+    print(f"with shared cache:       {after:7.2f} s ({after_stats['misses']} reads)")
+    print(f"speedup:                 {before / after:7.2f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,88 @@
+"""
+Template Engine Benchmark
+
+Compares the compiled TemplateEngine against the previous regex based
+renderer on a prompt with a large context payload.
+
+Usage:
+    python scripts/benchmarks/benchmark_template_engine.py
+"""
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.modules.prompt_manager import TemplateEngine
+
+
+def legacy_render(template, variables):
+    """Regex based renderer used before templates were compiled."""
+    def substitute(text, values):
+        for key, value in values.items():
+            if isinstance(value, (list, tuple)):
+                value_str = ', '.join(str(v) for v in value)
+            else:
+                value_str = str(value)
+            text = text.replace(f'{{{key}}}', value_str)
+        return text
+
+    def conditional(match):
+        name = match.group(1)
+        return match.group(2) if variables.get(name) else ""
+
+    def loop(match):
+        items = variables.get(match.group(2))
+        if not isinstance(items, (list, tuple)):
+            return ""
+        parts = []
+        for item in items:
+            loop_vars = variables.copy()
+            loop_vars[match.group(1)] = item
+            parts.append(substitute(match.group(3), loop_vars))
+        return ''.join(parts)
+
+    result = re.sub(r'\{%\s*if\s+(\w+)\s*%\}(.*?)\{%\s*endif\s*%\}',
+                    conditional, template, flags=re.DOTALL)
+    result = re.sub(r'\{%\s*for\s+(\w+)\s+in\s+(\w+)\s*%\}(.*?)\{%\s*endfor\s*%\}',
+                    loop, result, flags=re.DOTALL)
+    return substitute(result, variables)
+
+
+TEMPLATE = (
+    "You are a {role} working on {project}.\n"
+    "{% if strict %}Follow the rules strictly.\n{% endif %}"
+    "Files:\n{% for file in files %}- {file}\n{% endfor %}"
+    "Context:\n{context}\n"
+    "Task: {task}\n"
+)
+
+
+def main(iterations: int = 2000):
+    """Run the benchmark and print per-render timings."""
+    variables = {
+        'role': 'senior engineer',
+        'project': 'uaide',
+        'strict': True,
+        'files': [f'src/module_{i}.py' for i in range(50)],
+        'context': 'def example():\n    return 42\n' * 2000,
+        'task': 'Refactor the example module',
+    }
+    for i in range(30):
+        variables[f'extra_{i}'] = f'value {i}'
+
+    engine = TemplateEngine()
+    assert engine.render(TEMPLATE, variables) == legacy_render(TEMPLATE, variables)
+
+    legacy = timeit.timeit(lambda: legacy_render(TEMPLATE, variables), number=iterations)
+    compiled = timeit.timeit(lambda: engine.render(TEMPLATE, variables), number=iterations)
+
+    print(f"legacy regex renderer: {legacy / iterations * 1e6:9.1f} us/render")
+    print(f"compiled renderer:     {compiled / iterations * 1e6:9.1f} us/render")
+    print(f"speedup:               {legacy / compiled:9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,14 +3,20 @@ Automation Engine Module
 
 Event-driven automation for common development tasks.
 Automatically triggers actions based on project events.
+
+Triggers can be fired synchronously with fire_trigger() or scheduled with
+schedule_trigger(), which debounces per (trigger, path), coalesces duplicate
+pending actions and runs them on a worker pool.
 """
 
 import time
-from typing import Dict, List, Callable, Optional, Any
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Callable, Optional, Any, Tuple
 from enum import Enum
 from pathlib import Path
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
 
 logger = logging.getLogger(__name__)
 
@@ -46,20 +52,137 @@ class ActionType(Enum):
     TEMPLATE_VALIDATE = "template_validate"  # v1.5.0
 
 
+class JobStatus(Enum):
+    """Lifecycle states of a scheduled automation job"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+
+
+class _PendingAction:
+    """Action queued on the worker pool, shared by all jobs that requested it"""
+    
+    def __init__(self, action: ActionType, context: Dict):
+        self.action = action
+        self.context = context
+        self.future: Future = Future()
+        self.jobs = set()
+        self.started = False
+        self.cancelled = False
+
+
+class AutomationJob:
+    """
+    Handle for a scheduled trigger.
+    
+    Returned by AutomationEngine.schedule_trigger(). Repeated schedules for
+    the same (trigger, path) during the debounce window return the same job.
+    """
+    
+    def __init__(self, engine: 'AutomationEngine', trigger_type: TriggerType,
+                 key: Tuple, context: Dict):
+        self.trigger_type = trigger_type
+        self.key = key
+        self.context = context
+        self._engine = engine
+        self._timer: Optional[threading.Timer] = None
+        self._actions: List[_PendingAction] = []
+        self._dispatched = threading.Event()
+        self._cancelled = False
+    
+    @property
+    def status(self) -> JobStatus:
+        """Current job status"""
+        if self._cancelled:
+            return JobStatus.CANCELLED
+        if not self._dispatched.is_set():
+            return JobStatus.PENDING
+        if all(pending.future.done() for pending in self._actions):
+            return JobStatus.COMPLETED
+        return JobStatus.RUNNING
+    
+    def cancel(self) -> bool:
+        """
+        Cancel the job.
+        
+        Actions that are already running are left to finish. Queued actions
+        are dropped unless another job still waits for them.
+        
+        Returns:
+            True if the job was cancelled before completing
+        """
+        return self._engine._cancel_job(self)
+    
+    def cancelled(self) -> bool:
+        """Check whether the job was cancelled"""
+        return self._cancelled
+    
+    def done(self) -> bool:
+        """Check whether the job finished or was cancelled"""
+        return self.status in (JobStatus.COMPLETED, JobStatus.CANCELLED)
+    
+    def result(self, timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Wait for the job's actions and return their results
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            List of execution results in rule priority order
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+        
+        if not self._dispatched.wait(remaining()):
+            raise TimeoutError(f"Job {self.trigger_type.value} still pending")
+        if self._cancelled:
+            return []
+        
+        results = []
+        for pending in self._actions:
+            if pending.cancelled:
+                continue
+            results.append(pending.future.result(remaining()))
+        return results
+
+
 class AutomationEngine:
     """Manage automated workflows and triggers"""
     
-    def __init__(self):
-        """Initialize automation engine"""
-        self.triggers = defaultdict(list)  # trigger_type -> list of rules
+    def __init__(self, max_workers: int = 4, debounce_seconds: float = 0.5,
+                 action_limits: Optional[Dict[ActionType, int]] = None):
+        """
+        Initialize automation engine
+        
+        Args:
+            max_workers: Worker threads used by schedule_trigger()
+            debounce_seconds: Default debounce window per (trigger, path)
+            action_limits: Max concurrent runs per action type (default 1)
+        """
+        self.triggers = defaultdict(list)  # trigger_type -> rules, highest priority first
         self.action_handlers = {}  # action_type -> handler function
         self.enabled = True
         self.execution_log = []
         self.stats = {
             'triggers_fired': 0,
             'actions_executed': 0,
-            'actions_failed': 0
+            'actions_failed': 0,
+            'triggers_debounced': 0,
+            'actions_coalesced': 0
         }
+        self.max_workers = max_workers
+        self.debounce_seconds = debounce_seconds
+        self.action_limits = dict(action_limits or {})
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.RLock()
+        self._debounced: Dict[Tuple, AutomationJob] = {}
+        self._pending_actions: Dict[Tuple, _PendingAction] = {}
+        self._running_actions: Dict[ActionType, int] = defaultdict(int)
+        self._waiting_actions: Dict[ActionType, deque] = defaultdict(deque)
     
     def register_trigger(self, trigger_type: TriggerType, 
                         condition: Callable[[Dict], bool],
@@ -84,7 +207,10 @@ class AutomationEngine:
             'created_at': time.time()
         }
         
-        self.triggers[trigger_type].append(rule)
+        rules = self.triggers[trigger_type]
+        rules.append(rule)
+        # Keep rules ordered once here so firing never has to sort
+        rules.sort(key=lambda r: r['priority'], reverse=True)
         logger.info(f"Registered trigger: {trigger_type.value} -> {action.value}")
     
     def register_action_handler(self, action_type: ActionType, handler: Callable):
@@ -113,44 +239,227 @@ class AutomationEngine:
             logger.debug("Automation engine is disabled")
             return []
         
-        self.stats['triggers_fired'] += 1
+        with self._lock:
+            self.stats['triggers_fired'] += 1
         results = []
         
-        # Get all rules for this trigger type
-        rules = self.triggers.get(trigger_type, [])
+        logger.info(f"Trigger fired: {trigger_type.value}")
         
-        # Sort by priority (highest first)
-        rules = sorted(
-            [r for r in rules if r['enabled']],
-            key=lambda x: x['priority'],
-            reverse=True
-        )
+        for action in self._matching_actions(trigger_type, context):
+            logger.info(f"Condition met, executing action: {action.value}")
+            result = self._execute_action(action, context)
+            results.append(result)
+            self._record_result(trigger_type, action, result)
         
-        logger.info(f"Trigger fired: {trigger_type.value}, checking {len(rules)} rules")
+        return results
+    
+    def schedule_trigger(self, trigger_type: TriggerType, context: Dict[str, Any],
+                         debounce: Optional[float] = None) -> AutomationJob:
+        """
+        Schedule a trigger to run on the worker pool
         
-        for rule in rules:
+        Triggers are debounced per (trigger, path): firing again within the
+        window replaces the context and restarts the timer. Matching actions
+        that are already queued for the same path are coalesced, and each
+        action type runs at most action_limits[action] at a time.
+        
+        Args:
+            trigger_type: Type of trigger
+            context: Context information
+            debounce: Debounce window in seconds (default: debounce_seconds)
+            
+        Returns:
+            Cancellable job handle
+        """
+        delay = self.debounce_seconds if debounce is None else debounce
+        key = (trigger_type, self._context_path(context))
+        
+        if not self.enabled:
+            logger.debug("Automation engine is disabled")
+            job = AutomationJob(self, trigger_type, key, context)
+            job._cancelled = True
+            job._dispatched.set()
+            return job
+        
+        with self._lock:
+            job = self._debounced.get(key)
+            if job is not None:
+                job._timer.cancel()
+                job.context = context
+                self.stats['triggers_debounced'] += 1
+            else:
+                job = AutomationJob(self, trigger_type, key, context)
+                self._debounced[key] = job
+            
+            job._timer = threading.Timer(delay, self._dispatch_job, args=(job,))
+            job._timer.daemon = True
+            job._timer.start()
+        
+        return job
+    
+    def set_action_limit(self, action_type: ActionType, limit: int):
+        """
+        Set how many runs of an action may execute concurrently
+        
+        Args:
+            action_type: Type of action
+            limit: Maximum concurrent runs (at least 1)
+        """
+        with self._lock:
+            self.action_limits[action_type] = max(1, limit)
+            self._start_waiting(action_type)
+    
+    def shutdown(self, wait: bool = True):
+        """
+        Cancel pending debounced jobs and stop the worker pool
+        
+        Args:
+            wait: Wait for running actions to finish
+        """
+        with self._lock:
+            for job in list(self._debounced.values()):
+                self._cancel_job(job)
+            for waiting in self._waiting_actions.values():
+                while waiting:
+                    _, action_key, pending = waiting.popleft()
+                    self._pending_actions.pop(action_key, None)
+                    pending.cancelled = True
+                    pending.future.cancel()
+            executor, self._executor = self._executor, None
+        
+        if executor is not None:
+            executor.shutdown(wait=wait)
+    
+    def _matching_actions(self, trigger_type: TriggerType, context: Dict) -> List[ActionType]:
+        """Evaluate rule conditions in priority order"""
+        actions = []
+        
+        for rule in self.triggers.get(trigger_type, []):
+            if not rule['enabled']:
+                continue
             try:
-                # Check condition
                 if rule['condition'](context):
-                    logger.info(f"Condition met, executing action: {rule['action'].value}")
-                    
-                    # Execute action
-                    result = self._execute_action(rule['action'], context)
-                    results.append(result)
-                    
-                    if result['success']:
-                        self.stats['actions_executed'] += 1
-                    else:
-                        self.stats['actions_failed'] += 1
-                    
-                    # Log execution
-                    self._log_execution(trigger_type, rule['action'], result)
-            
+                    actions.append(rule['action'])
             except Exception as e:
                 logger.error(f"Error processing rule: {e}")
+                with self._lock:
+                    self.stats['actions_failed'] += 1
+        
+        return actions
+    
+    def _record_result(self, trigger_type: TriggerType, action: ActionType, result: Dict):
+        """Update statistics and execution log for an action result"""
+        with self._lock:
+            if result['success']:
+                self.stats['actions_executed'] += 1
+            else:
                 self.stats['actions_failed'] += 1
+            
+            self._log_execution(trigger_type, action, result)
+    
+    @staticmethod
+    def _context_path(context: Dict) -> Optional[str]:
+        """Path used to debounce and coalesce work for a context"""
+        path = context.get('file_path') or context.get('path')
+        return str(path) if path else None
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the worker pool on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="automation"
+            )
+        return self._executor
+    
+    def _start_waiting(self, action_type: ActionType):
+        """Submit queued runs of an action while it is under its limit"""
+        limit = self.action_limits.get(action_type, 1)
+        waiting = self._waiting_actions[action_type]
         
-        return results
+        while waiting and self._running_actions[action_type] < limit:
+            self._running_actions[action_type] += 1
+            self._get_executor().submit(self._run_pending, *waiting.popleft())
+    
+    def _dispatch_job(self, job: AutomationJob):
+        """Debounce window elapsed: queue the job's matching actions"""
+        with self._lock:
+            if job._cancelled or self._debounced.get(job.key) is not job:
+                return
+            del self._debounced[job.key]
+            self.stats['triggers_fired'] += 1
+        
+        try:
+            actions = self._matching_actions(job.trigger_type, job.context)
+            
+            with self._lock:
+                # cancel() may have landed while the rules were evaluated
+                if job._cancelled:
+                    return
+                for action in actions:
+                    action_key = (action, job.key[1])
+                    pending = self._pending_actions.get(action_key)
+                    if pending is not None and not pending.started and not pending.cancelled:
+                        # Same work already queued: latest context wins
+                        pending.context = job.context
+                        self.stats['actions_coalesced'] += 1
+                    else:
+                        pending = _PendingAction(action, job.context)
+                        self._pending_actions[action_key] = pending
+                        # Over-limit actions wait here instead of blocking a worker
+                        self._waiting_actions[action].append(
+                            (job.trigger_type, action_key, pending)
+                        )
+                        self._start_waiting(action)
+                    pending.jobs.add(job)
+                    job._actions.append(pending)
+        finally:
+            job._dispatched.set()
+    
+    def _run_pending(self, trigger_type: TriggerType, action_key: Tuple,
+                     pending: _PendingAction):
+        """Worker: run one pending action, then start the next waiting one"""
+        try:
+            with self._lock:
+                if self._pending_actions.get(action_key) is pending:
+                    del self._pending_actions[action_key]
+                if pending.cancelled:
+                    pending.future.cancel()
+                    return
+                pending.started = True
+                pending.future.set_running_or_notify_cancel()
+            
+            logger.info(f"Executing scheduled action: {pending.action.value}")
+            result = self._execute_action(pending.action, pending.context)
+            self._record_result(trigger_type, pending.action, result)
+            pending.future.set_result(result)
+        finally:
+            with self._lock:
+                self._running_actions[pending.action] -= 1
+                if self._executor is not None:
+                    self._start_waiting(pending.action)
+    
+    def _cancel_job(self, job: AutomationJob) -> bool:
+        """Cancel a job and drop queued actions nobody else is waiting for"""
+        with self._lock:
+            if job._cancelled or job.done():
+                return False
+            
+            job._cancelled = True
+            if job._timer is not None:
+                job._timer.cancel()
+            if self._debounced.get(job.key) is job:
+                del self._debounced[job.key]
+            
+            for pending in job._actions:
+                pending.jobs.discard(job)
+                if not pending.jobs and not pending.started:
+                    pending.cancelled = True
+            
+            job._dispatched.set()
+        
+        logger.info(f"Cancelled automation job: {job.trigger_type.value}")
+        return True
     
     def _execute_action(self, action_type: ActionType, context: Dict) -> Dict:
         """Execute an action"""
@@ -340,7 +649,7 @@ class AutomationEngine:
                     'priority': rule['priority']
                 })
         
-        return sorted(matching_actions, key=lambda x: x['priority'], reverse=True)
+        return matching_actions
 
 
 class AutomationPreferences:
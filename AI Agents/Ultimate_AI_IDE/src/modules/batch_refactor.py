@@ -0,0 +1,451 @@
+"""
+Batch Refactor Module
+
+Splits and refactors many files in one run.
+Plans every split up front from a shared analysis, runs LLM refactors
+concurrently under a provider concurrency cap, validates the generated
+files in parallel and applies all writes atomically through a single
+rollback journal.
+"""
+
+import ast
+import base64
+import json
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from .file_splitter import FileSplitter
+from .refactorer import CodeAnalyzer, CodeRefactorer, AnalysisReport
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript'
+}
+
+# Below this many Python files validation runs in-process
+PROCESS_VALIDATION_THRESHOLD = 8
+
+
+def _validate_source(path: str, content: str) -> Optional[str]:
+    """Check generated content; returns an error message or None."""
+    if not path.endswith('.py'):
+        return None
+    try:
+        ast.parse(content, filename=path)
+        return None
+    except SyntaxError as e:
+        return f"Syntax error in {path}: {e}"
+
+
+def _timed_validate(path: str, content: str) -> Tuple[Optional[str], float]:
+    """Validate one file; returns the error (or None) and the seconds it took."""
+    started = time.perf_counter()
+    error = _validate_source(path, content)
+    return error, time.perf_counter() - started
+
+
+@dataclass
+class BatchPlan:
+    """Planned work for a batch run."""
+    analyses: Dict[str, AnalysisReport] = field(default_factory=dict)
+    splits: Dict[str, Dict[str, str]] = field(default_factory=dict)  # original -> {new path: content}
+    refactors: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+    timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a batch run."""
+    success: bool
+    dry_run: bool
+    files_written: List[str] = field(default_factory=list)
+    writes: Dict[str, str] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    total_time: float = 0.0
+
+
+class RefactorJournal:
+    """
+    Rollback journal for a set of file writes.
+
+    Original contents are saved to the journal file before anything is
+    written. If a write fails the journal is replayed; if the process dies
+    mid-apply, recover() restores the originals on the next run.
+    """
+
+    def __init__(self, journal_path: str):
+        """
+        Initialize journal.
+
+        Args:
+            journal_path: Where to keep the journal while applying
+        """
+        self.journal_path = Path(journal_path)
+
+    def apply(self, writes: Dict[str, str]) -> List[str]:
+        """
+        Write all files or none of them.
+
+        Args:
+            writes: Path -> new content
+
+        Returns:
+            List of written paths
+        """
+        if self.journal_path.exists():
+            raise RuntimeError(
+                f"Unfinished refactor journal found: {self.journal_path}; run recover() first"
+            )
+
+        entries = []
+        for path in writes:
+            target = Path(path)
+            original = target.read_bytes() if target.exists() else None
+            entries.append({
+                'path': str(target),
+                'original': base64.b64encode(original).decode('ascii') if original is not None else None
+            })
+
+        with open(self.journal_path, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'entries': entries}, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        written = []
+        try:
+            for path, content in writes.items():
+                self._atomic_write(Path(path), content.encode('utf-8'))
+                written.append(path)
+        except Exception:
+            logger.error("Batch apply failed, rolling back")
+            self.rollback()
+            raise
+
+        self.journal_path.unlink()
+        return written
+
+    def rollback(self) -> int:
+        """
+        Restore every file recorded in the journal.
+
+        Returns:
+            Number of files restored
+        """
+        if not self.journal_path.exists():
+            return 0
+
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)['entries']
+
+        failed = 0
+        for entry in entries:
+            target = Path(entry['path'])
+            try:
+                if entry['original'] is None:
+                    if target.is_file():
+                        target.unlink()
+                else:
+                    self._atomic_write(target, base64.b64decode(entry['original']))
+            except OSError as e:
+                failed += 1
+                logger.error(f"Could not restore {target}: {e}")
+
+        # Keep the journal so a later recover() can retry
+        if failed:
+            raise RuntimeError(f"Rollback incomplete: {failed} files not restored, see {self.journal_path}")
+
+        self.journal_path.unlink()
+        logger.info(f"Rolled back {len(entries)} files from {self.journal_path}")
+        return len(entries)
+
+    @classmethod
+    def recover(cls, journal_path: str) -> int:
+        """
+        Roll back an interrupted apply, if any.
+
+        Args:
+            journal_path: Journal file location
+
+        Returns:
+            Number of files restored
+        """
+        return cls(journal_path).rollback()
+
+    @staticmethod
+    def _atomic_write(target: Path, data: bytes):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.uaide-tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+
+
+class BatchRefactorer:
+    """Plan and execute splits and LLM refactors across many files."""
+
+    def __init__(self, refactorer: Optional[CodeRefactorer] = None,
+                 splitter: Optional[FileSplitter] = None,
+                 analyzer: Optional[CodeAnalyzer] = None,
+                 max_concurrency: int = 4,
+                 validation_workers: Optional[int] = None,
+                 progress_callback: Optional[Callable[[Dict], None]] = None):
+        """
+        Initialize batch refactorer.
+
+        Args:
+            refactorer: LLM refactorer (required for refactor runs)
+            splitter: File splitter used to plan splits
+            analyzer: Analyzer shared by planning and refactor prompts
+            max_concurrency: Maximum concurrent LLM requests
+            validation_workers: Processes used to validate generated files
+            progress_callback: Called with a progress event dict per file and stage
+        """
+        self.refactorer = refactorer
+        self.splitter = splitter or FileSplitter()
+        self.analyzer = analyzer or CodeAnalyzer(max_lines=self.splitter.max_lines)
+        self.max_concurrency = max(1, max_concurrency)
+        self.validation_workers = validation_workers or os.cpu_count() or 1
+        self.progress_callback = progress_callback
+        self._start_time = 0.0
+        self._progress_lock = threading.Lock()
+
+    def plan_directory(self, project_path: str, refactor: bool = False,
+                       strategy: str = 'auto') -> BatchPlan:
+        """
+        Plan splits for every oversized file in a project.
+
+        Args:
+            project_path: Project root path
+            refactor: Also send files that are not split to the LLM
+            strategy: Split strategy passed to FileSplitter
+
+        Returns:
+            BatchPlan
+        """
+        large_files = self.splitter.detect_large_files(project_path)
+        paths = [str(Path(project_path) / item['path']) for item in large_files]
+        return self.plan(paths, split=True, refactor=refactor, strategy=strategy)
+
+    def plan(self, file_paths: List[str], split: bool = True, refactor: bool = False,
+             strategy: str = 'auto') -> BatchPlan:
+        """
+        Analyze files once and plan all splits and refactors.
+
+        Each split goes into a sub-package named after its module. A split
+        whose new files collide with another planned write or an existing
+        file is rejected. Files that are split are not also refactored.
+
+        Args:
+            file_paths: Files to process
+            split: Plan splits for files over the line limit
+            refactor: Send remaining files to the LLM refactorer
+            strategy: Split strategy passed to FileSplitter
+
+        Returns:
+            BatchPlan
+        """
+        self._start_time = time.perf_counter()
+        plan = BatchPlan()
+        claimed: Dict[str, str] = {}
+
+        for index, file_path in enumerate(file_paths, 1):
+            started = time.perf_counter()
+            language = LANGUAGES.get(Path(file_path).suffix.lower(), 'unknown')
+
+            try:
+                analysis = self.analyzer.analyze_code(file_path, language)
+                plan.analyses[file_path] = analysis
+
+                if split and analysis.needs_splitting:
+                    result = self.splitter.split_file(file_path, strategy, dry_run=True)
+                    if not result['success']:
+                        plan.errors[file_path] = result.get('error', 'Split failed')
+                    else:
+                        clash = next((p for p in result['contents'] if p in claimed), None)
+                        if clash:
+                            plan.errors[file_path] = f"{clash} is already planned by {claimed[clash]}"
+                        else:
+                            for new_path in result['contents']:
+                                claimed[new_path] = file_path
+                            plan.splits[file_path] = result['contents']
+                elif refactor:
+                    plan.refactors.append(file_path)
+            except Exception as e:
+                plan.errors[file_path] = str(e)
+
+            plan.timings.setdefault(file_path, {})['analysis'] = time.perf_counter() - started
+            self._report('plan', file_path, index, len(file_paths))
+
+        # A refactor may not overwrite a file another split creates
+        for file_path in list(plan.refactors):
+            if file_path in claimed:
+                plan.refactors.remove(file_path)
+                plan.errors[file_path] = f"Overwritten by split of {claimed[file_path]}"
+
+        return plan
+
+    def execute(self, plan: BatchPlan, dry_run: bool = False, focus: Optional[str] = None,
+                journal_path: Optional[str] = None) -> BatchResult:
+        """
+        Run LLM refactors, validate everything and apply it atomically.
+
+        Args:
+            plan: Plan from plan() or plan_directory()
+            dry_run: Stop after validation without writing
+            focus: Refactoring focus passed to the LLM
+            journal_path: Rollback journal location
+                (default: .uaide_refactor_journal.json next to the first file)
+
+        Returns:
+            BatchResult
+        """
+        if not self._start_time:
+            self._start_time = time.perf_counter()
+        errors = dict(plan.errors)
+        timings = {path: dict(t) for path, t in plan.timings.items()}
+
+        # original file -> {path: content}
+        changes: Dict[str, Dict[str, str]] = {path: dict(c) for path, c in plan.splits.items()}
+        changes.update(self._run_refactors(plan, focus, errors, timings))
+
+        invalid = self._validate(changes, timings)
+        for original, error in invalid.items():
+            errors[original] = error
+            del changes[original]
+
+        writes = {path: content for files in changes.values() for path, content in files.items()}
+        result = BatchResult(success=not errors, dry_run=dry_run, writes=writes,
+                             errors=errors, timings=timings)
+
+        if not dry_run and writes:
+            if journal_path is None:
+                journal_path = str(Path(next(iter(changes))).parent / '.uaide_refactor_journal.json')
+            try:
+                result.files_written = RefactorJournal(journal_path).apply(writes)
+                self._report('apply', None, len(writes), len(writes))
+            except Exception as e:
+                result.success = False
+                result.errors['apply'] = str(e)
+
+        result.total_time = time.perf_counter() - self._start_time
+        self._start_time = 0.0
+        return result
+
+    def run(self, file_paths: List[str], split: bool = True, refactor: bool = False,
+            strategy: str = 'auto', focus: Optional[str] = None,
+            dry_run: bool = False) -> BatchResult:
+        """
+        Plan and execute in one call.
+
+        Args:
+            file_paths: Files to process
+            split: Split files over the line limit
+            refactor: Refactor remaining files with the LLM
+            strategy: Split strategy
+            focus: Refactoring focus
+            dry_run: Do not write files
+
+        Returns:
+            BatchResult
+        """
+        plan = self.plan(file_paths, split=split, refactor=refactor, strategy=strategy)
+        return self.execute(plan, dry_run=dry_run, focus=focus)
+
+    def _run_refactors(self, plan: BatchPlan, focus: Optional[str],
+                       errors: Dict[str, str],
+                       timings: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, str]]:
+        """Run LLM refactors with at most max_concurrency in flight."""
+        if not plan.refactors:
+            return {}
+        if self.refactorer is None:
+            raise ValueError("BatchRefactorer needs a CodeRefactorer to refactor files")
+
+        def refactor_one(file_path: str) -> Tuple[str, Optional[str], float]:
+            started = time.perf_counter()
+            language = LANGUAGES.get(Path(file_path).suffix.lower(), 'unknown')
+            refactored = self.refactorer.refactor_file(
+                file_path, language, focus, analysis=plan.analyses.get(file_path)
+            )
+            content = refactored.refactored_content if refactored else None
+            return file_path, content, time.perf_counter() - started
+
+        changes = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                thread_name_prefix="batch-refactor") as executor:
+            futures = {executor.submit(refactor_one, path): path for path in plan.refactors}
+            for index, future in enumerate(as_completed(futures), 1):
+                file_path = futures[future]
+                try:
+                    _, content, elapsed = future.result()
+                except Exception as e:
+                    # One failing file must not abort the rest of the batch
+                    logger.error(f"Refactoring {file_path} failed: {e}")
+                    errors[file_path] = f"Refactoring failed: {e}"
+                    self._report('refactor', file_path, index, len(futures))
+                    continue
+                timings.setdefault(file_path, {})['llm'] = elapsed
+                if content:
+                    changes[file_path] = {file_path: content + '\n'}
+                else:
+                    errors[file_path] = 'Refactoring failed'
+                self._report('refactor', file_path, index, len(futures))
+
+        return changes
+
+    def _validate(self, changes: Dict[str, Dict[str, str]],
+                  timings: Dict[str, Dict[str, float]]) -> Dict[str, str]:
+        """Validate every generated file; returns original -> error."""
+        jobs = [(original, path, content)
+                for original, files in changes.items()
+                for path, content in files.items()]
+        python_jobs = sum(1 for _, path, _ in jobs if path.endswith('.py'))
+        invalid = {}
+        # Time measured around each file's own validation, summed per original
+        seconds = {original: 0.0 for original in changes}
+
+        if python_jobs >= PROCESS_VALIDATION_THRESHOLD and self.validation_workers > 1:
+            with ProcessPoolExecutor(max_workers=self.validation_workers) as executor:
+                outcomes = list(executor.map(_timed_validate,
+                                             [path for _, path, _ in jobs],
+                                             [content for _, _, content in jobs],
+                                             chunksize=max(1, len(jobs) // (self.validation_workers * 4))))
+        else:
+            outcomes = [_timed_validate(path, content) for _, path, content in jobs]
+
+        for (original, _, _), (error, elapsed) in zip(jobs, outcomes):
+            seconds[original] += elapsed
+            if error and original not in invalid:
+                invalid[original] = error
+
+        for index, original in enumerate(changes, 1):
+            timings.setdefault(original, {})['validation'] = seconds[original]
+            self._report('validate', original, index, len(changes))
+
+        return invalid
+
+    def _report(self, stage: str, file_path: Optional[str], completed: int, total: int):
+        """Emit a progress event."""
+        event = {
+            'stage': stage,
+            'file': file_path,
+            'completed': completed,
+            'total': total,
+            'elapsed': time.perf_counter() - self._start_time
+        }
+        logger.debug(f"Batch {stage}: {completed}/{total} {file_path or ''}")
+        if self.progress_callback:
+            with self._progress_lock:
+                self.progress_callback(event)
@@ -13,6 +13,8 @@ from pathlib import Path
 from typing import List, Dict, Set, Optional, Tuple
 import logging
 
+from ..utils.source_cache import get_source_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -218,8 +220,7 @@ class BloatDetector:
                 if file.endswith('.py'):
                     file_path = Path(root) / file
                     try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            tree = ast.parse(f.read())
+                        tree = get_source_cache().parse(file_path)
                         
                         for node in ast.walk(tree):
                             if isinstance(node, ast.Import):
@@ -244,8 +245,7 @@ class BloatDetector:
                 if file.endswith(('.js', '.ts', '.jsx', '.tsx')):
                     file_path = Path(root) / file
                     try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
+                        content = get_source_cache().read_text(file_path)
                         
                         # Find require() and import statements
                         require_pattern = r"require\(['\"]([^'\"]+)['\"]\)"
@@ -277,8 +277,7 @@ class BloatDetector:
                 if file.endswith('.py'):
                     file_path = Path(root) / file
                     try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            tree = ast.parse(f.read())
+                        tree = get_source_cache().parse(file_path)
                         
                         for node in ast.walk(tree):
                             if isinstance(node, ast.FunctionDef):
@@ -348,8 +347,7 @@ class BloatDetector:
                 if file.endswith(('.py', '.js', '.ts', '.jsx', '.tsx')):
                     file_path = Path(root) / file
                     try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
+                        content = get_source_cache().read_text(file_path)
                         
                         for i, line in enumerate(content.split('\n'), 1):
                             for pattern in self.BLOAT_COMMENTS:
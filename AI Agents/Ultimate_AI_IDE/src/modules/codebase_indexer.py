@@ -15,6 +15,8 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 import logging
 
+from ..utils.source_cache import ParsedSource, get_source_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -165,8 +167,8 @@ class CodebaseIndexer:
         language = self.SUPPORTED_EXTENSIONS.get(ext, 'unknown')
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            source = get_source_cache().get(file_path)
+            content = source.text
             
             # Count lines of code
             lines = content.split('\n')
@@ -174,7 +176,7 @@ class CodebaseIndexer:
             
             # Language-specific indexing
             if language == 'python':
-                index = self._index_python_file(file_path, content)
+                index = self._index_python_file(file_path, source)
             elif language in {'javascript', 'typescript'}:
                 index = self._index_js_file(file_path, content)
             else:
@@ -195,12 +197,13 @@ class CodebaseIndexer:
         except Exception as e:
             logger.error(f"Error indexing {file_path}: {e}")
     
-    def _index_python_file(self, file_path: Path, content: str) -> FileIndex:
+    def _index_python_file(self, file_path: Path, source: ParsedSource) -> FileIndex:
         """Index Python file."""
         rel_path = str(file_path.relative_to(self.project_path))
+        content = source.text
         
         try:
-            tree = ast.parse(content)
+            tree = source.tree
             
             classes = []
             functions = []
@@ -16,6 +16,7 @@ from .code_embedder_advanced import CodeBERTEmbedder, CodeBERTIndex
 from .multimodal_retriever import MultiModalRetriever, MultiModalResult
 from .query_enhancer import QueryEnhancer
 from .graph_retriever import GraphRetriever, CallGraphBuilder, CodeNode
+from .compact_graph import CompactGraph
 
 __all__ = [
     # Core
@@ -36,5 +37,6 @@ __all__ = [
     'QueryEnhancer',
     'GraphRetriever',
     'CallGraphBuilder',
-    'CodeNode'
+    'CodeNode',
+    'CompactGraph'
 ]
@@ -0,0 +1,247 @@
+"""
+Compact Call Graph
+
+Interned-ID call graph stored as CSR (compressed sparse row) adjacency
+arrays for both forward (calls) and reverse (called by) edges.
+Used by GraphRetriever for fast multi-hop expansion and shortest call
+chains without walking dicts of sets.
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def _build_csr(node_count: int, edges: List[Tuple[int, int]]) -> Tuple[array, array]:
+    """Build CSR offsets/targets from (source, target) pairs."""
+    counts = [0] * (node_count + 1)
+    for src, _ in edges:
+        counts[src + 1] += 1
+    for i in range(node_count):
+        counts[i + 1] += counts[i]
+
+    offsets = array('l', counts)
+    targets = array('l', bytes(array('l').itemsize * len(edges)))
+    cursor = list(counts[:-1])
+    for src, dst in edges:
+        targets[cursor[src]] = dst
+        cursor[src] += 1
+    return offsets, targets
+
+
+class CompactGraph:
+    """Immutable call graph with interned node IDs and CSR adjacency."""
+
+    def __init__(self, names: List[str], defined: bytearray,
+                 fwd_offsets: array, fwd_targets: array,
+                 rev_offsets: array, rev_targets: array):
+        """
+        Initialize compact graph.
+
+        Args:
+            names: Node name per ID
+            defined: 1 for nodes defined in the indexed code, 0 for external calls
+            fwd_offsets: CSR offsets of call edges
+            fwd_targets: CSR targets of call edges
+            rev_offsets: CSR offsets of reverse edges
+            rev_targets: CSR targets of reverse edges
+        """
+        self.names = names
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        self.defined = defined
+        self.fwd_offsets = fwd_offsets
+        self.fwd_targets = fwd_targets
+        self.rev_offsets = rev_offsets
+        self.rev_targets = rev_targets
+
+    @classmethod
+    def from_adjacency(cls, adjacency: Dict[str, Iterable[str]]) -> 'CompactGraph':
+        """
+        Build a graph from defined node names and their raw call targets.
+
+        Args:
+            adjacency: Defined node name -> names it calls
+
+        Returns:
+            CompactGraph
+        """
+        names = list(adjacency)
+        ids = {name: i for i, name in enumerate(names)}
+        defined_count = len(names)
+        edges = []
+
+        for name, targets in adjacency.items():
+            src = ids[name]
+            for target in targets:
+                dst = ids.get(target)
+                if dst is None:
+                    dst = ids[target] = len(names)
+                    names.append(target)
+                edges.append((src, dst))
+
+        defined = bytearray(len(names))
+        defined[:defined_count] = b'\x01' * defined_count
+
+        fwd_offsets, fwd_targets = _build_csr(len(names), edges)
+        rev_offsets, rev_targets = _build_csr(len(names), [(dst, src) for src, dst in edges])
+        return cls(names, defined, fwd_offsets, fwd_targets, rev_offsets, rev_targets)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.fwd_targets)
+
+    def neighbors(self, node_id: int, reverse: bool = False) -> array:
+        """
+        Get adjacent node IDs.
+
+        Args:
+            node_id: Node ID
+            reverse: Follow reverse (called by) edges
+
+        Returns:
+            Slice of the target array
+        """
+        offsets, targets = self._arrays(reverse)
+        return targets[offsets[node_id]:offsets[node_id + 1]]
+
+    def expand(self, name: str, depth: int, reverse: bool = False,
+               defined_only: bool = True) -> List[int]:
+        """
+        Breadth-first multi-hop expansion from a node.
+
+        Args:
+            name: Start node name
+            depth: Maximum number of hops
+            reverse: Follow reverse (called by) edges
+            defined_only: Skip external (undefined) nodes
+
+        Returns:
+            Node IDs in BFS order, starting with the start node
+        """
+        start = self.ids.get(name)
+        if start is None or (defined_only and not self.defined[start]):
+            return []
+
+        offsets, targets = self._arrays(reverse)
+        defined = self.defined
+        visited = bytearray(len(self.names))
+        visited[start] = 1
+        result = [start]
+        frontier = [start]
+
+        for _ in range(depth):
+            next_frontier = []
+            for node in frontier:
+                for i in range(offsets[node], offsets[node + 1]):
+                    target = targets[i]
+                    if visited[target]:
+                        continue
+                    visited[target] = 1
+                    if defined_only and not defined[target]:
+                        continue
+                    result.append(target)
+                    next_frontier.append(target)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        return result
+
+    def shortest_path(self, from_name: str, to_name: str) -> Optional[List[str]]:
+        """
+        Shortest call chain following call edges.
+
+        Args:
+            from_name: Starting node
+            to_name: Target node
+
+        Returns:
+            Node names along the chain, or None
+        """
+        if from_name == to_name:
+            return [from_name]
+
+        start = self.ids.get(from_name)
+        goal = self.ids.get(to_name)
+        if start is None or goal is None:
+            return None
+
+        # Bidirectional BFS: grow the smaller frontier, forward from the
+        # start over call edges and backward from the goal over reverse edges
+        parent = {start: -1}
+        child = {goal: -1}
+        forward = [start]
+        backward = [goal]
+
+        while forward and backward:
+            if len(forward) <= len(backward):
+                forward, meet = self._bfs_step(forward, parent, child,
+                                               self.fwd_offsets, self.fwd_targets)
+            else:
+                backward, meet = self._bfs_step(backward, child, parent,
+                                                self.rev_offsets, self.rev_targets)
+            if meet is not None:
+                return self._join_path(meet, parent, child)
+
+        return None
+
+    @staticmethod
+    def _bfs_step(frontier: List[int], seen: Dict[int, int], other: Dict[int, int],
+                  offsets: array, targets: array) -> Tuple[List[int], Optional[int]]:
+        """Expand one BFS level; return the next frontier and a meeting node."""
+        next_frontier = []
+        for node in frontier:
+            for i in range(offsets[node], offsets[node + 1]):
+                target = targets[i]
+                if target in seen:
+                    continue
+                seen[target] = node
+                if target in other:
+                    return next_frontier, target
+                next_frontier.append(target)
+        return next_frontier, None
+
+    def _join_path(self, meet: int, parent: Dict[int, int], child: Dict[int, int]) -> List[str]:
+        """Join the two half paths that meet at a node."""
+        path = []
+        node = meet
+        while node != -1:
+            path.append(node)
+            node = parent[node]
+        path.reverse()
+        node = child[meet]
+        while node != -1:
+            path.append(node)
+            node = child[node]
+        return [self.names[n] for n in path]
+
+    def to_dict(self) -> Dict:
+        """Serialize to a JSON-compatible dict."""
+        return {
+            'names': self.names,
+            'defined': list(self.defined),
+            'fwd_offsets': self.fwd_offsets.tolist(),
+            'fwd_targets': self.fwd_targets.tolist(),
+            'rev_offsets': self.rev_offsets.tolist(),
+            'rev_targets': self.rev_targets.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CompactGraph':
+        """Deserialize from to_dict() output."""
+        return cls(
+            list(data['names']),
+            bytearray(data['defined']),
+            array('l', data['fwd_offsets']),
+            array('l', data['fwd_targets']),
+            array('l', data['rev_offsets']),
+            array('l', data['rev_targets'])
+        )
+
+    def _arrays(self, reverse: bool) -> Tuple[array, array]:
+        if reverse:
+            return self.rev_offsets, self.rev_targets
+        return self.fwd_offsets, self.fwd_targets
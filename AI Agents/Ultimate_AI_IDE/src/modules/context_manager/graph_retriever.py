@@ -3,16 +3,24 @@ Graph-Based Retriever
 
 Retrieves code context using AST call graphs and dependency analysis.
 Part of v1.6.0 - Advanced RAG & Retrieval.
+
+The call graph is rebuilt per file (unchanged files are skipped by mtime
+and size), traversed through a CSR CompactGraph and can be persisted to
+disk with save_index()/load_index().
 """
 
 import os
 import ast
+import json
 import logging
 from typing import Dict, List, Set, Optional, Tuple, Any
 from dataclasses import dataclass
 from pathlib import Path
 from collections import defaultdict
 
+from ...utils.source_cache import get_source_cache
+from .compact_graph import CompactGraph
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,12 +43,18 @@ class CallGraphBuilder:
         """Initialize call graph builder."""
         self.graph = {}  # name -> CodeNode
         self.file_nodes = defaultdict(list)  # file_path -> List[CodeNode]
+        self.file_signatures = {}  # file_path -> (mtime_ns, size)
+        self._definitions = defaultdict(list)  # name -> CodeNodes, last one wins
+        self.compact = None  # CompactGraph, rebuilt by resolve_dependencies()
         logger.info("Initialized CallGraphBuilder")
     
     def build_from_file(self, file_path: str) -> bool:
         """
         Build call graph from a Python file.
         
+        Re-indexing a file replaces its previous nodes. Files whose mtime
+        and size are unchanged since the last build are skipped.
+        
         Args:
             file_path: Path to Python file
             
@@ -48,10 +62,18 @@ class CallGraphBuilder:
             True if successful
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                source = f.read()
+            # Unchanged files are skipped on a stat alone, before anything is read
+            st = os.stat(file_path)
+            if self.file_signatures.get(file_path) == (st.st_mtime_ns, st.st_size):
+                return True
+            
+            parsed = get_source_cache().get(file_path)
+            signature = (parsed.mtime_ns, parsed.size)
+            source = parsed.text
+            tree = parsed.tree
             
-            tree = ast.parse(source, filename=file_path)
+            self.remove_file(file_path)
+            self.file_signatures[file_path] = signature
             
             # Extract functions and classes
             for node in ast.walk(tree):
@@ -96,8 +118,7 @@ class CallGraphBuilder:
                 dependents=set()
             )
             
-            self.graph[node.name] = code_node
-            self.file_nodes[file_path].append(code_node)
+            self._add_node(code_node)
             
         except Exception as e:
             logger.error(f"Failed to add function {node.name}: {e}")
@@ -128,8 +149,7 @@ class CallGraphBuilder:
                 dependents=set()
             )
             
-            self.graph[node.name] = code_node
-            self.file_nodes[file_path].append(code_node)
+            self._add_node(code_node)
             
             # Add methods
             for item in node.body:
@@ -169,20 +189,120 @@ class CallGraphBuilder:
                 dependents=set()
             )
             
-            self.graph[method_name] = code_node
-            self.file_nodes[file_path].append(code_node)
+            self._add_node(code_node)
             
         except Exception as e:
             logger.error(f"Failed to add method {node.name}: {e}")
     
+    def _add_node(self, code_node: CodeNode):
+        """Register a node for its file and make it the current definition."""
+        self._definitions[code_node.name].append(code_node)
+        self.graph[code_node.name] = code_node
+        self.file_nodes[code_node.file_path].append(code_node)
+        self.compact = None
+    
+    def remove_file(self, file_path: str):
+        """
+        Remove all nodes defined in a file.
+        
+        Args:
+            file_path: Path previously passed to build_from_file()
+        """
+        nodes = self.file_nodes.pop(file_path, None)
+        self.file_signatures.pop(file_path, None)
+        if not nodes:
+            return
+        
+        for code_node in nodes:
+            definitions = self._definitions[code_node.name]
+            definitions[:] = [n for n in definitions if n is not code_node]
+            if definitions:
+                self.graph[code_node.name] = definitions[-1]
+            else:
+                del self._definitions[code_node.name]
+                self.graph.pop(code_node.name, None)
+        
+        self.compact = None
+    
     def resolve_dependencies(self):
-        """Resolve dependencies and build reverse edges."""
-        for node_name, node in self.graph.items():
-            for dep in node.dependencies:
-                if dep in self.graph:
-                    self.graph[dep].dependents.add(node_name)
+        """Resolve dependencies, rebuild reverse edges and the compact graph."""
+        self.compact = CompactGraph.from_adjacency(
+            {name: node.dependencies for name, node in self.graph.items()}
+        )
+        self._apply_dependents()
         
         logger.info("Resolved dependencies in call graph")
+    
+    def ensure_resolved(self) -> CompactGraph:
+        """
+        Get the compact graph, resolving dependencies if nodes changed.
+        
+        Returns:
+            CompactGraph for the current nodes
+        """
+        if self.compact is None:
+            self.resolve_dependencies()
+        return self.compact
+    
+    def _apply_dependents(self):
+        """Fill CodeNode.dependents from the compact graph's reverse edges."""
+        compact = self.compact
+        for node_id in range(compact.node_count):
+            if not compact.defined[node_id]:
+                continue
+            node = self.graph.get(compact.names[node_id])
+            if node is not None:
+                node.dependents = {
+                    compact.names[src] for src in compact.neighbors(node_id, reverse=True)
+                }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize nodes, file signatures and the compact graph."""
+        files = {}
+        for file_path, nodes in self.file_nodes.items():
+            mtime_ns, size = self.file_signatures.get(file_path, (0, 0))
+            files[file_path] = {
+                'mtime_ns': mtime_ns,
+                'size': size,
+                'nodes': [
+                    {
+                        'name': n.name,
+                        'type': n.node_type,
+                        'line': n.line_number,
+                        'code': n.code,
+                        'dependencies': sorted(n.dependencies)
+                    }
+                    for n in nodes
+                ]
+            }
+        
+        return {
+            'version': 1,
+            'files': files,
+            'compact': self.ensure_resolved().to_dict()
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CallGraphBuilder':
+        """Restore a builder from to_dict() output."""
+        builder = cls()
+        for file_path, record in data.get('files', {}).items():
+            for item in record['nodes']:
+                builder._add_node(CodeNode(
+                    name=item['name'],
+                    node_type=item['type'],
+                    file_path=file_path,
+                    line_number=item['line'],
+                    code=item['code'],
+                    dependencies=set(item['dependencies']),
+                    dependents=set()
+                ))
+            builder.file_signatures[file_path] = (record['mtime_ns'], record['size'])
+        
+        if 'compact' in data:
+            builder.compact = CompactGraph.from_dict(data['compact'])
+            builder._apply_dependents()
+        return builder
 
 
 class GraphRetriever:
@@ -217,6 +337,9 @@ class GraphRetriever:
         """
         Index all code files in a directory.
         
+        Only new or modified files are re-parsed; files that no longer
+        exist under the directory are dropped from the graph.
+        
         Args:
             directory: Directory to index
             extensions: File extensions to index
@@ -227,20 +350,28 @@ class GraphRetriever:
         if extensions is None:
             extensions = ['.py']  # Currently only Python supported
         
-        stats = {'files': 0, 'nodes': 0, 'errors': 0}
+        stats = {'files': 0, 'nodes': 0, 'errors': 0, 'removed': 0}
         
         try:
+            seen = set()
             for root, _, files in os.walk(directory):
                 for file in files:
                     if any(file.endswith(ext) for ext in extensions):
                         file_path = os.path.join(root, file)
+                        seen.add(file_path)
                         if self.index_file(file_path):
                             stats['files'] += 1
                         else:
                             stats['errors'] += 1
             
-            # Resolve dependencies
-            self.call_graph.resolve_dependencies()
+            prefix = os.path.join(directory, '')
+            for file_path in list(self.call_graph.file_signatures):
+                if file_path.startswith(prefix) and file_path not in seen:
+                    self.call_graph.remove_file(file_path)
+                    stats['removed'] += 1
+            
+            # Resolve dependencies (no-op when nothing changed)
+            self.call_graph.ensure_resolved()
             stats['nodes'] = len(self.call_graph.graph)
             
             logger.info(f"Indexed directory: {directory} - {stats}")
@@ -271,25 +402,9 @@ class GraphRetriever:
             depth: Traversal depth
             
         Returns:
-            List of dependent nodes
+            List of dependent nodes, nearest first
         """
-        result = []
-        visited = set()
-        
-        def traverse(node_name: str, current_depth: int):
-            if current_depth > depth or node_name in visited:
-                return
-            
-            visited.add(node_name)
-            node = self.call_graph.graph.get(node_name)
-            
-            if node:
-                result.append(node)
-                for dep in node.dependencies:
-                    traverse(dep, current_depth + 1)
-        
-        traverse(name, 0)
-        return result
+        return self._expand(name, depth, reverse=False)
     
     def get_dependents(self, name: str, depth: int = 1) -> List[CodeNode]:
         """
@@ -300,25 +415,15 @@ class GraphRetriever:
             depth: Traversal depth
             
         Returns:
-            List of dependent nodes
+            List of dependent nodes, nearest first
         """
-        result = []
-        visited = set()
-        
-        def traverse(node_name: str, current_depth: int):
-            if current_depth > depth or node_name in visited:
-                return
-            
-            visited.add(node_name)
-            node = self.call_graph.graph.get(node_name)
-            
-            if node:
-                result.append(node)
-                for dep in node.dependents:
-                    traverse(dep, current_depth + 1)
-        
-        traverse(name, 0)
-        return result
+        return self._expand(name, depth, reverse=True)
+    
+    def _expand(self, name: str, depth: int, reverse: bool) -> List[CodeNode]:
+        """Breadth-first expansion over the compact graph."""
+        compact = self.call_graph.ensure_resolved()
+        graph = self.call_graph.graph
+        return [graph[compact.names[i]] for i in compact.expand(name, depth, reverse)]
     
     def expand_context(self, name: str, expansion_depth: int = 2) -> str:
         """
@@ -439,26 +544,7 @@ class GraphRetriever:
             List of node names in the chain, or None
         """
         try:
-            # BFS to find shortest path
-            from collections import deque
-            
-            queue = deque([(from_name, [from_name])])
-            visited = {from_name}
-            
-            while queue:
-                current, path = queue.popleft()
-                
-                if current == to_name:
-                    return path
-                
-                node = self.call_graph.graph.get(current)
-                if node:
-                    for dep in node.dependencies:
-                        if dep not in visited:
-                            visited.add(dep)
-                            queue.append((dep, path + [dep]))
-            
-            return None
+            return self.call_graph.ensure_resolved().shortest_path(from_name, to_name)
             
         except Exception as e:
             logger.error(f"Failed to find call chain: {e}")
@@ -482,6 +568,49 @@ class GraphRetriever:
             'avg_dependencies': total_deps / len(self.call_graph.graph) if self.call_graph.graph else 0
         }
     
+    def save_index(self, file_path: str) -> bool:
+        """
+        Persist the call graph so later runs only re-index changed files.
+        
+        Args:
+            file_path: Output JSON file
+            
+        Returns:
+            True if successful
+        """
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(self.call_graph.to_dict(), f)
+            
+            logger.info(f"Saved call graph index to: {file_path}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to save call graph index: {e}")
+            return False
+    
+    def load_index(self, file_path: str) -> bool:
+        """
+        Load a call graph saved with save_index().
+        
+        Args:
+            file_path: JSON file written by save_index()
+            
+        Returns:
+            True if successful
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            self.call_graph = CallGraphBuilder.from_dict(data)
+            logger.info(f"Loaded call graph index from: {file_path}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to load call graph index: {e}")
+            return False
+    
     def export_graph(self, output_file: str, format: str = 'dot') -> bool:
         """
         Export call graph to file.
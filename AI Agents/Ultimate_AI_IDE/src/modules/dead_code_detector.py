@@ -12,6 +12,8 @@ from typing import Dict, List, Set, Tuple, Optional
 from collections import defaultdict
 import logging
 
+from ..utils.source_cache import get_source_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -78,8 +80,7 @@ class DeadCodeDetector:
     def _collect_definitions(self, file_path: Path):
         """Collect function and class definitions"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                tree = ast.parse(f.read(), filename=str(file_path))
+            tree = get_source_cache().parse(file_path)
             
             for node in ast.walk(tree):
                 if isinstance(node, ast.FunctionDef):
@@ -102,8 +103,7 @@ class DeadCodeDetector:
     def _collect_usages(self, file_path: Path):
         """Collect function and class usages"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                tree = ast.parse(f.read(), filename=str(file_path))
+            tree = get_source_cache().parse(file_path)
             
             rel_path = str(file_path.relative_to(self.project_path))
             
@@ -146,8 +146,7 @@ class DeadCodeDetector:
         # Also consider anything imported in __init__.py as entry point
         for file_path in self.project_path.rglob('__init__.py'):
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    tree = ast.parse(f.read())
+                tree = get_source_cache().parse(file_path)
                 
                 for node in ast.walk(tree):
                     if isinstance(node, ast.ImportFrom):
@@ -228,9 +227,9 @@ class DeadCodeDetector:
                 continue
             
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    tree = ast.parse(content)
+                source = get_source_cache().get(file_path)
+                content = source.text
+                tree = source.tree
                 
                 rel_path = str(file_path.relative_to(self.project_path))
                 
@@ -301,8 +300,7 @@ class DeadCodeDetector:
                 continue
             
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    tree = ast.parse(f.read())
+                tree = get_source_cache().parse(file_path)
                 
                 for node in ast.walk(tree):
                     if isinstance(node, ast.ImportFrom):
@@ -11,6 +11,8 @@ from typing import Dict, List, Tuple, Optional, Set
 from pathlib import Path
 import logging
 
+from ..utils.source_cache import get_source_cache
+
 
 class FileSplitter:
     """Split large files into smaller modules"""
@@ -142,11 +144,10 @@ class FileSplitter:
     
     def _suggest_python_splits(self, file_path: str) -> Dict[str, any]:
         """Suggest split points for Python file"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        source = get_source_cache().get(file_path)
         
         try:
-            tree = ast.parse(content)
+            tree = source.tree
         except SyntaxError as e:
             return {'success': False, 'error': f'Syntax error: {e}'}
         
@@ -199,8 +200,7 @@ class FileSplitter:
             })
         
         # Strategy 3: By size
-        with open(file_path, 'r', encoding='utf-8') as f:
-            total_lines = len(f.readlines())
+        total_lines = len(source.lines)
         
         estimated_files = (total_lines // self.max_lines) + 1
         suggestions.append({
@@ -220,9 +220,8 @@ class FileSplitter:
     
     def _suggest_js_splits(self, file_path: str) -> Dict[str, any]:
         """Suggest split points for JavaScript/TypeScript file"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            lines = content.split('\n')
+        content = get_source_cache().read_text(file_path)
+        lines = content.split('\n')
         
         # Simple regex-based detection for JS/TS
         classes = []
@@ -277,8 +276,7 @@ class FileSplitter:
     
     def _suggest_generic_splits(self, file_path: str) -> Dict[str, any]:
         """Generic split suggestions for unsupported languages"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        lines = get_source_cache().get(file_path).lines
         
         estimated_files = (len(lines) // self.max_lines) + 1
         
@@ -295,14 +293,17 @@ class FileSplitter:
     
     def _split_python_file(self, file_path: str, strategy: str, dry_run: bool) -> Dict[str, any]:
         """Split Python file"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        source = get_source_cache().get(file_path)
+        content = source.text
         
         try:
-            tree = ast.parse(content)
+            tree = source.tree
         except SyntaxError as e:
             return {'success': False, 'error': f'Syntax error: {e}'}
         
+        if Path(file_path).stem == '__init__':
+            return {'success': False, 'error': 'Cannot split a package __init__.py'}
+        
         # Extract imports
         imports = self._extract_python_imports(tree)
         
@@ -327,19 +328,31 @@ class FileSplitter:
         if strategy == 'auto':
             strategy = 'by_class' if classes else 'by_function'
         
-        result = {'success': True, 'files_created': [], 'dry_run': dry_run}
+        result = {'success': True, 'files_created': [], 'contents': {}, 'dry_run': dry_run}
         
         if strategy == 'by_class' and classes:
             result['files_created'] = self._split_by_class(
-                file_path, imports, classes, dry_run
+                file_path, imports, classes, result['contents']
             )
         elif strategy == 'by_function' and functions:
             result['files_created'] = self._split_by_function(
-                file_path, imports, functions, dry_run
+                file_path, imports, functions, result['contents']
             )
         else:
             result['success'] = False
             result['error'] = f'Cannot apply strategy {strategy}'
+            return result
+        
+        # Never overwrite a file the split did not create
+        existing = [path for path in result['contents'] if Path(path).exists()]
+        if existing:
+            return {'success': False, 'error': f'Split would overwrite existing file: {existing[0]}'}
+        
+        if not dry_run:
+            for path, content in result['contents'].items():
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(content)
         
         return result
     
@@ -352,58 +365,60 @@ class FileSplitter:
         }
     
     def _extract_python_imports(self, tree: ast.AST) -> str:
-        """Extract import statements from Python AST"""
+        """Extract import statements from Python AST, for modules one package deeper"""
         imports = []
         
         for node in tree.body:
-            if isinstance(node, (ast.Import, ast.ImportFrom)):
+            if isinstance(node, ast.ImportFrom) and node.level:
+                # Split modules live in a sub-package of the original's package
+                node = ast.ImportFrom(module=node.module, names=node.names, level=node.level + 1)
+                imports.append(ast.unparse(node))
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
                 imports.append(ast.unparse(node))
         
         return '\n'.join(imports)
     
+    def _package_path(self, file_path: str) -> Path:
+        """Sub-package the split modules of a file go into, named after the file"""
+        return Path(file_path).parent / Path(file_path).stem
+    
     def _split_by_class(self, file_path: str, imports: str, 
-                       classes: List[Dict], dry_run: bool) -> List[str]:
+                       classes: List[Dict],
+                       contents: Dict[str, str]) -> List[str]:
         """Split file by class (one class per file)"""
         created_files = []
-        base_path = Path(file_path).parent
-        base_name = Path(file_path).stem
+        base_path = self._package_path(file_path)
         
         for cls in classes:
             new_file_name = f"{cls['name'].lower()}.py"
             new_file_path = base_path / new_file_name
             
             content = f'"""\n{cls["name"]} module\n"""\n\n{imports}\n\n\n{cls["code"]}\n'
-            
-            if not dry_run:
-                with open(new_file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-            
+            contents[str(new_file_path)] = content
             created_files.append(str(new_file_path))
         
         # Create __init__.py to export all classes
-        if not dry_run:
-            init_path = base_path / '__init__.py'
-            init_content = '\n'.join([
-                f'from .{cls["name"].lower()} import {cls["name"]}'
-                for cls in classes
-            ])
-            init_content += '\n\n__all__ = [' + ', '.join([
-                f"'{cls['name']}'" for cls in classes
-            ]) + ']\n'
-            
-            with open(init_path, 'w', encoding='utf-8') as f:
-                f.write(init_content)
+        init_path = base_path / '__init__.py'
+        init_content = '\n'.join([
+            f'from .{cls["name"].lower()} import {cls["name"]}'
+            for cls in classes
+        ])
+        init_content += '\n\n__all__ = [' + ', '.join([
+            f"'{cls['name']}'" for cls in classes
+        ]) + ']\n'
+        contents[str(init_path)] = init_content
         
         return created_files
     
     def _split_by_function(self, file_path: str, imports: str,
-                          functions: List[Dict], dry_run: bool) -> List[str]:
+                          functions: List[Dict],
+                          contents: Dict[str, str]) -> List[str]:
         """Split file by grouping related functions"""
         # Group functions (simplified - would need better heuristics)
         groups = self._group_related_functions(functions)
         
         created_files = []
-        base_path = Path(file_path).parent
+        base_path = self._package_path(file_path)
         
         for i, group in enumerate(groups, 1):
             new_file_name = f"utils_{i}.py"
@@ -411,13 +426,20 @@ class FileSplitter:
             
             functions_code = '\n\n'.join([f['code'] for f in group])
             content = f'"""\nUtility functions module {i}\n"""\n\n{imports}\n\n\n{functions_code}\n'
-            
-            if not dry_run:
-                with open(new_file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-            
+            contents[str(new_file_path)] = content
             created_files.append(str(new_file_path))
         
+        # Create __init__.py to export all functions
+        init_path = base_path / '__init__.py'
+        init_content = '\n'.join([
+            f'from .utils_{i} import ' + ', '.join(f['name'] for f in group)
+            for i, group in enumerate(groups, 1)
+        ])
+        init_content += '\n\n__all__ = [' + ', '.join([
+            f"'{f['name']}'" for f in functions
+        ]) + ']\n'
+        contents[str(init_path)] = init_content
+        
         return created_files
     
     def _group_related_functions(self, functions: List[Dict]) -> List[List[Dict]]:
@@ -458,11 +480,8 @@ class FileSplitter:
             
             # Check syntax
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
                 if file_path.endswith('.py'):
-                    ast.parse(content)
+                    get_source_cache().parse(file_path)
             except SyntaxError as e:
                 issues.append(f"Syntax error in {file_path}: {e}")
         
@@ -6,12 +6,13 @@ Phase 3 implementation.
 """
 
 from .manager import PromptManager, Prompt
-from .template_engine import TemplateEngine
+from .template_engine import TemplateEngine, compile_template
 from .defaults import DefaultPrompts
 
 __all__ = [
     'PromptManager',
     'Prompt',
     'TemplateEngine',
+    'compile_template',
     'DefaultPrompts'
 ]
@@ -2,12 +2,153 @@
 Template Engine
 
 Advanced template rendering with conditionals and loops.
+
+Templates are compiled once into a tree of render closures and cached by
+template text, so repeated renders only walk pre-split literal segments and
+placeholders and finish with a single ``''.join``.
 """
 
-from typing import Dict, Any, List
+from collections import ChainMap
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Mapping
 import re
 
 
+# Matches block tags and simple {variable} placeholders in one pass
+_TOKEN_PATTERN = re.compile(
+    r'\{%\s*if\s+(?P<if_var>\w+)\s*%\}'
+    r'|\{%\s*endif\s*%\}'
+    r'|\{%\s*for\s+(?P<item>\w+)\s+in\s+(?P<list>\w+)\s*%\}'
+    r'|\{%\s*endfor\s*%\}'
+    r'|\{(?P<var>\w+)\}'
+)
+
+_MISSING = object()
+
+RenderFn = Callable[[Mapping[str, Any], Callable[[str], None]], None]
+
+
+def _format_value(value: Any) -> str:
+    """Format a variable value the same way for every placeholder."""
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(v) for v in value)
+    return str(value)
+
+
+def _literal_node(text: str) -> RenderFn:
+    def render(scope, emit):
+        emit(text)
+    return render
+
+
+def _variable_node(name: str) -> RenderFn:
+    placeholder = '{' + name + '}'
+
+    def render(scope, emit):
+        value = scope.get(name, _MISSING)
+        # Unknown placeholders are left untouched
+        emit(placeholder if value is _MISSING else _format_value(value))
+    return render
+
+
+def _sequence(nodes: List[RenderFn]) -> RenderFn:
+    nodes = tuple(nodes)
+
+    def render(scope, emit):
+        for node in nodes:
+            node(scope, emit)
+    return render
+
+
+def _if_node(var_name: str, body: RenderFn) -> RenderFn:
+    def render(scope, emit):
+        if scope.get(var_name):
+            body(scope, emit)
+    return render
+
+
+def _for_node(item_name: str, list_name: str, body: RenderFn) -> RenderFn:
+    def render(scope, emit):
+        items = scope.get(list_name)
+        if not isinstance(items, (list, tuple)):
+            return
+        # One small overlay per loop instead of copying the variables per item
+        local: Dict[str, Any] = {}
+        loop_scope = ChainMap(local, scope)
+        for item in items:
+            local[item_name] = item
+            body(loop_scope, emit)
+    return render
+
+
+class _Block:
+    """Open block collected while parsing."""
+
+    __slots__ = ('kind', 'tag', 'args', 'nodes')
+
+    def __init__(self, kind: str, tag: str, args: tuple):
+        self.kind = kind
+        self.tag = tag
+        self.args = args
+        self.nodes: List[RenderFn] = []
+
+
+@lru_cache(maxsize=256)
+def compile_template(template: str) -> RenderFn:
+    """
+    Compile template text into a render function.
+
+    Results are cached by template text. Unmatched block tags are kept as
+    literal text, as the regex based renderer did.
+
+    Args:
+        template: Template string
+
+    Returns:
+        Function taking (variables, emit) that emits rendered segments
+    """
+    root = _Block('root', '', ())
+    stack = [root]
+    pos = 0
+
+    def add_literal(text: str):
+        if text:
+            stack[-1].nodes.append(_literal_node(text))
+
+    for match in _TOKEN_PATTERN.finditer(template):
+        add_literal(template[pos:match.start()])
+        pos = match.end()
+        tag = match.group(0)
+
+        if match.group('var'):
+            stack[-1].nodes.append(_variable_node(match.group('var')))
+        elif match.group('if_var'):
+            stack.append(_Block('if', tag, (match.group('if_var'),)))
+        elif match.group('item'):
+            stack.append(_Block('for', tag, (match.group('item'), match.group('list'))))
+        else:
+            kind = 'if' if 'endif' in tag else 'for'
+            if stack[-1].kind != kind:
+                add_literal(tag)
+                continue
+            block = stack.pop()
+            body = _sequence(block.nodes)
+            if kind == 'if':
+                stack[-1].nodes.append(_if_node(block.args[0], body))
+            else:
+                stack[-1].nodes.append(_for_node(block.args[0], block.args[1], body))
+
+    add_literal(template[pos:])
+
+    # Unclosed blocks fall back to literal text
+    while len(stack) > 1:
+        block = stack.pop()
+        stack[-1].nodes.append(_literal_node(block.tag))
+        stack[-1].nodes.extend(block.nodes)
+
+    return _sequence(root.nodes)
+
+
 class TemplateEngine:
     """Template engine for prompt rendering."""
     
@@ -26,86 +167,9 @@ class TemplateEngine:
         Returns:
             Rendered string
         """
-        result = template
-        
-        # Process conditionals
-        result = self._process_conditionals(result, variables)
-        
-        # Process loops
-        result = self._process_loops(result, variables)
-        
-        # Process simple variable substitution
-        result = self._substitute_variables(result, variables)
-        
-        return result
-    
-    def _process_conditionals(self, template: str, 
-                             variables: Dict[str, Any]) -> str:
-        """Process {% if condition %} blocks."""
-        # Pattern: {% if variable %}...{% endif %}
-        pattern = r'\{%\s*if\s+(\w+)\s*%\}(.*?)\{%\s*endif\s*%\}'
-        
-        def replace_conditional(match):
-            var_name = match.group(1)
-            content = match.group(2)
-            
-            # Check if variable exists and is truthy
-            if var_name in variables and variables[var_name]:
-                return content
-            return ""
-        
-        return re.sub(pattern, replace_conditional, template, flags=re.DOTALL)
-    
-    def _process_loops(self, template: str, 
-                      variables: Dict[str, Any]) -> str:
-        """Process {% for item in list %} blocks."""
-        # Pattern: {% for item in list %}...{% endfor %}
-        pattern = r'\{%\s*for\s+(\w+)\s+in\s+(\w+)\s*%\}(.*?)\{%\s*endfor\s*%\}'
-        
-        def replace_loop(match):
-            item_name = match.group(1)
-            list_name = match.group(2)
-            content = match.group(3)
-            
-            if list_name not in variables:
-                return ""
-            
-            items = variables[list_name]
-            if not isinstance(items, (list, tuple)):
-                return ""
-            
-            result = []
-            for item in items:
-                # Create temporary variables dict with loop item
-                loop_vars = variables.copy()
-                loop_vars[item_name] = item
-                
-                # Render content with loop variables
-                rendered = self._substitute_variables(content, loop_vars)
-                result.append(rendered)
-            
-            return ''.join(result)
-        
-        return re.sub(pattern, replace_loop, template, flags=re.DOTALL)
-    
-    def _substitute_variables(self, template: str, 
-                             variables: Dict[str, Any]) -> str:
-        """Substitute {variable} placeholders."""
-        result = template
-        
-        for key, value in variables.items():
-            # Handle different value types
-            if isinstance(value, (list, tuple)):
-                value_str = ', '.join(str(v) for v in value)
-            elif isinstance(value, dict):
-                value_str = str(value)
-            else:
-                value_str = str(value)
-            
-            # Replace {key} with value
-            result = result.replace(f'{{{key}}}', value_str)
-        
-        return result
+        parts: List[str] = []
+        compile_template(template)(variables, parts.append)
+        return ''.join(parts)
     
     def validate_template(self, template: str) -> tuple[bool, List[str]]:
         """
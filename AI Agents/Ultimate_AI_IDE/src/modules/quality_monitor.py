@@ -13,6 +13,8 @@ from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 import logging
 
+from ..utils.source_cache import get_source_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -98,8 +100,8 @@ class QualityMonitor:
         issues = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            source = get_source_cache().get(file_path)
+            content = source.text
             
             # Check file size
             lines = content.split('\n')
@@ -117,7 +119,7 @@ class QualityMonitor:
             
             # Parse AST for deeper analysis
             try:
-                tree = ast.parse(content)
+                tree = source.tree
                 issues.extend(self._check_ast(tree, file_path))
             except SyntaxError as e:
                 issues.append(QualityIssue(
@@ -302,13 +304,13 @@ class QualityMonitor:
             Quality metrics
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            source = get_source_cache().get(file_path)
+            content = source.text
             
             lines = content.split('\n')
             loc = len([l for l in lines if l.strip() and not l.strip().startswith('#')])
             
-            tree = ast.parse(content)
+            tree = source.tree
             
             functions = [n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)]
             classes = [n for n in ast.walk(tree) if isinstance(n, ast.ClassDef)]
@@ -433,10 +435,7 @@ class QualityMonitor:
     def _suggest_file_split(self, file_path: Path) -> str:
         """Suggest how to split a large file."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            tree = ast.parse(content)
+            tree = get_source_cache().parse(file_path)
             classes = [n for n in ast.walk(tree) if isinstance(n, ast.ClassDef)]
             
             if len(classes) > 1:
@@ -10,6 +10,8 @@ from dataclasses import dataclass, field
 import ast
 import re
 
+from ...utils.source_cache import ParsedSource, get_source_cache
+
 
 @dataclass
 class ComplexityMetrics:
@@ -84,8 +86,8 @@ class CodeAnalyzer:
     
     def _analyze_python_file(self, file_path: Path) -> AnalysisReport:
         """Analyze Python file."""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        source = get_source_cache().get(file_path)
+        content = source.text
         
         lines = content.split('\n')
         
@@ -111,11 +113,11 @@ class CodeAnalyzer:
             ))
             
             # Suggest split points
-            report.suggested_split_points = self._find_split_points_python(content)
+            report.suggested_split_points = self._find_split_points_python(source)
         
         # Analyze functions for complexity
         try:
-            tree = ast.parse(content)
+            tree = source.tree
             self._analyze_python_functions(tree, report, str(file_path))
         except SyntaxError:
             report.code_smells.append(CodeSmell(
@@ -236,13 +238,13 @@ class CodeAnalyzer:
         
         return complexity
     
-    def _find_split_points_python(self, content: str) -> List[int]:
+    def _find_split_points_python(self, source: ParsedSource) -> List[int]:
         """Find logical points to split Python file."""
         split_points = []
-        lines = content.split('\n')
+        lines = source.text.split('\n')
         
         try:
-            tree = ast.parse(content)
+            tree = source.tree
             
             # Split at class boundaries
             for node in ast.iter_child_nodes(tree):
@@ -302,8 +304,7 @@ class CodeAnalyzer:
     
     def _analyze_js_file(self, file_path: Path) -> AnalysisReport:
         """Analyze JavaScript/TypeScript file."""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = get_source_cache().read_text(file_path)
         
         lines = content.split('\n')
         loc = len([l for l in lines if l.strip() and not l.strip().startswith('//')])
@@ -339,8 +340,7 @@ class CodeAnalyzer:
     
     def _analyze_generic_file(self, file_path: Path) -> AnalysisReport:
         """Analyze generic code file."""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = get_source_cache().read_text(file_path)
         
         lines = content.split('\n')
         loc = len([l for l in lines if l.strip()])
@@ -8,6 +8,7 @@ from pathlib import Path
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 from .analyzer import CodeAnalyzer, AnalysisReport
+from ...utils.source_cache import get_source_cache
 
 
 @dataclass
@@ -35,7 +36,8 @@ class CodeRefactorer:
         self.analyzer = CodeAnalyzer()
     
     def refactor_file(self, file_path: str, language: str = 'python',
-                     focus: Optional[str] = None) -> Optional[RefactoredCode]:
+                     focus: Optional[str] = None,
+                     analysis: Optional[AnalysisReport] = None) -> Optional[RefactoredCode]:
         """
         Refactor a code file.
         
@@ -43,6 +45,7 @@ class CodeRefactorer:
             file_path: Path to file
             language: Programming language
             focus: Specific focus
+            analysis: Precomputed analysis report (analyzed here if omitted)
             
         Returns:
             RefactoredCode with improvements
@@ -52,10 +55,10 @@ class CodeRefactorer:
         if not path.exists():
             return None
         
-        with open(path, 'r', encoding='utf-8') as f:
-            original_content = f.read()
+        original_content = get_source_cache().read_text(path)
         
-        analysis = self.analyzer.analyze_code(file_path, language)
+        if analysis is None:
+            analysis = self.analyzer.analyze_code(file_path, language)
         
         prompt = self._build_refactoring_prompt(
             original_content, language, analysis, focus
@@ -10,6 +10,8 @@ from dataclasses import dataclass
 import ast
 import re
 
+from ...utils.source_cache import get_source_cache
+
 
 @dataclass
 class FileSplit:
@@ -49,8 +51,7 @@ class FileSplitter:
         if not path.exists():
             return None
         
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = get_source_cache().read_text(path)
         
         lines = content.split('\n')
         
@@ -69,7 +70,7 @@ class FileSplitter:
                           split_points: Optional[List[int]]) -> Optional[FileSplit]:
         """Split Python file into smaller modules."""
         try:
-            tree = ast.parse(content)
+            tree = get_source_cache().parse(file_path)
         except SyntaxError:
             print(f"Cannot split {file_path}: syntax errors")
             return None
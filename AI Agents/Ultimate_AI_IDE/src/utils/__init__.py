@@ -15,6 +15,7 @@ from .path_utils import (
     get_filename, get_extension, change_extension, is_subpath,
     find_project_root, sanitize_filename, expand_user, get_size_str
 )
+from .source_cache import ParsedSource, ParsedSourceCache, get_source_cache
 from .validators import (
     validate_project_name, validate_path, validate_language,
     validate_framework, validate_email, validate_url, validate_version,
@@ -28,6 +29,7 @@ __all__ = [
     'normalize_path', 'get_relative_path', 'join_paths', 'get_parent_dir',
     'get_filename', 'get_extension', 'change_extension', 'is_subpath',
     'find_project_root', 'sanitize_filename', 'expand_user', 'get_size_str',
+    'ParsedSource', 'ParsedSourceCache', 'get_source_cache',
     'validate_project_name', 'validate_path', 'validate_language',
     'validate_framework', 'validate_email', 'validate_url', 'validate_version',
     'validate_identifier', 'validate_json_string', 'validate_port', 'sanitize_input'
@@ -0,0 +1,287 @@
+"""
+Parsed Source Cache
+
+Process-wide cache of source text, line offsets and ASTs.
+
+Analyzers (quality monitor, dead code detector, bloat detector, file
+splitter, refactorer, codebase indexer, graph retriever) all read and parse
+the same files. Going through this cache means a full project analysis reads
+and parses each file once. Entries are validated against (mtime, size) on
+every lookup and evicted LRU when the estimated memory use exceeds the limit.
+
+Cached ASTs are shared between callers and must be treated as read-only.
+"""
+
+import ast
+import io
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rough memory cost of a parsed AST relative to its source text
+AST_SIZE_FACTOR = 12
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ParsedSource:
+    """Source text of one file with lazily computed lines, offsets and AST."""
+
+    def __init__(self, path: str, text: str, mtime_ns: int, size: int,
+                 on_parsed: Optional[Callable[['ParsedSource'], None]] = None):
+        """
+        Initialize parsed source.
+
+        Args:
+            path: Absolute file path
+            text: Decoded file contents
+            mtime_ns: Modification time the text was read at
+            size: File size in bytes the text was read at
+            on_parsed: Called once after the AST is built, so the owning
+                cache can charge its memory
+        """
+        self.path = path
+        self.text = text
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self._on_parsed = on_parsed
+        self._lines: Optional[List[str]] = None
+        self._line_offsets: Optional[List[int]] = None
+        self._tree: Optional[ast.Module] = None
+        self._syntax_error: Optional[SyntaxError] = None
+        self._lock = threading.Lock()
+
+    @property
+    def lines(self) -> List[str]:
+        """Lines with line endings kept, as returned by readlines()."""
+        if self._lines is None:
+            self._lines = io.StringIO(self.text).readlines()
+        return self._lines
+
+    @property
+    def line_offsets(self) -> List[int]:
+        """Character offset of the start of every line."""
+        if self._line_offsets is None:
+            offsets = [0]
+            find = self.text.find
+            pos = find('\n')
+            while pos != -1:
+                offsets.append(pos + 1)
+                pos = find('\n', pos + 1)
+            self._line_offsets = offsets
+        return self._line_offsets
+
+    @property
+    def tree(self) -> ast.Module:
+        """
+        Parsed AST.
+
+        Raises:
+            SyntaxError: If the source does not parse (the error is cached)
+        """
+        if self._tree is None and self._syntax_error is None:
+            parsed = False
+            with self._lock:
+                if self._tree is None and self._syntax_error is None:
+                    try:
+                        self._tree = ast.parse(self.text, filename=self.path)
+                        parsed = True
+                    except SyntaxError as e:
+                        self._syntax_error = e
+            if parsed and self._on_parsed is not None:
+                self._on_parsed(self)
+        if self._syntax_error is not None:
+            raise self._syntax_error
+        return self._tree
+
+    @property
+    def is_parsed(self) -> bool:
+        """Whether the AST (or its syntax error) has been computed."""
+        return self._tree is not None or self._syntax_error is not None
+
+    def offset_to_position(self, offset: int) -> tuple:
+        """
+        Convert a character offset to a (line, column) pair.
+
+        Args:
+            offset: Character offset into text
+
+        Returns:
+            Tuple of (1-based line number, 0-based column)
+        """
+        offsets = self.line_offsets
+        index = bisect_right(offsets, offset) - 1
+        return index + 1, offset - offsets[index]
+
+    def estimated_bytes(self) -> int:
+        """Estimated memory used by this entry."""
+        size = len(self.text)
+        if self._tree is not None:
+            size += len(self.text) * AST_SIZE_FACTOR
+        return size
+
+
+class ParsedSourceCache:
+    """
+    LRU cache of ParsedSource entries keyed by (path, encoding) and
+    validated against (mtime, size).
+
+    An entry's AST is charged to the memory estimate when it is built,
+    however it is reached (parse() or entry.tree).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize cache.
+
+        Args:
+            max_bytes: Estimated memory limit for cached entries
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], ParsedSource]" = OrderedDict()
+        self._sizes: Dict[Tuple[str, str], int] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, file_path: Union[str, Path], encoding: str = 'utf-8') -> ParsedSource:
+        """
+        Get the cached source for a file, reading it if changed or missing.
+
+        Args:
+            file_path: Path to file
+            encoding: File encoding
+
+        Returns:
+            ParsedSource entry
+
+        Raises:
+            OSError: If the file cannot be read
+            UnicodeDecodeError: If the file cannot be decoded
+        """
+        path = os.path.abspath(file_path)
+        key = (path, encoding)
+        st = os.stat(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry
+            self._stats['misses'] += 1
+
+        with open(path, 'r', encoding=encoding) as f:
+            text = f.read()
+        entry = ParsedSource(path, text, st.st_mtime_ns, st.st_size,
+                             on_parsed=lambda parsed: self._charge(key, parsed))
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._account(key, entry)
+            self._evict()
+        return entry
+
+    def read_text(self, file_path: Union[str, Path], encoding: str = 'utf-8') -> str:
+        """
+        Read file contents through the cache.
+
+        Args:
+            file_path: Path to file
+            encoding: File encoding
+
+        Returns:
+            File contents
+        """
+        return self.get(file_path, encoding).text
+
+    def parse(self, file_path: Union[str, Path], encoding: str = 'utf-8') -> ast.Module:
+        """
+        Parse a file through the cache.
+
+        Args:
+            file_path: Path to file
+            encoding: File encoding
+
+        Returns:
+            Parsed AST (shared, do not mutate)
+
+        Raises:
+            SyntaxError: If the file does not parse
+        """
+        return self.get(file_path, encoding).tree
+
+    def invalidate(self, file_path: Optional[Union[str, Path]] = None):
+        """
+        Drop one file or the whole cache.
+
+        Args:
+            file_path: File to drop (in every encoding), or None to clear
+                everything
+        """
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                self._sizes.clear()
+                self._bytes = 0
+            else:
+                path = os.path.abspath(file_path)
+                for key in [key for key in self._entries if key[0] == path]:
+                    del self._entries[key]
+                    self._bytes -= self._sizes.pop(key, 0)
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics."""
+        with self._lock:
+            return {
+                **self._stats,
+                'entries': len(self._entries),
+                'estimated_bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def _account(self, key: Tuple[str, str], entry: ParsedSource):
+        """Update the running memory estimate for an entry."""
+        size = entry.estimated_bytes()
+        self._bytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+
+    def _charge(self, key: Tuple[str, str], entry: ParsedSource):
+        """Charge a newly built AST to its entry, if still cached, and evict."""
+        with self._lock:
+            if self._entries.get(key) is entry:
+                self._account(key, entry)
+                self._evict()
+
+    def _evict(self):
+        """Evict least recently used entries until under the memory limit."""
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(key, 0)
+            self._stats['evictions'] += 1
+
+
+_default_cache: Optional[ParsedSourceCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_source_cache() -> ParsedSourceCache:
+    """
+    Get the process-wide source cache.
+
+    Returns:
+        Shared ParsedSourceCache instance
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ParsedSourceCache()
+    return _default_cache
@@ -2,12 +2,16 @@
 Tests for Automation Engine Module
 """
 
+import threading
+import time
+
 import pytest
 from src.modules.automation_engine import (
     AutomationEngine,
     TriggerType,
     ActionType,
-    AutomationPreferences
+    AutomationPreferences,
+    JobStatus
 )
 
 
@@ -80,6 +84,132 @@ class TestAutomationEngine:
         assert stats['actions_executed'] == 1
 
 
+class TestAutomationScheduling:
+    """Test debounced, pooled trigger scheduling"""
+    
+    def test_rules_sorted_at_registration(self):
+        """Test rules are kept in priority order when registered"""
+        engine = AutomationEngine()
+        engine.register_trigger(TriggerType.FILE_SAVE, lambda ctx: True, ActionType.QUALITY_CHECK, priority=3)
+        engine.register_trigger(TriggerType.FILE_SAVE, lambda ctx: True, ActionType.REFACTOR, priority=9)
+        engine.register_trigger(TriggerType.FILE_SAVE, lambda ctx: True, ActionType.SECURITY_SCAN, priority=5)
+        
+        priorities = [rule['priority'] for rule in engine.triggers[TriggerType.FILE_SAVE]]
+        assert priorities == [9, 5, 3]
+    
+    def test_debounce_per_path(self):
+        """Test rapid saves of one file run the action once with the latest context"""
+        engine = AutomationEngine(debounce_seconds=0.05)
+        seen = []
+        engine.register_trigger(TriggerType.FILE_SAVE, lambda ctx: True, ActionType.QUALITY_CHECK)
+        engine.register_action_handler(ActionType.QUALITY_CHECK, lambda ctx: seen.append(ctx['rev']))
+        
+        jobs = [engine.schedule_trigger(TriggerType.FILE_SAVE, {'file_path': 'a.py', 'rev': i})
+                for i in range(5)]
+        other = engine.schedule_trigger(TriggerType.FILE_SAVE, {'file_path': 'b.py', 'rev': 'b'})
+        
+        assert all(job is jobs[0] for job in jobs)
+        assert len(jobs[0].result(timeout=5)) == 1
+        assert len(other.result(timeout=5)) == 1
+        assert sorted(seen, key=str) == [4, 'b']
+        assert engine.get_stats()['triggers_debounced'] == 4
+        engine.shutdown()
+    
+    def test_duplicate_pending_actions_coalesced(self):
+        """Test an action already queued for a path is not queued again"""
+        engine = AutomationEngine(max_workers=1)
+        release = threading.Event()
+        calls = []
+        
+        engine.register_trigger(TriggerType.FILE_SAVE, lambda ctx: True, ActionType.QUALITY_CHECK)
+        engine.register_trigger(TriggerType.QUALITY_ISSUE, lambda ctx: True, ActionType.QUALITY_CHECK)
+        engine.register_trigger(TriggerType.MANUAL, lambda ctx: True, ActionType.REFACTOR)
+        engine.register_action_handler(ActionType.REFACTOR, lambda ctx: release.wait(5))
+        engine.register_action_handler(ActionType.QUALITY_CHECK, lambda ctx: calls.append(ctx['file_path']))
+        
+        blocker = engine.schedule_trigger(TriggerType.MANUAL, {}, debounce=0)
+        first = engine.schedule_trigger(TriggerType.FILE_SAVE, {'file_path': 'a.py'}, debounce=0)
+        second = engine.schedule_trigger(TriggerType.QUALITY_ISSUE, {'file_path': 'a.py'}, debounce=0)
+        
+        time.sleep(0.1)
+        release.set()
+        assert first.result(timeout=5) == second.result(timeout=5)
+        blocker.result(timeout=5)
+        
+        assert calls == ['a.py']
+        assert engine.get_stats()['actions_coalesced'] == 1
+        engine.shutdown()
+    
+    def test_per_action_concurrency_limit(self):
+        """Test actions never exceed their concurrency limit"""
+        engine = AutomationEngine(max_workers=4, action_limits={ActionType.SECURITY_SCAN: 2})
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+        
+        def scan(ctx):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+        
+        engine.register_trigger(TriggerType.FILE_SAVE, lambda ctx: True, ActionType.SECURITY_SCAN)
+        engine.register_action_handler(ActionType.SECURITY_SCAN, scan)
+        
+        jobs = [engine.schedule_trigger(TriggerType.FILE_SAVE, {'file_path': f'{i}.py'}, debounce=0)
+                for i in range(6)]
+        for job in jobs:
+            assert job.result(timeout=5)[0]['success'] is True
+        
+        assert peak[0] == 2
+        engine.shutdown()
+    
+    def test_cancel_pending_job(self):
+        """Test cancelling a job before its debounce window elapses"""
+        engine = AutomationEngine()
+        calls = []
+        engine.register_trigger(TriggerType.FILE_SAVE, lambda ctx: True, ActionType.QUALITY_CHECK)
+        engine.register_action_handler(ActionType.QUALITY_CHECK, lambda ctx: calls.append(ctx))
+        
+        job = engine.schedule_trigger(TriggerType.FILE_SAVE, {'file_path': 'a.py'}, debounce=10)
+        assert job.status == JobStatus.PENDING
+        assert job.cancel() is True
+        
+        assert job.status == JobStatus.CANCELLED
+        assert job.result(timeout=1) == []
+        assert calls == []
+        engine.shutdown()
+    
+    def test_cancel_while_rules_evaluate(self):
+        """Test a job cancelled during rule evaluation queues no actions"""
+        engine = AutomationEngine()
+        evaluating = threading.Event()
+        cancelled = threading.Event()
+        calls = []
+        
+        def condition(ctx):
+            evaluating.set()
+            cancelled.wait(5)
+            return True
+        
+        engine.register_trigger(TriggerType.FILE_SAVE, condition, ActionType.QUALITY_CHECK)
+        engine.register_action_handler(ActionType.QUALITY_CHECK, lambda ctx: calls.append(ctx))
+        
+        job = engine.schedule_trigger(TriggerType.FILE_SAVE, {'file_path': 'a.py'}, debounce=0)
+        assert evaluating.wait(5)
+        assert job.cancel() is True
+        cancelled.set()
+        job._timer.join(5)
+        engine.shutdown(wait=True)
+        
+        assert job.result(timeout=5) == []
+        assert job.status == JobStatus.CANCELLED
+        assert job._actions == []
+        assert calls == []
+
+
 class TestAutomationPreferences:
     """Test automation preferences"""
     
@@ -0,0 +1,220 @@
+"""
+Tests for Batch Refactor Module
+"""
+
+import json
+import threading
+import time
+import pytest
+from pathlib import Path
+from src.modules.batch_refactor import BatchRefactorer, RefactorJournal
+from src.modules.file_splitter import FileSplitter
+from src.modules.refactorer import CodeRefactorer
+
+
+class SlowMockAIBackend:
+    """Mock AI backend that records concurrent requests."""
+
+    def __init__(self, response='def improved():\n    return 1\n', delay=0.05):
+        self.response = response
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def query(self, prompt, max_tokens=1000):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return self.response
+
+
+def write_large_module(path: Path, name: str, classes: int = 3, methods: int = 40):
+    lines = ['"""Large module."""', '']
+    for c in range(classes):
+        lines.append(f'class {name}{c}:')
+        for m in range(methods):
+            lines.append(f'    def method_{m}(self):')
+            lines.append(f'        return {m}')
+            lines.append('')
+    path.write_text('\n'.join(lines) + '\n')
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / 'pkg_a').mkdir()
+    (tmp_path / 'pkg_b').mkdir()
+    write_large_module(tmp_path / 'pkg_a' / 'big_a.py', 'Alpha')
+    write_large_module(tmp_path / 'pkg_b' / 'big_b.py', 'Beta')
+    for i in range(3):
+        (tmp_path / f'small_{i}.py').write_text(f'def small_{i}():\n    return {i}\n')
+    return tmp_path
+
+
+class TestBatchRefactorer:
+    """Test batch planning and execution"""
+
+    def test_plan_splits_large_files_only(self, project):
+        batch = BatchRefactorer(splitter=FileSplitter(max_lines=100))
+        files = sorted(str(p) for p in project.rglob('*.py'))
+
+        plan = batch.plan(files, split=True, refactor=False)
+
+        assert set(plan.splits) == {str(project / 'pkg_a' / 'big_a.py'), str(project / 'pkg_b' / 'big_b.py')}
+        assert plan.refactors == []
+        assert all('analysis' in plan.timings[f] for f in files)
+
+    def test_two_large_modules_in_one_package(self, tmp_path):
+        package = tmp_path / 'pkg'
+        package.mkdir()
+        (package / '__init__.py').write_text('from .big_a import Alpha0\nVERSION = 1\n')
+        write_large_module(package / 'big_a.py', 'Alpha')
+        write_large_module(package / 'big_b.py', 'Beta')
+        batch = BatchRefactorer(splitter=FileSplitter(max_lines=100))
+
+        result = batch.run([str(package / 'big_a.py'), str(package / 'big_b.py')])
+
+        assert result.success, result.errors
+        # Each module is split into its own sub-package
+        assert sorted(str(Path(p).relative_to(package)) for p in result.files_written) == [
+            'big_a/__init__.py', 'big_a/alpha0.py', 'big_a/alpha1.py', 'big_a/alpha2.py',
+            'big_b/__init__.py', 'big_b/beta0.py', 'big_b/beta1.py', 'big_b/beta2.py',
+        ]
+        assert (package / '__init__.py').read_text() == 'from .big_a import Alpha0\nVERSION = 1\n'
+        assert 'from .beta1 import Beta1' in (package / 'big_b' / '__init__.py').read_text()
+
+    def test_plan_rejects_colliding_splits(self, tmp_path):
+        write_large_module(tmp_path / 'big_a.py', 'Alpha')
+        batch = BatchRefactorer(splitter=FileSplitter(max_lines=100))
+
+        plan = batch.plan([str(tmp_path / 'big_a.py'), str(tmp_path / 'big_a.py')])
+
+        assert list(plan.splits) == [str(tmp_path / 'big_a.py')]
+        assert 'already planned' in plan.errors[str(tmp_path / 'big_a.py')]
+
+    def test_split_never_overwrites_existing_files(self, tmp_path):
+        write_large_module(tmp_path / 'big_a.py', 'Alpha')
+        (tmp_path / 'big_a').mkdir()
+        (tmp_path / 'big_a' / 'alpha1.py').write_text('KEEP = True\n')
+        batch = BatchRefactorer(splitter=FileSplitter(max_lines=100))
+
+        result = batch.run([str(tmp_path / 'big_a.py')])
+
+        assert not result.success
+        assert 'would overwrite existing file' in result.errors[str(tmp_path / 'big_a.py')]
+        assert result.files_written == []
+        assert (tmp_path / 'big_a' / 'alpha1.py').read_text() == 'KEEP = True\n'
+        assert sorted(p.name for p in (tmp_path / 'big_a').iterdir()) == ['alpha1.py']
+
+    def test_dry_run_writes_nothing(self, project):
+        batch = BatchRefactorer(splitter=FileSplitter(max_lines=100))
+        before = sorted(p.name for p in project.rglob('*'))
+
+        result = batch.run([str(project / 'pkg_a' / 'big_a.py')], dry_run=True)
+
+        assert result.success
+        assert result.writes
+        assert result.files_written == []
+        assert sorted(p.name for p in project.rglob('*')) == before
+
+    def test_apply_splits_and_refactors(self, project):
+        ai = SlowMockAIBackend()
+        events = []
+        batch = BatchRefactorer(refactorer=CodeRefactorer(ai), splitter=FileSplitter(max_lines=100),
+                                max_concurrency=2, progress_callback=events.append)
+        files = sorted(str(p) for p in project.rglob('*.py'))
+
+        result = batch.run(files, split=True, refactor=True)
+
+        assert result.success, result.errors
+        assert (project / 'small_0.py').read_text() == ai.response
+        assert any('__init__.py' in path for path in result.files_written)
+        assert not list(project.rglob('.uaide_refactor_journal.json'))
+        assert 1 < ai.peak <= 2
+        assert 'llm' in result.timings[str(project / 'small_1.py')]
+        assert {e['stage'] for e in events} >= {'plan', 'refactor', 'validate', 'apply'}
+
+    def test_invalid_refactor_is_not_applied(self, project):
+        ai = SlowMockAIBackend(response='def broken(:\n', delay=0)
+        batch = BatchRefactorer(refactorer=CodeRefactorer(ai))
+        target = project / 'small_0.py'
+        original = target.read_text()
+
+        result = batch.run([str(target)], split=False, refactor=True)
+
+        assert not result.success
+        assert str(target) in result.errors
+        assert target.read_text() == original
+
+
+    def test_refactor_exception_is_recorded_per_file(self, project):
+        refactorer = CodeRefactorer(SlowMockAIBackend(delay=0))
+        refactor_file = refactorer.refactor_file
+        failing = str(project / 'small_1.py')
+
+        def flaky(file_path, *args, **kwargs):
+            if file_path == failing:
+                raise RuntimeError('backend went away')
+            return refactor_file(file_path, *args, **kwargs)
+
+        refactorer.refactor_file = flaky
+        batch = BatchRefactorer(refactorer=refactorer, max_concurrency=2)
+        files = [str(project / f'small_{i}.py') for i in range(3)]
+
+        result = batch.run(files, split=False, refactor=True)
+
+        assert not result.success
+        assert list(result.errors) == [failing]
+        assert 'backend went away' in result.errors[failing]
+        assert (project / 'small_0.py').read_text() == 'def improved():\n    return 1\n'
+        assert (project / 'small_1.py').read_text() == 'def small_1():\n    return 1\n'
+
+    def test_validation_timed_per_file(self, project):
+        batch = BatchRefactorer(splitter=FileSplitter(max_lines=100))
+        files = [str(project / 'pkg_a' / 'big_a.py'), str(project / 'pkg_b' / 'big_b.py')]
+
+        result = batch.run(files, dry_run=True)
+
+        validation = [result.timings[f]['validation'] for f in files]
+        assert all(seconds > 0 for seconds in validation)
+        assert sum(validation) < result.total_time
+
+class TestRefactorJournal:
+    """Test atomic apply and rollback"""
+
+    def test_failed_apply_rolls_back(self, tmp_path):
+        existing = tmp_path / 'existing.py'
+        existing.write_text('original\n')
+        blocker = tmp_path / 'blocker'
+        blocker.write_text('not a directory')
+        journal = RefactorJournal(str(tmp_path / 'journal.json'))
+
+        writes = {
+            str(existing): 'changed\n',
+            str(tmp_path / 'new.py'): 'new\n',
+            str(blocker / 'child.py'): 'fails\n'
+        }
+        with pytest.raises(OSError):
+            journal.apply(writes)
+
+        assert existing.read_text() == 'original\n'
+        assert not (tmp_path / 'new.py').exists()
+        assert not (tmp_path / 'journal.json').exists()
+
+    def test_recover_interrupted_apply(self, tmp_path):
+        target = tmp_path / 'module.py'
+        target.write_text('original\n')
+        journal_path = tmp_path / 'journal.json'
+        journal_path.write_text(json.dumps({'entries': [
+            {'path': str(target), 'original': 'b3JpZ2luYWwK'},
+            {'path': str(tmp_path / 'created.py'), 'original': None}
+        ]}))
+        target.write_text('half written')
+        (tmp_path / 'created.py').write_text('partial')
+
+        assert RefactorJournal.recover(str(journal_path)) == 2
+        assert target.read_text() == 'original\n'
+        assert not (tmp_path / 'created.py').exists()
@@ -128,6 +128,29 @@ class ClassB:
         assert result['success'] is True
         assert result['dry_run'] is True
     
+    def test_split_by_function_writes_a_subpackage(self, tmp_path):
+        """Test split modules go into a package named after the file"""
+        python_file = tmp_path / "helpers.py"
+        python_file.write_text(
+            "import os\nfrom .models import User\n\n"
+            "def get_user():\n    return User()\n\n"
+            "def get_path():\n    return os.sep\n\n"
+            "def set_user(user):\n    pass\n"
+        )
+        
+        splitter = FileSplitter()
+        result = splitter.split_file(str(python_file), strategy='by_function')
+        
+        assert result['success'] is True
+        package = tmp_path / "helpers"
+        assert sorted(p.name for p in package.iterdir()) == ['__init__.py', 'utils_1.py', 'utils_2.py']
+        # One package deeper, relative imports need one more level
+        assert "from ..models import User" in (package / "utils_1.py").read_text()
+        assert "import os\n" in (package / "utils_1.py").read_text()
+        init = (package / "__init__.py").read_text()
+        assert "from .utils_1 import get_user, get_path" in init
+        assert "from .utils_2 import set_user" in init
+    
     def test_split_file_invalid_syntax(self, tmp_path):
         """Test splitting file with syntax error"""
         python_file = tmp_path / "invalid.py"
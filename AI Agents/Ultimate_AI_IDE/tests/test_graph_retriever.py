@@ -10,6 +10,8 @@ import tempfile
 import ast
 
 from src.modules.context_manager import GraphRetriever, CallGraphBuilder, CodeNode
+from src.modules.context_manager.compact_graph import CompactGraph
+from src.utils.source_cache import get_source_cache
 
 
 class TestCallGraphBuilder:
@@ -102,6 +104,23 @@ class Calculator:
         assert node.node_type == 'method'
         assert 'multiply' in node.dependencies
     
+    def test_unchanged_file_is_not_read_again(self, builder, sample_file, monkeypatch):
+        """Test an unchanged file is skipped on its stat, without a read."""
+        assert builder.build_from_file(sample_file)
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("unchanged file was read")
+        
+        monkeypatch.setattr(get_source_cache(), 'get', fail)
+        assert builder.build_from_file(sample_file)
+        assert 'Calculator.calculate' in builder.graph
+        
+        monkeypatch.undo()
+        with open(sample_file, 'a') as f:
+            f.write("\ndef extra():\n    return add(1, 2)\n")
+        assert builder.build_from_file(sample_file)
+        assert 'extra' in builder.graph
+    
     def test_resolve_dependencies(self, builder, sample_file):
         """Test dependency resolution."""
         builder.build_from_file(sample_file)
@@ -265,5 +284,79 @@ def main():
             assert len(data) > 0
 
 
+class TestCompactGraph:
+    """Test CSR call graph and incremental, persistent indexing."""
+    
+    @pytest.fixture
+    def chain_graph(self):
+        """a -> b -> c -> d, with a also calling print."""
+        return CompactGraph.from_adjacency({
+            'a': {'b', 'print'},
+            'b': {'c'},
+            'c': {'d'},
+            'd': set()
+        })
+    
+    def test_csr_layout(self, chain_graph):
+        """Test interned IDs and forward/reverse adjacency."""
+        a, b = chain_graph.ids['a'], chain_graph.ids['b']
+        
+        assert chain_graph.edge_count == 4
+        assert b in chain_graph.neighbors(a)
+        assert list(chain_graph.neighbors(b, reverse=True)) == [a]
+        assert chain_graph.defined[chain_graph.ids['print']] == 0
+    
+    def test_expand_depth(self, chain_graph):
+        """Test multi-hop expansion is limited by depth and skips externals."""
+        names = lambda ids: [chain_graph.names[i] for i in ids]
+        
+        assert names(chain_graph.expand('a', 2)) == ['a', 'b', 'c']
+        assert names(chain_graph.expand('d', 3, reverse=True)) == ['d', 'c', 'b', 'a']
+        assert chain_graph.expand('missing', 2) == []
+    
+    def test_shortest_path(self, chain_graph):
+        """Test shortest call chain, including to external names."""
+        assert chain_graph.shortest_path('a', 'd') == ['a', 'b', 'c', 'd']
+        assert chain_graph.shortest_path('a', 'print') == ['a', 'print']
+        assert chain_graph.shortest_path('d', 'a') is None
+    
+    def test_incremental_reindex(self, tmp_path):
+        """Test changed files are re-parsed and deleted files dropped."""
+        first = tmp_path / "first.py"
+        second = tmp_path / "second.py"
+        first.write_text("def helper():\n    return 1\n")
+        second.write_text("def main():\n    return helper()\n")
+        
+        retriever = GraphRetriever()
+        retriever.index_directory(str(tmp_path))
+        assert [n.name for n in retriever.get_dependents('helper')] == ['helper', 'main']
+        
+        second.write_text("def main():\n    return 2\n\n\ndef other():\n    return helper()\n")
+        stats = retriever.index_directory(str(tmp_path))
+        assert [n.name for n in retriever.get_dependents('helper')] == ['helper', 'other']
+        
+        first.unlink()
+        stats = retriever.index_directory(str(tmp_path))
+        assert stats['removed'] == 1
+        assert retriever.find_node('helper') is None
+    
+    def test_save_and_load_index(self, tmp_path):
+        """Test the graph round-trips through save_index/load_index."""
+        source = tmp_path / "code.py"
+        source.write_text("def a():\n    return b()\n\n\ndef b():\n    return 1\n")
+        retriever = GraphRetriever()
+        retriever.index_directory(str(tmp_path))
+        index_file = str(tmp_path / "graph_index.json")
+        assert retriever.save_index(index_file)
+        
+        loaded = GraphRetriever()
+        assert loaded.load_index(index_file)
+        assert loaded.get_call_chain('a', 'b') == ['a', 'b']
+        assert 'a' in loaded.find_node('b').dependents
+        
+        # Unchanged files are not rebuilt after loading
+        assert loaded.index_directory(str(tmp_path))['nodes'] == 2
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -6,7 +6,7 @@ import pytest
 from pathlib import Path
 import tempfile
 from src.modules.prompt_manager import (
-    PromptManager, TemplateEngine, DefaultPrompts, Prompt
+    PromptManager, TemplateEngine, DefaultPrompts, Prompt, compile_template
 )
 
 
@@ -132,6 +132,53 @@ def test_template_engine_loop():
     assert "c" in result
 
 
+def test_template_engine_loop_with_globals():
+    """Test loop bodies see both the loop item and outer variables."""
+    engine = TemplateEngine()
+    
+    template = "{% for item in items %}{prefix}{item};{% endfor %}{missing}"
+    variables = {"items": ["a", "b"], "prefix": "-"}
+    result = engine.render(template, variables)
+    
+    assert result == "-a;-b;{missing}"
+    assert "item" not in variables
+
+
+def test_template_engine_nested_blocks():
+    """Test conditionals nested inside loops use the loop scope."""
+    engine = TemplateEngine()
+    
+    template = "{% for x in xs %}[{% if x %}{x}{% endif %}]{% endfor %}"
+    result = engine.render(template, {"xs": [1, 0, 2]})
+    
+    assert result == "[1][][2]"
+
+
+def test_template_engine_unmatched_tags_kept():
+    """Test unmatched block tags stay as literal text."""
+    engine = TemplateEngine()
+    
+    assert engine.render("{% if a %}text", {"a": True}) == "{% if a %}text"
+    assert engine.render("x{% endfor %}", {}) == "x{% endfor %}"
+
+
+def test_template_engine_value_formatting():
+    """Test list values are comma joined and double braces are preserved."""
+    engine = TemplateEngine()
+    
+    result = engine.render("{{name}}: {langs}", {"name": "n", "langs": ["py", "js"]})
+    
+    assert result == "{n}: py, js"
+
+
+def test_compile_template_cached():
+    """Test templates are compiled once and reused."""
+    template = "Cached {value}"
+    
+    assert compile_template(template) is compile_template(template)
+    assert TemplateEngine().render(template, {"value": 1}) == "Cached 1"
+
+
 def test_template_engine_validate():
     """Test template validation."""
     engine = TemplateEngine()
@@ -16,6 +16,7 @@ from src.utils.path_utils import (
     get_filename, get_extension, change_extension, is_subpath,
     sanitize_filename, get_size_str
 )
+from src.utils.source_cache import AST_SIZE_FACTOR, ParsedSourceCache, get_source_cache
 from src.utils.validators import (
     validate_project_name, validate_path, validate_language,
     validate_email, validate_url, validate_version, validate_identifier
@@ -163,6 +164,113 @@ class TestPathUtils:
         assert "MB" in get_size_str(2 * 1024 * 1024)
 
 
+class TestParsedSourceCache:
+    """Test shared parsed source cache."""
+    
+    def test_parse_reuses_tree(self, tmp_path):
+        """Test a file is read and parsed once while unchanged."""
+        file_path = tmp_path / "module.py"
+        file_path.write_text("def f():\n    return 1\n")
+        cache = ParsedSourceCache()
+        
+        tree1 = cache.parse(file_path)
+        tree2 = cache.parse(str(file_path))
+        
+        assert tree1 is tree2
+        assert cache.get_stats()['hits'] == 1
+        assert cache.get(file_path).lines == ["def f():\n", "    return 1\n"]
+        assert cache.get(file_path).line_offsets == [0, 9, 22]
+        assert cache.get(file_path).offset_to_position(13) == (2, 4)
+    
+    def test_change_invalidates_entry(self, tmp_path):
+        """Test edits are picked up through (mtime, size)."""
+        file_path = tmp_path / "module.py"
+        file_path.write_text("x = 1\n")
+        cache = ParsedSourceCache()
+        
+        first = cache.parse(file_path)
+        file_path.write_text("x = 1\ny = 2\n")
+        second = cache.parse(file_path)
+        
+        assert first is not second
+        assert len(second.body) == 2
+    
+    def test_syntax_error_cached(self, tmp_path):
+        """Test syntax errors are raised on every parse."""
+        file_path = tmp_path / "broken.py"
+        file_path.write_text("def broken(:\n")
+        cache = ParsedSourceCache()
+        
+        for _ in range(2):
+            with pytest.raises(SyntaxError):
+                cache.parse(file_path)
+        assert cache.read_text(file_path) == "def broken(:\n"
+    
+    def test_lru_eviction(self, tmp_path):
+        """Test least recently used entries are evicted over the limit."""
+        cache = ParsedSourceCache(max_bytes=2000)
+        paths = []
+        for i in range(5):
+            file_path = tmp_path / f"m{i}.py"
+            file_path.write_text(f"value_{i} = {i}\n" * 10)
+            paths.append(file_path)
+            cache.parse(file_path)
+        
+        stats = cache.get_stats()
+        assert stats['evictions'] > 0
+        assert stats['estimated_bytes'] <= 2000
+        cache.invalidate()
+        assert cache.get_stats()['entries'] == 0
+    
+    def test_tree_access_is_charged(self, tmp_path):
+        """Test ASTs reached through entry.tree count toward the limit."""
+        file_path = tmp_path / "module.py"
+        file_path.write_text("value = 1\n" * 400)
+        cache = ParsedSourceCache()
+        
+        entry = cache.get(file_path)
+        assert cache.get_stats()['estimated_bytes'] == 4000
+        assert len(entry.tree.body) == 400
+        assert cache.get_stats()['estimated_bytes'] == 4000 * (1 + AST_SIZE_FACTOR)
+        
+        # Charged once, however often the tree is read afterwards
+        entry.tree
+        cache.parse(file_path)
+        assert cache.get_stats()['estimated_bytes'] == 4000 * (1 + AST_SIZE_FACTOR)
+    
+    def test_tree_access_evicts(self, tmp_path):
+        """Test parsing through entry.tree evicts over the limit."""
+        cache = ParsedSourceCache(max_bytes=20000)
+        for i in range(5):
+            file_path = tmp_path / f"m{i}.py"
+            file_path.write_text(f"value_{i} = {i}\n" * 100)
+            cache.get(file_path).tree
+        
+        stats = cache.get_stats()
+        assert stats['evictions'] > 0
+        assert stats['estimated_bytes'] <= 20000
+    
+    def test_encoding_is_part_of_key(self, tmp_path):
+        """Test the same file read with another encoding is a separate entry."""
+        file_path = tmp_path / "latin.py"
+        file_path.write_bytes("name = 'caf\xe9'\n".encode('latin-1'))
+        cache = ParsedSourceCache()
+        
+        assert cache.read_text(file_path, encoding='latin-1') == "name = 'caf\xe9'\n"
+        with pytest.raises(UnicodeDecodeError):
+            cache.read_text(file_path, encoding='utf-8')
+        assert cache.get(file_path, encoding='latin-1').text == "name = 'caf\xe9'\n"
+        assert cache.get_stats()['hits'] == 1
+        
+        cache.invalidate(file_path)
+        assert cache.get_stats()['entries'] == 0
+        assert cache.get_stats()['estimated_bytes'] == 0
+    
+    def test_default_cache_is_shared(self):
+        """Test the process-wide cache is a singleton."""
+        assert get_source_cache() is get_source_cache()
+
+
 class TestValidators:
     """Test validation functions."""
     
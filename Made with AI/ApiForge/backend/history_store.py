@@ -0,0 +1,238 @@
+"""Request history storage: small metadata documents, compressed body blobs and rolling aggregates.
+
+Collections:
+    request_history          metadata (request, status, timing, sizes) - one per execution
+    request_history_bodies   compressed response headers + body, keyed by history id
+    history_aggregates       one document per user with running totals and a recent window
+
+Both history collections carry an `expire_at` date with a TTL index, and each
+user's history is pruned to `max_per_user` entries. Mongo's TTL monitor does not
+touch the aggregates, so the `stored` count is recounted whenever the oldest
+counted entry (`expires_next`) may have expired.
+"""
+
+import gzip
+import json
+import os
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+TRUNCATION_MARKER = "\n...[truncated {omitted} bytes]"
+
+# Number of recent executions kept in the aggregates window for the dashboard
+AGGREGATE_WINDOW = 100
+
+
+def compress_payload(payload: Dict[str, Any], encoding: str) -> bytes:
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return gzip.compress(raw, compresslevel=6)
+
+
+def decompress_payload(data: bytes, encoding: str) -> Dict[str, Any]:
+    if encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("History body is zstd-compressed but zstandard is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        raw = gzip.decompress(data)
+    return json.loads(raw)
+
+
+def truncate_body(body: str, max_bytes: int) -> Tuple[str, int, bool]:
+    """Cap a body at max_bytes of UTF-8, appending a truncation marker.
+
+    Returns the stored body, the original size in bytes and whether it was truncated.
+    """
+    encoded = body.encode("utf-8")
+    size = len(encoded)
+    if size <= max_bytes:
+        return body, size, False
+    kept = encoded[:max_bytes].decode("utf-8", errors="ignore")
+    return kept + TRUNCATION_MARKER.format(omitted=size - max_bytes), size, True
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Mongo returns naive UTC datetimes unless the client is tz_aware."""
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class HistoryStore:
+    def __init__(
+        self,
+        db,
+        max_body_bytes: int = 1024 * 1024,
+        ttl_days: int = 30,
+        max_per_user: int = 1000,
+        compression: Optional[str] = None,
+    ):
+        self.db = db
+        self.max_body_bytes = max_body_bytes
+        self.ttl = timedelta(days=ttl_days)
+        self.max_per_user = max_per_user
+        # Prune in batches once a user is this far over the retention count
+        self.prune_slack = max(1, max_per_user // 10)
+        if compression is None:
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstandard not installed, compressing history with gzip")
+            compression = "gzip"
+        self.compression = compression
+
+    @classmethod
+    def from_env(cls, db) -> "HistoryStore":
+        return cls(
+            db,
+            max_body_bytes=int(os.environ.get("HISTORY_MAX_BODY_BYTES", 1024 * 1024)),
+            ttl_days=int(os.environ.get("HISTORY_TTL_DAYS", 30)),
+            max_per_user=int(os.environ.get("HISTORY_MAX_PER_USER", 1000)),
+            compression=os.environ.get("HISTORY_COMPRESSION") or None,
+        )
+
+    async def ensure_indexes(self):
+        await self.db.request_history.create_index([("user_id", 1), ("created_at", -1)])
+        await self.db.request_history.create_index("expire_at", expireAfterSeconds=0)
+        await self.db.request_history.create_index([("user_id", 1), ("expire_at", 1)])
+        await self.db.request_history_bodies.create_index("id", unique=True)
+        await self.db.request_history_bodies.create_index("expire_at", expireAfterSeconds=0)
+        await self.db.history_aggregates.create_index("user_id", unique=True)
+
+    async def record(self, entry: Dict[str, Any]):
+        """Store one RequestHistory.model_dump() and update the user's aggregates."""
+        response = dict(entry["response"])
+        headers = response.pop("headers", {}) or {}
+        body, body_size, truncated = truncate_body(response.pop("body", "") or "", self.max_body_bytes)
+
+        now = datetime.now(timezone.utc)
+        created_at = entry.get("created_at") or now
+        if isinstance(created_at, datetime):
+            created_at = created_at.isoformat()
+        expire_at = now + self.ttl
+
+        meta = {
+            "id": entry["id"],
+            "user_id": entry["user_id"],
+            "request": entry["request"],
+            "response": {**response, "body_size": body_size, "body_truncated": truncated},
+            "created_at": created_at,
+            "expire_at": expire_at,
+        }
+        blob = {
+            "id": entry["id"],
+            "user_id": entry["user_id"],
+            "encoding": self.compression,
+            "data": compress_payload({"headers": headers, "body": body}, self.compression),
+            "expire_at": expire_at,
+        }
+
+        await self.db.request_history.insert_one(meta)
+        await self.db.request_history_bodies.insert_one(blob)
+        stored, expires_next = await self._update_aggregates(entry["user_id"], response, now, expire_at)
+        if expires_next is not None and _as_utc(expires_next) <= now:
+            stored = await self._recount(entry["user_id"], now)
+        if stored > self.max_per_user + self.prune_slack:
+            await self._prune(entry["user_id"], now)
+
+    async def _update_aggregates(
+        self, user_id: str, response: Dict[str, Any], now: datetime, expire_at: datetime
+    ) -> Tuple[int, Optional[datetime]]:
+        """Add one execution to the totals; returns the stored count and the earliest expiry counted in it."""
+        success = response.get("status_code", 0) < 400
+        response_time = response.get("response_time", 0) or 0
+        aggregates = await self.db.history_aggregates.find_one_and_update(
+            {"user_id": user_id},
+            {
+                "$inc": {
+                    "total_count": 1,
+                    "success_count": 1 if success else 0,
+                    "total_response_time": response_time,
+                    "stored": 1,
+                },
+                "$push": {
+                    "window": {
+                        "$each": [{"response_time": response_time, "success": success}],
+                        "$slice": -AGGREGATE_WINDOW,
+                    }
+                },
+                "$set": {"updated_at": now.isoformat()},
+                "$min": {"expires_next": expire_at},
+            },
+            upsert=True,
+            return_document=True,
+            projection={"stored": 1, "expires_next": 1},
+        )
+        if not aggregates:
+            return 0, None
+        return aggregates.get("stored", 0), aggregates.get("expires_next")
+
+    async def _recount(self, user_id: str, now: datetime) -> int:
+        """Reset `stored` and `expires_next` from the entries that have not expired."""
+        live = {"user_id": user_id, "expire_at": {"$gt": now}}
+        stored = await self.db.request_history.count_documents(live)
+        oldest = await self.db.request_history.find_one(live, {"_id": 0, "expire_at": 1}, sort=[("expire_at", 1)])
+        if oldest:
+            update = {"$set": {"stored": stored, "expires_next": oldest["expire_at"]}}
+        else:
+            # Unset rather than null: null sorts below dates and would pin the $min
+            update = {"$set": {"stored": stored}, "$unset": {"expires_next": ""}}
+        await self.db.history_aggregates.update_one({"user_id": user_id}, update)
+        return stored
+
+    async def _prune(self, user_id: str, now: datetime):
+        """Delete the user's oldest entries beyond max_per_user."""
+        stale = await self.db.request_history.find(
+            {"user_id": user_id}, {"_id": 0, "id": 1}
+        ).sort("created_at", -1).skip(self.max_per_user).to_list(None)
+        ids = [doc["id"] for doc in stale]
+        if ids:
+            await self.db.request_history.delete_many({"id": {"$in": ids}})
+            await self.db.request_history_bodies.delete_many({"id": {"$in": ids}})
+        await self._recount(user_id, now)
+
+    async def list(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Latest history entries, with bodies decompressed, newest first."""
+        entries = await self.db.request_history.find(
+            {"user_id": user_id}, {"_id": 0, "expire_at": 0}
+        ).sort("created_at", -1).limit(limit).to_list(limit)
+
+        ids = [e["id"] for e in entries if "body" not in e.get("response", {})]
+        bodies = {}
+        if ids:
+            async for blob in self.db.request_history_bodies.find({"id": {"$in": ids}}, {"_id": 0}):
+                bodies[blob["id"]] = decompress_payload(blob["data"], blob.get("encoding", "gzip"))
+
+        for entry in entries:
+            response = entry.get("response", {})
+            if "body" in response:
+                continue  # stored before bodies were split out
+            payload = bodies.get(entry["id"], {"headers": {}, "body": ""})
+            response["headers"] = payload["headers"]
+            response["body"] = payload["body"]
+        return entries
+
+    async def get_aggregates(self, user_id: str) -> Dict[str, Any]:
+        """Dashboard metrics from the rolling aggregates document."""
+        aggregates = await self.db.history_aggregates.find_one({"user_id": user_id}, {"_id": 0}) or {}
+        window = aggregates.get("window", [])
+        if not window:
+            return {"avg_response_time": 0, "success_rate": 0, "total_executions": 0}
+        times = [w["response_time"] for w in window if w["response_time"]]
+        return {
+            "avg_response_time": sum(times) / len(times) if times else 0,
+            "success_rate": sum(1 for w in window if w["success"]) / len(window) * 100,
+            "total_executions": aggregates.get("total_count", 0),
+        }
+
+    async def delete_user(self, user_id: str):
+        await self.db.request_history.delete_many({"user_id": user_id})
+        await self.db.request_history_bodies.delete_many({"user_id": user_id})
+        await self.db.history_aggregates.delete_one({"user_id": user_id})
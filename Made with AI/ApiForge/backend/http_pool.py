@@ -0,0 +1,165 @@
+"""Process-wide pool of keep-alive httpx clients, keyed by scheme, host and TLS settings."""
+
+import asyncio
+import os
+import time
+import logging
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+ClientKey = Tuple[str, str, int, bool, bool]
+
+
+def cookieless_jar() -> CookieJar:
+    """A cookie jar that refuses every cookie.
+
+    Pooled clients serve every user; a Set-Cookie kept from one user's
+    response would be sent on the next user's request to that host.
+    Cookies a request needs travel in its own Cookie header instead.
+    """
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+class HTTPClientPool:
+    """Reuses one AsyncClient (and its open connections) per target origin.
+
+    Clients are created on first use and closed after `idle_timeout` seconds
+    without a request. They never store cookies, since one client is shared
+    by every user. `transport_factory` lets tests route every client to an
+    in-process ASGI app instead of the network.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        idle_timeout: float = 300.0,
+        timeout: float = 30.0,
+        transport_factory: Optional[Callable[[ClientKey], httpx.AsyncBaseTransport]] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.transport_factory = transport_factory
+        self._clients: Dict[ClientKey, httpx.AsyncClient] = {}
+        self._last_used: Dict[ClientKey, float] = {}
+        self._lock = asyncio.Lock()
+        self._evictor: Optional[asyncio.Task] = None
+        self.stats = {"created": 0, "reused": 0, "evicted": 0}
+
+    @classmethod
+    def from_env(cls) -> "HTTPClientPool":
+        """Build a pool from HTTP_POOL_* environment variables."""
+        return cls(
+            max_connections=int(os.environ.get("HTTP_POOL_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.environ.get("HTTP_POOL_MAX_KEEPALIVE", 20)),
+            keepalive_expiry=float(os.environ.get("HTTP_POOL_KEEPALIVE_EXPIRY", 30.0)),
+            http2=os.environ.get("HTTP_POOL_HTTP2", "false").lower() in ("1", "true", "yes"),
+            idle_timeout=float(os.environ.get("HTTP_POOL_IDLE_TIMEOUT", 300.0)),
+            timeout=float(os.environ.get("HTTP_POOL_TIMEOUT", 30.0)),
+        )
+
+    def key_for(self, url: str, verify: bool = True, http2: Optional[bool] = None) -> ClientKey:
+        """Pool key for a request URL."""
+        parsed = httpx.URL(url)
+        scheme = parsed.scheme or "http"
+        port = parsed.port or (443 if scheme == "https" else 80)
+        return (scheme, parsed.host, port, verify, self.http2 if http2 is None else http2)
+
+    async def get_client(self, url: str, verify: bool = True, http2: Optional[bool] = None) -> httpx.AsyncClient:
+        """Get the shared client for a URL's origin, creating it if needed."""
+        key = self.key_for(url, verify, http2)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            async with self._lock:
+                client = self._clients.get(key)
+                if client is None or client.is_closed:
+                    client = self._create_client(key)
+                    self._clients[key] = client
+                    self.stats["created"] += 1
+                else:
+                    self.stats["reused"] += 1
+        else:
+            self.stats["reused"] += 1
+        self._last_used[key] = time.monotonic()
+        return client
+
+    def dedicated_client(self, url: str, max_connections: int, verify: bool = True,
+                         http2: Optional[bool] = None) -> httpx.AsyncClient:
+        """A client outside the pool with its own connection limit.
+
+        For bulk traffic such as load runs, so it cannot take the pooled
+        connections interactive requests use. The caller closes it.
+        """
+        key = self.key_for(url, verify, http2)
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=self.limits.keepalive_expiry,
+        )
+        return self._create_client(key, limits)
+
+    def _create_client(self, key: ClientKey, limits: Optional[httpx.Limits] = None) -> httpx.AsyncClient:
+        _, _, _, verify, http2 = key
+        kwargs = {"timeout": self.timeout, "verify": verify, "http2": http2, "cookies": cookieless_jar()}
+        if self.transport_factory is not None:
+            kwargs["transport"] = self.transport_factory(key)
+        else:
+            kwargs["limits"] = limits or self.limits
+        return httpx.AsyncClient(**kwargs)
+
+    async def evict_idle(self) -> int:
+        """Close clients unused for longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        async with self._lock:
+            stale = [key for key, used in self._last_used.items() if used < cutoff]
+            clients = [self._clients.pop(key) for key in stale if key in self._clients]
+            for key in stale:
+                self._last_used.pop(key, None)
+        for client in clients:
+            await client.aclose()
+        self.stats["evicted"] += len(clients)
+        return len(clients)
+
+    async def _evict_loop(self):
+        interval = max(1.0, self.idle_timeout / 2)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                evicted = await self.evict_idle()
+                if evicted:
+                    logger.info(f"Evicted {evicted} idle HTTP clients")
+            except Exception as e:
+                logger.warning(f"HTTP client eviction failed: {e}")
+
+    def start(self):
+        """Start the background idle eviction task."""
+        if self._evictor is None or self._evictor.done():
+            self._evictor = asyncio.get_running_loop().create_task(self._evict_loop())
+
+    async def aclose(self):
+        """Stop eviction and close every pooled client."""
+        if self._evictor is not None:
+            self._evictor.cancel()
+            self._evictor = None
+        async with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._last_used.clear()
+        for client in clients:
+            await client.aclose()
+
+    def snapshot(self) -> Dict:
+        """Pool statistics."""
+        return {**self.stats, "open_clients": len(self._clients), "http2": self.http2}
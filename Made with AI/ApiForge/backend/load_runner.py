@@ -0,0 +1,160 @@
+"""Concurrent load runner with live latency percentiles for /execute/load."""
+
+import asyncio
+import math
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+# Latencies are bucketed logarithmically: each bucket is 2% wider than the
+# previous one, so percentiles are accurate to ~1% with bounded memory.
+BUCKET_GROWTH = 1.02
+MIN_LATENCY_MS = 0.01
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram."""
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float):
+        latency_ms = max(latency_ms, MIN_LATENCY_MS)
+        index = int(math.log(latency_ms / MIN_LATENCY_MS) / _LOG_GROWTH)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.min_ms = min(self.min_ms, latency_ms)
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency (ms) below which `p` percent of samples fall."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                value = MIN_LATENCY_MS * BUCKET_GROWTH ** (index + 0.5)
+                return min(max(value, self.min_ms), self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> Dict:
+        if not self.count:
+            return {"p50": None, "p95": None, "p99": None, "min": None, "max": None, "mean": None}
+        return {
+            "p50": round(self.percentile(50), 3),
+            "p95": round(self.percentile(95), 3),
+            "p99": round(self.percentile(99), 3),
+            "min": round(self.min_ms, 3),
+            "max": round(self.max_ms, 3),
+            "mean": round(self.total_ms / self.count, 3),
+        }
+
+
+class LoadStats:
+    """Running counters for a load test."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.started = time.perf_counter()
+        self.latency = LatencyHistogram()
+        self.status_codes: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+
+    def record_response(self, status_code: int, latency_ms: float):
+        self.completed += 1
+        self.latency.record(latency_ms)
+        code = str(status_code)
+        self.status_codes[code] = self.status_codes.get(code, 0) + 1
+        if status_code >= 400:
+            self.failed += 1
+            status_class = f"{status_code // 100}xx"
+            self.errors[status_class] = self.errors.get(status_class, 0) + 1
+
+    def record_error(self, error_type: str, latency_ms: float):
+        self.completed += 1
+        self.failed += 1
+        self.latency.record(latency_ms)
+        self.errors[error_type] = self.errors.get(error_type, 0) + 1
+
+    def snapshot(self, done: bool = False) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "done": done,
+            "completed": self.completed,
+            "total": self.total,
+            "in_flight": self.in_flight,
+            "failed": self.failed,
+            "elapsed": round(elapsed, 3),
+            "throughput": round(self.completed / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency_ms": self.latency.summary(),
+            "status_codes": dict(self.status_codes),
+            "errors": dict(self.errors),
+        }
+
+
+async def run_load(
+    send: Callable[[], Awaitable[int]],
+    total: int,
+    concurrency: int,
+    rate: Optional[float] = None,
+    report_interval: float = 0.5,
+) -> AsyncIterator[Dict]:
+    """Fire `total` requests and yield a stats snapshot every `report_interval`.
+
+    `send` performs one request and returns its status code; exceptions are
+    counted by type. At most `concurrency` requests are in flight and, when
+    `rate` is set, request starts are paced to `rate` per second. The last
+    snapshot has `done` set. Closing the generator cancels outstanding work.
+    """
+    stats = LoadStats(total)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            if rate:
+                delay = start + index / rate - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            stats.in_flight += 1
+            begin = time.perf_counter()
+            try:
+                status_code = await send()
+                stats.record_response(status_code, (time.perf_counter() - begin) * 1000)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats.record_error(type(e).__name__, (time.perf_counter() - begin) * 1000)
+            finally:
+                stats.in_flight -= 1
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, total)))]
+    all_done = asyncio.ensure_future(asyncio.gather(*workers))
+    try:
+        while True:
+            done, _ = await asyncio.wait({all_done}, timeout=report_interval)
+            if done:
+                all_done.result()
+                yield stats.snapshot(done=True)
+                return
+            yield stats.snapshot()
+    finally:
+        if not all_done.done():
+            all_done.cancel()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -11,14 +12,18 @@ from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional, Dict, Any, Union
 import uuid
+import asyncio
 from datetime import datetime, timezone, timedelta
 import httpx
 import json
-import xml.etree.ElementTree as ET
 import xmltodict
 from bs4 import BeautifulSoup
 import re
-import yaml
+from http_pool import HTTPClientPool
+from load_runner import run_load
+from history_store import HistoryStore
+from spec_import import ImportJobs, SpecParseError
+from workflow_executor import WorkflowError, WorkflowExecution, WorkflowRunner
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -28,6 +33,16 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Shared keep-alive HTTP clients for outgoing API calls
+http_pool = HTTPClientPool.from_env()
+
+# Request history with compressed bodies, TTL expiry and per-user retention
+history_store = HistoryStore.from_env(db)
+
+# Workflow executions running in this process, for log streaming and cancellation
+workflow_runner = WorkflowRunner()
+WORKFLOW_MAX_CONCURRENCY = int(os.environ.get("WORKFLOW_MAX_CONCURRENCY", 8))
+
 # Security setup
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -172,6 +187,12 @@ class APIExecuteRequest(BaseModel):
     grpc_method: Optional[str] = None
     websocket_message: Optional[str] = None
 
+class LoadTestRequest(APIExecuteRequest):
+    total_requests: int = Field(default=100, ge=1, le=100000)
+    concurrency: int = Field(default=10, ge=1, le=1000)
+    rate: Optional[float] = Field(default=None, gt=0)  # requests per second, None = unthrottled
+    report_interval: float = Field(default=0.5, ge=0.05, le=10)
+
 class APIExecuteResponse(BaseModel):
     status_code: int
     headers: Dict[str, str]
@@ -252,115 +273,6 @@ def create_soap_envelope(body: str, action: Optional[str] = None) -> str:
 </soap:Envelope>'''
     return envelope
 
-def parse_openapi_spec(content: str) -> List[Dict]:
-    """Parse OpenAPI/Swagger specification"""
-    try:
-        if content.strip().startswith('{'):
-            spec = json.loads(content)
-        else:
-            spec = yaml.safe_load(content)
-        
-        requests = []
-        base_url = ""
-        
-        if 'servers' in spec and spec['servers']:
-            base_url = spec['servers'][0]['url']
-        elif 'host' in spec:
-            scheme = spec.get('schemes', ['https'])[0]
-            base_url = f"{scheme}://{spec['host']}"
-            if 'basePath' in spec:
-                base_url += spec['basePath']
-        
-        for path, methods in spec.get('paths', {}).items():
-            for method, operation in methods.items():
-                if method.upper() in ['GET', 'POST', 'PUT', 'DELETE', 'PATCH']:
-                    requests.append({
-                        'name': operation.get('operationId', f"{method.upper()} {path}"),
-                        'method': method.upper(),
-                        'url': base_url + path,
-                        'description': operation.get('summary', ''),
-                        'headers': {'Content-Type': 'application/json'} if method.upper() in ['POST', 'PUT', 'PATCH'] else {},
-                        'body': json.dumps(operation.get('requestBody', {}).get('content', {}).get('application/json', {}).get('example', {}), indent=2) if operation.get('requestBody') else None
-                    })
-        
-        return requests
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse OpenAPI spec: {str(e)}")
-
-def parse_raml_spec(content: str) -> List[Dict]:
-    """Parse RAML specification"""
-    try:
-        spec = yaml.safe_load(content)
-        requests = []
-        base_url = spec.get('baseUri', '')
-        
-        def parse_resources(resources, path_prefix=''):
-            for resource_path, resource in resources.items():
-                full_path = path_prefix + resource_path
-                
-                # Parse methods for this resource
-                for key, value in resource.items():
-                    if key in ['get', 'post', 'put', 'delete', 'patch']:
-                        method_info = value if isinstance(value, dict) else {}
-                        requests.append({
-                            'name': method_info.get('displayName', f"{key.upper()} {full_path}"),
-                            'method': key.upper(),
-                            'url': base_url + full_path,
-                            'description': method_info.get('description', ''),
-                            'headers': {'Content-Type': 'application/json'} if key.upper() in ['POST', 'PUT', 'PATCH'] else {},
-                            'body': json.dumps(method_info.get('body', {}).get('application/json', {}).get('example', {}), indent=2) if method_info.get('body') else None
-                        })
-                    elif isinstance(value, dict) and not key.startswith('/'):
-                        # Nested resources
-                        parse_resources({k: v for k, v in value.items() if k.startswith('/')}, full_path)
-        
-        # Parse root level resources
-        resources = {k: v for k, v in spec.items() if k.startswith('/')}
-        parse_resources(resources)
-        
-        return requests
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse RAML spec: {str(e)}")
-
-def parse_wsdl(content: str) -> List[Dict]:
-    """Parse WSDL specification"""
-    try:
-        root = ET.fromstring(content)
-        requests = []
-        
-        # Extract service information
-        services = root.findall('.//{http://schemas.xmlsoap.org/wsdl/}service')
-        for service in services:
-            service_name = service.get('name', 'Unknown Service')
-            
-            # Find operations
-            bindings = root.findall('.//{http://schemas.xmlsoap.org/wsdl/}binding')
-            for binding in bindings:
-                operations = binding.findall('.//{http://schemas.xmlsoap.org/wsdl/}operation')
-                for operation in operations:
-                    op_name = operation.get('name', 'Unknown Operation')
-                    
-                    # Get SOAP action
-                    soap_action = ""
-                    soap_op = operation.find('.//{http://schemas.xmlsoap.org/wsdl/soap/}operation')
-                    if soap_op is not None:
-                        soap_action = soap_op.get('soapAction', '')
-                    
-                    requests.append({
-                        'name': f"{service_name} - {op_name}",
-                        'method': 'POST',
-                        'url': '',  # Will need to be filled manually
-                        'headers': {
-                            'Content-Type': 'text/xml; charset=utf-8',
-                            'SOAPAction': soap_action
-                        },
-                        'body': create_soap_envelope(f'<!-- {op_name} operation body -->')
-                    })
-        
-        return requests
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse WSDL: {str(e)}")
-
 # Authentication Routes
 @api_router.post("/auth/register", response_model=Token)
 async def register(user_data: UserRegister):
@@ -538,70 +450,75 @@ async def delete_environment(env_id: str, current_user: dict = Depends(get_curre
         raise HTTPException(status_code=404, detail="Environment not found")
     return {"message": "Environment deleted successfully"}
 
+def build_outgoing_request(request_data: APIExecuteRequest, variables: Dict[str, str]) -> Dict[str, Any]:
+    """Resolve variables, auth and protocol framing into httpx.request() arguments"""
+    # Substitute variables in URL and body
+    url = substitute_variables(request_data.url, variables)
+    body = substitute_variables(request_data.body, variables) if request_data.body else None
+    
+    # Apply authentication
+    headers = dict(request_data.headers or {})
+    if request_data.auth:
+        headers = apply_auth(headers, request_data.auth)
+    
+    # Substitute variables in headers
+    for key, value in headers.items():
+        headers[key] = substitute_variables(value, variables)
+    
+    if request_data.protocol == "SOAP":
+        # Handle SOAP request
+        if body and not body.strip().startswith('<?xml'):
+            body = create_soap_envelope(body)
+        
+        if 'Content-Type' not in headers:
+            headers['Content-Type'] = 'text/xml; charset=utf-8'
+        
+        return {"method": "POST", "url": url, "headers": headers, "content": body}
+    
+    if request_data.protocol == "GraphQL":
+        # Handle GraphQL request
+        if 'Content-Type' not in headers:
+            headers['Content-Type'] = 'application/json'
+        
+        # Parse GraphQL query and variables
+        try:
+            graphql_body = json.loads(body) if body else {}
+        except:
+            graphql_body = {"query": body or ""}
+        
+        return {"method": "POST", "url": url, "headers": headers, "json": graphql_body}
+    
+    # Handle REST request
+    query_params = dict(request_data.query_params or {})
+    
+    # Substitute variables in query params
+    for key, value in query_params.items():
+        query_params[key] = substitute_variables(value, variables)
+    
+    return {
+        "method": request_data.method,
+        "url": url,
+        "headers": headers,
+        "params": query_params,
+        "content": body
+    }
+
+async def get_active_variables(user_id: str) -> Dict[str, str]:
+    active_env = await db.environments.find_one({"user_id": user_id, "is_active": True})
+    return active_env.get('variables', {}) if active_env else {}
+
 # Enhanced API Execution Route
 @api_router.post("/execute", response_model=APIExecuteResponse)
 async def execute_api_request(request_data: APIExecuteRequest, current_user: dict = Depends(get_current_user)):
     try:
         # Get active environment for variable substitution
-        active_env = await db.environments.find_one({"user_id": current_user['id'], "is_active": True})
-        variables = active_env.get('variables', {}) if active_env else {}
-        
-        # Substitute variables in URL and body
-        url = substitute_variables(request_data.url, variables)
-        body = substitute_variables(request_data.body, variables) if request_data.body else None
-        
-        # Apply authentication
-        headers = request_data.headers or {}
-        if request_data.auth:
-            headers = apply_auth(headers, request_data.auth)
-        
-        # Substitute variables in headers
-        for key, value in headers.items():
-            headers[key] = substitute_variables(value, variables)
+        variables = await get_active_variables(current_user['id'])
+        outgoing = build_outgoing_request(request_data, variables)
         
         start_time = datetime.now()
         
-        if request_data.protocol == "SOAP":
-            # Handle SOAP request
-            if body and not body.strip().startswith('<?xml'):
-                body = create_soap_envelope(body)
-            
-            if 'Content-Type' not in headers:
-                headers['Content-Type'] = 'text/xml; charset=utf-8'
-            
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(url, headers=headers, content=body)
-        
-        elif request_data.protocol == "GraphQL":
-            # Handle GraphQL request
-            if 'Content-Type' not in headers:
-                headers['Content-Type'] = 'application/json'
-            
-            # Parse GraphQL query and variables
-            try:
-                graphql_body = json.loads(body) if body else {}
-            except:
-                graphql_body = {"query": body or ""}
-            
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(url, headers=headers, json=graphql_body)
-        
-        else:
-            # Handle REST request
-            query_params = request_data.query_params or {}
-            
-            # Substitute variables in query params
-            for key, value in query_params.items():
-                query_params[key] = substitute_variables(value, variables)
-            
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.request(
-                    method=request_data.method,
-                    url=url,
-                    headers=headers,
-                    params=query_params,
-                    content=body
-                )
+        client = await http_pool.get_client(outgoing["url"])
+        response = await client.request(**outgoing)
         
         end_time = datetime.now()
         response_time = (end_time - start_time).total_seconds()
@@ -619,8 +536,7 @@ async def execute_api_request(request_data: APIExecuteRequest, current_user: dic
             user_id=current_user['id']
         )
         
-        history_dict = prepare_for_mongo(history_entry.model_dump())
-        await db.request_history.insert_one(history_dict)
+        await history_store.record(history_entry.model_dump())
         
         return APIExecuteResponse(
             status_code=response.status_code,
@@ -635,296 +551,127 @@ async def execute_api_request(request_data: APIExecuteRequest, current_user: dic
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
+# Load Test Route - streams live stats as Server-Sent Events
+@api_router.post("/execute/load")
+async def execute_load_test(load_data: LoadTestRequest, current_user: dict = Depends(get_current_user)):
+    variables = await get_active_variables(current_user['id'])
+    outgoing = build_outgoing_request(load_data, variables)
+    try:
+        # Its own client and connection limit, so a run cannot starve /execute
+        client = http_pool.dedicated_client(outgoing["url"], max_connections=load_data.concurrency)
+    except (httpx.InvalidURL, httpx.UnsupportedProtocol) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid URL: {str(e)}")
+    
+    async def send() -> int:
+        response = await client.request(**outgoing)
+        return response.status_code
+    
+    async def event_stream():
+        try:
+            async for snapshot in run_load(
+                send,
+                total=load_data.total_requests,
+                concurrency=load_data.concurrency,
+                rate=load_data.rate,
+                report_interval=load_data.report_interval
+            ):
+                event = "done" if snapshot["done"] else "progress"
+                yield f"event: {event}\ndata: {json.dumps(snapshot)}\n\n"
+        finally:
+            await client.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Request History Route
 @api_router.get("/history", response_model=List[RequestHistory])
 async def get_request_history(current_user: dict = Depends(get_current_user), limit: int = 50):
-    history = await db.request_history.find(
-        {"user_id": current_user['id']}, 
-        {"_id": 0}
-    ).sort("created_at", -1).limit(limit).to_list(limit)
+    history = await history_store.list(current_user['id'], limit)
     
     return [RequestHistory(**parse_from_mongo(h)) for h in history]
 
-# ==============================================
-# API SPECIFICATION PARSING FUNCTIONS
-# ==============================================
+# Import Routes
+async def resolve_import_collection(user_id: str, import_type: str, collection_name: Optional[str]) -> str:
+    """Collection an import goes into: a new named one, else the user's first or a default"""
+    if collection_name:
+        collection = Collection(
+            name=collection_name,
+            description=f"Imported from {import_type.upper()}",
+            user_id=user_id
+        )
+        await db.collections.insert_one(prepare_for_mongo(collection.model_dump()))
+        return collection.id
+    
+    existing = await db.collections.find_one({"user_id": user_id}, {"_id": 0, "id": 1})
+    if existing:
+        return existing['id']
+    collection = Collection(name="Imported Requests", user_id=user_id)
+    await db.collections.insert_one(prepare_for_mongo(collection.model_dump()))
+    return collection.id
+
+def build_imported_request(req_data: Dict[str, Any], collection_id: str, user_id: str) -> Dict[str, Any]:
+    api_request = APIRequest(
+        name=req_data['name'],
+        protocol=req_data.get('protocol', 'REST'),
+        method=req_data.get('method', 'GET'),
+        url=req_data['url'],
+        headers=req_data.get('headers', {}),
+        body=req_data.get('body'),
+        collection_id=collection_id,
+        user_id=user_id
+    )
+    return prepare_for_mongo(api_request.model_dump())
 
-def parse_openapi_spec(content: str):
-    """Parse OpenAPI/Swagger specification"""
-    try:
-        import yaml
-        # Try JSON first, then YAML
-        try:
-            spec = json.loads(content)
-        except:
-            spec = yaml.safe_load(content)
-        
-        requests = []
-        base_url = ""
-        
-        # Get base URL from servers or host
-        if "servers" in spec and spec["servers"]:
-            base_url = spec["servers"][0]["url"]
-        elif "host" in spec:
-            protocol = "https" if spec.get("schemes", ["https"])[0] == "https" else "http"
-            base_url = f"{protocol}://{spec['host']}{spec.get('basePath', '')}"
-        
-        # Parse paths
-        for path, methods in spec.get("paths", {}).items():
-            for method, details in methods.items():
-                if method.upper() in ["GET", "POST", "PUT", "DELETE", "PATCH"]:
-                    requests.append({
-                        "name": details.get("summary", f"{method.upper()} {path}"),
-                        "method": method.upper(),
-                        "url": f"{base_url}{path}",
-                        "protocol": "REST",
-                        "description": details.get("description", ""),
-                        "headers": {"Content-Type": "application/json"}
-                    })
-        
-        return requests
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse OpenAPI spec: {str(e)}")
+import_jobs = ImportJobs.from_env(db, resolve_import_collection, build_imported_request)
 
-def parse_wsdl(content: str):
-    """Parse WSDL specification for SOAP services"""
+@api_router.post("/import")
+async def import_specification(import_data: ImportRequest, current_user: dict = Depends(get_current_user)):
+    """Import a specification and wait for it to finish (see /import/jobs to poll instead)"""
     try:
-        import xml.etree.ElementTree as ET
-        
-        root = ET.fromstring(content)
-        requests = []
-        
-        # Extract namespace map
-        ns_map = {}
-        for prefix, uri in root.attrib.items():
-            if prefix.startswith('xmlns:'):
-                ns_map[prefix[6:]] = uri
-        
-        # Common WSDL namespaces
-        common_ns = {
-            'wsdl': 'http://schemas.xmlsoap.org/wsdl/',
-            'soap': 'http://schemas.xmlsoap.org/wsdl/soap/',
-            'tns': root.get('targetNamespace', '')
-        }
-        ns_map.update(common_ns)
-        
-        # Find service endpoint
-        service_url = ""
-        for service in root.findall('.//wsdl:service', ns_map):
-            for port in service.findall('.//wsdl:port', ns_map):
-                address = port.find('.//soap:address', ns_map)
-                if address is not None:
-                    service_url = address.get('location', '')
-                    break
-        
-        # Extract operations
-        for operation in root.findall('.//wsdl:operation', ns_map):
-            op_name = operation.get('name')
-            if op_name:
-                # Find SOAP action
-                soap_op = operation.find('.//soap:operation', ns_map)
-                soap_action = soap_op.get('soapAction', '') if soap_op is not None else ''
-                
-                requests.append({
-                    "name": op_name,
-                    "method": "POST",
-                    "url": service_url,
-                    "protocol": "SOAP",
-                    "soapAction": soap_action,
-                    "soapVersion": "1.1",
-                    "headers": {
-                        "Content-Type": "text/xml; charset=utf-8",
-                        "SOAPAction": f'"{soap_action}"'
-                    }
-                })
-        
-        return requests
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse WSDL: {str(e)}")
+        job, deduplicated = await import_jobs.submit(
+            current_user['id'], import_data.type, import_data.content, import_data.collection_name
+        )
+    except SpecParseError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    job = await import_jobs.wait(job['id'], current_user['id'])
+    if job['status'] == 'failed':
+        raise HTTPException(status_code=400, detail=f"Import failed: {job['error']}")
+    
+    count = job.get('inserted', 0)
+    return {
+        "message": f"Specification already imported ({count} requests)" if deduplicated
+        else f"Successfully imported {count} requests",
+        "collection_id": job.get('collection_id'),
+        "requests_count": count,
+        "job_id": job['id'],
+        "deduplicated": deduplicated
+    }
 
-def parse_raml_spec(content: str):
-    """Parse RAML API specification"""
+@api_router.post("/import/jobs", status_code=202)
+async def create_import_job(import_data: ImportRequest, current_user: dict = Depends(get_current_user)):
+    """Start an import in the background; poll GET /import/jobs/{job_id} for progress"""
     try:
-        import yaml
-        
-        spec = yaml.safe_load(content)
-        requests = []
-        
-        base_url = spec.get("baseUri", "")
-        version = spec.get("version", "")
-        if "{version}" in base_url:
-            base_url = base_url.replace("{version}", version)
-        
-        def parse_resources(resources, parent_path=""):
-            for path, resource in resources.items():
-                current_path = parent_path + path
-                
-                # Parse HTTP methods
-                for method in ["get", "post", "put", "delete", "patch"]:
-                    if method in resource:
-                        method_spec = resource[method]
-                        requests.append({
-                            "name": method_spec.get("displayName", f"{method.upper()} {current_path}"),
-                            "method": method.upper(),
-                            "url": f"{base_url}{current_path}",
-                            "protocol": "REST",
-                            "description": method_spec.get("description", ""),
-                            "headers": {"Content-Type": "application/json"}
-                        })
-                
-                # Recursively parse nested resources
-                nested = {k: v for k, v in resource.items() if k.startswith("/") and isinstance(v, dict)}
-                if nested:
-                    parse_resources(nested, current_path)
-        
-        # Parse root-level resources
-        resources = {k: v for k, v in spec.items() if k.startswith("/") and isinstance(v, dict)}
-        parse_resources(resources)
-        
-        return requests
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse RAML spec: {str(e)}")
+        job, deduplicated = await import_jobs.submit(
+            current_user['id'], import_data.type, import_data.content, import_data.collection_name
+        )
+    except SpecParseError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**job, "deduplicated": deduplicated}
 
-def parse_graphql_schema(content: str):
-    """Parse GraphQL schema"""
-    try:
-        requests = []
-        
-        # Basic parsing - look for type Query and type Mutation
-        lines = content.strip().split('\n')
-        current_type = None
-        
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith('type Query'):
-                current_type = 'query'
-                continue
-            elif line.startswith('type Mutation'):
-                current_type = 'mutation'
-                continue
-            elif line.startswith('type Subscription'):
-                current_type = 'subscription'
-                continue
-            elif line.startswith('type ') or line.startswith('input ') or line.startswith('enum '):
-                current_type = None
-                continue
-            
-            if current_type and ':' in line and not line.startswith('#'):
-                # Extract field name
-                field_match = line.split(':')[0].strip()
-                if '(' in field_match:
-                    field_name = field_match.split('(')[0].strip()
-                else:
-                    field_name = field_match
-                
-                if field_name and field_name not in ['schema', 'directive']:
-                    requests.append({
-                        "name": f"{current_type.title()}: {field_name}",
-                        "method": "POST",
-                        "url": "/graphql",  # Default GraphQL endpoint
-                        "protocol": "GraphQL",
-                        "graphqlOperation": current_type,
-                        "body": f"{current_type} {{\n  {field_name}\n}}",
-                        "headers": {"Content-Type": "application/json"}
-                    })
-        
-        return requests
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse GraphQL schema: {str(e)}")
+@api_router.get("/import/jobs")
+async def list_import_jobs(current_user: dict = Depends(get_current_user), limit: int = 20):
+    return await import_jobs.list(current_user['id'], min(limit, 100))
 
-# Import Routes
-@api_router.post("/import")
-async def import_specification(import_data: ImportRequest, current_user: dict = Depends(get_current_user)):
-    try:
-        if import_data.type == "openapi":
-            requests = parse_openapi_spec(import_data.content)
-        elif import_data.type == "wsdl":
-            requests = parse_wsdl(import_data.content)
-        elif import_data.type == "raml":
-            requests = parse_raml_spec(import_data.content)
-        elif import_data.type == "graphql":
-            requests = parse_graphql_schema(import_data.content)
-        elif import_data.type == "postman":
-            # Parse Postman collection format
-            postman_data = json.loads(import_data.content)
-            requests = []
-            
-            def extract_requests(item, folder_name=""):
-                if 'request' in item:
-                    req = item['request']
-                    name = f"{folder_name} - {item['name']}" if folder_name else item['name']
-                    
-                    # Handle Postman URL format
-                    url = req['url'] if isinstance(req['url'], str) else req['url']['raw']
-                    
-                    requests.append({
-                        'name': name,
-                        'method': req['method'],
-                        'url': url,
-                        'headers': {h['key']: h['value'] for h in req.get('header', [])},
-                        'body': req.get('body', {}).get('raw', '') if req.get('body') else None
-                    })
-                
-                if 'item' in item:
-                    for subitem in item['item']:
-                        extract_requests(subitem, item.get('name', ''))
-            
-            if 'item' in postman_data:
-                for item in postman_data['item']:
-                    extract_requests(item)
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported import type")
-        
-        # Create collection if name provided
-        if import_data.collection_name:
-            collection = Collection(
-                name=import_data.collection_name,
-                description=f"Imported from {import_data.type.upper()}",
-                user_id=current_user['id']
-            )
-            collection_dict = prepare_for_mongo(collection.model_dump())
-            await db.collections.insert_one(collection_dict)
-            collection_id = collection.id
-        else:
-            # Use first collection or create default
-            collections = await db.collections.find({"user_id": current_user['id']}).to_list(1)
-            if collections:
-                collection_id = collections[0]['id']
-            else:
-                collection = Collection(
-                    name="Imported Requests",
-                    user_id=current_user['id']
-                )
-                collection_dict = prepare_for_mongo(collection.model_dump())
-                await db.collections.insert_one(collection_dict)
-                collection_id = collection.id
-        
-        # Create API requests
-        created_requests = []
-        for req_data in requests:
-            api_request = APIRequest(
-                name=req_data['name'],
-                method=req_data.get('method', 'GET'),
-                url=req_data['url'],
-                headers=req_data.get('headers', {}),
-                body=req_data.get('body'),
-                collection_id=collection_id,
-                user_id=current_user['id']
-            )
-            
-            request_dict = prepare_for_mongo(api_request.model_dump())
-            await db.requests.insert_one(request_dict)
-            created_requests.append(api_request)
-        
-        return {
-            "message": f"Successfully imported {len(created_requests)} requests",
-            "collection_id": collection_id,
-            "requests_count": len(created_requests)
-        }
-    
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Import failed: {str(e)}")
+@api_router.get("/import/jobs/{job_id}")
+async def get_import_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    job = await import_jobs.get(job_id, current_user['id'])
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
 
 # GraphQL Schema Introspection
 @api_router.post("/graphql/introspect")
@@ -1001,17 +748,17 @@ async def introspect_graphql_schema(url: str, current_user: dict = Depends(get_c
     """
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                url,
-                json={"query": introspection_query},
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise HTTPException(status_code=response.status_code, detail="Failed to introspect schema")
+        http_client = await http_pool.get_client(url)
+        response = await http_client.post(
+            url,
+            json={"query": introspection_query},
+            headers={"Content-Type": "application/json"}
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise HTTPException(status_code=response.status_code, detail="Failed to introspect schema")
     
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Introspection failed: {str(e)}")
@@ -1062,6 +809,9 @@ async def create_workflow(workflow_data: dict, current_user: dict = Depends(get_
         "name": workflow_data.get("name", "New Workflow"),
         "description": workflow_data.get("description", ""),
         "nodes": workflow_data.get("nodes", []),
+        "connections": workflow_data.get("connections", []),
+        "variables": workflow_data.get("variables", {}),
+        "max_concurrency": workflow_data.get("max_concurrency"),
         "is_active": True,
         "created_at": datetime.now(timezone.utc).isoformat(),
         "updated_at": datetime.now(timezone.utc).isoformat()
@@ -1082,32 +832,126 @@ async def get_workflows(current_user: dict = Depends(get_current_user)):
     ).to_list(1000)
     return workflows
 
+def prepare_workflow_request(config: Dict[str, Any], variables: Dict[str, str]) -> Dict[str, Any]:
+    """httpx.request() arguments for an api_call workflow step"""
+    headers = config.get("headers") or {}
+    if isinstance(headers, str):
+        # The workflow designer edits headers as a JSON text field
+        try:
+            headers = json.loads(headers) if headers.strip() else {}
+        except ValueError:
+            raise WorkflowError(f"Invalid headers JSON in step config: {headers[:100]}")
+    request_data = APIExecuteRequest(
+        protocol=config.get("protocol", "REST"),
+        method=config.get("method", "GET"),
+        url=config.get("url") or "",
+        headers={k: str(v) for k, v in headers.items()},
+        query_params=config.get("query_params") or {},
+        body=config.get("body") or None,
+        auth=AuthConfig(**config["auth"]) if config.get("auth") else None
+    )
+    return build_outgoing_request(request_data, variables)
+
+async def send_workflow_request(request: Dict[str, Any]):
+    client = await http_pool.get_client(request["url"])
+    return await client.request(**request)
+
+async def store_workflow_execution(document: Dict[str, Any]):
+    await db.workflow_executions.replace_one({"id": document["id"]}, document, upsert=True)
+
 @api_router.post("/workflows/{workflow_id}/execute")
-async def execute_workflow(workflow_id: str, current_user: dict = Depends(get_current_user)):
-    """Execute a workflow (mock implementation)"""
-    workflow = await db.workflows.find_one({"id": workflow_id, "user_id": current_user['id']})
+async def execute_workflow(
+    workflow_id: str,
+    wait: bool = False,
+    max_concurrency: Optional[int] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Run a workflow as a DAG of API calls.
+    
+    Returns immediately with the execution id; follow progress with
+    GET /workflows/executions/{id}/stream, or pass wait=true to get the
+    finished execution back.
+    """
+    workflow = await db.workflows.find_one({"id": workflow_id, "user_id": current_user['id']}, {"_id": 0})
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
-    execution = {
-        "id": str(uuid.uuid4()),
-        "workflow_id": workflow_id,
-        "status": "completed",  # Mock successful execution
-        "started_at": datetime.now(timezone.utc).isoformat(),
-        "completed_at": datetime.now(timezone.utc).isoformat(),
-        "logs": [
-            {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "message": "Workflow execution completed successfully (demo)",
-                "level": "info"
-            }
-        ]
-    }
+    variables = await get_active_variables(current_user['id'])
+    variables.update(workflow.get("variables") or {})
+    concurrency = max_concurrency or workflow.get("max_concurrency") or WORKFLOW_MAX_CONCURRENCY
+    try:
+        execution = WorkflowExecution(
+            workflow,
+            send=send_workflow_request,
+            prepare_request=prepare_workflow_request,
+            variables=variables,
+            max_concurrency=min(concurrency, 100),
+            store=store_workflow_execution,
+            user_id=current_user['id']
+        )
+    except WorkflowError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    await db.workflow_executions.insert_one(execution)
+    task = workflow_runner.start(execution)
     await log_audit_event(current_user['id'], "workflow_executed", "workflow", workflow_id)
     
-    return {"execution_id": execution["id"], "status": "completed"}
+    if wait:
+        document = await asyncio.shield(task)
+        document.pop("_id", None)
+        return document
+    return {"execution_id": execution.id, "status": execution.status}
+
+@api_router.get("/workflows/{workflow_id}/executions")
+async def get_workflow_executions(workflow_id: str, limit: int = 20, current_user: dict = Depends(get_current_user)):
+    """Recent executions of a workflow, without their logs"""
+    return await db.workflow_executions.find(
+        {"workflow_id": workflow_id, "user_id": current_user['id']}, {"_id": 0, "logs": 0}
+    ).sort("started_at", -1).limit(min(limit, 100)).to_list(min(limit, 100))
+
+@api_router.get("/workflows/executions/{execution_id}")
+async def get_workflow_execution(execution_id: str, current_user: dict = Depends(get_current_user)):
+    execution = workflow_runner.get(execution_id)
+    if execution and execution.user_id == current_user['id']:
+        return execution.to_document()
+    document = await db.workflow_executions.find_one({"id": execution_id, "user_id": current_user['id']}, {"_id": 0})
+    if not document:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    return document
+
+@api_router.get("/workflows/executions/{execution_id}/stream")
+async def stream_workflow_execution(execution_id: str, current_user: dict = Depends(get_current_user)):
+    """Execution log as Server-Sent Events: "log" per entry, then "done" with the final status"""
+    execution = workflow_runner.get(execution_id)
+    if execution is None or execution.user_id != current_user['id']:
+        document = await db.workflow_executions.find_one({"id": execution_id, "user_id": current_user['id']}, {"_id": 0})
+        if not document:
+            raise HTTPException(status_code=404, detail="Execution not found")
+        execution = None
+    
+    async def event_stream():
+        if execution is not None:
+            async for entry in execution.events():
+                yield f"event: log\ndata: {json.dumps(entry)}\n\n"
+            final = execution.to_document()
+        else:
+            for entry in document.get("logs", []):
+                yield f"event: log\ndata: {json.dumps(entry)}\n\n"
+            final = document
+        summary = {"status": final["status"], "analysis": final.get("analysis")}
+        yield f"event: done\ndata: {json.dumps(summary)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.post("/workflows/executions/{execution_id}/cancel")
+async def cancel_workflow_execution(execution_id: str, current_user: dict = Depends(get_current_user)):
+    execution = workflow_runner.get(execution_id)
+    if execution is None or execution.user_id != current_user['id'] or not workflow_runner.cancel(execution_id):
+        raise HTTPException(status_code=404, detail="No running execution with that id")
+    return {"execution_id": execution_id, "status": "cancelling"}
 
 # VARIABLE ROUTES
 @api_router.get("/variables")
@@ -1350,7 +1194,7 @@ async def delete_account(current_user: dict = Depends(get_current_user)):
     await db.workflows.delete_many({"user_id": user_id})
     await db.monitoring_rules.delete_many({"user_id": user_id})
     await db.azure_services.delete_many({"user_id": user_id})
-    await db.request_history.delete_many({"user_id": user_id})
+    await history_store.delete_user(user_id)
     
     return {"message": "Account and all associated data deleted successfully"}
 
@@ -1373,19 +1217,10 @@ async def get_dashboard_metrics(current_user: dict = Depends(get_current_user)):
     total_collections = await db.collections.count_documents({"user_id": current_user['id']})
     total_workflows = await db.workflows.count_documents({"user_id": current_user['id']})
     
-    # Get performance metrics from request history
-    recent_history = await db.request_history.find(
-        {"user_id": current_user['id']}
-    ).sort("created_at", -1).limit(100).to_list(100)
-    
-    if recent_history:
-        response_times = [h.get('response', {}).get('response_time', 0) for h in recent_history if h.get('response', {}).get('response_time')]
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
-        success_count = sum(1 for h in recent_history if h.get('response', {}).get('status_code', 0) < 400)
-        success_rate = (success_count / len(recent_history)) * 100 if recent_history else 0
-    else:
-        avg_response_time = 0
-        success_rate = 0
+    # Get performance metrics from the rolling history aggregates
+    aggregates = await history_store.get_aggregates(current_user['id'])
+    avg_response_time = aggregates["avg_response_time"]
+    success_rate = aggregates["success_rate"]
     
     # Get monitoring info
     active_monitors = await db.monitoring_rules.count_documents({
@@ -1436,8 +1271,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def start_services():
+    http_pool.start()
+    await history_store.ensure_indexes()
+    await import_jobs.ensure_indexes()
+    await db.workflow_executions.create_index([("workflow_id", 1), ("user_id", 1), ("started_at", -1)])
+    await db.workflow_executions.create_index("id", unique=True)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await http_pool.aclose()
+    await import_jobs.aclose()
+    await workflow_runner.aclose()
     client.close()
 
 @api_router.get("/")
@@ -0,0 +1,630 @@
+"""Specification import: parsers and background import jobs.
+
+Parsers turn an OpenAPI, RAML, WSDL, GraphQL SDL or Postman document into
+plain request dicts. They are pure functions so they can run in a worker
+process. ImportJobs runs each import as a background job:
+
+    queued -> parsing -> inserting -> completed | failed
+
+Large documents are parsed in a process pool (small ones in a thread),
+generated requests are written with batched insert_many, and progress is
+stored in the `import_jobs` collection for clients to poll. Jobs are keyed
+by a hash of the import type and content, so re-importing the same
+document while its earlier import is running or complete is a no-op.
+
+Several server processes share the collection. Each job records the
+process running it (`owner`) and a `heartbeat_at` that process refreshes
+while the job runs; a job whose heartbeat is older than the stale timeout
+is marked failed, at startup or when it is next read.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import uuid
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+try:
+    YamlLoader = yaml.CSafeLoader
+except AttributeError:  # PyYAML built without libyaml
+    YamlLoader = yaml.SafeLoader
+
+HTTP_METHODS = ("get", "post", "put", "delete", "patch")
+
+# Documents at least this large are parsed in the process pool
+PROCESS_PARSE_THRESHOLD = 256 * 1024
+
+ACTIVE_STATUSES = ("queued", "parsing", "inserting")
+
+# Seconds between heartbeats of running jobs, and without one before a job
+# counts as abandoned by a dead process
+HEARTBEAT_INTERVAL = 10.0
+STALE_AFTER = 60.0
+# Seconds between polls when waiting on another process's job
+WAIT_POLL_INTERVAL = 0.5
+
+
+class SpecParseError(ValueError):
+    pass
+
+
+def load_yaml(content: str) -> Any:
+    return yaml.load(content, Loader=YamlLoader)
+
+
+_WHITESPACE = " \t\r\n"
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+class JSONObjectReader:
+    """Reads a JSON object in a string one member at a time.
+
+    Iterating yields member keys. For the current member, call value() to
+    decode it or object() to read it as a nested JSONObjectReader; members
+    that are neither are decoded and dropped. Only one member value is ever
+    materialised at a time, so a large document never exists as a whole in
+    memory as Python objects.
+    """
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, text: str, pos: int = 0):
+        self.text = text
+        self.start = _skip_whitespace(text, pos)
+        if self.start >= len(text) or text[self.start] != "{":
+            raise SpecParseError(f"Expected a JSON object at offset {self.start}")
+        self.end: Optional[int] = None
+        self._value_start = 0
+        self._value_end: Optional[int] = None
+        self._child: Optional["JSONObjectReader"] = None
+
+    def __iter__(self) -> Iterator[str]:
+        text, decode = self.text, self._decoder.raw_decode
+        pos = _skip_whitespace(text, self.start + 1)
+        if pos < len(text) and text[pos] == "}":
+            self.end = pos + 1
+            return
+        while True:
+            key, pos = decode(text, pos)
+            pos = _skip_whitespace(text, pos)
+            if pos >= len(text) or text[pos] != ":":
+                raise SpecParseError(f"Expected ':' at offset {pos}")
+            self._value_start = _skip_whitespace(text, pos + 1)
+            self._value_end = None
+            self._child = None
+            yield key
+
+            if self._value_end is None:
+                if self._child is not None and self._child.end is None:
+                    for _ in self._child:
+                        pass
+                self._value_end = self._child.end if self._child is not None else decode(text, self._value_start)[1]
+            pos = _skip_whitespace(text, self._value_end)
+            if pos < len(text) and text[pos] == ",":
+                pos = _skip_whitespace(text, pos + 1)
+            elif pos < len(text) and text[pos] == "}":
+                self.end = pos + 1
+                return
+            else:
+                raise SpecParseError(f"Expected ',' or '}}' at offset {pos}")
+
+    def value(self) -> Any:
+        value, self._value_end = self._decoder.raw_decode(self.text, self._value_start)
+        return value
+
+    def object(self) -> "JSONObjectReader":
+        self._child = JSONObjectReader(self.text, self._value_start)
+        return self._child
+
+
+def _openapi_base_url(spec: Dict[str, Any]) -> str:
+    if "servers" in spec and spec["servers"]:
+        return spec["servers"][0]["url"]
+    if "host" in spec:
+        protocol = "https" if spec.get("schemes", ["https"])[0] == "https" else "http"
+        return f"{protocol}://{spec['host']}{spec.get('basePath', '')}"
+    return ""
+
+
+def _openapi_operations(path: str, methods: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    for method, details in methods.items():
+        if method.lower() in HTTP_METHODS and isinstance(details, dict):
+            yield {
+                "name": details.get("summary", f"{method.upper()} {path}"),
+                "method": method.upper(),
+                "url": path,
+                "protocol": "REST",
+                "description": details.get("description", ""),
+                "headers": {"Content-Type": "application/json"},
+            }
+
+
+def _scan_openapi_json(content: str, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Collect operations from a JSON document one path item at a time.
+
+    Returns the top-level fields needed to work out the base URL.
+    """
+    header = {}
+    document = JSONObjectReader(content)
+    for key in document:
+        if key == "paths":
+            paths = document.object()
+            for path in paths:
+                requests.extend(_openapi_operations(path, paths.value()))
+        elif key in ("servers", "host", "schemes", "basePath"):
+            header[key] = document.value()
+    return header
+
+
+def parse_openapi_spec(content: str) -> List[Dict[str, Any]]:
+    """Parse OpenAPI/Swagger specification"""
+    try:
+        requests = []
+        header = None
+        if content.lstrip().startswith("{"):
+            try:
+                header = _scan_openapi_json(content, requests)
+            except ValueError:
+                requests = []  # not strict JSON; YAML flow style is parsed below
+        if header is None:
+            header = load_yaml(content)
+            for path, methods in (header.get("paths") or {}).items():
+                requests.extend(_openapi_operations(path, methods or {}))
+
+        base_url = _openapi_base_url(header)
+        for request in requests:
+            request["url"] = f"{base_url}{request['url']}"
+        return requests
+    except Exception as e:
+        raise SpecParseError(f"Failed to parse OpenAPI spec: {str(e)}")
+
+
+def parse_wsdl(content: str) -> List[Dict[str, Any]]:
+    """Parse WSDL specification for SOAP services"""
+    try:
+        root = ET.fromstring(content)
+        requests = []
+
+        # Extract namespace map
+        ns_map = {}
+        for prefix, uri in root.attrib.items():
+            if prefix.startswith('xmlns:'):
+                ns_map[prefix[6:]] = uri
+
+        # Common WSDL namespaces
+        common_ns = {
+            'wsdl': 'http://schemas.xmlsoap.org/wsdl/',
+            'soap': 'http://schemas.xmlsoap.org/wsdl/soap/',
+            'tns': root.get('targetNamespace', '')
+        }
+        ns_map.update(common_ns)
+
+        # Find service endpoint
+        service_url = ""
+        for service in root.findall('.//wsdl:service', ns_map):
+            for port in service.findall('.//wsdl:port', ns_map):
+                address = port.find('.//soap:address', ns_map)
+                if address is not None:
+                    service_url = address.get('location', '')
+                    break
+
+        # Extract operations
+        for operation in root.findall('.//wsdl:operation', ns_map):
+            op_name = operation.get('name')
+            if op_name:
+                # Find SOAP action
+                soap_op = operation.find('.//soap:operation', ns_map)
+                soap_action = soap_op.get('soapAction', '') if soap_op is not None else ''
+
+                requests.append({
+                    "name": op_name,
+                    "method": "POST",
+                    "url": service_url,
+                    "protocol": "SOAP",
+                    "soapAction": soap_action,
+                    "soapVersion": "1.1",
+                    "headers": {
+                        "Content-Type": "text/xml; charset=utf-8",
+                        "SOAPAction": f'"{soap_action}"'
+                    }
+                })
+
+        return requests
+    except Exception as e:
+        raise SpecParseError(f"Failed to parse WSDL: {str(e)}")
+
+
+def parse_raml_spec(content: str) -> List[Dict[str, Any]]:
+    """Parse RAML API specification"""
+    try:
+        spec = load_yaml(content)
+        requests = []
+
+        base_url = spec.get("baseUri", "")
+        version = spec.get("version", "")
+        if "{version}" in base_url:
+            base_url = base_url.replace("{version}", str(version))
+
+        def parse_resources(resources, parent_path=""):
+            for path, resource in resources.items():
+                current_path = parent_path + path
+
+                # Parse HTTP methods
+                for method in HTTP_METHODS:
+                    if method in resource:
+                        method_spec = resource[method] or {}
+                        requests.append({
+                            "name": method_spec.get("displayName", f"{method.upper()} {current_path}"),
+                            "method": method.upper(),
+                            "url": f"{base_url}{current_path}",
+                            "protocol": "REST",
+                            "description": method_spec.get("description", ""),
+                            "headers": {"Content-Type": "application/json"}
+                        })
+
+                # Recursively parse nested resources
+                nested = {k: v for k, v in resource.items() if k.startswith("/") and isinstance(v, dict)}
+                if nested:
+                    parse_resources(nested, current_path)
+
+        # Parse root-level resources
+        resources = {k: v for k, v in spec.items() if k.startswith("/") and isinstance(v, dict)}
+        parse_resources(resources)
+
+        return requests
+    except Exception as e:
+        raise SpecParseError(f"Failed to parse RAML spec: {str(e)}")
+
+
+def parse_graphql_schema(content: str) -> List[Dict[str, Any]]:
+    """Parse GraphQL schema"""
+    try:
+        requests = []
+
+        # Basic parsing - look for type Query and type Mutation
+        current_type = None
+
+        for line in content.strip().split('\n'):
+            line = line.strip()
+
+            if line.startswith('type Query'):
+                current_type = 'query'
+                continue
+            elif line.startswith('type Mutation'):
+                current_type = 'mutation'
+                continue
+            elif line.startswith('type Subscription'):
+                current_type = 'subscription'
+                continue
+            elif line.startswith('type ') or line.startswith('input ') or line.startswith('enum '):
+                current_type = None
+                continue
+
+            if current_type and ':' in line and not line.startswith('#'):
+                # Extract field name
+                field_match = line.split(':')[0].strip()
+                if '(' in field_match:
+                    field_name = field_match.split('(')[0].strip()
+                else:
+                    field_name = field_match
+
+                if field_name and field_name not in ['schema', 'directive']:
+                    requests.append({
+                        "name": f"{current_type.title()}: {field_name}",
+                        "method": "POST",
+                        "url": "/graphql",  # Default GraphQL endpoint
+                        "protocol": "GraphQL",
+                        "graphqlOperation": current_type,
+                        "body": f"{current_type} {{\n  {field_name}\n}}",
+                        "headers": {"Content-Type": "application/json"}
+                    })
+
+        return requests
+    except Exception as e:
+        raise SpecParseError(f"Failed to parse GraphQL schema: {str(e)}")
+
+
+def parse_postman_collection(content: str) -> List[Dict[str, Any]]:
+    """Parse a Postman collection"""
+    try:
+        postman_data = json.loads(content)
+        requests = []
+
+        def extract_requests(item, folder_name=""):
+            if 'request' in item:
+                req = item['request']
+                name = f"{folder_name} - {item['name']}" if folder_name else item['name']
+
+                # Handle Postman URL format
+                url = req['url'] if isinstance(req['url'], str) else req['url']['raw']
+
+                requests.append({
+                    'name': name,
+                    'method': req['method'],
+                    'url': url,
+                    'headers': {h['key']: h['value'] for h in req.get('header', [])},
+                    'body': req.get('body', {}).get('raw', '') if req.get('body') else None
+                })
+
+            if 'item' in item:
+                for subitem in item['item']:
+                    extract_requests(subitem, item.get('name', ''))
+
+        for item in postman_data.get('item', []):
+            extract_requests(item)
+        return requests
+    except Exception as e:
+        raise SpecParseError(f"Failed to parse Postman collection: {str(e)}")
+
+
+PARSERS: Dict[str, Callable[[str], List[Dict[str, Any]]]] = {
+    "openapi": parse_openapi_spec,
+    "wsdl": parse_wsdl,
+    "raml": parse_raml_spec,
+    "graphql": parse_graphql_schema,
+    "postman": parse_postman_collection,
+}
+
+
+def parse_spec(import_type: str, content: str) -> List[Dict[str, Any]]:
+    """Parse a document of any supported type. Runs in worker processes."""
+    parser = PARSERS.get(import_type)
+    if parser is None:
+        raise SpecParseError("Unsupported import type")
+    return parser(content)
+
+
+def content_hash(import_type: str, content: str) -> str:
+    digest = hashlib.sha256(import_type.encode("utf-8") + b"\0")
+    digest.update(content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ImportJobs:
+    """Runs spec imports in the background and records their progress.
+
+    `resolve_collection(user_id, import_type, collection_name)` returns the
+    collection id to import into, and `build_request(operation,
+    collection_id, user_id)` turns a parsed operation into a request
+    document; both are supplied by the server so the models stay there.
+    """
+
+    def __init__(
+        self,
+        db,
+        resolve_collection: Callable[..., Any],
+        build_request: Callable[[Dict[str, Any], str, str], Dict[str, Any]],
+        batch_size: int = 500,
+        max_workers: Optional[int] = None,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL,
+        stale_after: float = STALE_AFTER,
+    ):
+        self.db = db
+        self.resolve_collection = resolve_collection
+        self.build_request = build_request
+        self.batch_size = batch_size
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        # Identifies this process on the jobs it runs
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # (user id, content hash) -> job id for imports running in this process
+        self._inflight: Dict[Tuple[str, str], str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, db, resolve_collection, build_request) -> "ImportJobs":
+        workers = os.environ.get("IMPORT_WORKERS")
+        return cls(
+            db,
+            resolve_collection,
+            build_request,
+            batch_size=int(os.environ.get("IMPORT_BATCH_SIZE", 500)),
+            max_workers=int(workers) if workers else None,
+            stale_after=float(os.environ.get("IMPORT_STALE_AFTER", STALE_AFTER)),
+        )
+
+    async def ensure_indexes(self):
+        await self.db.import_jobs.create_index("id", unique=True)
+        await self.db.import_jobs.create_index([("user_id", 1), ("content_hash", 1), ("created_at", -1)])
+        await self.db.import_jobs.create_index([("status", 1), ("heartbeat_at", 1)])
+        await self.fail_stale()
+
+    def _stale_query(self) -> Dict[str, Any]:
+        """Active jobs whose owner has not sent a heartbeat within stale_after."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)).isoformat()
+        return {
+            "status": {"$in": list(ACTIVE_STATUSES)},
+            "$or": [
+                {"heartbeat_at": {"$lt": cutoff}},
+                # Jobs from before heartbeats were recorded
+                {"heartbeat_at": {"$exists": False}, "updated_at": {"$lt": cutoff}},
+            ],
+        }
+
+    def _stale_failure(self) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc).isoformat()
+        return {"$set": {"status": "failed", "error": "Interrupted: the server running the import stopped",
+                         "updated_at": now, "finished_at": now}}
+
+    async def fail_stale(self) -> int:
+        """Mark failed every job abandoned by a dead process; jobs other live processes run are left alone."""
+        result = await self.db.import_jobs.update_many(self._stale_query(), self._stale_failure())
+        return result.modified_count
+
+    async def _expire_if_stale(self, job: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if job is None or job["status"] not in ACTIVE_STATUSES or job["id"] in self._tasks:
+            return job
+        result = await self.db.import_jobs.update_one({"id": job["id"], **self._stale_query()}, self._stale_failure())
+        if result.modified_count:
+            return await self.db.import_jobs.find_one({"id": job["id"]}, {"_id": 0})
+        return job
+
+    async def _beat(self):
+        """Refresh heartbeat_at on this process's running jobs until none are left."""
+        while self._tasks:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.db.import_jobs.update_many(
+                    {"id": {"$in": list(self._tasks)}, "owner": self.owner_id},
+                    {"$set": {"heartbeat_at": datetime.now(timezone.utc).isoformat()}},
+                )
+            except Exception as e:
+                logger.warning(f"Import job heartbeat failed: {e}")
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the server process has motor's threads running
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def parse(self, import_type: str, content: str) -> List[Dict[str, Any]]:
+        """Parse off the event loop: a worker process for large documents, a thread otherwise."""
+        if len(content) >= PROCESS_PARSE_THRESHOLD:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool(), parse_spec, import_type, content)
+        return await asyncio.to_thread(parse_spec, import_type, content)
+
+    async def submit(self, user_id: str, import_type: str, content: str,
+                     collection_name: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """Start an import job, or return the existing one for identical content.
+
+        Returns the job document and whether it was deduplicated.
+        """
+        if import_type not in PARSERS:
+            raise SpecParseError("Unsupported import type")
+        digest = content_hash(import_type, content)
+
+        job_id = self._inflight.get((user_id, digest))
+        if job_id:
+            return await self.get(job_id, user_id), True
+        previous = await self._expire_if_stale(await self.db.import_jobs.find_one(
+            {"user_id": user_id, "content_hash": digest, "status": {"$in": ["completed", *ACTIVE_STATUSES]}},
+            {"_id": 0},
+            sort=[("created_at", -1)],
+        ))
+        if previous and previous["status"] != "failed" and (previous["status"] != "completed" or await self._collection_exists(previous)):
+            return previous, True
+
+        now = datetime.now(timezone.utc).isoformat()
+        job = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "type": import_type,
+            "content_hash": digest,
+            "content_bytes": len(content),
+            "collection_name": collection_name,
+            "collection_id": None,
+            "status": "queued",
+            "total": None,
+            "inserted": 0,
+            "error": None,
+            "owner": self.owner_id,
+            "heartbeat_at": now,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+        }
+        await self.db.import_jobs.insert_one(dict(job))
+        self._inflight[(user_id, digest)] = job["id"]
+        loop = asyncio.get_running_loop()
+        self._tasks[job["id"]] = loop.create_task(self._run(job, content))
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = loop.create_task(self._beat())
+        return job, False
+
+    async def _collection_exists(self, job: Dict[str, Any]) -> bool:
+        if not job.get("collection_id"):
+            return False
+        return await self.db.collections.count_documents({"id": job["collection_id"]}, limit=1) > 0
+
+    async def _update(self, job: Dict[str, Any], **fields):
+        fields["updated_at"] = fields["heartbeat_at"] = datetime.now(timezone.utc).isoformat()
+        job.update(fields)
+        await self.db.import_jobs.update_one({"id": job["id"]}, {"$set": fields})
+
+    async def _run(self, job: Dict[str, Any], content: str):
+        try:
+            await self._update(job, status="parsing")
+            operations = await self.parse(job["type"], content)
+            del content
+
+            collection_id = await self.resolve_collection(job["user_id"], job["type"], job["collection_name"])
+            await self._update(job, status="inserting", total=len(operations), collection_id=collection_id)
+
+            inserted = 0
+            for start in range(0, len(operations), self.batch_size):
+                batch = [
+                    self.build_request(operation, collection_id, job["user_id"])
+                    for operation in operations[start:start + self.batch_size]
+                ]
+                await self.db.requests.insert_many(batch, ordered=False)
+                inserted += len(batch)
+                await self._update(job, inserted=inserted)
+
+            await self._update(job, status="completed", finished_at=datetime.now(timezone.utc).isoformat())
+        except Exception as e:
+            logger.warning(f"Import job {job['id']} failed: {e}")
+            await self._update(job, status="failed", error=str(e), finished_at=datetime.now(timezone.utc).isoformat())
+        finally:
+            self._inflight.pop((job["user_id"], job["content_hash"]), None)
+            self._tasks.pop(job["id"], None)
+
+    async def wait(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Wait for a job to finish and return its final state.
+
+        Jobs run by this process are awaited; jobs another process runs are
+        polled until they finish or their heartbeat goes stale.
+        """
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+        job = await self.get(job_id, user_id)
+        while job is not None and job["status"] in ACTIVE_STATUSES:
+            await asyncio.sleep(WAIT_POLL_INTERVAL)
+            job = await self.get(job_id, user_id)
+        return job
+
+    async def get(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """A job's current state; an abandoned job is marked failed first."""
+        return await self._expire_if_stale(
+            await self.db.import_jobs.find_one({"id": job_id, "user_id": user_id}, {"_id": 0})
+        )
+
+    async def list(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        return await self.db.import_jobs.find(
+            {"user_id": user_id}, {"_id": 0}
+        ).sort("created_at", -1).limit(limit).to_list(limit)
+
+    async def aclose(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
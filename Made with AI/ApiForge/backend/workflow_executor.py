@@ -0,0 +1,500 @@
+"""DAG workflow executor.
+
+A workflow is the WorkflowDesigner document: `nodes` (id, type, config,
+connections) and `connections` ({from, fromOutput, to}). Nodes run as soon
+as all of their parents have finished, so independent branches run in
+parallel, up to `max_concurrency` steps at a time.
+
+Node types:
+    start, end      no-op
+    api_call        HTTP request; `timeout`, `retries`, `retry_backoff` and
+                    `extract` ({variable: JSONPath}) in its config
+    delay           sleep for `seconds`
+    transform       JSONPath over the upstream response into `variable`
+    condition       response_code / json_path / header test; output 0 is
+                    taken when it holds, output 1 otherwise
+    notification    writes `message` to the execution log
+
+A node whose parents all ended on branches that were not taken is skipped;
+a node with a failed parent is skipped as blocked unless that parent has
+`continue_on_error`. Variables are shared by the whole execution and
+`{{name}}` references are substituted in request fields; when parallel
+branches extract the same variable the last one to finish wins.
+"""
+
+import asyncio
+import json
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+SUPPORTED_TYPES = {"start", "end", "api_call", "delay", "transform", "condition", "notification"}
+
+DEFAULT_TIMEOUT = 30.0
+MAX_RETRIES = 10
+# Status codes an api_call step retries on, besides transport errors and timeouts
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class WorkflowError(ValueError):
+    pass
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def jsonpath_values(expression: str, data: Any) -> List[Any]:
+    """All values matching a JSONPath expression."""
+    import jsonpath_ng
+    return [match.value for match in jsonpath_ng.parse(expression).find(data)]
+
+
+def jsonpath_first(expression: str, data: Any) -> Any:
+    values = jsonpath_values(expression, data)
+    return values[0] if values else None
+
+
+def parse_body(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except (ValueError, TypeError):
+        return text
+
+
+def build_graph(workflow: Dict[str, Any]) -> Tuple[Dict[str, Dict], Dict[str, List[Tuple[str, int]]], Dict[str, List[str]]]:
+    """Nodes by id, children as (child id, source output index) and parents per node.
+
+    Raises WorkflowError for unknown node ids or cycles.
+    """
+    nodes = {}
+    for node in workflow.get("nodes") or []:
+        if not node.get("id"):
+            raise WorkflowError("Every workflow node needs an id")
+        nodes[node["id"]] = node
+
+    edges: Set[Tuple[str, str, int]] = set()
+    for node in nodes.values():
+        for target in node.get("connections") or []:
+            target = target.get("to") if isinstance(target, dict) else target
+            edges.add((node["id"], target, 0))
+    for connection in workflow.get("connections") or []:
+        source, target = connection.get("from"), connection.get("to")
+        output = connection.get("fromOutput") or 0
+        # The designer also lists connections on the node itself; keep the indexed one
+        edges.discard((source, target, 0))
+        edges.add((source, target, output))
+
+    children: Dict[str, List[Tuple[str, int]]] = {node_id: [] for node_id in nodes}
+    parents: Dict[str, List[str]] = {node_id: [] for node_id in nodes}
+    for source, target, output in sorted(edges, key=lambda edge: (edge[0], edge[1], edge[2])):
+        if source not in nodes or target not in nodes:
+            raise WorkflowError(f"Connection {source} -> {target} refers to an unknown node")
+        children[source].append((target, output))
+        if source not in parents[target]:
+            parents[target].append(source)
+
+    # Kahn's algorithm; anything left over is on a cycle
+    indegree = {node_id: len(parents[node_id]) for node_id in nodes}
+    ready = [node_id for node_id, degree in indegree.items() if degree == 0]
+    seen = 0
+    while ready:
+        node_id = ready.pop()
+        seen += 1
+        for child, _ in children[node_id]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+    if seen != len(nodes):
+        cyclic = sorted(node_id for node_id, degree in indegree.items() if degree > 0)
+        raise WorkflowError(f"Workflow has a cycle through: {', '.join(cyclic)}")
+    return nodes, children, parents
+
+
+def critical_path(steps: Dict[str, Dict[str, Any]], parents: Dict[str, List[str]]) -> Dict[str, Any]:
+    """The chain of steps that determined the total run time.
+
+    Starting from the step that finished last, repeatedly follow the parent
+    that finished last (the one the step was waiting for).
+    """
+    ran = {node_id: step for node_id, step in steps.items() if step.get("end_offset_ms") is not None}
+    if not ran:
+        return {"critical_path": [], "critical_path_ms": 0.0, "wall_time_ms": 0.0,
+                "total_step_ms": 0.0, "parallelism": 0.0}
+
+    node_id = max(ran, key=lambda n: ran[n]["end_offset_ms"])
+    wall_time = ran[node_id]["end_offset_ms"]
+    path = []
+    while node_id is not None:
+        path.append(node_id)
+        waited_on = [p for p in parents.get(node_id, []) if p in ran]
+        node_id = max(waited_on, key=lambda n: ran[n]["end_offset_ms"]) if waited_on else None
+    path.reverse()
+
+    total = sum(step["duration_ms"] for step in ran.values())
+    return {
+        "critical_path": path,
+        "critical_path_ms": round(sum(ran[n]["duration_ms"] for n in path), 3),
+        "wall_time_ms": round(wall_time, 3),
+        "total_step_ms": round(total, 3),
+        "parallelism": round(total / wall_time, 3) if wall_time else 0.0,
+    }
+
+
+class StepFailed(Exception):
+    pass
+
+
+class WorkflowExecution:
+    """One run of a workflow.
+
+    `prepare_request(config, variables)` turns an api_call config into
+    client.request() keyword arguments; `send(kwargs)` performs it and
+    returns a response with status_code, headers and text. `store(document)`
+    persists the execution after every step.
+    """
+
+    def __init__(
+        self,
+        workflow: Dict[str, Any],
+        send: Callable[[Dict[str, Any]], Awaitable[Any]],
+        prepare_request: Callable[[Dict[str, Any], Dict[str, str]], Dict[str, Any]],
+        variables: Optional[Dict[str, Any]] = None,
+        max_concurrency: int = 8,
+        store: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        user_id: Optional[str] = None,
+    ):
+        self.nodes, self.children, self.parents = build_graph(workflow)
+        self.workflow_id = workflow.get("id")
+        self.user_id = user_id
+        self.send = send
+        self.prepare_request = prepare_request
+        self.variables: Dict[str, Any] = dict(variables or {})
+        self.max_concurrency = max(1, max_concurrency)
+        self.store = store
+
+        self.id = str(uuid.uuid4())
+        self.status = "pending"
+        self.started_at: Optional[str] = None
+        self.completed_at: Optional[str] = None
+        self.logs: List[Dict[str, Any]] = []
+        self.steps: Dict[str, Dict[str, Any]] = {
+            node_id: {"node_id": node_id, "type": node.get("type"), "name": node.get("name") or node_id,
+                      "status": "pending", "attempts": 0}
+            for node_id, node in self.nodes.items()
+        }
+        self.outputs: Dict[str, Any] = {}
+        self._extracted: Set[str] = set()
+        # node id -> output index taken (conditions) or None for every output
+        self._branch: Dict[str, Optional[int]] = {}
+        self._subscribers: List[asyncio.Queue] = []
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._clock = 0.0
+
+    # Logging and streaming
+
+    def log(self, message: str, level: str = "info", node_id: Optional[str] = None, **extra):
+        entry = {"timestamp": now_iso(), "level": level, "message": message, "node_id": node_id, **extra}
+        self.logs.append(entry)
+        for queue in self._subscribers:
+            queue.put_nowait(entry)
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """Log entries so far, then new ones as they happen, until the run ends."""
+        queue: asyncio.Queue = asyncio.Queue()
+        backlog = list(self.logs)
+        self._subscribers.append(queue)
+        try:
+            for entry in backlog:
+                yield entry
+            while self.status in ("pending", "running") or not queue.empty():
+                entry = await queue.get()
+                if entry is None:
+                    break
+                yield entry
+        finally:
+            self._subscribers.remove(queue)
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "workflow_id": self.workflow_id,
+            "user_id": self.user_id,
+            "status": self.status,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "max_concurrency": self.max_concurrency,
+            "steps": list(self.steps.values()),
+            "analysis": critical_path(self.steps, self.parents),
+            "variables": {k: v for k, v in self.variables.items() if k in self._extracted},
+            "logs": self.logs,
+        }
+
+    async def _persist(self):
+        if self.store is not None:
+            await self.store(self.to_document())
+
+    # Scheduling
+
+    async def run(self) -> Dict[str, Any]:
+        self.status = "running"
+        self.started_at = now_iso()
+        self._clock = time.perf_counter()
+        self.log(f"Execution started: {len(self.nodes)} steps, concurrency {self.max_concurrency}")
+        await self._persist()
+
+        waiting = {node_id: len(parents) for node_id, parents in self.parents.items()}
+        running: Dict[asyncio.Task, str] = {}
+
+        def launch(node_id: str):
+            running[asyncio.create_task(self._run_step(node_id))] = node_id
+
+        for node_id, count in waiting.items():
+            if count == 0:
+                launch(node_id)
+
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node_id = running.pop(task)
+                    task.result()
+                    for child, _ in self.children[node_id]:
+                        waiting[child] -= 1
+                        if waiting[child] == 0:
+                            if self._should_run(child):
+                                launch(child)
+                            else:
+                                self._skip(child, waiting, launch)
+                    await self._persist()
+        except asyncio.CancelledError:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            self.status = "cancelled"
+            self.log("Execution cancelled", level="warning")
+            raise
+        finally:
+            if self.status == "running":
+                failed = [s["node_id"] for s in self.steps.values() if s["status"] == "failed"]
+                self.status = "failed" if failed else "completed"
+            self.completed_at = now_iso()
+            analysis = critical_path(self.steps, self.parents)
+            self.log(
+                f"Execution {self.status} in {analysis['wall_time_ms']:.0f} ms; critical path "
+                f"{' -> '.join(analysis['critical_path'])} ({analysis['critical_path_ms']:.0f} ms)",
+                level="error" if self.status == "failed" else "info",
+            )
+            for queue in self._subscribers:
+                queue.put_nowait(None)
+            await asyncio.shield(self._persist())
+        return self.to_document()
+
+    def _edge_taken(self, parent: str, child: str) -> bool:
+        step = self.steps[parent]
+        if step["status"] == "failed":
+            return bool(self.nodes[parent].get("config", {}).get("continue_on_error"))
+        if step["status"] != "succeeded":
+            return False
+        branch = self._branch.get(parent)
+        return branch is None or any(c == child and out == branch for c, out in self.children[parent])
+
+    def _should_run(self, node_id: str) -> bool:
+        parents = self.parents[node_id]
+        blocked = [p for p in parents if self.steps[p]["status"] == "failed"
+                   and not self.nodes[p].get("config", {}).get("continue_on_error")]
+        if blocked:
+            self.steps[node_id]["skip_reason"] = f"upstream step {blocked[0]} failed"
+            return False
+        if not any(self._edge_taken(p, node_id) for p in parents):
+            self.steps[node_id]["skip_reason"] = "branch not taken"
+            return False
+        return True
+
+    def _skip(self, node_id: str, waiting, launch):
+        """Mark a node skipped and release its children."""
+        step = self.steps[node_id]
+        step["status"] = "skipped"
+        self.log(f"Skipped: {step.pop('skip_reason', 'not reached')}", level="warning", node_id=node_id)
+        for child, _ in self.children[node_id]:
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                if self._should_run(child):
+                    launch(child)
+                else:
+                    self._skip(child, waiting, launch)
+
+    # Steps
+
+    def _offset_ms(self) -> float:
+        return (time.perf_counter() - self._clock) * 1000
+
+    def _input(self, node_id: str) -> Any:
+        """Output of the parent that finished last, for steps that act on a response."""
+        finished = [p for p in self.parents[node_id] if p in self.outputs]
+        if not finished:
+            return None
+        return self.outputs[max(finished, key=lambda p: self.steps[p]["end_offset_ms"])]
+
+    async def _run_step(self, node_id: str):
+        node = self.nodes[node_id]
+        step = self.steps[node_id]
+        node_type = node.get("type")
+        config = node.get("config") or {}
+
+        async with self._semaphore:
+            step["status"] = "running"
+            step["started_at"] = now_iso()
+            step["start_offset_ms"] = round(self._offset_ms(), 3)
+            begin = time.perf_counter()
+            try:
+                if node_type not in SUPPORTED_TYPES:
+                    raise StepFailed(f"Node type '{node_type}' is not supported by the executor")
+                handler = getattr(self, f"_step_{node_type}", None)
+                output = await handler(node_id, config) if handler else self._input(node_id)
+                self.outputs[node_id] = output
+                step["status"] = "succeeded"
+            except StepFailed as e:
+                step["status"] = "failed"
+                step["error"] = str(e)
+            except Exception as e:
+                step["status"] = "failed"
+                step["error"] = f"{type(e).__name__}: {e}"
+            finally:
+                step["duration_ms"] = round((time.perf_counter() - begin) * 1000, 3)
+                step["end_offset_ms"] = round(self._offset_ms(), 3)
+                step["completed_at"] = now_iso()
+
+        if step["status"] == "failed":
+            self.log(f"Failed after {step['duration_ms']:.0f} ms: {step['error']}", level="error", node_id=node_id)
+        elif node_type not in ("start", "end"):
+            self.log(f"Succeeded in {step['duration_ms']:.0f} ms", node_id=node_id)
+
+    def _substitution_variables(self) -> Dict[str, str]:
+        return {k: v if isinstance(v, str) else json.dumps(v) for k, v in self.variables.items()}
+
+    async def _step_api_call(self, node_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        step = self.steps[node_id]
+        timeout = float(config.get("timeout") or DEFAULT_TIMEOUT)
+        retries = min(int(config.get("retries") or 0), MAX_RETRIES)
+        backoff = float(config.get("retry_backoff", 0.5))
+
+        request = self.prepare_request(config, self._substitution_variables())
+        step["request"] = {"method": request.get("method"), "url": str(request.get("url"))}
+        error = None
+        for attempt in range(retries + 1):
+            step["attempts"] = attempt + 1
+            if attempt:
+                delay = backoff * 2 ** (attempt - 1)
+                self.log(f"Retrying in {delay:.2f}s ({error})", level="warning", node_id=node_id, attempt=attempt + 1)
+                await asyncio.sleep(delay)
+            try:
+                response = await asyncio.wait_for(self.send(request), timeout)
+            except asyncio.TimeoutError:
+                error = f"timed out after {timeout:g}s"
+                continue
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                continue
+            step["status_code"] = response.status_code
+            if response.status_code in RETRY_STATUS and attempt < retries:
+                error = f"HTTP {response.status_code}"
+                continue
+            break
+        else:
+            raise StepFailed(f"Request failed after {retries + 1} attempt(s): {error}")
+
+        output = {"status_code": response.status_code, "headers": dict(response.headers),
+                  "body": parse_body(response.text)}
+        for variable, expression in (config.get("extract") or {}).items():
+            value = jsonpath_first(expression, output["body"])
+            self.variables[variable] = value
+            self._extracted.add(variable)
+            self.log(f"Extracted {variable} = {json.dumps(value)[:200]}", node_id=node_id)
+        if response.status_code >= 400 and not config.get("allow_error_status"):
+            raise StepFailed(f"HTTP {response.status_code}")
+        return output
+
+    async def _step_delay(self, node_id: str, config: Dict[str, Any]) -> Any:
+        await asyncio.sleep(float(config.get("seconds") or 0))
+        return self._input(node_id)
+
+    async def _step_transform(self, node_id: str, config: Dict[str, Any]) -> Any:
+        source = self._input(node_id)
+        body = source.get("body") if isinstance(source, dict) and "body" in source else source
+        value = jsonpath_first(config.get("transformExpression") or "$", body)
+        variable = config.get("variable") or self.steps[node_id]["name"]
+        self.variables[variable] = value
+        self._extracted.add(variable)
+        return value
+
+    async def _step_condition(self, node_id: str, config: Dict[str, Any]) -> Any:
+        source = self._input(node_id) or {}
+        kind = config.get("conditionType") or "response_code"
+        expected = str(config.get("conditionValue") or "").strip()
+
+        if kind == "response_code":
+            code = str(source.get("status_code", ""))
+            pattern = re.escape(expected).replace("x", r"\d").replace("X", r"\d")
+            holds = bool(code) and (re.fullmatch(pattern, code) is not None if expected else code.startswith("2"))
+        elif kind == "json_path":
+            expression, _, value = expected.partition("==")
+            found = jsonpath_values(expression.strip(), source.get("body"))
+            holds = (str(found[0]) == value.strip()) if value else bool(found and found[0])
+        elif kind == "header":
+            name, _, value = expected.partition(":")
+            headers = {k.lower(): v for k, v in (source.get("headers") or {}).items()}
+            actual = headers.get(name.strip().lower())
+            holds = actual is not None and (not value.strip() or actual == value.strip())
+        else:
+            raise StepFailed(f"Unknown condition type '{kind}'")
+
+        self._branch[node_id] = 0 if holds else 1
+        self.steps[node_id]["result"] = holds
+        self.log(f"Condition {kind} '{expected}' is {holds}", node_id=node_id)
+        return source
+
+    async def _step_notification(self, node_id: str, config: Dict[str, Any]) -> Any:
+        message = config.get("message") or ""
+        for key, value in self._substitution_variables().items():
+            message = message.replace(f"{{{{{key}}}}}", value)
+        self.log(f"Notification ({config.get('notificationType', 'log')}): {message}", node_id=node_id)
+        return self._input(node_id)
+
+
+class WorkflowRunner:
+    """Starts executions in the background and keeps the live ones addressable."""
+
+    def __init__(self):
+        self.executions: Dict[str, WorkflowExecution] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self, execution: WorkflowExecution) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(execution.run())
+        self.executions[execution.id] = execution
+        self._tasks[execution.id] = task
+
+        def finished(_):
+            self.executions.pop(execution.id, None)
+            self._tasks.pop(execution.id, None)
+
+        task.add_done_callback(finished)
+        return task
+
+    def get(self, execution_id: str) -> Optional[WorkflowExecution]:
+        return self.executions.get(execution_id)
+
+    def cancel(self, execution_id: str) -> bool:
+        task = self._tasks.get(execution_id)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    async def aclose(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,129 @@
+"""
+Benchmark specification import with a generated OpenAPI document.
+
+Compares the old import path with ImportJobs.parse. The old path parsed
+inline in the request handler with the pure-Python YAML loader, or json.loads
+for JSON. ImportJobs.parse runs in a worker process, using the streaming JSON
+reader or libyaml.
+
+For each format it reports the parse time and the longest stall seen by a
+coroutine ticking on the event loop every millisecond. It also reports the
+number of database round trips each path makes to insert the generated
+requests. No database is needed.
+
+Usage:
+    python import_benchmark.py [--operations 5000] [--batch-size 500]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from spec_import import ImportJobs, YamlLoader  # noqa: E402
+
+
+def make_spec(operations: int) -> dict:
+    paths = {}
+    schemas = {}
+    methods = ["get", "post", "put", "delete", "patch"]
+    for i in range(operations):
+        resource = f"/resources{i // len(methods)}/{{id}}"
+        method = methods[i % len(methods)]
+        schemas[f"Resource{i}"] = {
+            "type": "object",
+            "properties": {f"field{j}": {"type": "string", "description": f"Field {j} of resource {i}"} for j in range(8)},
+        }
+        paths.setdefault(resource, {})[method] = {
+            "operationId": f"op{i}",
+            "summary": f"Operation {i}",
+            "description": f"Performs operation {i} on the resource",
+            "parameters": [{"name": "id", "in": "path", "required": True, "schema": {"type": "string"}}],
+            "responses": {"200": {"description": "OK", "content": {"application/json": {
+                "schema": {"$ref": f"#/components/schemas/Resource{i}"}}}}},
+        }
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Generated", "version": "1.0"},
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": paths,
+        "components": {"schemas": schemas},
+    }
+
+
+def old_parse(content: str):
+    try:
+        spec = json.loads(content)
+    except ValueError:
+        spec = yaml.safe_load(content)
+    return [
+        (method, path) for path, methods in spec.get("paths", {}).items()
+        for method in methods if method.upper() in ["GET", "POST", "PUT", "DELETE", "PATCH"]
+    ]
+
+
+async def measure(work):
+    """Run `work` while ticking every 1ms; return (seconds, longest loop stall ms, result)."""
+    stall = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stall = max(stall, (now - last) * 1000 - 1)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    result = await work()
+    elapsed = time.perf_counter() - start
+    running = False
+    await tick
+    return elapsed, stall, result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    spec = make_spec(args.operations)
+    documents = {
+        "json": json.dumps(spec, indent=2),
+        "yaml": yaml.dump(spec, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper), sort_keys=False),
+    }
+    jobs = ImportJobs(db=None, resolve_collection=None, build_request=None, batch_size=args.batch_size)
+    # Start the worker processes so their startup is not counted
+    await jobs.parse("openapi", documents["json"])
+
+    print(f"{args.operations} operations, yaml loader: {YamlLoader.__name__}\n")
+    print(f"{'format':<8}{'size MB':>9}{'old s':>9}{'old stall ms':>14}{'new s':>9}{'new stall ms':>14}{'ops':>7}")
+    for name, content in documents.items():
+        async def inline():
+            return old_parse(content)
+
+        old_time, old_stall, old_ops = await measure(inline)
+        new_time, new_stall, new_ops = await measure(lambda: jobs.parse("openapi", content))
+        assert len(old_ops) == len(new_ops) == args.operations
+        print(f"{name:<8}{len(content) / 1e6:>9.1f}{old_time:>9.2f}{old_stall:>14.0f}"
+              f"{new_time:>9.2f}{new_stall:>14.0f}{len(new_ops):>7}")
+
+    batches = math.ceil(args.operations / args.batch_size)
+    print(f"\ninsert round trips: old {args.operations} x insert_one, new {batches} x insert_many")
+    await jobs.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
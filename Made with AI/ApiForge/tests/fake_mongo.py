@@ -0,0 +1,338 @@
+"""In-memory stand-in for the parts of motor's collection API the backend stores use.
+
+Covers equality and the comparison/logical query operators, the update operators
+the stores issue, sort/skip/limit cursors and projections. Not a general Mongo.
+"""
+
+import copy
+import itertools
+from datetime import datetime
+from types import SimpleNamespace
+
+_object_ids = itertools.count(1)
+
+
+def _get(doc, path):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+class _Missing:
+    def __repr__(self):
+        return "<missing>"
+
+
+_MISSING = _Missing()
+
+
+def _rank(value):
+    """Mongo's cross-type order for the types the stores use."""
+    if value is _MISSING or value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (4, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (5, value)
+    return (3, str(value))
+
+
+def _compare(op, value, operand):
+    if value is _MISSING or value is None or operand is None:
+        return False
+    if _rank(value)[0] != _rank(operand)[0]:
+        return False
+    return {"$gt": value > operand, "$gte": value >= operand,
+            "$lt": value < operand, "$lte": value <= operand}[op]
+
+
+def _match_value(value, condition):
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for op, operand in condition.items():
+            if op == "$in":
+                if not any(_equals(value, item) for item in operand):
+                    return False
+            elif op == "$nin":
+                if any(_equals(value, item) for item in operand):
+                    return False
+            elif op == "$ne":
+                if _equals(value, operand):
+                    return False
+            elif op == "$exists":
+                if (value is not _MISSING) != bool(operand):
+                    return False
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if not _compare(op, value, operand):
+                    return False
+            else:
+                raise NotImplementedError(op)
+        return True
+    return _equals(value, condition)
+
+
+def _equals(value, expected):
+    if expected is None:
+        return value is None or value is _MISSING
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+
+def matches(doc, query):
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif not _match_value(_get(doc, key), condition):
+            return False
+    return True
+
+
+def _set(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _unset(doc, path):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part, {})
+    doc.pop(parts[-1], None)
+
+
+def apply_update(doc, update, inserting=False):
+    for op, fields in update.items():
+        for path, operand in fields.items():
+            current = _get(doc, path)
+            if op == "$set":
+                _set(doc, path, copy.deepcopy(operand))
+            elif op == "$setOnInsert":
+                if inserting:
+                    _set(doc, path, copy.deepcopy(operand))
+            elif op == "$unset":
+                _unset(doc, path)
+            elif op == "$inc":
+                _set(doc, path, (0 if current is _MISSING else current) + operand)
+            elif op == "$min":
+                if current is _MISSING or _rank(operand) < _rank(current):
+                    _set(doc, path, operand)
+            elif op == "$max":
+                if current is _MISSING or _rank(operand) > _rank(current):
+                    _set(doc, path, operand)
+            elif op == "$push":
+                items = list(current) if current is not _MISSING else []
+                if isinstance(operand, dict) and "$each" in operand:
+                    items.extend(copy.deepcopy(operand["$each"]))
+                    if "$slice" in operand:
+                        limit = operand["$slice"]
+                        items = items[limit:] if limit < 0 else items[:limit]
+                else:
+                    items.append(copy.deepcopy(operand))
+                _set(doc, path, items)
+            else:
+                raise NotImplementedError(op)
+
+
+def project(doc, projection):
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    include = {key for key, flag in projection.items() if flag and key != "_id"}
+    if include:
+        result = {key: doc[key] for key in include if key in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    for key, flag in projection.items():
+        if not flag:
+            doc.pop(key, None)
+    return doc
+
+
+def _sort_key(spec):
+    def key(doc):
+        return tuple(_Ordered(_rank(_get(doc, field)), direction) for field, direction in spec)
+    return key
+
+
+class _Ordered:
+    def __init__(self, rank, direction):
+        self.rank = rank
+        self.direction = direction
+
+    def __lt__(self, other):
+        return self.rank < other.rank if self.direction > 0 else self.rank > other.rank
+
+    def __eq__(self, other):
+        return self.rank == other.rank
+
+
+def _sort_spec(key_or_list, direction=None):
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    return list(key_or_list)
+
+
+class FakeCursor:
+    def __init__(self, docs, projection):
+        self._docs = docs
+        self._projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _sort_spec(key_or_list, direction)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def _results(self):
+        docs = list(self._docs)
+        if self._sort:
+            docs.sort(key=_sort_key(self._sort))
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length=None):
+        results = self._results()
+        return results if length is None else results[:length]
+
+    def __aiter__(self):
+        self._iter = iter(self._results())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+        self.indexes = []
+
+    async def create_index(self, keys, **kwargs):
+        self.indexes.append((keys, kwargs))
+        return str(keys)
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", next(_object_ids))
+        self.docs.append(copy.deepcopy(doc))
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            await self.insert_one(doc)
+        return SimpleNamespace(inserted_ids=[doc["_id"] for doc in docs])
+
+    def find(self, query=None, projection=None, sort=None):
+        cursor = FakeCursor([doc for doc in self.docs if matches(doc, query)], projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor
+
+    async def find_one(self, query=None, projection=None, sort=None):
+        results = await self.find(query, projection, sort).limit(1).to_list(1)
+        return results[0] if results else None
+
+    async def count_documents(self, query, limit=0):
+        count = sum(1 for doc in self.docs if matches(doc, query))
+        return min(count, limit) if limit else count
+
+    async def delete_many(self, query):
+        before = len(self.docs)
+        self.docs = [doc for doc in self.docs if not matches(doc, query)]
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+    async def delete_one(self, query):
+        for index, doc in enumerate(self.docs):
+            if matches(doc, query):
+                del self.docs[index]
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    def _upsert_doc(self, query):
+        doc = {key: value for key, value in query.items()
+               if not key.startswith("$") and not isinstance(value, dict)}
+        doc["_id"] = next(_object_ids)
+        self.docs.append(doc)
+        return doc
+
+    async def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if matches(doc, query):
+                apply_update(doc, update)
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            doc = self._upsert_doc(query)
+            apply_update(doc, update, inserting=True)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def update_many(self, query, update, upsert=False):
+        matched = [doc for doc in self.docs if matches(doc, query)]
+        for doc in matched:
+            apply_update(doc, update)
+        return SimpleNamespace(matched_count=len(matched), modified_count=len(matched))
+
+    async def replace_one(self, query, replacement, upsert=False):
+        for index, doc in enumerate(self.docs):
+            if matches(doc, query):
+                replacement = {**copy.deepcopy(replacement), "_id": doc["_id"]}
+                self.docs[index] = replacement
+                return SimpleNamespace(matched_count=1, modified_count=1)
+        if upsert:
+            await self.insert_one(copy.deepcopy(replacement))
+        return SimpleNamespace(matched_count=0, modified_count=0)
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=False,
+                                  projection=None, sort=None):
+        candidates = [doc for doc in self.docs if matches(doc, query)]
+        if sort:
+            candidates.sort(key=_sort_key(_sort_spec(sort)))
+        if candidates:
+            doc = candidates[0]
+            before = copy.deepcopy(doc)
+            apply_update(doc, update)
+            return project(doc if return_document else before, projection)
+        if not upsert:
+            return None
+        doc = self._upsert_doc(query)
+        apply_update(doc, update, inserting=True)
+        return project(doc, projection) if return_document else None
+
+
+class FakeDatabase:
+    def __init__(self):
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._collections.setdefault(name, FakeCollection())
+
+    def __getitem__(self, name):
+        return getattr(self, name)
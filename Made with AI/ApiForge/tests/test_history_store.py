@@ -0,0 +1,224 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import history_store
+from fake_mongo import FakeDatabase
+from history_store import HistoryStore, compress_payload, decompress_payload, truncate_body
+
+
+def test_truncate_body_keeps_small_bodies():
+    assert truncate_body("hello", 10) == ("hello", 5, False)
+
+
+def test_truncate_body_caps_bytes_and_marks():
+    body = "é" * 100  # 200 bytes of UTF-8
+    stored, size, truncated = truncate_body(body, 51)
+
+    assert size == 200 and truncated
+    assert stored.startswith("é" * 25)
+    assert stored.endswith("...[truncated 149 bytes]")
+
+
+def test_gzip_payload_round_trip():
+    payload = {"headers": {"content-type": "application/json"}, "body": '{"a": 1}' * 500}
+    data = compress_payload(payload, "gzip")
+
+    assert len(data) < len(payload["body"])
+    assert decompress_payload(data, "gzip") == payload
+
+
+class Clock(datetime):
+    """datetime whose now() is set by the test."""
+
+    current = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(history_store, "datetime", Clock)
+    Clock.current = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return Clock
+
+
+def entry(number, user_id="u1", status=200, response_time=0.1, body="ok"):
+    return {
+        "id": f"h{number}",
+        "user_id": user_id,
+        "request": {"method": "GET", "url": f"https://api.example.com/{number}"},
+        "response": {"status_code": status, "headers": {"x-n": str(number)}, "body": body,
+                     "response_time": response_time, "protocol": "REST"},
+        "created_at": f"2026-01-01T00:00:{number:02d}+00:00",
+    }
+
+
+def expire(db, now):
+    """What Mongo's TTL monitor does: drop expired documents, leave aggregates alone."""
+    for name in ("request_history", "request_history_bodies"):
+        db[name].docs = [doc for doc in db[name].docs if doc["expire_at"] > now]
+
+
+def test_record_splits_metadata_body_and_aggregates(clock):
+    db = FakeDatabase()
+    store = HistoryStore(db, max_body_bytes=10, compression="gzip")
+
+    asyncio.run(store.record(entry(1, body="x" * 25)))
+
+    meta = db.request_history.docs[0]
+    assert "body" not in meta["response"] and "headers" not in meta["response"]
+    assert meta["response"]["body_size"] == 25 and meta["response"]["body_truncated"]
+    assert meta["expire_at"] == clock.current + timedelta(days=30)
+    blob = db.request_history_bodies.docs[0]
+    assert blob["id"] == "h1" and blob["encoding"] == "gzip"
+    payload = decompress_payload(blob["data"], "gzip")
+    assert payload["headers"] == {"x-n": "1"}
+    assert payload["body"] == "x" * 10 + "\n...[truncated 15 bytes]"
+    aggregates = db.history_aggregates.docs[0]
+    assert (aggregates["total_count"], aggregates["success_count"], aggregates["stored"]) == (1, 1, 1)
+    assert aggregates["expires_next"] == meta["expire_at"]
+
+
+def test_update_aggregates_keeps_a_bounded_window(clock, monkeypatch):
+    monkeypatch.setattr(history_store, "AGGREGATE_WINDOW", 3)
+    db = FakeDatabase()
+    store = HistoryStore(db)
+
+    async def run():
+        results = []
+        for number, status in enumerate([200, 500, 200, 404, 201]):
+            response = {"status_code": status, "response_time": number + 1}
+            results.append(await store._update_aggregates("u1", response, clock.current,
+                                                          clock.current + timedelta(days=number + 1)))
+        return results
+
+    results = asyncio.run(run())
+
+    assert [stored for stored, _ in results] == [1, 2, 3, 4, 5]
+    # The earliest expiry stays the minimum
+    assert {expires for _, expires in results} == {clock.current + timedelta(days=1)}
+    aggregates = db.history_aggregates.docs[0]
+    assert aggregates["total_count"] == 5 and aggregates["success_count"] == 3
+    assert aggregates["total_response_time"] == 15
+    assert aggregates["window"] == [
+        {"response_time": 3, "success": True},
+        {"response_time": 4, "success": False},
+        {"response_time": 5, "success": True},
+    ]
+
+
+def test_list_returns_newest_first_with_bodies(clock):
+    db = FakeDatabase()
+    store = HistoryStore(db, compression="gzip")
+
+    async def run():
+        for number in range(1, 4):
+            await store.record(entry(number, body=f"body {number}"))
+        # A document written before bodies were split out
+        await db.request_history.insert_one({**entry(9), "expire_at": clock.current})
+        return await store.list("u1", limit=3), await store.list("other")
+
+    entries, other = asyncio.run(run())
+
+    assert [e["id"] for e in entries] == ["h9", "h3", "h2"]
+    assert entries[0]["response"]["body"] == "ok"
+    assert entries[1]["response"]["body"] == "body 3"
+    assert entries[1]["response"]["headers"] == {"x-n": "3"}
+    assert all("expire_at" not in e and "_id" not in e for e in entries)
+    assert other == []
+
+
+def test_get_aggregates(clock):
+    db = FakeDatabase()
+    store = HistoryStore(db)
+
+    async def run():
+        empty = await store.get_aggregates("u1")
+        await store.record(entry(1, status=200, response_time=0.2))
+        await store.record(entry(2, status=500, response_time=0.4))
+        await store.record(entry(3, status=204, response_time=0))
+        return empty, await store.get_aggregates("u1")
+
+    empty, metrics = asyncio.run(run())
+
+    assert empty == {"avg_response_time": 0, "success_rate": 0, "total_executions": 0}
+    # Zero response times are left out of the average
+    assert metrics["avg_response_time"] == pytest.approx(0.3)
+    assert metrics["success_rate"] == pytest.approx(200 / 3)
+    assert metrics["total_executions"] == 3
+
+
+def test_prune_keeps_newest_entries(clock):
+    db = FakeDatabase()
+    store = HistoryStore(db, max_per_user=5)
+
+    async def run():
+        for number in range(1, 8):
+            await store.record(entry(number))
+        await store.record(entry(1, user_id="u2"))
+
+    asyncio.run(run())
+
+    # prune_slack is 1: the 7th record is over 5 + 1 and prunes back to 5
+    assert sorted(doc["id"] for doc in db.request_history.docs if doc["user_id"] == "u1") == \
+        ["h3", "h4", "h5", "h6", "h7"]
+    assert sorted(doc["id"] for doc in db.request_history_bodies.docs if doc["user_id"] == "u1") == \
+        ["h3", "h4", "h5", "h6", "h7"]
+    aggregates = {doc["user_id"]: doc for doc in db.history_aggregates.docs}
+    assert aggregates["u1"]["stored"] == 5 and aggregates["u1"]["total_count"] == 7
+    assert aggregates["u2"]["stored"] == 1
+
+
+def test_stored_count_follows_ttl_expiry(clock):
+    db = FakeDatabase()
+    store = HistoryStore(db, ttl_days=1, max_per_user=3)
+
+    async def run():
+        for number in range(1, 4):
+            await store.record(entry(number))
+            clock.current += timedelta(hours=1)
+        # Past the first entries' expiry; the TTL monitor removes them
+        clock.current += timedelta(days=1)
+        expire(db, clock.current)
+        await store.record(entry(4))
+        first = dict(db.history_aggregates.docs[0])
+        for number in range(5, 8):
+            await store.record(entry(number))
+        return first
+
+    after_expiry = asyncio.run(run())
+
+    assert after_expiry["stored"] == 1
+    assert after_expiry["expires_next"] == db.request_history.docs[0]["expire_at"]
+    # The recount kept the count exact, so nothing was pruned
+    assert [doc["id"] for doc in db.request_history.docs] == ["h4", "h5", "h6", "h7"]
+    assert db.history_aggregates.docs[0]["stored"] == 4
+
+
+def test_recount_with_everything_expired_unsets_expiry(clock):
+    db = FakeDatabase()
+    store = HistoryStore(db, ttl_days=1)
+
+    async def run():
+        await store.record(entry(1))
+        clock.current += timedelta(days=2)
+        expire(db, clock.current)
+        stored = await store._recount("u1", clock.current)
+        unset = "expires_next" not in db.history_aggregates.docs[0]
+        await store.record(entry(2))
+        return stored, unset
+
+    stored, unset = asyncio.run(run())
+
+    assert stored == 0 and unset
+    assert db.history_aggregates.docs[0]["stored"] == 1
+    assert db.history_aggregates.docs[0]["expires_next"] == clock.current + timedelta(days=1)
@@ -0,0 +1,148 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from load_runner import LatencyHistogram, run_load
+
+
+async def collect(agen):
+    return [snapshot async for snapshot in agen]
+
+
+def test_histogram_percentiles_within_bucket_error():
+    histogram = LatencyHistogram()
+    for ms in range(1, 1001):
+        histogram.record(float(ms))
+
+    assert histogram.percentile(50) == pytest.approx(500, rel=0.02)
+    assert histogram.percentile(99) == pytest.approx(990, rel=0.02)
+    assert histogram.summary()["max"] == 1000
+
+
+def test_run_load_respects_concurrency_and_counts_errors():
+    state = {"active": 0, "peak": 0, "calls": 0}
+
+    async def send():
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        state["calls"] += 1
+        call = state["calls"]
+        await asyncio.sleep(0.001)
+        state["active"] -= 1
+        if call % 10 == 0:
+            raise ConnectionError("refused")
+        return 500 if call % 5 == 0 else 200
+
+    snapshots = asyncio.run(collect(run_load(send, total=100, concurrency=8, report_interval=0.05)))
+    final = snapshots[-1]
+
+    assert final["done"] and final["completed"] == 100
+    assert state["peak"] == 8
+    assert final["errors"] == {"ConnectionError": 10, "5xx": 10}
+    assert final["status_codes"] == {"200": 80, "500": 10}
+    assert final["latency_ms"]["p50"] is not None
+
+
+def test_run_load_paces_to_rate():
+    async def send():
+        return 200
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        snapshots = await collect(run_load(send, total=20, concurrency=20, rate=100, report_interval=0.05))
+        return snapshots, loop.time() - started
+
+    snapshots, elapsed = asyncio.run(run())
+
+    assert snapshots[-1]["completed"] == 20
+    assert elapsed >= 0.18
+
+
+def test_pooled_client_against_asgi_stand_in():
+    httpx = pytest.importorskip("httpx")
+    from http_pool import HTTPClientPool
+
+    async def stand_in(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204 if scope["path"] == "/ok" else 404, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def run():
+        pool = HTTPClientPool(transport_factory=lambda key: httpx.ASGITransport(app=stand_in))
+        client = await pool.get_client("http://target.local/ok")
+
+        async def send_request():
+            response = await client.get("http://target.local/ok")
+            return response.status_code
+
+        snapshots = await collect(run_load(send_request, total=50, concurrency=5, report_interval=0.05))
+        assert await pool.get_client("http://target.local/other") is client
+        assert await pool.get_client("https://target.local/ok") is not client
+        await pool.aclose()
+        return snapshots[-1], pool.snapshot()
+
+    final, stats = asyncio.run(run())
+
+    assert final["status_codes"] == {"204": 50}
+    assert stats["created"] == 2 and stats["open_clients"] == 0
+
+
+def test_pooled_client_does_not_carry_cookies_between_requests():
+    httpx = pytest.importorskip("httpx")
+    from http_pool import HTTPClientPool
+
+    async def stand_in(scope, receive, send):
+        headers = dict(scope["headers"])
+        if scope["path"] == "/login":
+            response_headers = [(b"set-cookie", b"session=alice-secret; Path=/")]
+            body = b""
+        else:
+            response_headers = []
+            body = headers.get(b"cookie", b"")
+        await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def run():
+        pool = HTTPClientPool(transport_factory=lambda key: httpx.ASGITransport(app=stand_in))
+        alice = await pool.get_client("http://target.local/login")
+        await alice.get("http://target.local/login")
+        bob = await pool.get_client("http://target.local/whoami")
+        anonymous = await bob.get("http://target.local/whoami")
+        explicit = await bob.get("http://target.local/whoami", headers={"Cookie": "session=bob"})
+        await pool.aclose()
+        return alice is bob, anonymous.text, explicit.text
+
+    shared, anonymous, explicit = asyncio.run(run())
+
+    assert shared
+    assert anonymous == ""
+    assert explicit == "session=bob"
+
+
+def test_dedicated_client_is_outside_the_pool():
+    httpx = pytest.importorskip("httpx")
+    from http_pool import HTTPClientPool
+
+    async def stand_in(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def run():
+        pool = HTTPClientPool(transport_factory=lambda key: httpx.ASGITransport(app=stand_in))
+        pooled = await pool.get_client("http://target.local/")
+        dedicated = pool.dedicated_client("http://target.local/", max_connections=500)
+        response = await dedicated.get("http://target.local/")
+        await dedicated.aclose()
+        still_open = not pooled.is_closed
+        stats = pool.snapshot()
+        await pool.aclose()
+        return dedicated is not pooled, response.status_code, still_open, stats
+
+    separate, status, still_open, stats = asyncio.run(run())
+
+    assert separate and status == 204 and still_open
+    assert stats["created"] == 1 and stats["open_clients"] == 1
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import spec_import
+from fake_mongo import FakeDatabase
+from spec_import import ImportJobs, JSONObjectReader, SpecParseError, content_hash, parse_spec
+
+
+SPEC = {
+    "openapi": "3.0.0",
+    "paths": {
+        "/pets": {"get": {"summary": "List pets"}, "post": {"description": "Add a pet"}, "parameters": []},
+        "/pets/{id}": {"delete": {}},
+    },
+    "components": {"schemas": {"Pet": {"type": "object", "example": "}{\\\"]"}}},
+    "servers": [{"url": "https://api.example.com"}],
+}
+
+
+def test_openapi_json_and_yaml_agree():
+    import yaml
+
+    from_json = parse_spec("openapi", json.dumps(SPEC, indent=2))
+    from_yaml = parse_spec("openapi", yaml.safe_dump(SPEC))
+
+    assert from_json == from_yaml
+    assert [(r["method"], r["url"]) for r in from_json] == [
+        ("GET", "https://api.example.com/pets"),
+        ("POST", "https://api.example.com/pets"),
+        ("DELETE", "https://api.example.com/pets/{id}"),
+    ]
+    assert from_json[0]["name"] == "List pets" and from_json[1]["name"] == "POST /pets"
+
+
+def test_json_object_reader_skips_unread_members():
+    text = json.dumps({"a": [1, {"b": "}"}], "nested": {"x": 1, "y": {"z": 2}}, "last": True})
+    reader = JSONObjectReader(text)
+    seen = {}
+    for key in reader:
+        if key == "nested":
+            nested = reader.object()
+            seen["nested_keys"] = [k for k in nested]
+        elif key == "last":
+            seen["last"] = reader.value()
+
+    assert seen == {"nested_keys": ["x", "y"], "last": True}
+    assert reader.end == len(text)
+
+
+def test_postman_and_graphql_parsers():
+    postman = {"item": [{"name": "Users", "item": [
+        {"name": "List", "request": {"method": "GET", "url": {"raw": "https://x/users"}, "header": []}}
+    ]}]}
+    assert parse_spec("postman", json.dumps(postman)) == [
+        {"name": "Users - List", "method": "GET", "url": "https://x/users", "headers": {}, "body": None}
+    ]
+
+    sdl = "type Query {\n  users: [User]\n  user(id: ID!): User\n}\ntype User {\n  id: ID\n}"
+    assert [r["name"] for r in parse_spec("graphql", sdl)] == ["Query: users", "Query: user"]
+
+
+def test_parse_errors_and_content_hash():
+    with pytest.raises(SpecParseError, match="Unsupported import type"):
+        parse_spec("swagger2000", "{}")
+    with pytest.raises(SpecParseError, match="Failed to parse WSDL"):
+        parse_spec("wsdl", "<not-closed")
+
+    assert content_hash("openapi", "{}") == content_hash("openapi", "{}")
+    assert content_hash("openapi", "{}") != content_hash("raml", "{}")
+
+
+def ago(seconds):
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds)).isoformat()
+
+
+def import_jobs(db, **kwargs):
+    async def resolve_collection(user_id, import_type, collection_name):
+        return "collection-1"
+
+    def build_request(operation, collection_id, user_id):
+        return {"name": operation["name"], "collection_id": collection_id, "user_id": user_id}
+
+    return ImportJobs(db, resolve_collection, build_request, **kwargs)
+
+
+def job(id, status="inserting", heartbeat=None, updated=None, content="{}", **fields):
+    doc = {"id": id, "user_id": "u1", "type": "openapi", "content_hash": content_hash("openapi", content),
+           "status": status, "inserted": 0, "collection_id": None, "error": None,
+           "created_at": ago(300), "updated_at": updated or ago(0), **fields}
+    if heartbeat is not None:
+        doc["heartbeat_at"] = heartbeat
+    return doc
+
+
+def test_startup_fails_only_jobs_with_a_stale_heartbeat():
+    db = FakeDatabase()
+    db.import_jobs.docs.extend([
+        job("live", heartbeat=ago(5), owner="other-worker"),
+        job("dead", heartbeat=ago(600), owner="crashed-worker"),
+        job("legacy", status="parsing", updated=ago(600)),
+        job("done", status="completed", heartbeat=ago(600)),
+    ])
+
+    asyncio.run(import_jobs(db).ensure_indexes())
+
+    statuses = {doc["id"]: doc["status"] for doc in db.import_jobs.docs}
+    assert statuses == {"live": "inserting", "dead": "failed", "legacy": "failed", "done": "completed"}
+    assert "stopped" in next(doc for doc in db.import_jobs.docs if doc["id"] == "dead")["error"]
+
+
+def test_waiting_on_another_workers_job_returns_its_final_state(monkeypatch):
+    monkeypatch.setattr(spec_import, "WAIT_POLL_INTERVAL", 0.01)
+    db = FakeDatabase()
+    db.import_jobs.docs.append(job("elsewhere", heartbeat=ago(1), owner="other-worker"))
+    jobs = import_jobs(db)
+
+    async def main():
+        submitted, deduplicated = await jobs.submit("u1", "openapi", "{}")
+        waiter = asyncio.create_task(jobs.wait(submitted["id"], "u1"))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        await db.import_jobs.update_one({"id": "elsewhere"}, {"$set": {"status": "completed", "inserted": 7}})
+        return deduplicated, await asyncio.wait_for(waiter, 5)
+
+    deduplicated, final = asyncio.run(main())
+    assert deduplicated
+    assert (final["status"], final["inserted"]) == ("completed", 7)
+
+
+def test_abandoned_job_is_failed_and_the_import_runs_again():
+    db = FakeDatabase()
+    db.import_jobs.docs.append(job("abandoned", heartbeat=ago(600), owner="crashed-worker", content=json.dumps(SPEC)))
+    jobs = import_jobs(db)
+
+    async def main():
+        submitted, deduplicated = await jobs.submit("u1", "openapi", json.dumps(SPEC))
+        return submitted, deduplicated, await jobs.wait(submitted["id"], "u1")
+
+    submitted, deduplicated, final = asyncio.run(main())
+    assert not deduplicated and submitted["id"] != "abandoned"
+    assert submitted["owner"] == jobs.owner_id
+    assert (final["status"], final["inserted"]) == ("completed", 3)
+    assert asyncio.run(jobs.get("abandoned", "u1"))["status"] == "failed"
+
+
+def test_running_jobs_keep_their_heartbeat_fresh(monkeypatch):
+    db = FakeDatabase()
+    jobs = import_jobs(db, heartbeat_interval=0.02)
+    # Another worker with a short timeout reads the job while it parses
+    observer = import_jobs(db, stale_after=0.1)
+    release = asyncio.Event()
+
+    async def slow_parse(import_type, content):
+        await release.wait()
+        return []
+
+    monkeypatch.setattr(jobs, "parse", slow_parse)
+
+    async def main():
+        submitted, _ = await jobs.submit("u1", "openapi", "{}")
+        first_beat = submitted["heartbeat_at"]
+        await asyncio.sleep(0.3)
+        seen = await observer.get(submitted["id"], "u1")
+        release.set()
+        return first_beat, seen, await jobs.wait(submitted["id"], "u1")
+
+    first_beat, seen, final = asyncio.run(main())
+    assert seen["status"] == "parsing"
+    assert seen["heartbeat_at"] > first_beat
+    assert final["status"] == "completed"
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from workflow_executor import WorkflowError, WorkflowExecution, build_graph
+
+
+class Response:
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.text = json.dumps(body if body is not None else {})
+        self.headers = headers or {"content-type": "application/json"}
+
+
+class MockUpstream:
+    """In-process upstream: routes are "METHOD path" -> async handler(request kwargs)."""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    async def send(self, request):
+        self.calls.append((request["method"], request["url"]))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await self.routes[f"{request['method']} {request['url']}"](request)
+        finally:
+            self.active -= 1
+
+
+def prepare(config, variables):
+    url = config["url"]
+    for key, value in variables.items():
+        url = url.replace(f"{{{{{key}}}}}", value)
+    return {"method": config.get("method", "GET"), "url": url}
+
+
+def api(node_id, url, connections=(), **config):
+    return {"id": node_id, "type": "api_call", "config": {"url": url, **config}, "connections": list(connections)}
+
+
+def after(seconds, response):
+    async def handler(request):
+        await asyncio.sleep(seconds)
+        return response
+    return handler
+
+
+def run(workflow, upstream, **kwargs):
+    execution = WorkflowExecution(workflow, upstream.send, prepare, **kwargs)
+    return asyncio.run(execution.run())
+
+
+def test_independent_branches_run_in_parallel_and_critical_path_is_recorded():
+    upstream = MockUpstream({
+        "GET /a": after(0.05, Response()),
+        "GET /b": after(0.05, Response()),
+        "GET /c": after(0.15, Response()),
+        "GET /join": after(0.01, Response()),
+    })
+    workflow = {"id": "wf", "nodes": [
+        {"id": "start", "type": "start", "connections": ["a", "c"]},
+        api("a", "/a", ["b"]),
+        api("b", "/b", ["join"]),
+        api("c", "/c", ["join"]),
+        api("join", "/join"),
+    ]}
+
+    document = run(workflow, upstream)
+
+    assert document["status"] == "completed"
+    assert upstream.peak == 2
+    steps = {step["node_id"]: step for step in document["steps"]}
+    assert steps["join"]["start_offset_ms"] >= max(steps["b"]["end_offset_ms"], steps["c"]["end_offset_ms"])
+    analysis = document["analysis"]
+    assert analysis["critical_path"] == ["start", "c", "join"]
+    assert analysis["wall_time_ms"] < 240  # serial would be ~260ms
+    assert analysis["parallelism"] > 1
+
+
+def test_concurrency_cap_limits_in_flight_steps():
+    upstream = MockUpstream({f"GET /{i}": after(0.02, Response()) for i in range(6)})
+    workflow = {"nodes": [api(str(i), f"/{i}") for i in range(6)]}
+
+    document = run(workflow, upstream, max_concurrency=2)
+
+    assert document["status"] == "completed"
+    assert upstream.peak == 2
+
+
+def test_retry_then_timeout_and_failure_blocks_downstream():
+    attempts = {"n": 0}
+
+    async def flaky(request):
+        attempts["n"] += 1
+        return Response(503) if attempts["n"] < 3 else Response(200)
+
+    upstream = MockUpstream({
+        "GET /flaky": flaky,
+        "GET /slow": after(1.0, Response()),
+        "GET /never": after(0, Response()),
+    })
+    workflow = {"nodes": [
+        api("flaky", "/flaky", retries=3, retry_backoff=0.001),
+        api("slow", "/slow", ["never"], timeout=0.05, retries=1, retry_backoff=0.001),
+        api("never", "/never"),
+    ]}
+
+    document = run(workflow, upstream)
+    steps = {step["node_id"]: step for step in document["steps"]}
+
+    assert steps["flaky"]["status"] == "succeeded" and steps["flaky"]["attempts"] == 3
+    assert steps["slow"]["status"] == "failed" and steps["slow"]["attempts"] == 2
+    assert "timed out" in steps["slow"]["error"]
+    assert steps["never"]["status"] == "skipped"
+    assert ("GET", "/never") not in upstream.calls
+    assert document["status"] == "failed"
+
+
+def test_condition_takes_one_branch():
+    upstream = MockUpstream({
+        "GET /check": after(0, Response(404)),
+        "GET /found": after(0, Response()),
+        "GET /missing": after(0, Response()),
+    })
+    workflow = {
+        "nodes": [
+            api("check", "/check", ["cond"], allow_error_status=True),
+            {"id": "cond", "type": "condition", "config": {"conditionType": "response_code", "conditionValue": "2xx"}},
+            api("found", "/found"),
+            api("missing", "/missing"),
+        ],
+        "connections": [
+            {"from": "cond", "fromOutput": 0, "to": "found"},
+            {"from": "cond", "fromOutput": 1, "to": "missing"},
+        ],
+    }
+
+    document = run(workflow, upstream)
+    steps = {step["node_id"]: step for step in document["steps"]}
+
+    assert steps["cond"]["result"] is False
+    assert steps["found"]["status"] == "skipped"
+    assert steps["missing"]["status"] == "succeeded"
+
+
+def test_extracted_variables_flow_to_later_steps():
+    pytest.importorskip("jsonpath_ng")
+    upstream = MockUpstream({
+        "POST /login": after(0, Response(body={"data": {"token": "abc"}})),
+        "GET /me/abc": after(0, Response(body={"name": "ada"})),
+    })
+    workflow = {"nodes": [
+        api("login", "/login", ["me"], method="POST", extract={"token": "$.data.token"}),
+        api("me", "/me/{{token}}"),
+    ]}
+
+    document = run(workflow, upstream)
+
+    assert document["status"] == "completed"
+    assert document["variables"] == {"token": "abc"}
+
+
+def test_live_log_stream_sees_every_entry():
+    upstream = MockUpstream({"GET /a": after(0.02, Response()), "GET /b": after(0.02, Response())})
+    execution = WorkflowExecution({"nodes": [api("a", "/a", ["b"]), api("b", "/b")]}, upstream.send, prepare)
+
+    async def main():
+        task = asyncio.create_task(execution.run())
+        await asyncio.sleep(0)
+        streamed = [entry async for entry in execution.events()]
+        await task
+        return streamed
+
+    streamed = asyncio.run(main())
+    assert [e["message"] for e in streamed] == [e["message"] for e in execution.logs]
+    assert streamed[-1]["message"].startswith("Execution completed")
+
+
+def test_build_graph_rejects_cycles_and_unknown_nodes():
+    with pytest.raises(WorkflowError, match="cycle"):
+        build_graph({"nodes": [{"id": "a", "connections": ["b"]}, {"id": "b", "connections": ["a"]}]})
+    with pytest.raises(WorkflowError, match="unknown node"):
+        build_graph({"nodes": [{"id": "a", "connections": ["ghost"]}]})
+
+
+def test_runs_through_pooled_http_client():
+    httpx = pytest.importorskip("httpx")
+    from http_pool import HTTPClientPool
+
+    def handler(request):
+        return httpx.Response(200, json={"path": request.url.path})
+
+    pool = HTTPClientPool(transport_factory=lambda key: httpx.MockTransport(handler))
+
+    async def send(request):
+        client = await pool.get_client(request["url"])
+        return await client.request(**request)
+
+    def prepare_absolute(config, variables):
+        return {"method": "GET", "url": config["url"]}
+
+    async def main():
+        execution = WorkflowExecution(
+            {"nodes": [api("a", "http://upstream.test/a"), api("b", "http://upstream.test/b")]},
+            send, prepare_absolute,
+        )
+        document = await execution.run()
+        await pool.aclose()
+        return document
+
+    document = asyncio.run(main())
+    assert document["status"] == "completed"
+    assert pool.stats["created"] == 1
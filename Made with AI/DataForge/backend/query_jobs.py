@@ -0,0 +1,597 @@
+"""Bounded worker processes for notebook Python, streamed queries and schema introspection.
+
+Each job runs in its own worker process under an RLIMIT_AS memory limit, and
+at most `max_workers` run at once; later jobs wait in the queue. Workers encode
+their results as NDJSON lines and send them over a pipe one chunk at a time.
+The pipe only buffers a few chunks, so a slow reader blocks the worker instead
+of growing a buffer in the server, and a large result streams with flat memory.
+The server enforces the wall-clock limit and kills the worker on timeout,
+cancellation or client disconnect.
+
+Every stream is a sequence of lines like
+
+    {"type": "job", "job_id": "..."}
+    {"type": "columns", "columns": ["id", "name"]}
+    {"type": "rows", "rows": [[1, "a"], [2, "b"]]}
+    {"type": "output", "text": "..."}
+    {"type": "result", "schema": [...]}
+    {"type": "done", "row_count": 2, "elapsed_ms": 12.5}
+
+and ends with either "done" or {"type": "error", "status": ..., "error": ...}.
+
+Schema introspection is cached per connection fingerprint, a hash of the
+connection's address and credentials, so a connection that is pointed at
+another database misses the cache. `SchemaCache.invalidate` drops an entry.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("python", "query", "schema")
+FINAL_EVENTS = ("done", "error")
+# Rows kept by collect(); streaming has no limit
+MAX_COLLECTED_ROWS = 10000
+MAX_FINISHED_JOBS = 200
+OUTPUT_FLUSH_CHARS = 4096
+
+FINGERPRINT_FIELDS = ("db_type", "host", "port", "database", "username",
+                      "encrypted_password", "file_path", "connection_string")
+
+# Statements Postgres can run through a server-side (DECLARE) cursor
+_CURSOR_STATEMENTS = ("select", "with", "values", "table")
+
+_EOF = object()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _line(event: str, **payload) -> bytes:
+    return (json.dumps({"type": event, **payload}, default=str, separators=(",", ":")) + "\n").encode()
+
+
+def connection_fingerprint(connection: Dict[str, Any]) -> str:
+    raw = json.dumps([connection.get(name) for name in FINGERPRINT_FIELDS], default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# Worker process side
+
+class _Channel:
+    """Worker end of the job pipe: batches rows and output into NDJSON chunks."""
+
+    def __init__(self, conn, chunk_rows: int):
+        self.conn = conn
+        self.chunk_rows = chunk_rows
+        self.rows: List[Any] = []
+        self.row_count = 0
+        self._output: List[str] = []
+        self._output_size = 0
+
+    def send(self, event: str, **payload):
+        self.conn.send((event, _line(event, **payload)))
+
+    def columns(self, names):
+        self.send("columns", columns=list(names))
+
+    def row(self, row: Any):
+        self.rows.append(row)
+        self.row_count += 1
+        if len(self.rows) >= self.chunk_rows:
+            self.flush_rows()
+
+    def extend(self, rows: List[Any]):
+        self.rows.extend(rows)
+        self.row_count += len(rows)
+        if len(self.rows) >= self.chunk_rows:
+            self.flush_rows()
+
+    def flush_rows(self):
+        if self.rows:
+            self.send("rows", rows=self.rows)
+            self.rows = []
+
+    def write(self, text: str):
+        self._output.append(text)
+        self._output_size += len(text)
+        if self._output_size >= OUTPUT_FLUSH_CHARS or text.endswith("\n"):
+            self.flush_output()
+
+    def flush_output(self):
+        if self._output:
+            self.send("output", text="".join(self._output))
+            self._output = []
+            self._output_size = 0
+
+    def flush(self):
+        self.flush_output()
+        self.flush_rows()
+
+
+def _apply_limits(memory_mb: int, cpu_seconds: float):
+    import resource
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_seconds:
+        # Backstop in case the server dies before it can enforce the wall-clock limit
+        seconds = int(cpu_seconds) + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+
+
+def _connect(params: Dict[str, Any]):
+    db_type = params["db_type"]
+    if db_type == "postgresql":
+        import psycopg2
+        return psycopg2.connect(host=params["host"], port=params.get("port") or 5432,
+                                database=params["database"], user=params["username"],
+                                password=params.get("password"))
+    if db_type == "mysql":
+        import mysql.connector
+        return mysql.connector.connect(host=params["host"], port=params.get("port") or 3306,
+                                       database=params["database"], user=params["username"],
+                                       password=params.get("password"))
+    if db_type == "mssql":
+        import pymssql
+        return pymssql.connect(server=params["host"], port=params.get("port") or 1433,
+                               database=params["database"], user=params["username"],
+                               password=params.get("password"))
+    if db_type == "sqlite":
+        import sqlite3
+        return sqlite3.connect(params["file_path"])
+    raise ValueError(f"Unsupported database type: {db_type}")
+
+
+def _open_cursor(conn, db_type: str, query: str):
+    """(cursor with `query` executed, whether it is a server-side cursor).
+
+    Either way rows are fetched incrementally: mysql.connector, pymssql and
+    sqlite3 cursors are unbuffered by default, while psycopg2's default cursor
+    would fetch the whole result on execute.
+    """
+    if db_type == "postgresql" and query.lstrip().split(None, 1)[0].lower() in _CURSOR_STATEMENTS:
+        import psycopg2
+        cursor = conn.cursor(name=f"dataforge_{uuid.uuid4().hex}")
+        try:
+            cursor.execute(query)
+            return cursor, True
+        except psycopg2.ProgrammingError:
+            # e.g. a data-modifying WITH, which cannot be declared as a cursor
+            conn.rollback()
+    cursor = conn.cursor()
+    cursor.execute(query)
+    return cursor, False
+
+
+def _run_query(payload: Dict[str, Any], channel: _Channel):
+    params, query = payload["connection"], payload["query"]
+    if params["db_type"] == "mongodb":
+        return _run_mongo_query(params, query, channel)
+
+    conn = _connect(params)
+    try:
+        cursor, server_side = _open_cursor(conn, params["db_type"], query)
+        # Server-side cursors only describe their columns after the first fetch
+        batch = cursor.fetchmany(channel.chunk_rows) if server_side else None
+        if cursor.description:
+            channel.columns(desc[0] for desc in cursor.description)
+            while True:
+                if batch is None:
+                    batch = cursor.fetchmany(channel.chunk_rows)
+                if not batch:
+                    break
+                channel.extend(batch)
+                batch = None
+        cursor.close()
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _run_mongo_query(params: Dict[str, Any], query: str, channel: _Channel):
+    from pymongo import MongoClient
+
+    spec = json.loads(query)
+    operation = spec.get("operation", "find")
+    if operation != "find":
+        raise ValueError(f"Unsupported operation: {operation}")
+    client = MongoClient(params["connection_string"])
+    try:
+        collection = client[params["database"]][spec["collection"]]
+        for doc in collection.find(spec.get("query", {})).batch_size(channel.chunk_rows):
+            if "_id" in doc:
+                doc["_id"] = str(doc["_id"])
+            channel.row(doc)
+    finally:
+        client.close()
+
+
+def _run_python(payload: Dict[str, Any], channel: _Channel):
+    """Run notebook code under RestrictedPython.
+
+    print() output is streamed as "output" chunks and `emit(row)` streams a
+    JSON-serialisable row; `emit_columns(names)` optionally names them.
+    """
+    from RestrictedPython import compile_restricted
+    from RestrictedPython.Eval import default_guarded_getitem, default_guarded_getiter
+    from RestrictedPython.Guards import (full_write_guard, guarded_iter_unpack_sequence,
+                                         safe_builtins, safer_getattr)
+    from RestrictedPython.PrintCollector import PrintCollector
+
+    class StreamingPrintCollector(PrintCollector):
+        def write(self, text):
+            channel.write(text)
+
+    byte_code = compile_restricted(payload["code"], "<notebook>", "exec")
+    safe_globals = {
+        "__builtins__": safe_builtins,
+        "_getattr_": safer_getattr,
+        "_getitem_": default_guarded_getitem,
+        "_getiter_": default_guarded_getiter,
+        "_iter_unpack_sequence_": guarded_iter_unpack_sequence,
+        "_write_": full_write_guard,
+        "_print_": StreamingPrintCollector,
+        "json": json,
+        "emit": channel.row,
+        "emit_columns": channel.columns,
+    }
+    exec(byte_code, safe_globals)
+
+
+def _group_columns(rows) -> List[Dict[str, Any]]:
+    """[(table, column, type)] ordered by table -> schema entries."""
+    schema: List[Dict[str, Any]] = []
+    for table, column, data_type in rows:
+        if not schema or schema[-1]["table"] != table:
+            schema.append({"table": table, "columns": []})
+        if column is not None:
+            schema[-1]["columns"].append({"name": column, "type": data_type})
+    return schema
+
+
+_SCHEMA_QUERIES = {
+    "postgresql": """
+        SELECT t.table_name, c.column_name, c.data_type
+        FROM information_schema.tables t
+        LEFT JOIN information_schema.columns c
+          ON c.table_schema = t.table_schema AND c.table_name = t.table_name
+        WHERE t.table_schema = 'public'
+        ORDER BY t.table_name, c.ordinal_position
+    """,
+    "mysql": """
+        SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """,
+    "mssql": """
+        SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE
+        FROM INFORMATION_SCHEMA.COLUMNS
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """,
+    "sqlite": """
+        SELECT m.name, p.name, p.type
+        FROM sqlite_master m LEFT JOIN pragma_table_info(m.name) p
+        WHERE m.type = 'table'
+        ORDER BY m.name, p.cid
+    """,
+}
+
+
+def _run_schema(payload: Dict[str, Any], channel: _Channel):
+    params = payload["connection"]
+    query = _SCHEMA_QUERIES.get(params["db_type"])
+    if query is None:
+        channel.send("result", schema=[])
+        return
+    # One query for every table's columns rather than one per table
+    conn = _connect(params)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        schema = _group_columns(cursor.fetchall())
+        cursor.close()
+    finally:
+        conn.close()
+    channel.send("result", schema=schema)
+
+
+_RUNNERS = {"python": _run_python, "query": _run_query, "schema": _run_schema}
+
+
+def _worker_main(kind: str, payload: Dict[str, Any], conn, memory_mb: int,
+                 cpu_seconds: float, chunk_rows: int):
+    channel = _Channel(conn, chunk_rows)
+    started = time.perf_counter()
+    try:
+        _apply_limits(memory_mb, cpu_seconds)
+        _RUNNERS[kind](payload, channel)
+        channel.flush()
+        channel.send("done", row_count=channel.row_count,
+                     elapsed_ms=round((time.perf_counter() - started) * 1000, 1))
+    except (BrokenPipeError, EOFError):
+        # The server stopped reading; nothing left to report to
+        pass
+    except MemoryError:
+        channel.rows = []
+        channel.flush_output()
+        channel.send("error", status="failed", error=f"Memory limit of {memory_mb} MB exceeded")
+    except Exception as e:
+        channel.flush_output()
+        channel.send("error", status="failed", error=str(e), traceback=traceback.format_exc())
+    finally:
+        conn.close()
+
+
+# Server side
+
+def _receive(conn, timeout: float):
+    """Next (event, line) from a worker, None on timeout or _EOF once it has exited."""
+    try:
+        if not conn.poll(timeout):
+            return None
+        return conn.recv()
+    except (EOFError, OSError):
+        return _EOF
+
+
+@dataclass
+class QueryJob:
+    id: str
+    user_id: str
+    kind: str
+    payload: Dict[str, Any] = field(repr=False)
+    timeout: float
+    # queued, running, completed, failed, cancelled, timed_out
+    status: str = "queued"
+    error: Optional[str] = None
+    row_count: int = 0
+    bytes_sent: int = 0
+    created_at: str = field(default_factory=_now)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    process: Any = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in ("queued", "running")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "error": self.error,
+            "row_count": self.row_count,
+            "bytes_sent": self.bytes_sent,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class QueryJobs:
+    def __init__(self, max_workers: int = 4, timeout: float = 60.0, memory_mb: int = 512,
+                 chunk_rows: int = 1000):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.chunk_rows = chunk_rows
+        self._slots = asyncio.Semaphore(max_workers)
+        self._context = multiprocessing.get_context("spawn")
+        self.jobs: "OrderedDict[str, QueryJob]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "QueryJobs":
+        return cls(
+            max_workers=int(os.environ.get("QUERY_WORKERS", 4)),
+            timeout=float(os.environ.get("QUERY_TIMEOUT", 60)),
+            memory_mb=int(os.environ.get("QUERY_MEMORY_MB", 512)),
+            chunk_rows=int(os.environ.get("QUERY_CHUNK_ROWS", 1000)),
+        )
+
+    def submit(self, user_id: str, kind: str, payload: Dict[str, Any],
+               timeout: Optional[float] = None) -> QueryJob:
+        """Register a job; it starts when stream() or collect() is called."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        job = QueryJob(id=str(uuid.uuid4()), user_id=user_id, kind=kind, payload=payload, timeout=timeout)
+        self.jobs[job.id] = job
+        self._prune()
+        return job
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id: str, user_id: str) -> Optional[QueryJob]:
+        job = self.jobs.get(job_id)
+        return job if job is not None and job.user_id == user_id else None
+
+    def list(self, user_id: str) -> List[Dict[str, Any]]:
+        return [job.summary() for job in reversed(self.jobs.values()) if job.user_id == user_id]
+
+    def cancel(self, job_id: str, user_id: str) -> Optional[QueryJob]:
+        job = self.get(job_id, user_id)
+        if job is not None and not job.finished:
+            self._finish(job, "cancelled", "Job cancelled")
+            if job.process is not None and job.process.is_alive():
+                job.process.kill()
+        return job
+
+    def _finish(self, job: QueryJob, status: str, error: Optional[str] = None):
+        if not job.finished:
+            job.status = status
+            job.error = error
+            job.finished_at = _now()
+
+    async def stream(self, job: QueryJob) -> AsyncIterator[Tuple[str, bytes]]:
+        """Run a job and yield its (event, NDJSON line) pairs as they arrive."""
+        yield "job", _line("job", job_id=job.id)
+        conn = None
+        try:
+            async with self._slots:
+                if job.finished:
+                    yield "error", _line("error", status=job.status, error=job.error)
+                    return
+                conn, child_conn = self._context.Pipe(duplex=False)
+                process = self._context.Process(
+                    target=_worker_main,
+                    args=(job.kind, job.payload, child_conn, self.memory_mb, job.timeout, self.chunk_rows),
+                    daemon=True,
+                )
+                try:
+                    process.start()
+                finally:
+                    child_conn.close()
+                job.process = process
+                job.status = "running"
+                job.started_at = _now()
+                deadline = time.monotonic() + job.timeout
+
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._finish(job, "timed_out", f"Wall-clock limit of {job.timeout:g}s exceeded")
+                        yield "error", _line("error", status=job.status, error=job.error)
+                        return
+                    message = await asyncio.to_thread(_receive, conn, remaining)
+                    if message is None:
+                        continue
+                    if message is _EOF:
+                        job.process.join(1)
+                        self._finish(job, "failed", self._exit_reason(job.process.exitcode))
+                        yield "error", _line("error", status=job.status, error=job.error)
+                        return
+
+                    event, line = message
+                    job.bytes_sent += len(line)
+                    if event == "done":
+                        job.row_count = json.loads(line)["row_count"]
+                        self._finish(job, "completed")
+                    elif event == "error":
+                        self._finish(job, "failed", json.loads(line)["error"])
+                    yield event, line
+                    if event in FINAL_EVENTS:
+                        return
+        finally:
+            # Reached on completion, timeout, cancellation and client disconnect
+            self._finish(job, "cancelled", "Client disconnected")
+            if job.process is not None:
+                if job.process.is_alive():
+                    job.process.kill()
+                job.process.join(1)
+                job.process = None
+            if conn is not None:
+                conn.close()
+
+    @staticmethod
+    def _exit_reason(exitcode: Optional[int]) -> str:
+        if exitcode is not None and exitcode < 0:
+            return f"Worker killed by signal {-exitcode}"
+        return f"Worker exited with code {exitcode}"
+
+    async def collect(self, job: QueryJob, max_rows: int = MAX_COLLECTED_ROWS) -> Dict[str, Any]:
+        """Run a job and gather its stream into one response document."""
+        result: Dict[str, Any] = {"job_id": job.id, "status": "success"}
+        output: List[str] = []
+        rows: List[Any] = []
+        seen = 0
+        async for event, line in self.stream(job):
+            if event == "job":
+                continue
+            data = json.loads(line)
+            if event == "output":
+                output.append(data["text"])
+            elif event == "columns":
+                result["columns"] = data["columns"]
+            elif event == "rows":
+                seen += len(data["rows"])
+                rows.extend(data["rows"][:max_rows - len(rows)])
+            elif event == "result":
+                result.update({key: value for key, value in data.items() if key != "type"})
+            elif event == "error":
+                result.update({"status": "error", "error": data["error"]})
+                if data.get("traceback"):
+                    result["traceback"] = data["traceback"]
+        result["output"] = "".join(output)
+        if seen or "columns" in result:
+            result["results"] = rows
+            result["row_count"] = seen
+            result["truncated"] = seen > len(rows)
+        return result
+
+    async def aclose(self):
+        for job in list(self.jobs.values()):
+            self.cancel(job.id, job.user_id)
+
+
+class SchemaCache:
+    """Introspected schemas by connection fingerprint, with a TTL and LRU eviction."""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # Loads in flight, shared by concurrent requests for the same fingerprint
+        self._loading: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    @classmethod
+    def from_env(cls) -> "SchemaCache":
+        return cls(ttl=float(os.environ.get("SCHEMA_CACHE_TTL", 300)),
+                   max_entries=int(os.environ.get("SCHEMA_CACHE_SIZE", 256)))
+
+    def invalidate(self, fingerprint: str) -> bool:
+        return self._entries.pop(fingerprint, None) is not None
+
+    async def get(self, fingerprint: str, load: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """(schema, served from cache) for a fingerprint, calling `load` on a miss."""
+        entry = self._entries.get(fingerprint)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self._entries.move_to_end(fingerprint)
+            self.stats["hits"] += 1
+            return entry[1], True
+
+        pending = self._loading.get(fingerprint)
+        if pending is not None:
+            return await asyncio.shield(pending), False
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[fingerprint] = future
+        try:
+            schema = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unshared failure is not logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(schema)
+            self._entries[fingerprint] = (time.monotonic(), schema)
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return schema, False
+        finally:
+            del self._loading[fingerprint]
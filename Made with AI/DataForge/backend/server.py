@@ -1,5 +1,5 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Depends, Cookie, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -19,11 +19,8 @@ import psycopg2
 import mysql.connector
 import pymssql
 import sqlite3
-from RestrictedPython import compile_restricted
-from RestrictedPython.Guards import safe_builtins, guarded_iter_unpack_sequence
-import io
-import sys
 import traceback
+from query_jobs import QueryJobs, SchemaCache, connection_fingerprint
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -45,6 +42,10 @@ ACCESS_TOKEN_EXPIRE_DAYS = 7
 ENCRYPTION_KEY = os.environ.get('ENCRYPTION_KEY', Fernet.generate_key().decode())
 fernet = Fernet(ENCRYPTION_KEY.encode() if isinstance(ENCRYPTION_KEY, str) else ENCRYPTION_KEY)
 
+# Worker processes for notebook code, streamed queries and schema introspection
+query_jobs = QueryJobs.from_env()
+schema_cache = SchemaCache.from_env()
+
 # Create the main app
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
@@ -170,6 +171,21 @@ def parse_connection_string(connection_string: str, db_type: str) -> dict:
     except Exception as e:
         raise ValueError(f"Invalid connection string format: {str(e)}")
 
+def connection_params(connection: dict) -> dict:
+    """Plain connection settings, with the password decrypted, for a job worker"""
+    params = {key: connection.get(key) for key in ("db_type", "host", "port", "database", "username", "file_path", "connection_string")}
+    params['password'] = decrypt_password(connection['encrypted_password']) if connection.get('encrypted_password') else None
+    if params['connection_string'] and params['db_type'] not in ("sqlite", "mongodb") and not params['host']:
+        parsed = parse_connection_string(params['connection_string'], params['db_type'])
+        params.update({key: value for key, value in parsed.items() if value is not None})
+    return params
+
+def ndjson_response(job) -> StreamingResponse:
+    async def body():
+        async for _, line in query_jobs.stream(job):
+            yield line
+    return StreamingResponse(body(), media_type="application/x-ndjson", headers={"X-Job-Id": job.id})
+
 async def get_current_user(session_token: Optional[str] = Cookie(None)) -> User:
     if not session_token:
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -375,9 +391,10 @@ async def get_connections(current_user: User = Depends(get_current_user)):
 
 @api_router.delete("/connections/{connection_id}")
 async def delete_connection(connection_id: str, current_user: User = Depends(get_current_user)):
-    result = await db.connections.delete_one({"id": connection_id, "user_id": current_user.id})
-    if result.deleted_count == 0:
+    connection = await db.connections.find_one_and_delete({"id": connection_id, "user_id": current_user.id}, {"_id": 0})
+    if not connection:
         raise HTTPException(status_code=404, detail="Connection not found")
+    schema_cache.invalidate(connection_fingerprint(connection))
     return {"message": "Connection deleted"}
 
 @api_router.post("/connections/test")
@@ -558,6 +575,15 @@ async def execute_query(query_data: QueryExecute, current_user: User = Depends(g
             "traceback": traceback.format_exc()
         }
 
+@api_router.post("/query/stream")
+async def stream_query(query_data: QueryExecute, current_user: User = Depends(get_current_user)):
+    """Run a query in a worker process and stream its rows as NDJSON chunks"""
+    connection = await db.connections.find_one({"id": query_data.connection_id, "user_id": current_user.id}, {"_id": 0})
+    if not connection:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    job = query_jobs.submit(current_user.id, "query", {"connection": connection_params(connection), "query": query_data.query})
+    return ndjson_response(job)
+
 # Notebook routes
 @api_router.post("/notebooks")
 async def create_notebook(notebook_data: NotebookCreate, current_user: User = Depends(get_current_user)):
@@ -616,130 +642,62 @@ async def delete_notebook(notebook_id: str, current_user: User = Depends(get_cur
 # Python execution for notebooks
 @api_router.post("/notebooks/execute-python")
 async def execute_python(code: Dict[str, str], current_user: User = Depends(get_current_user)):
-    try:
-        # Capture stdout
-        old_stdout = sys.stdout
-        sys.stdout = io.StringIO()
-        
-        # Compile restricted code
-        byte_code = compile_restricted(code['code'], '<string>', 'exec')
-        
-        # Safe globals
-        safe_globals = {
-            '__builtins__': safe_builtins,
-            '_iter_unpack_sequence_': guarded_iter_unpack_sequence,
-            'json': json,
-        }
-        
-        # Execute
-        exec(byte_code, safe_globals)
-        
-        # Get output
-        output = sys.stdout.getvalue()
-        sys.stdout = old_stdout
-        
-        return {
-            "status": "success",
-            "output": output
-        }
-    except Exception as e:
-        sys.stdout = old_stdout
-        return {
-            "status": "error",
-            "error": str(e),
-            "traceback": traceback.format_exc()
-        }
+    job = query_jobs.submit(current_user.id, "python", {"code": code['code']})
+    return await query_jobs.collect(job)
+
+@api_router.post("/notebooks/execute-python/stream")
+async def stream_python(code: Dict[str, str], current_user: User = Depends(get_current_user)):
+    """Run notebook code and stream its print() output and emit() rows as NDJSON chunks"""
+    job = query_jobs.submit(current_user.id, "python", {"code": code['code']})
+    return ndjson_response(job)
+
+# Jobs
+@api_router.get("/jobs")
+async def get_jobs(current_user: User = Depends(get_current_user)):
+    return query_jobs.list(current_user.id)
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = query_jobs.get(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.summary()
+
+@api_router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = query_jobs.cancel(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.summary()
 
 # Schema explorer
 @api_router.get("/schema/{connection_id}")
-async def get_schema(connection_id: str, current_user: User = Depends(get_current_user)):
+async def get_schema(connection_id: str, refresh: bool = False, current_user: User = Depends(get_current_user)):
     connection = await db.connections.find_one({"id": connection_id, "user_id": current_user.id}, {"_id": 0})
     if not connection:
         raise HTTPException(status_code=404, detail="Connection not found")
     
-    try:
-        schema = []
-        
-        if connection['db_type'] == "postgresql":
-            password = decrypt_password(connection['encrypted_password']) if connection.get('encrypted_password') else None
-            conn = psycopg2.connect(
-                host=connection['host'],
-                port=connection.get('port', 5432),
-                database=connection['database'],
-                user=connection['username'],
-                password=password
-            )
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public'
-            """)
-            tables = cursor.fetchall()
-            
-            for table in tables:
-                table_name = table[0]
-                cursor.execute(f"""
-                    SELECT column_name, data_type 
-                    FROM information_schema.columns 
-                    WHERE table_name = '{table_name}'
-                """)
-                columns = cursor.fetchall()
-                schema.append({
-                    "table": table_name,
-                    "columns": [{"name": col[0], "type": col[1]} for col in columns]
-                })
-            
-            cursor.close()
-            conn.close()
-            
-        elif connection['db_type'] == "mysql":
-            password = decrypt_password(connection['encrypted_password']) if connection.get('encrypted_password') else None
-            conn = mysql.connector.connect(
-                host=connection['host'],
-                port=connection.get('port', 3306),
-                database=connection['database'],
-                user=connection['username'],
-                password=password
-            )
-            cursor = conn.cursor()
-            cursor.execute("SHOW TABLES")
-            tables = cursor.fetchall()
-            
-            for table in tables:
-                table_name = table[0]
-                cursor.execute(f"DESCRIBE {table_name}")
-                columns = cursor.fetchall()
-                schema.append({
-                    "table": table_name,
-                    "columns": [{"name": col[0], "type": col[1]} for col in columns]
-                })
-            
-            cursor.close()
-            conn.close()
-            
-        elif connection['db_type'] == "sqlite":
-            conn = sqlite3.connect(connection['file_path'])
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
-            
-            for table in tables:
-                table_name = table[0]
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                columns = cursor.fetchall()
-                schema.append({
-                    "table": table_name,
-                    "columns": [{"name": col[1], "type": col[2]} for col in columns]
-                })
-            
-            cursor.close()
-            conn.close()
-        
-        return {"schema": schema}
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    fingerprint = connection_fingerprint(connection)
+    if refresh:
+        schema_cache.invalidate(fingerprint)
+    
+    async def introspect():
+        job = query_jobs.submit(current_user.id, "schema", {"connection": connection_params(connection)})
+        result = await query_jobs.collect(job)
+        if result['status'] != "success":
+            raise HTTPException(status_code=500, detail=result['error'])
+        return result['schema']
+    
+    schema, cached = await schema_cache.get(fingerprint, introspect)
+    return {"schema": schema, "cached": cached}
+
+@api_router.delete("/schema/{connection_id}/cache")
+async def invalidate_schema(connection_id: str, current_user: User = Depends(get_current_user)):
+    connection = await db.connections.find_one({"id": connection_id, "user_id": current_user.id}, {"_id": 0})
+    if not connection:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    invalidated = schema_cache.invalidate(connection_fingerprint(connection))
+    return {"message": "Schema cache invalidated", "invalidated": invalidated}
 
 # Include router
 app.include_router(api_router)
@@ -760,4 +718,5 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await query_jobs.aclose()
     client.close()
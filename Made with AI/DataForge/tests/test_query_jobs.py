@@ -0,0 +1,131 @@
+import asyncio
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from query_jobs import QueryJobs, SchemaCache, connection_fingerprint
+
+ENDLESS = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+
+@pytest.fixture
+def params(tmp_path):
+    path = tmp_path / "data.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, price REAL)")
+    conn.execute("CREATE TABLE tags (item_id INTEGER, tag TEXT)")
+    conn.executemany("INSERT INTO items (name, price) VALUES (?, ?)", [(f"item {i}", i / 2) for i in range(2500)])
+    conn.commit()
+    conn.close()
+    return {"db_type": "sqlite", "file_path": str(path)}
+
+
+async def stream_lines(jobs, job):
+    return [json.loads(line) async for _, line in jobs.stream(job)]
+
+
+def test_query_streams_rows_in_chunks(params):
+    jobs = QueryJobs(max_workers=1, chunk_rows=1000)
+    job = jobs.submit("u1", "query", {"connection": params, "query": "SELECT id, name FROM items ORDER BY id"})
+    lines = asyncio.run(stream_lines(jobs, job))
+
+    assert lines[0] == {"type": "job", "job_id": job.id}
+    assert lines[1] == {"type": "columns", "columns": ["id", "name"]}
+    chunks = [line["rows"] for line in lines if line["type"] == "rows"]
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    assert chunks[0][0] == [1, "item 0"]
+    assert lines[-1]["type"] == "done" and lines[-1]["row_count"] == 2500
+    assert job.status == "completed" and job.row_count == 2500
+
+
+def test_collect_caps_buffered_rows(params):
+    jobs = QueryJobs(max_workers=1)
+    job = jobs.submit("u1", "query", {"connection": params, "query": "SELECT id FROM items"})
+    result = asyncio.run(jobs.collect(job, max_rows=10))
+    assert result["status"] == "success"
+    assert len(result["results"]) == 10
+    assert result["row_count"] == 2500 and result["truncated"]
+
+
+def test_query_errors_are_reported(params):
+    jobs = QueryJobs(max_workers=1)
+    job = jobs.submit("u1", "query", {"connection": params, "query": "SELECT * FROM missing"})
+    result = asyncio.run(jobs.collect(job))
+    assert result["status"] == "error"
+    assert "no such table" in result["error"]
+    assert job.status == "failed"
+
+
+def test_wall_clock_limit_kills_worker(params):
+    jobs = QueryJobs(max_workers=1)
+    job = jobs.submit("u1", "query", {"connection": params, "query": ENDLESS}, timeout=0.5)
+    result = asyncio.run(jobs.collect(job))
+    assert result["status"] == "error"
+    assert job.status == "timed_out"
+    assert job.process is None
+
+
+def test_cancel_running_and_queued_jobs(params):
+    jobs = QueryJobs(max_workers=1)
+    running = jobs.submit("u1", "query", {"connection": params, "query": ENDLESS})
+    queued = jobs.submit("u1", "query", {"connection": params, "query": "SELECT 1"})
+
+    async def main():
+        tasks = [asyncio.create_task(jobs.collect(running)), asyncio.create_task(jobs.collect(queued))]
+        while running.status != "running":
+            await asyncio.sleep(0.05)
+        assert jobs.cancel(running.id, "u2") is None
+        jobs.cancel(queued.id, "u1")
+        jobs.cancel(running.id, "u1")
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(main())
+    assert [result["error"] for result in results] == ["Job cancelled", "Job cancelled"]
+    assert running.status == queued.status == "cancelled"
+    assert [job["job_id"] for job in jobs.list("u1")] == [queued.id, running.id]
+
+
+def test_schema_introspection_and_cache(params):
+    jobs = QueryJobs(max_workers=2)
+    cache = SchemaCache(ttl=60)
+    fingerprint = connection_fingerprint(params)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        result = await jobs.collect(jobs.submit("u1", "schema", {"connection": params}))
+        return result["schema"]
+
+    async def main():
+        first = await asyncio.gather(cache.get(fingerprint, load), cache.get(fingerprint, load))
+        second = await cache.get(fingerprint, load)
+        cache.invalidate(fingerprint)
+        third = await cache.get(fingerprint, load)
+        return first, second, third
+
+    first, second, third = asyncio.run(main())
+    assert len(loads) == 2
+    schema, cached = second
+    assert cached and not third[1]
+    assert first[0][0] == first[1][0] == schema
+    assert schema == [
+        {"table": "items", "columns": [{"name": "id", "type": "INTEGER"}, {"name": "name", "type": "TEXT"},
+                                       {"name": "price", "type": "REAL"}]},
+        {"table": "tags", "columns": [{"name": "item_id", "type": "INTEGER"}, {"name": "tag", "type": "TEXT"}]},
+    ]
+    assert connection_fingerprint({**params, "file_path": "/elsewhere.db"}) != fingerprint
+
+
+def test_python_job_streams_output_and_rows():
+    pytest.importorskip("RestrictedPython")
+    jobs = QueryJobs(max_workers=1, chunk_rows=2)
+    code = "emit_columns(['n'])\nfor i in range(3):\n    emit([i])\nprint('total', 3)\n"
+    result = asyncio.run(jobs.collect(jobs.submit("u1", "python", {"code": code})))
+    assert result["status"] == "success"
+    assert result["output"] == "total 3\n"
+    assert result["columns"] == ["n"] and result["results"] == [[0], [1], [2]]
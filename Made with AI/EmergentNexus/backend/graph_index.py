@@ -0,0 +1,318 @@
+"""In-memory CSR adjacency over the nodes/relations collections for graph traversal.
+
+RelationGraph is an immutable snapshot: node ids are mapped to dense integers
+and each direction's adjacency is stored as an offsets array plus parallel
+neighbor / relation-index arrays. GraphCache holds the current snapshot,
+rebuilds it lazily after writes and is shared by all traversal endpoints.
+
+Every traversal takes a TraversalBudget. Depth, nodes visited and neighbors
+followed per node are capped, and when a cap is hit the traversal stops
+early and records why on the budget instead of running unbounded.
+"""
+
+import asyncio
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DIRECTIONS = ("out", "in", "both")
+
+MAX_DEPTH = 8
+MAX_NODES = 10000
+
+
+@dataclass
+class TraversalBudget:
+    max_depth: int = 3
+    max_nodes: int = 1000
+    # Neighbors followed per node; hubs beyond this are only partially expanded
+    max_fanout: int = 500
+    truncated: bool = False
+    reason: Optional[str] = None
+    visited: int = 0
+
+    def stop(self, reason: str):
+        self.truncated = True
+        if self.reason is None:
+            self.reason = reason
+
+    def summary(self) -> Dict[str, Any]:
+        return {"truncated": self.truncated, "reason": self.reason, "visited": self.visited}
+
+
+def _csr(count: int, sources: Sequence[int], targets: Sequence[int]) -> Tuple[array, array, array]:
+    """Offsets, neighbors and relation indexes for edges sources[i] -> targets[i]."""
+    offsets = array("l", [0]) * (count + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+
+    neighbors = array("l", [0]) * len(sources)
+    edges = array("l", [0]) * len(sources)
+    cursor = array("l", offsets[:count])
+    for edge, (source, target) in enumerate(zip(sources, targets)):
+        slot = cursor[source]
+        neighbors[slot] = target
+        edges[slot] = edge
+        cursor[source] = slot + 1
+    return offsets, neighbors, edges
+
+
+class RelationGraph:
+    def __init__(self, nodes: List[Dict[str, Any]], relations: List[Dict[str, Any]]):
+        self.ids: List[str] = [node["id"] for node in nodes]
+        self.types: List[str] = [node.get("node_type", "") for node in nodes]
+        self.index: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.ids)}
+
+        # Relations whose endpoints no longer exist are left out of the graph
+        self.relations: List[Dict[str, Any]] = []
+        sources, targets = [], []
+        for relation in relations:
+            source = self.index.get(relation.get("from_id"))
+            target = self.index.get(relation.get("to_id"))
+            if source is None or target is None:
+                continue
+            self.relations.append(relation)
+            sources.append(source)
+            targets.append(target)
+
+        count = len(self.ids)
+        self._out = _csr(count, sources, targets)
+        self._in = _csr(count, targets, sources)
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.relations)
+
+    def neighbors(self, node: int, direction: str) -> Iterator[Tuple[int, int]]:
+        """(neighbor, relation index) pairs for a node index."""
+        for offsets, neighbors, edges in self._adjacency(direction):
+            for slot in range(offsets[node], offsets[node + 1]):
+                yield neighbors[slot], edges[slot]
+
+    def degree(self, node: int, direction: str) -> int:
+        return sum(offsets[node + 1] - offsets[node] for offsets, _, _ in self._adjacency(direction))
+
+    def _adjacency(self, direction: str):
+        if direction == "out":
+            return (self._out,)
+        if direction == "in":
+            return (self._in,)
+        return (self._out, self._in)
+
+    def _expand(self, node: int, direction: str, budget: TraversalBudget) -> Iterator[Tuple[int, int]]:
+        if self.degree(node, direction) > budget.max_fanout:
+            budget.stop("max_fanout")
+        for followed, pair in enumerate(self.neighbors(node, direction)):
+            if followed >= budget.max_fanout:
+                return
+            yield pair
+
+    def neighborhood(self, start: str, direction: str, budget: TraversalBudget) -> Iterator[Tuple[str, Any]]:
+        """Breadth-first k-hop neighborhood.
+
+        Yields ("node", (node_id, depth)) for each node reached and
+        ("edge", relation) for each relation followed between reached nodes.
+        """
+        origin = self.index[start]
+        depths = {origin: 0}
+        emitted = set()
+        budget.visited = 1
+        yield "node", (start, 0)
+
+        frontier = [origin]
+        for depth in range(1, budget.max_depth + 1):
+            next_frontier = []
+            for node in frontier:
+                for neighbor, edge in self._expand(node, direction, budget):
+                    if neighbor not in depths:
+                        if len(depths) >= budget.max_nodes:
+                            budget.stop("max_nodes")
+                            continue
+                        depths[neighbor] = depth
+                        budget.visited = len(depths)
+                        next_frontier.append(neighbor)
+                        yield "node", (self.ids[neighbor], depth)
+                    if edge not in emitted:
+                        emitted.add(edge)
+                        yield "edge", self.relations[edge]
+            if not next_frontier:
+                return
+            frontier = next_frontier
+        if any(self.degree(node, direction) for node in frontier):
+            budget.stop("max_depth")
+
+    def shortest_path(self, source: str, target: str, direction: str,
+                      budget: TraversalBudget) -> Optional[List[Tuple[str, Optional[Dict[str, Any]]]]]:
+        """Fewest-hops path as [(node_id, relation used to reach it)], or None.
+
+        Bidirectional breadth-first search: the smaller frontier is expanded
+        one full layer at a time, walking relations backwards from the target.
+        """
+        start, goal = self.index[source], self.index[target]
+        if start == goal:
+            budget.visited = 1
+            return [(source, None)]
+
+        backward = {"out": "in", "in": "out", "both": "both"}[direction]
+        # node -> (parent node, relation index, distance from that side's root)
+        forward_seen: Dict[int, Tuple[int, int, int]] = {start: (-1, -1, 0)}
+        backward_seen: Dict[int, Tuple[int, int, int]] = {goal: (-1, -1, 0)}
+        forward_frontier, backward_frontier = [start], [goal]
+        forward_depth = backward_depth = 0
+
+        while forward_frontier and backward_frontier:
+            if forward_depth + backward_depth >= budget.max_depth:
+                budget.stop("max_depth")
+                return None
+            if len(forward_frontier) <= len(backward_frontier):
+                seen, other, frontier, step = forward_seen, backward_seen, forward_frontier, direction
+                forward_depth += 1
+                depth = forward_depth
+            else:
+                seen, other, frontier, step = backward_seen, forward_seen, backward_frontier, backward
+                backward_depth += 1
+                depth = backward_depth
+
+            next_frontier = []
+            best: Optional[Tuple[int, int]] = None
+            for node in frontier:
+                for neighbor, edge in self._expand(node, step, budget):
+                    if neighbor in seen:
+                        continue
+                    if len(forward_seen) + len(backward_seen) >= budget.max_nodes:
+                        budget.stop("max_nodes")
+                        return None
+                    seen[neighbor] = (node, edge, depth)
+                    next_frontier.append(neighbor)
+                    if neighbor in other:
+                        length = depth + other[neighbor][2]
+                        if best is None or length < best[0]:
+                            best = (length, neighbor)
+            budget.visited = len(forward_seen) + len(backward_seen)
+            if best is not None:
+                return self._join_path(best[1], forward_seen, backward_seen)
+
+            if seen is forward_seen:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+        return None
+
+    def _join_path(self, meet: int, forward_seen, backward_seen) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        head = []
+        node = meet
+        while node != -1:
+            parent, edge, _ = forward_seen[node]
+            head.append((node, edge))
+            node = parent
+        head.reverse()
+
+        path = [(self.ids[node], self.relations[edge] if edge != -1 else None) for node, edge in head]
+        node = meet
+        while True:
+            parent, edge, _ = backward_seen[node]
+            if parent == -1:
+                break
+            path.append((self.ids[parent], self.relations[edge]))
+            node = parent
+        return path
+
+    def components(self, node_types: Optional[Sequence[str]] = None,
+                   min_size: int = 1) -> List[List[str]]:
+        """Weakly connected components, largest first.
+
+        With node_types, only nodes of those types and the relations between
+        them are considered.
+        """
+        wanted = set(node_types) if node_types else None
+        parent = list(range(len(self.ids)))
+
+        def find(node: int) -> int:
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for relation in self.relations:
+            source, target = self.index[relation["from_id"]], self.index[relation["to_id"]]
+            if wanted is not None and (self.types[source] not in wanted or self.types[target] not in wanted):
+                continue
+            a, b = find(source), find(target)
+            if a != b:
+                parent[b] = a
+
+        groups: Dict[int, List[str]] = {}
+        for node, node_id in enumerate(self.ids):
+            if wanted is None or self.types[node] in wanted:
+                groups.setdefault(find(node), []).append(node_id)
+        components = [members for members in groups.values() if len(members) >= min_size]
+        components.sort(key=lambda members: (-len(members), members[0]))
+        return components
+
+    def subgraph(self, node_types: Sequence[str], budget: TraversalBudget) -> Iterator[Tuple[str, Any]]:
+        """All nodes of the given types, then the relations between them."""
+        wanted = set(node_types)
+        included = set()
+        for node, node_type in enumerate(self.types):
+            if node_type not in wanted:
+                continue
+            if len(included) >= budget.max_nodes:
+                budget.stop("max_nodes")
+                break
+            included.add(node)
+            yield "node", (self.ids[node], None)
+        budget.visited = len(included)
+
+        for node in sorted(included):
+            offsets, neighbors, edges = self._out
+            for slot in range(offsets[node], offsets[node + 1]):
+                if neighbors[slot] in included:
+                    yield "edge", self.relations[edges[slot]]
+
+
+class GraphCache:
+    """The current RelationGraph for a database, rebuilt on first use after a write."""
+
+    def __init__(self, db):
+        self.db = db
+        self._graph: Optional[RelationGraph] = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self.stats = {"builds": 0}
+
+    def invalidate(self):
+        self._generation += 1
+
+    async def get(self) -> RelationGraph:
+        graph = self._graph
+        if graph is not None and graph.generation == self._generation:
+            return graph
+        async with self._lock:
+            graph = self._graph
+            if graph is not None and graph.generation == self._generation:
+                return graph
+            # Writes that land while loading bump the generation again, so
+            # this snapshot is replaced on the next request
+            generation = self._generation
+            nodes = await self.db.nodes.find({}, {"_id": 0, "id": 1, "node_type": 1}).to_list(None)
+            relations = await self.db.relations.find({}, {"_id": 0}).to_list(None)
+            graph = await asyncio.to_thread(RelationGraph, nodes, relations)
+            graph.generation = generation
+            self._graph = graph
+            self.stats["builds"] += 1
+            return graph
+
+    def snapshot(self) -> Dict[str, Any]:
+        graph = self._graph
+        return {
+            **self.stats,
+            "nodes": len(graph) if graph else 0,
+            "relations": graph.edge_count if graph else 0,
+            "stale": graph is None or graph.generation != self._generation,
+        }
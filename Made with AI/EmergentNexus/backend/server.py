@@ -1,4 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -8,8 +9,11 @@ from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Dict, Any, Optional
 import uuid
+import json
 from datetime import datetime, timezone
 
+from graph_index import GraphCache, TraversalBudget, DIRECTIONS, MAX_DEPTH, MAX_NODES
+
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -19,6 +23,9 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Adjacency snapshot for the /graph endpoints, rebuilt after node/relation writes
+graph_cache = GraphCache(db)
+
 # Create the main app without a prefix
 app = FastAPI()
 
@@ -76,6 +83,7 @@ async def create_node(input: NodeCreate):
     doc['updated_at'] = doc['updated_at'].isoformat()
     
     result = await db.nodes.insert_one(doc)
+    graph_cache.invalidate()
     return node_obj
 
 @api_router.get("/nodes", response_model=List[Node])
@@ -114,6 +122,7 @@ async def update_node(node_id: str, input: NodeCreate):
     update_dict['updated_at'] = datetime.now(timezone.utc).isoformat()
     
     await db.nodes.update_one({"id": node_id}, {"$set": update_dict})
+    graph_cache.invalidate()
     
     updated_node = await db.nodes.find_one({"id": node_id}, {"_id": 0})
     if isinstance(updated_node['created_at'], str):
@@ -131,6 +140,7 @@ async def delete_node(node_id: str):
     
     # Also delete related relations
     await db.relations.delete_many({"$or": [{"from_id": node_id}, {"to_id": node_id}]})
+    graph_cache.invalidate()
     
     return {"message": "Node deleted successfully"}
 
@@ -163,6 +173,7 @@ async def create_relation(input: RelationCreate):
     # Store relation
     doc = relation_obj.model_dump()
     await db.relations.insert_one(doc)
+    graph_cache.invalidate()
     
     return relation_obj
 
@@ -183,10 +194,186 @@ async def delete_relation(from_id: str, to_id: str):
     result = await db.relations.delete_one({"from_id": from_id, "to_id": to_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Relation not found")
+    graph_cache.invalidate()
     
     return {"message": "Relation deleted successfully"}
 
 
+# Graph traversal endpoints
+#
+# All of these stream newline-delimited JSON: "node" and "edge" (or "path" /
+# "component") lines as they are produced, then one "summary" line saying
+# whether the depth, node or fan-out budget cut the traversal short.
+
+NODE_FETCH_BATCH = 200
+
+
+def ndjson(line: Dict[str, Any]) -> bytes:
+    return (json.dumps(line, default=str) + "\n").encode("utf-8")
+
+
+def relation_line(relation: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "edge", **{k: v for k, v in relation.items() if k != "_id"}}
+
+
+def check_direction(direction: str):
+    if direction not in DIRECTIONS:
+        raise HTTPException(status_code=400, detail=f"direction must be one of {', '.join(DIRECTIONS)}")
+
+
+async def fetch_nodes(node_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    nodes = await db.nodes.find({"id": {"$in": node_ids}}, {"_id": 0}).to_list(len(node_ids))
+    return {node["id"]: node for node in nodes}
+
+
+async def stream_traversal(events, budget: TraversalBudget, include_nodes: bool, extra: Dict[str, Any]):
+    """Turn (kind, payload) traversal events into NDJSON lines.
+
+    Node documents are loaded in batches; edges are held back until the
+    nodes they follow have been written, so clients always see both
+    endpoints of an edge before the edge itself.
+    """
+    pending_nodes: List[tuple] = []
+    pending_edges: List[Dict[str, Any]] = []
+
+    async def flush():
+        documents = await fetch_nodes([node_id for node_id, _ in pending_nodes]) if include_nodes else {}
+        for node_id, depth in pending_nodes:
+            line = {"type": "node", "id": node_id}
+            if depth is not None:
+                line["depth"] = depth
+            if include_nodes:
+                line["node"] = documents.get(node_id)
+            yield ndjson(line)
+        for relation in pending_edges:
+            yield ndjson(relation_line(relation))
+        pending_nodes.clear()
+        pending_edges.clear()
+
+    for kind, payload in events:
+        if kind == "node":
+            pending_nodes.append(payload)
+        else:
+            pending_edges.append(payload)
+        if len(pending_nodes) >= NODE_FETCH_BATCH or len(pending_edges) >= NODE_FETCH_BATCH * 4:
+            async for line in flush():
+                yield line
+    async for line in flush():
+        yield line
+    yield ndjson({"type": "summary", **extra, **budget.summary()})
+
+
+def ndjson_response(lines) -> StreamingResponse:
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@api_router.get("/graph/neighborhood/{node_id}")
+async def graph_neighborhood(
+    node_id: str,
+    depth: int = Query(2, ge=0, le=MAX_DEPTH),
+    direction: str = "both",
+    max_nodes: int = Query(1000, ge=1, le=MAX_NODES),
+    max_fanout: int = Query(500, ge=1, le=MAX_NODES),
+    include_nodes: bool = True,
+):
+    """Nodes within `depth` hops of a node and the relations followed to reach them."""
+    check_direction(direction)
+    graph = await graph_cache.get()
+    if node_id not in graph.index:
+        raise HTTPException(status_code=404, detail="Node not found")
+
+    budget = TraversalBudget(max_depth=depth, max_nodes=max_nodes, max_fanout=max_fanout)
+    events = graph.neighborhood(node_id, direction, budget)
+    return ndjson_response(stream_traversal(events, budget, include_nodes, {"start": node_id, "depth": depth}))
+
+
+@api_router.get("/graph/path")
+async def graph_shortest_path(
+    from_id: str,
+    to_id: str,
+    direction: str = "out",
+    max_depth: int = Query(6, ge=1, le=MAX_DEPTH),
+    max_nodes: int = Query(MAX_NODES, ge=1, le=MAX_NODES),
+    max_fanout: int = Query(1000, ge=1, le=MAX_NODES),
+    include_nodes: bool = True,
+):
+    """Fewest-hops path between two nodes, as one "node" line per hop in order."""
+    check_direction(direction)
+    graph = await graph_cache.get()
+    if from_id not in graph.index or to_id not in graph.index:
+        raise HTTPException(status_code=404, detail="One or both nodes not found")
+
+    budget = TraversalBudget(max_depth=max_depth, max_nodes=max_nodes, max_fanout=max_fanout)
+    path = graph.shortest_path(from_id, to_id, direction, budget)
+
+    async def lines():
+        documents = await fetch_nodes([node_id for node_id, _ in path]) if path and include_nodes else {}
+        for hop, (node_id, relation) in enumerate(path or []):
+            line = {"type": "node", "id": node_id, "depth": hop}
+            if relation is not None:
+                line["via"] = relation_line(relation)
+            if include_nodes:
+                line["node"] = documents.get(node_id)
+            yield ndjson(line)
+        yield ndjson({
+            "type": "summary",
+            "found": path is not None,
+            "length": len(path) - 1 if path else None,
+            **budget.summary(),
+        })
+
+    return ndjson_response(lines())
+
+
+@api_router.get("/graph/components")
+async def graph_components(
+    node_type: Optional[List[str]] = Query(None),
+    min_size: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1, le=MAX_NODES),
+    max_nodes: int = Query(MAX_NODES, ge=1, le=MAX_NODES * 10),
+):
+    """Weakly connected components, largest first, optionally restricted to node types."""
+    graph = await graph_cache.get()
+    components = graph.components(node_type, min_size=min_size)
+    budget = TraversalBudget(max_nodes=max_nodes)
+
+    async def lines():
+        listed = 0
+        for component in components[:limit]:
+            remaining = max_nodes - listed
+            if remaining <= 0:
+                budget.stop("max_nodes")
+                break
+            if len(component) > remaining:
+                budget.stop("max_nodes")
+            listed += min(len(component), remaining)
+            yield ndjson({"type": "component", "size": len(component), "node_ids": component[:remaining]})
+        if len(components) > limit:
+            budget.stop("limit")
+        budget.visited = listed
+        yield ndjson({"type": "summary", "components": len(components), **budget.summary()})
+
+    return ndjson_response(lines())
+
+
+@api_router.get("/graph/subgraph")
+async def graph_subgraph(
+    node_type: List[str] = Query(...),
+    max_nodes: int = Query(MAX_NODES, ge=1, le=MAX_NODES * 10),
+    include_nodes: bool = True,
+):
+    """Every node of the given types and the relations among them."""
+    graph = await graph_cache.get()
+    budget = TraversalBudget(max_nodes=max_nodes)
+    events = graph.subgraph(node_type, budget)
+    return ndjson_response(stream_traversal(events, budget, include_nodes, {"node_types": node_type}))
+
+
+@api_router.get("/graph/stats")
+async def graph_stats():
+    return graph_cache.snapshot()
+
+
 # Basic endpoints
 @api_router.get("/")
 async def root():
@@ -215,6 +402,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    await db.nodes.create_index("id")
+    await db.nodes.create_index("node_type")
+    await db.relations.create_index([("from_id", 1), ("to_id", 1)])
+    await db.relations.create_index("to_id")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
\ No newline at end of file
@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from graph_index import RelationGraph, TraversalBudget
+
+
+def make_graph(edges, types=None):
+    names = sorted({name for edge in edges for name in edge} | set(types or {}))
+    nodes = [{"id": name, "node_type": (types or {}).get(name, "markdown")} for name in names]
+    relations = [{"from_id": a, "to_id": b, "relation_type": "links-to"} for a, b in edges]
+    return RelationGraph(nodes, relations)
+
+
+def test_neighborhood_respects_depth_and_direction():
+    graph = make_graph([("a", "b"), ("b", "c"), ("c", "d"), ("x", "a")])
+
+    budget = TraversalBudget(max_depth=2)
+    events = list(graph.neighborhood("a", "out", budget))
+    nodes = {payload for kind, payload in events if kind == "node"}
+    assert nodes == {("a", 0), ("b", 1), ("c", 2)}
+    assert sum(1 for kind, _ in events if kind == "edge") == 2
+    assert budget.reason == "max_depth"
+
+    nodes = {payload[0] for kind, payload in graph.neighborhood("a", "both", TraversalBudget(max_depth=1))
+             if kind == "node"}
+    assert nodes == {"a", "b", "x"}
+
+
+def test_neighborhood_budgets_cap_hubs_and_node_count():
+    graph = make_graph([("hub", f"n{i}") for i in range(50)])
+
+    budget = TraversalBudget(max_depth=1, max_fanout=10)
+    nodes = [payload for kind, payload in graph.neighborhood("hub", "out", budget) if kind == "node"]
+    assert len(nodes) == 11
+    assert budget.truncated and budget.reason == "max_fanout"
+
+    budget = TraversalBudget(max_depth=1, max_nodes=5)
+    events = list(graph.neighborhood("hub", "out", budget))
+    assert sum(1 for kind, _ in events if kind == "node") == 5
+    assert sum(1 for kind, _ in events if kind == "edge") == 4
+    assert budget.reason == "max_nodes"
+
+
+def test_shortest_path_finds_fewest_hops():
+    graph = make_graph([("a", "b"), ("b", "c"), ("c", "d"), ("d", "e"), ("a", "x"), ("x", "e")])
+
+    path = graph.shortest_path("a", "e", "out", TraversalBudget(max_depth=6))
+    assert [node for node, _ in path] == ["a", "x", "e"]
+    assert path[0][1] is None
+    assert (path[2][1]["from_id"], path[2][1]["to_id"]) == ("x", "e")
+
+    assert graph.shortest_path("e", "a", "out", TraversalBudget(max_depth=6)) is None
+    assert [node for node, _ in graph.shortest_path("e", "a", "both", TraversalBudget(max_depth=6))] == ["e", "x", "a"]
+
+    budget = TraversalBudget(max_depth=1)
+    assert graph.shortest_path("a", "e", "out", budget) is None
+    assert budget.reason == "max_depth"
+
+
+def test_shortest_path_on_long_chain_matches_length():
+    graph = make_graph([(f"n{i}", f"n{i + 1}") for i in range(20)] + [("n3", "n15")])
+    path = graph.shortest_path("n0", "n20", "out", TraversalBudget(max_depth=20))
+    assert [node for node, _ in path] == ["n0", "n1", "n2", "n3", "n15", "n16", "n17", "n18", "n19", "n20"]
+
+
+def test_components_and_subgraph_by_type():
+    types = {"a": "card", "b": "card", "c": "note", "d": "card", "e": "card", "lonely": "card"}
+    graph = make_graph([("a", "b"), ("b", "c"), ("c", "d"), ("d", "e")], types)
+
+    assert graph.components() == [["a", "b", "c", "d", "e"], ["lonely"]]
+    assert graph.components(["card"]) == [["a", "b"], ["d", "e"], ["lonely"]]
+    assert graph.components(["card"], min_size=2) == [["a", "b"], ["d", "e"]]
+
+    budget = TraversalBudget(max_nodes=100)
+    events = list(graph.subgraph(["card"], budget))
+    assert {payload[0] for kind, payload in events if kind == "node"} == {"a", "b", "d", "e", "lonely"}
+    assert {(r["from_id"], r["to_id"]) for kind, r in events if kind == "edge"} == {("a", "b"), ("d", "e")}
+
+
+def test_relations_to_missing_nodes_are_ignored():
+    nodes = [{"id": "a", "node_type": "markdown"}]
+    graph = RelationGraph(nodes, [{"from_id": "a", "to_id": "gone", "relation_type": "links-to"}])
+    assert graph.edge_count == 0
+    assert list(graph.neighborhood("a", "both", TraversalBudget())) == [("node", ("a", 0))]
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request, Response, Query
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -13,6 +14,8 @@ from datetime import datetime, timezone, timedelta
 import jwt
 import hashlib
 import json
+import base64
+import re
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -614,1969 +617,322 @@ async def update_asset(asset_id: str, asset_data: AssetUpdate, current_user: Use
     cleaned_asset = parse_from_mongo(updated_asset_data)
     return Asset(**cleaned_asset)
 
+# ========== DETAILED ASSET LISTING ==========
+
+# Sort keys accepted by the detailed listing, mapped to asset document fields.
+# All but custom.<field> are backed by the compound indexes created at startup.
+# Type and group names are only joined after the page is cut, so the listing
+# cannot sort on them; sorting on their ids would order by UUID.
+DETAILED_SORT_FIELDS = {
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "name": "name",
+}
+# Equality filters the detailed listing indexes are prefixed with
+DETAILED_INDEX_FILTERS = ([], ["asset_type_id"], ["asset_group_id"], ["tags"])
+DETAILED_MAX_LIMIT = 1000
+
+def encode_cursor(values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def resolve_sort_field(sort: str) -> str:
+    if sort in DETAILED_SORT_FIELDS:
+        return DETAILED_SORT_FIELDS[sort]
+    if sort.startswith("custom.") and len(sort) > len("custom."):
+        return "custom_data." + sort[len("custom."):]
+    if sort in ("type", "group"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Sorting by {sort} is not supported; filter by asset_{sort}_id instead"
+        )
+    raise HTTPException(status_code=400, detail=f"Unsupported sort field: {sort}")
+
+def keyset_condition(sort_field: str, direction: int, after: List[Any]) -> Dict[str, Any]:
+    """Match documents strictly after (value, id) in (sort_field, id) order"""
+    value, last_id = after
+    op = "$gt" if direction == 1 else "$lt"
+    if value is None:
+        # Missing/null values sort first: ascending continues with the rest of
+        # the nulls then every non-null value, descending only has nulls left
+        ties = {sort_field: None, "id": {op: last_id}}
+        if direction == 1:
+            return {"$or": [ties, {sort_field: {"$ne": None}}]}
+        return ties
+    after_value = [
+        {sort_field: {op: value}},
+        {sort_field: value, "id": {op: last_id}}
+    ]
+    if direction == -1:
+        # $lt never matches null or missing, which come last when descending
+        after_value.append({sort_field: None})
+    return {"$or": after_value}
+
+def build_detailed_assets_pipeline(
+    org_id: str,
+    filters: Dict[str, Any],
+    sort_field: str,
+    direction: int,
+    after: Optional[List[Any]] = None,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """Aggregation for assets joined with their type and group names.
+
+    Filtering, keyset pagination and the limit run before the $lookups so
+    only the returned page is joined.
+    """
+    match = {"organization_id": org_id, **filters}
+    if after is not None:
+        match = {"$and": [match, keyset_condition(sort_field, direction, after)]}
+    
+    pipeline = [
+        {"$match": match},
+        {"$sort": {sort_field: direction, "id": direction}}
+    ]
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    
+    pipeline += [
+        {"$lookup": {"from": "asset_types", "localField": "asset_type_id", "foreignField": "id", "as": "_type"}},
+        {"$lookup": {"from": "asset_groups", "localField": "asset_group_id", "foreignField": "id", "as": "_group"}},
+        {"$addFields": {
+            "asset_type_name": {"$ifNull": [{"$arrayElemAt": ["$_type.name", 0]}, "Unknown"]},
+            "asset_group_name": {"$ifNull": [{"$arrayElemAt": ["$_group.name", 0]}, "Unknown"]},
+            "asset_type_description": {"$ifNull": [{"$arrayElemAt": ["$_type.description", 0]}, ""]},
+            "asset_group_description": {"$ifNull": [{"$arrayElemAt": ["$_group.description", 0]}, ""]}
+        }}
+    ]
+    
+    if fields:
+        projection = {field: 1 for field in fields}
+        projection.update({
+            "_id": 0, "id": 1,
+            "asset_type_name": 1, "asset_group_name": 1,
+            "asset_type_description": 1, "asset_group_description": 1
+        })
+        # The next-page cursor needs the sort value
+        if sort_field.split(".")[0] not in projection:
+            projection[sort_field] = 1
+    else:
+        projection = {"_id": 0, "_type": 0, "_group": 0}
+    pipeline.append({"$project": projection})
+    return pipeline
+
+def detailed_asset_filters(
+    request: Request,
+    asset_type_id: Optional[str],
+    asset_group_id: Optional[str],
+    tag: Optional[str]
+) -> Dict[str, Any]:
+    filters = {}
+    if asset_type_id:
+        filters["asset_type_id"] = asset_type_id
+    if asset_group_id:
+        filters["asset_group_id"] = asset_group_id
+    if tag:
+        filters["tags"] = tag
+    # custom.<field>=value filters on custom_data
+    for key, value in request.query_params.items():
+        if key.startswith("custom.") and len(key) > len("custom."):
+            filters["custom_data." + key[len("custom."):]] = value
+    return filters
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    for name in names:
+        if not re.fullmatch(r"[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*", name):
+            raise HTTPException(status_code=400, detail=f"Invalid field name: {name}")
+    return names
+
+def get_nested(document: Dict[str, Any], dotted: str) -> Any:
+    value = document
+    for part in dotted.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
 @api_router.get("/organizations/{org_id}/assets/detailed", response_model=List[Dict])
-async def get_assets_detailed(org_id: str, current_user: User = Depends(get_current_user)):
+async def get_assets_detailed(
+    org_id: str,
+    request: Request,
+    response: Response,
+    asset_type_id: Optional[str] = None,
+    asset_group_id: Optional[str] = None,
+    tag: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: int = Query(DETAILED_MAX_LIMIT, ge=1, le=DETAILED_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Assets with type and group names, one page at a time.
+
+    Pages are keyset-paginated on (sort field, id); when more results exist
+    the X-Next-Cursor response header holds the cursor for the next page.
+    Filter with asset_type_id, asset_group_id, tag and custom.<field>=value.
+    """
     if org_id not in current_user.organization_ids:
         raise HTTPException(status_code=403, detail="Access denied to this organization")
     
-    # Get all assets with their type and group information
-    assets = await db.assets.find({"organization_id": org_id}).to_list(1000)
-    asset_types = await db.asset_types.find({"organization_id": org_id}).to_list(1000)
-    asset_groups = await db.asset_groups.find({"organization_id": org_id}).to_list(1000)
+    sort_field = resolve_sort_field(sort)
+    direction = 1 if order == "asc" else -1
+    pipeline = build_detailed_assets_pipeline(
+        org_id,
+        detailed_asset_filters(request, asset_type_id, asset_group_id, tag),
+        sort_field,
+        direction,
+        after=decode_cursor(cursor) if cursor else None,
+        limit=limit + 1,
+        fields=parse_fields(fields)
+    )
     
-    # Create lookup dictionaries
-    types_dict = {t["id"]: t for t in asset_types}
-    groups_dict = {g["id"]: g for g in asset_groups}
+    assets = await db.assets.aggregate(pipeline, allowDiskUse=True).to_list(length=limit + 1)
+    if len(assets) > limit:
+        assets = assets[:limit]
+        last = assets[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor([get_nested(last, sort_field), last["id"]])
+    
+    return assets
+
+@api_router.get("/organizations/{org_id}/assets/export.ndjson")
+async def export_assets_ndjson(
+    org_id: str,
+    request: Request,
+    asset_type_id: Optional[str] = None,
+    asset_group_id: Optional[str] = None,
+    tag: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream every matching detailed asset as newline-delimited JSON"""
+    if org_id not in current_user.organization_ids:
+        raise HTTPException(status_code=403, detail="Access denied to this organization")
     
-    # Enrich assets with type and group info
-    detailed_assets = []
-    for asset in assets:
-        # Clean the asset data first
-        cleaned_asset = parse_from_mongo(asset)
-        asset_type = types_dict.get(asset["asset_type_id"], {})
-        asset_group = groups_dict.get(asset["asset_group_id"], {})
-        
-        detailed_asset = {
-            **cleaned_asset,
-            "asset_type_name": asset_type.get("name", "Unknown"),
-            "asset_group_name": asset_group.get("name", "Unknown"),
-            "asset_type_description": asset_type.get("description", ""),
-            "asset_group_description": asset_group.get("description", "")
-        }
-        detailed_assets.append(detailed_asset)
+    pipeline = build_detailed_assets_pipeline(
+        org_id,
+        detailed_asset_filters(request, asset_type_id, asset_group_id, tag),
+        resolve_sort_field(sort),
+        1 if order == "asc" else -1,
+        fields=parse_fields(fields)
+    )
+    
+    async def stream_lines():
+        cursor = db.assets.aggregate(pipeline, allowDiskUse=True, batchSize=500)
+        async for asset in cursor:
+            yield json.dumps(asset, default=str) + "\n"
     
-    return detailed_assets
+    return StreamingResponse(
+        stream_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="assets-{org_id}.ndjson"'}
+    )
 
 # Old template routes removed - replaced with enhanced template endpoints below
 
 # ========== TEMPLATE ENDPOINTS ==========
 
+TEMPLATE_KINDS = ("asset_group", "asset_type", "asset")
+
+class TemplateCatalog:
+    """Default templates, loaded once from template_catalog.json.
+
+    Every listing (all templates of a kind, or one category of them) is
+    serialized to JSON bytes up front with a strong ETag. Single templates
+    are handed out as fresh copies, so the shared catalog never changes.
+    """
+    
+    def __init__(self, path: Path):
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        self._items: Dict[tuple, bytes] = {}
+        self._names: Dict[tuple, tuple] = {}
+        self._listings: Dict[tuple, tuple] = {}
+        
+        for kind in TEMPLATE_KINDS:
+            by_category: Dict[str, List[dict]] = {}
+            for template in raw[kind]:
+                self._items[(kind, template["name"])] = json.dumps(template).encode()
+                by_category.setdefault(self.category_of(kind, template).lower(), []).append(template)
+            
+            self._names[(kind, None)] = tuple(t["name"] for t in raw[kind])
+            self._listings[(kind, None)] = self._serialize(raw[kind])
+            for category, templates in by_category.items():
+                self._names[(kind, category)] = tuple(t["name"] for t in templates)
+                self._listings[(kind, category)] = self._serialize(templates)
+        
+        self._empty_listing = self._serialize([])
+    
+    @staticmethod
+    def category_of(kind: str, template: dict) -> str:
+        """Asset group a template belongs to"""
+        if kind == "asset_group":
+            return template["name"]
+        return template.get("asset_group_name", "")
+    
+    @staticmethod
+    def _serialize(templates: List[dict]) -> tuple:
+        body = json.dumps(templates, separators=(",", ":")).encode()
+        return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    
+    def listing(self, kind: str, category: Optional[str] = None) -> tuple:
+        """Pre-serialized (body, etag) for a kind, optionally one category"""
+        key = (kind, category.lower() if category else None)
+        return self._listings.get(key, self._empty_listing)
+    
+    def get(self, kind: str, name: str) -> Optional[dict]:
+        data = self._items.get((kind, name))
+        return json.loads(data) if data is not None else None
+    
+    def all(self, kind: str, category: Optional[str] = None) -> List[dict]:
+        names = self._names.get((kind, category.lower() if category else None), ())
+        return [self.get(kind, name) for name in names]
+
+template_catalog = TemplateCatalog(ROOT_DIR / "template_catalog.json")
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def catalog_response(request: Request, kind: str, category: Optional[str]) -> Response:
+    body, etag = template_catalog.listing(kind, category)
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @api_router.get("/templates/default-asset-groups")
-async def get_default_asset_group_templates():
+async def get_default_asset_group_templates(request: Request, category: Optional[str] = None):
     """Get pre-defined asset group templates with custom fields"""
-    return [
-        {
-            "name": "Hardware",
-            "description": "Physical IT equipment and devices",
-            "icon": "Monitor",
-            "custom_fields": [
-                {
-                    "id": "warranty_date",
-                    "name": "warranty_date",
-                    "label": "Warranty Expiration",
-                    "type": "date",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "purchase_date",
-                    "name": "purchase_date", 
-                    "label": "Purchase Date",
-                    "type": "date",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "cost",
-                    "name": "cost",
-                    "label": "Purchase Cost",
-                    "type": "currency",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "location",
-                    "name": "location",
-                    "label": "Physical Location",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Software",
-            "description": "Software applications and licenses",
-            "icon": "Code",
-            "custom_fields": [
-                {
-                    "id": "license_key",
-                    "name": "license_key",
-                    "label": "License Key",
-                    "type": "password",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "version",
-                    "name": "version",
-                    "label": "Version Number",
-                    "type": "version",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "license_expiry",
-                    "name": "license_expiry",
-                    "label": "License Expires",
-                    "type": "date",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "vendor",
-                    "name": "vendor",
-                    "label": "Software Vendor",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "license_seats",
-                    "name": "license_seats",
-                    "label": "License Seats",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 1
-                }
-            ]
-        },
-        {
-            "name": "Network Equipment",
-            "description": "Network infrastructure and connectivity devices",
-            "icon": "Router",
-            "custom_fields": [
-                {
-                    "id": "ip_address",
-                    "name": "ip_address",
-                    "label": "IP Address",
-                    "type": "ip_address",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "mac_address",
-                    "name": "mac_address",
-                    "label": "MAC Address",
-                    "type": "mac_address",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "network_status",
-                    "name": "network_status",
-                    "label": "Network Status",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Online", "Offline", "Maintenance", "Error"],
-                    "default_value": "Online"
-                },
-                {
-                    "id": "port_count",
-                    "name": "port_count",
-                    "label": "Port Count",
-                    "type": "number",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Cloud Services",
-            "description": "Cloud-based services and subscriptions",
-            "icon": "Cloud",
-            "custom_fields": [
-                {
-                    "id": "service_url",
-                    "name": "service_url",
-                    "label": "Service URL",
-                    "type": "url",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "monthly_cost",
-                    "name": "monthly_cost",
-                    "label": "Monthly Cost",
-                    "type": "currency",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "renewal_date",
-                    "name": "renewal_date",
-                    "label": "Renewal Date",
-                    "type": "date",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "service_tier",
-                    "name": "service_tier",
-                    "label": "Service Tier",
-                    "type": "dataset",
-                    "required": False,
-                    "dataset_values": ["Basic", "Standard", "Premium", "Enterprise"],
-                    "default_value": "Standard"
-                }
-            ]
-        },
-        {
-            "name": "Security",
-            "description": "Security tools and access management",
-            "icon": "Shield",
-            "custom_fields": [
-                {
-                    "id": "security_level",
-                    "name": "security_level",
-                    "label": "Security Level",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Low", "Medium", "High", "Critical"],
-                    "default_value": "Medium"
-                },
-                {
-                    "id": "access_control",
-                    "name": "access_control",
-                    "label": "Access Control Required",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                },
-                {
-                    "id": "compliance_standard",
-                    "name": "compliance_standard",
-                    "label": "Compliance Standard",
-                    "type": "multi_select",
-                    "required": False,
-                    "dataset_values": ["ISO27001", "SOC2", "GDPR", "HIPAA", "PCI-DSS"],
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Identity & Access",
-            "description": "User accounts, credentials, and identity management",
-            "icon": "User",
-            "custom_fields": [
-                {
-                    "id": "username",
-                    "name": "username",
-                    "label": "Username",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "email_address",
-                    "name": "email_address",
-                    "label": "Email Address",
-                    "type": "email",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "access_level",
-                    "name": "access_level",
-                    "label": "Access Level",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Guest", "User", "Power User", "Admin", "Super Admin"],
-                    "default_value": "User"
-                },
-                {
-                    "id": "account_status",
-                    "name": "account_status",
-                    "label": "Account Status",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Active", "Inactive", "Suspended", "Pending", "Locked"],
-                    "default_value": "Active"
-                },
-                {
-                    "id": "last_login",
-                    "name": "last_login",
-                    "label": "Last Login",
-                    "type": "date",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Network Infrastructure",
-            "description": "Cables, adapters, and network connectivity components",
-            "icon": "Cable",
-            "custom_fields": [
-                {
-                    "id": "cable_type",
-                    "name": "cable_type",
-                    "label": "Cable Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Ethernet Cat5e", "Ethernet Cat6", "Ethernet Cat6a", "Fiber Optic", "Coaxial", "USB-C", "HDMI", "Power"],
-                    "default_value": "Ethernet Cat6"
-                },
-                {
-                    "id": "cable_length",
-                    "name": "cable_length",
-                    "label": "Cable Length (meters)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "connector_a",
-                    "name": "connector_a",
-                    "label": "Connector Type A",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "connector_b",
-                    "name": "connector_b",
-                    "label": "Connector Type B",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "max_bandwidth",
-                    "name": "max_bandwidth",
-                    "label": "Max Bandwidth",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Adapters & Accessories",
-            "description": "Dongles, converters, and peripheral adapters",
-            "icon": "Plug",
-            "custom_fields": [
-                {
-                    "id": "adapter_type",
-                    "name": "adapter_type",
-                    "label": "Adapter Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["USB-C to HDMI", "USB-C to VGA", "USB Hub", "Power Adapter", "Audio Adapter", "Network Adapter", "Display Adapter", "Docking Station"],
-                    "default_value": "USB Hub"
-                },
-                {
-                    "id": "input_connector",
-                    "name": "input_connector",
-                    "label": "Input Connector",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "output_connector",
-                    "name": "output_connector",
-                    "label": "Output Connector",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "power_rating",
-                    "name": "power_rating",
-                    "label": "Power Rating (W)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "compatibility",
-                    "name": "compatibility",
-                    "label": "Device Compatibility",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Security Testing Tools",
-            "description": "Penetration testing and cybersecurity equipment",
-            "icon": "Bug",
-            "custom_fields": [
-                {
-                    "id": "tool_category",
-                    "name": "tool_category",
-                    "label": "Tool Category",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Network Scanner", "WiFi Auditing", "USB Testing", "RFID/NFC", "Radio Frequency", "Physical Security", "Social Engineering"],
-                    "default_value": "Network Scanner"
-                },
-                {
-                    "id": "operating_frequency",
-                    "name": "operating_frequency",
-                    "label": "Operating Frequency",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "supported_protocols",
-                    "name": "supported_protocols",
-                    "label": "Supported Protocols",
-                    "type": "multi_select",
-                    "required": False,
-                    "dataset_values": ["WiFi", "Bluetooth", "NFC", "RFID", "GSM", "LTE", "Zigbee", "LoRa"],
-                    "default_value": None
-                },
-                {
-                    "id": "legal_status",
-                    "name": "legal_status",
-                    "label": "Legal Usage Status",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Authorized Use Only", "Professional Testing", "Educational", "Research", "Restricted"],
-                    "default_value": "Authorized Use Only"
-                },
-                {
-                    "id": "certification_required",
-                    "name": "certification_required",
-                    "label": "Certification Required",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                }
-            ]
-        },
-        {
-            "name": "Smart Devices & Gadgets",
-            "description": "IoT devices, smart home, and electronic gadgets",
-            "icon": "Smartphone",
-            "custom_fields": [
-                {
-                    "id": "device_category",
-                    "name": "device_category",
-                    "label": "Device Category",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Smart Home", "Wearable", "IoT Sensor", "Smart Speaker", "Streaming Device", "Gaming", "Health Monitor", "Automation"],
-                    "default_value": "Smart Home"
-                },
-                {
-                    "id": "connectivity",
-                    "name": "connectivity",
-                    "label": "Connectivity Options",
-                    "type": "multi_select",
-                    "required": True,
-                    "dataset_values": ["WiFi", "Bluetooth", "Zigbee", "Z-Wave", "Thread", "Ethernet", "Cellular", "USB"],
-                    "default_value": "WiFi"
-                },
-                {
-                    "id": "power_source",
-                    "name": "power_source",
-                    "label": "Power Source",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Battery", "USB Powered", "Wall Adapter", "PoE", "Solar", "Hardwired"],
-                    "default_value": "USB Powered"
-                },
-                {
-                    "id": "battery_life",
-                    "name": "battery_life",
-                    "label": "Battery Life (hours)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "firmware_version",
-                    "name": "firmware_version",
-                    "label": "Firmware Version",
-                    "type": "version",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Storage Devices",
-            "description": "USB drives, external HDDs, SSDs, and storage media",
-            "icon": "HardDrive",
-            "custom_fields": [
-                {
-                    "id": "storage_type",
-                    "name": "storage_type",
-                    "label": "Storage Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["USB Flash Drive", "External HDD", "External SSD", "SD Card", "microSD", "CD/DVD", "Blu-ray", "Tape Drive"],
-                    "default_value": "External SSD"
-                },
-                {
-                    "id": "capacity",
-                    "name": "capacity",
-                    "label": "Storage Capacity",
-                    "type": "file_size",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "interface",
-                    "name": "interface",
-                    "label": "Interface Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["USB 2.0", "USB 3.0", "USB 3.1", "USB-C", "Thunderbolt", "eSATA", "FireWire"],
-                    "default_value": "USB 3.0"
-                },
-                {
-                    "id": "encryption_enabled",
-                    "name": "encryption_enabled",
-                    "label": "Encryption Enabled",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": False
-                },
-                {
-                    "id": "file_system",
-                    "name": "file_system",
-                    "label": "File System",
-                    "type": "dataset",
-                    "required": False,
-                    "dataset_values": ["NTFS", "exFAT", "FAT32", "ext4", "HFS+", "APFS"],
-                    "default_value": "NTFS"
-                }
-            ]
-        },
-        {
-            "name": "Cloud & Virtual Resources",
-            "description": "Cloud instances, virtual infrastructure, and SaaS platforms",
-            "icon": "Cloud",
-            "custom_fields": [
-                {
-                    "id": "provider",
-                    "name": "provider",
-                    "label": "Cloud Provider",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["AWS", "Microsoft Azure", "Google Cloud", "DigitalOcean", "Linode", "Vultr", "IBM Cloud", "Oracle Cloud"],
-                    "default_value": "AWS"
-                },
-                {
-                    "id": "region",
-                    "name": "region",
-                    "label": "Region/Zone",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "instance_type",
-                    "name": "instance_type",
-                    "label": "Instance Type/Size",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "monthly_cost",
-                    "name": "monthly_cost",
-                    "label": "Monthly Cost",
-                    "type": "currency",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "auto_scaling",
-                    "name": "auto_scaling",
-                    "label": "Auto Scaling Enabled",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": False
-                }
-            ]
-        },
-        {
-            "name": "Digital & Data Assets",
-            "description": "Digital files, documents, intellectual property, and data repositories",
-            "icon": "FileText",
-            "custom_fields": [
-                {
-                    "id": "asset_type",
-                    "name": "asset_type",
-                    "label": "Digital Asset Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Document", "Image", "Video", "Audio", "Code Repository", "Dataset", "License", "Certificate", "Backup"],
-                    "default_value": "Document"
-                },
-                {
-                    "id": "file_format",
-                    "name": "file_format",
-                    "label": "File Format",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "file_size",
-                    "name": "file_size",
-                    "label": "File Size",
-                    "type": "file_size",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "confidentiality_level",
-                    "name": "confidentiality_level",
-                    "label": "Confidentiality Level",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Public", "Internal", "Confidential", "Restricted", "Top Secret"],
-                    "default_value": "Internal"
-                },
-                {
-                    "id": "retention_period",
-                    "name": "retention_period",
-                    "label": "Retention Period",
-                    "type": "duration",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Databases",
-            "description": "Database servers, instances, and data management systems",
-            "icon": "Database",
-            "custom_fields": [
-                {
-                    "id": "database_type",
-                    "name": "database_type",
-                    "label": "Database Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["MySQL", "PostgreSQL", "SQL Server", "Oracle", "MongoDB", "Redis", "Cassandra", "Elasticsearch", "InfluxDB", "SQLite"],
-                    "default_value": "PostgreSQL"
-                },
-                {
-                    "id": "database_version",
-                    "name": "database_version",
-                    "label": "Version",
-                    "type": "version",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "environment",
-                    "name": "environment",
-                    "label": "Environment",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Development", "Testing", "Staging", "Production", "Backup"],
-                    "default_value": "Production"
-                },
-                {
-                    "id": "database_size",
-                    "name": "database_size",
-                    "label": "Database Size",
-                    "type": "file_size",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "backup_frequency",
-                    "name": "backup_frequency",
-                    "label": "Backup Frequency",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Hourly", "Daily", "Weekly", "Monthly", "On-Demand", "Continuous"],
-                    "default_value": "Daily"
-                }
-            ]
-        },
-        {
-            "name": "Virtual Machines",
-            "description": "VMs, containers, and virtualized computing resources",
-            "icon": "Server",
-            "custom_fields": [
-                {
-                    "id": "hypervisor",
-                    "name": "hypervisor",
-                    "label": "Hypervisor/Platform",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["VMware vSphere", "Microsoft Hyper-V", "KVM", "Xen", "Proxmox", "VirtualBox", "Docker", "Kubernetes", "OpenStack"],
-                    "default_value": "VMware vSphere"
-                },
-                {
-                    "id": "operating_system",
-                    "name": "operating_system",
-                    "label": "Operating System",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "virtualization_type",
-                    "name": "virtualization_type",
-                    "label": "Virtualization Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Full Virtualization", "Paravirtualization", "Container", "OS-level Virtualization"],
-                    "default_value": "Full Virtualization"
-                },
-                {
-                    "id": "allocated_cpu",
-                    "name": "allocated_cpu",
-                    "label": "Allocated CPU Cores",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 2
-                },
-                {
-                    "id": "allocated_memory",
-                    "name": "allocated_memory",
-                    "label": "Allocated Memory (GB)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 4
-                },
-                {
-                    "id": "primary_services",
-                    "name": "primary_services",
-                    "label": "Primary Services",
-                    "type": "multi_select",
-                    "required": False,
-                    "dataset_values": ["Web Server", "Database", "Application Server", "Load Balancer", "Cache", "Monitoring", "Backup", "Development"],
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Licenses & Compliance",
-            "description": "Software licenses, certificates, and compliance documentation",
-            "icon": "FileText",
-            "custom_fields": [
-                {
-                    "id": "license_type",
-                    "name": "license_type",
-                    "label": "License Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Software License", "SSL Certificate", "Domain Registration", "Patent", "Trademark", "Copyright", "Compliance Certificate"],
-                    "default_value": "Software License"
-                },
-                {
-                    "id": "license_key",
-                    "name": "license_key",
-                    "label": "License Key/Certificate",
-                    "type": "password",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "expiration_date",
-                    "name": "expiration_date",
-                    "label": "Expiration Date",
-                    "type": "date",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "renewal_required",
-                    "name": "renewal_required",
-                    "label": "Auto-Renewal Required",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                },
-                {
-                    "id": "compliance_standard",
-                    "name": "compliance_standard",
-                    "label": "Compliance Standard",
-                    "type": "dataset",
-                    "required": False,
-                    "dataset_values": ["ISO 27001", "SOC 2", "GDPR", "HIPAA", "PCI DSS", "FedRAMP", "NIST"],
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Networks & VLANs",
-            "description": "Network segments, VLANs, WiFi networks, and network infrastructure",
-            "icon": "Network",
-            "custom_fields": [
-                {
-                    "id": "network_type",
-                    "name": "network_type",
-                    "label": "Network Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["LAN", "VLAN", "WiFi", "WAN", "VPN", "DMZ", "Guest Network", "Management Network"],
-                    "default_value": "LAN"
-                },
-                {
-                    "id": "network_address",
-                    "name": "network_address",
-                    "label": "Network Address (CIDR)",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "vlan_id",
-                    "name": "vlan_id",
-                    "label": "VLAN ID",
-                    "type": "number",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "gateway_ip",
-                    "name": "gateway_ip",
-                    "label": "Gateway IP Address",
-                    "type": "ip_address",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "dhcp_enabled",
-                    "name": "dhcp_enabled",
-                    "label": "DHCP Enabled",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                },
-                {
-                    "id": "security_level",
-                    "name": "security_level",
-                    "label": "Security Level",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Open", "WPA2", "WPA3", "Enterprise", "802.1X", "VPN Required"],
-                    "default_value": "WPA3"
-                }
-            ]
-        },
-        {
-            "name": "Network Interfaces",
-            "description": "Physical and virtual network interfaces, ports, and connections",
-            "icon": "Plug",
-            "custom_fields": [
-                {
-                    "id": "interface_type",
-                    "name": "interface_type",
-                    "label": "Interface Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Ethernet", "Fiber Optic", "WiFi", "Virtual", "Loopback", "Tunnel", "Bond", "Bridge"],
-                    "default_value": "Ethernet"
-                },
-                {
-                    "id": "port_speed",
-                    "name": "port_speed",
-                    "label": "Port Speed",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["10 Mbps", "100 Mbps", "1 Gbps", "10 Gbps", "25 Gbps", "40 Gbps", "100 Gbps"],
-                    "default_value": "1 Gbps"
-                },
-                {
-                    "id": "interface_status",
-                    "name": "interface_status",
-                    "label": "Interface Status",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Up", "Down", "Admin Down", "Testing", "Dormant", "Not Present"],
-                    "default_value": "Up"
-                },
-                {
-                    "id": "assigned_ip",
-                    "name": "assigned_ip",
-                    "label": "Assigned IP Address",
-                    "type": "ip_address",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "mac_address",
-                    "name": "mac_address",
-                    "label": "MAC Address",
-                    "type": "mac_address",
-                    "required": True,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Firewalls & Switches",
-            "description": "Network security devices, managed switches, and routing equipment",
-            "icon": "Shield",
-            "custom_fields": [
-                {
-                    "id": "device_type",
-                    "name": "device_type",
-                    "label": "Device Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Firewall", "Managed Switch", "Layer 3 Switch", "Router", "Load Balancer", "IDS/IPS", "Proxy", "Access Point"],
-                    "default_value": "Firewall"
-                },
-                {
-                    "id": "port_count",
-                    "name": "port_count",
-                    "label": "Port Count",
-                    "type": "number",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "management_ip",
-                    "name": "management_ip",
-                    "label": "Management IP",
-                    "type": "ip_address",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "firmware_version",
-                    "name": "firmware_version",
-                    "label": "Firmware Version",
-                    "type": "version",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "security_features",
-                    "name": "security_features",
-                    "label": "Security Features",
-                    "type": "multi_select",
-                    "required": False,
-                    "dataset_values": ["Stateful Inspection", "DPI", "VPN Support", "IPS", "Anti-malware", "Content Filtering", "DDoS Protection"],
-                    "default_value": None
-                },
-                {
-                    "id": "high_availability",
-                    "name": "high_availability",
-                    "label": "High Availability Configured",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": False
-                }
-            ]
-        },
-        {
-            "name": "Internal Services",
-            "description": "Internal applications, microservices, APIs, and system services",
-            "icon": "Cog",
-            "custom_fields": [
-                {
-                    "id": "service_type",
-                    "name": "service_type",
-                    "label": "Service Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Web Service", "API", "Database Service", "Authentication", "Monitoring", "Logging", "Backup", "File Service", "Print Service"],
-                    "default_value": "Web Service"
-                },
-                {
-                    "id": "service_port",
-                    "name": "service_port",
-                    "label": "Service Port",
-                    "type": "number",
-                    "required": True,
-                    "default_value": 80
-                },
-                {
-                    "id": "protocol",
-                    "name": "protocol",
-                    "label": "Protocol",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["HTTP", "HTTPS", "TCP", "UDP", "SSH", "FTP", "SMTP", "DNS", "LDAP"],
-                    "default_value": "HTTPS"
-                },
-                {
-                    "id": "service_status",
-                    "name": "service_status",
-                    "label": "Service Status",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Running", "Stopped", "Starting", "Stopping", "Failed", "Unknown"],
-                    "default_value": "Running"
-                },
-                {
-                    "id": "auto_start",
-                    "name": "auto_start",
-                    "label": "Auto Start on Boot",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                },
-                {
-                    "id": "dependencies",
-                    "name": "dependencies",
-                    "label": "Service Dependencies",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Website Links & URLs",
-            "description": "External websites, web applications, and online resources",
-            "icon": "Globe",
-            "custom_fields": [
-                {
-                    "id": "url_address",
-                    "name": "url_address",
-                    "label": "URL Address",
-                    "type": "url",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "site_category",
-                    "name": "site_category",
-                    "label": "Site Category",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Corporate Website", "Web Application", "Admin Panel", "Documentation", "Monitoring", "Support Portal", "API Endpoint", "Third-party Service"],
-                    "default_value": "Web Application"
-                },
-                {
-                    "id": "authentication_required",
-                    "name": "authentication_required",
-                    "label": "Authentication Required",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                },
-                {
-                    "id": "ssl_certificate",
-                    "name": "ssl_certificate",
-                    "label": "SSL Certificate Status",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Valid", "Expired", "Self-Signed", "Invalid", "Not Present"],
-                    "default_value": "Valid"
-                },
-                {
-                    "id": "last_checked",
-                    "name": "last_checked",
-                    "label": "Last Availability Check",
-                    "type": "date",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "criticality_level",
-                    "name": "criticality_level",
-                    "label": "Criticality Level",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Low", "Medium", "High", "Critical", "Business Critical"],
-                    "default_value": "Medium"
-                }
-            ]
-        }
-    ]
+    return catalog_response(request, "asset_group", category)
 
 @api_router.get("/templates/default-asset-types")
-async def get_default_asset_type_templates():
+async def get_default_asset_type_templates(request: Request, category: Optional[str] = None):
     """Get pre-defined asset type templates with custom fields"""
-    return [
-        {
-            "name": "Desktop Computer",
-            "description": "Desktop workstations and PCs",
-            "icon": "Monitor",
-            "asset_group_name": "Hardware",
-            "custom_fields": [
-                {
-                    "id": "serial_number",
-                    "name": "serial_number", 
-                    "label": "Serial Number",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "processor",
-                    "name": "processor",
-                    "label": "Processor",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "memory_gb",
-                    "name": "memory_gb",
-                    "label": "Memory (GB)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 16
-                },
-                {
-                    "id": "storage_gb",
-                    "name": "storage_gb",
-                    "label": "Storage (GB)", 
-                    "type": "number",
-                    "required": False,
-                    "default_value": 512
-                }
-            ]
-        },
-        {
-            "name": "Laptop",
-            "description": "Portable laptops and notebooks",
-            "icon": "Laptop",
-            "asset_group_name": "Hardware",
-            "custom_fields": [
-                {
-                    "id": "serial_number",
-                    "name": "serial_number",
-                    "label": "Serial Number",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "processor",
-                    "name": "processor",
-                    "label": "Processor",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "memory_gb",
-                    "name": "memory_gb",
-                    "label": "Memory (GB)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 8
-                },
-                {
-                    "id": "battery_health",
-                    "name": "battery_health",
-                    "label": "Battery Health (%)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 100
-                }
-            ]
-        },
-        {
-            "name": "Server",
-            "description": "Physical and virtual servers",
-            "icon": "Server",
-            "asset_group_name": "Hardware",
-            "custom_fields": [
-                {
-                    "id": "server_type",
-                    "name": "server_type",
-                    "label": "Server Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Physical", "Virtual", "Container", "Cloud Instance"],
-                    "default_value": "Physical"
-                },
-                {
-                    "id": "cpu_cores",
-                    "name": "cpu_cores",
-                    "label": "CPU Cores",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 8
-                },
-                {
-                    "id": "memory_gb",
-                    "name": "memory_gb",
-                    "label": "Memory (GB)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 32
-                }
-            ]
-        },
-        {
-            "name": "Network Switch",
-            "description": "Network switching hardware",
-            "icon": "Network",
-            "asset_group_name": "Network Equipment",
-            "custom_fields": [
-                {
-                    "id": "port_count",
-                    "name": "port_count",
-                    "label": "Number of Ports",
-                    "type": "number",
-                    "required": True,
-                    "default_value": 24
-                },
-                {
-                    "id": "port_speed",
-                    "name": "port_speed",
-                    "label": "Port Speed",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["10/100 Mbps", "Gigabit", "10 Gigabit", "25 Gigabit", "40 Gigabit", "100 Gigabit"],
-                    "default_value": "Gigabit"
-                },
-                {
-                    "id": "management_ip",
-                    "name": "management_ip",
-                    "label": "Management IP Address",
-                    "type": "ip_address",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "vlan_support",
-                    "name": "vlan_support",
-                    "label": "VLAN Support",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": True
-                }
-            ]
-        },
-        {
-            "name": "Router",
-            "description": "Network routing hardware",
-            "icon": "Wifi",
-            "asset_group_name": "Network Equipment",
-            "custom_fields": [
-                {
-                    "id": "wan_ports",
-                    "name": "wan_ports",
-                    "label": "WAN Ports",
-                    "type": "number",
-                    "required": True,
-                    "default_value": 1
-                },
-                {
-                    "id": "lan_ports",
-                    "name": "lan_ports",
-                    "label": "LAN Ports",
-                    "type": "number",
-                    "required": True,
-                    "default_value": 4
-                },
-                {
-                    "id": "wifi_standard",
-                    "name": "wifi_standard",
-                    "label": "WiFi Standard",
-                    "type": "dataset",
-                    "required": False,
-                    "dataset_values": ["802.11n", "802.11ac", "802.11ax (WiFi 6)", "802.11be (WiFi 7)"],
-                    "default_value": "802.11ax (WiFi 6)"
-                },
-                {
-                    "id": "vpn_support",
-                    "name": "vpn_support",
-                    "label": "VPN Support",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": True
-                }
-            ]
-        },
-        {
-            "name": "Printer",
-            "description": "Office printing devices",
-            "icon": "Printer",
-            "asset_group_name": "Hardware",
-            "custom_fields": [
-                {
-                    "id": "print_type",
-                    "name": "print_type",
-                    "label": "Print Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Laser", "Inkjet", "Dot Matrix", "Thermal", "3D Printer"],
-                    "default_value": "Laser"
-                },
-                {
-                    "id": "color_support",
-                    "name": "color_support",
-                    "label": "Color Support",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": False
-                },
-                {
-                    "id": "pages_per_minute",
-                    "name": "pages_per_minute",
-                    "label": "Pages Per Minute",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 20
-                },
-                {
-                    "id": "network_enabled",
-                    "name": "network_enabled",
-                    "label": "Network Enabled",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": True
-                }
-            ]
-        },
-        {
-            "name": "Mobile Device",
-            "description": "Smartphones and tablets",
-            "icon": "Smartphone",
-            "asset_group_name": "Hardware",
-            "custom_fields": [
-                {
-                    "id": "device_type",
-                    "name": "device_type",
-                    "label": "Device Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Smartphone", "Tablet", "Smartwatch", "Other"],
-                    "default_value": "Smartphone"
-                },
-                {
-                    "id": "operating_system",
-                    "name": "operating_system",
-                    "label": "Operating System",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["iOS", "Android", "Windows Mobile", "Other"],
-                    "default_value": "iOS"
-                },
-                {
-                    "id": "phone_number",
-                    "name": "phone_number",
-                    "label": "Phone Number",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "carrier",
-                    "name": "carrier",
-                    "label": "Carrier",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Storage Device",
-            "description": "External and internal storage devices",
-            "icon": "HardDrive",
-            "asset_group_name": "Storage Devices",
-            "custom_fields": [
-                {
-                    "id": "storage_capacity",
-                    "name": "storage_capacity",
-                    "label": "Storage Capacity (GB)",
-                    "type": "number",
-                    "required": True,
-                    "default_value": 1000
-                },
-                {
-                    "id": "interface_type",
-                    "name": "interface_type",
-                    "label": "Interface Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["SATA", "NVMe", "USB 3.0", "USB-C", "Thunderbolt", "Ethernet"],
-                    "default_value": "SATA"
-                },
-                {
-                    "id": "storage_type",
-                    "name": "storage_type",
-                    "label": "Storage Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["HDD", "SSD", "NAS", "External Drive", "Cloud Storage"],
-                    "default_value": "SSD"
-                },
-                {
-                    "id": "raid_level",
-                    "name": "raid_level",
-                    "label": "RAID Level",
-                    "type": "dataset",
-                    "required": False,
-                    "dataset_values": ["None", "RAID 0", "RAID 1", "RAID 5", "RAID 10"],
-                    "default_value": "None"
-                }
-            ]
-        },
-        {
-            "name": "Monitor",
-            "description": "Display monitors and screens",
-            "icon": "Monitor",
-            "asset_group_name": "Hardware",
-            "custom_fields": [
-                {
-                    "id": "screen_size",
-                    "name": "screen_size",
-                    "label": "Screen Size (inches)",
-                    "type": "number",
-                    "required": True,
-                    "default_value": 24
-                },
-                {
-                    "id": "resolution",
-                    "name": "resolution",
-                    "label": "Resolution",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["1920x1080", "2560x1440", "3840x2160", "1366x768", "2560x1080"],
-                    "default_value": "1920x1080"
-                },
-                {
-                    "id": "panel_type",
-                    "name": "panel_type",
-                    "label": "Panel Type",
-                    "type": "dataset",
-                    "required": False,
-                    "dataset_values": ["IPS", "TN", "VA", "OLED", "QLED"],
-                    "default_value": "IPS"
-                },
-                {
-                    "id": "refresh_rate",
-                    "name": "refresh_rate",
-                    "label": "Refresh Rate (Hz)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 60
-                }
-            ]
-        },
-        {
-            "name": "UPS Device",
-            "description": "Uninterruptible Power Supply units",
-            "icon": "Zap",
-            "asset_group_name": "Hardware",
-            "custom_fields": [
-                {
-                    "id": "power_rating",
-                    "name": "power_rating",
-                    "label": "Power Rating (VA)",
-                    "type": "number",
-                    "required": True,
-                    "default_value": 1500
-                },
-                {
-                    "id": "battery_backup_time",
-                    "name": "battery_backup_time",
-                    "label": "Battery Backup Time (minutes)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 15
-                },
-                {
-                    "id": "outlet_count",
-                    "name": "outlet_count",
-                    "label": "Number of Outlets",
-                    "type": "number",
-                    "required": True,
-                    "default_value": 8
-                },
-                {
-                    "id": "network_management",
-                    "name": "network_management",
-                    "label": "Network Management Card",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": False
-                }
-            ]
-        },
-        {
-            "name": "Security Camera",
-            "description": "Surveillance and security cameras",
-            "icon": "Camera",
-            "asset_group_name": "Security",
-            "custom_fields": [
-                {
-                    "id": "camera_resolution",
-                    "name": "camera_resolution",
-                    "label": "Camera Resolution",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["720p", "1080p", "4K", "8MP", "12MP"],
-                    "default_value": "1080p"
-                },
-                {
-                    "id": "camera_type",
-                    "name": "camera_type",
-                    "label": "Camera Type",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Indoor", "Outdoor", "PTZ", "Dome", "Bullet"],
-                    "default_value": "Indoor"
-                },
-                {
-                    "id": "night_vision",
-                    "name": "night_vision",
-                    "label": "Night Vision",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": True
-                },
-                {
-                    "id": "recording_storage",
-                    "name": "recording_storage",
-                    "label": "Recording Storage (GB)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 500
-                }
-            ]
-        }
-    ]
-
-# Duplicate endpoint removed - consolidated into enhanced version above
+    return catalog_response(request, "asset_type", category)
 
 @api_router.get("/templates/default-assets")
-async def get_default_asset_templates():
+async def get_default_asset_templates(request: Request, category: Optional[str] = None):
     """Get pre-defined asset templates with custom fields"""
-    return [
-        {
-            "name": "Production Web Server",
-            "description": "Production web server instance",
-            "icon": "Globe",
-            "asset_group_name": "Hardware",
-            "asset_type_name": "Web Server",
-            "custom_fields": [
-                {
-                    "id": "environment",
-                    "name": "environment",
-                    "label": "Environment",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Production", "Staging", "Development", "Testing"],
-                    "default_value": "Production"
-                },
-                {
-                    "id": "load_balancer_backend",
-                    "name": "load_balancer_backend",
-                    "label": "Load Balancer Backend",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": False
-                },
-                {
-                    "id": "domain_names",
-                    "name": "domain_names",
-                    "label": "Domain Names",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Employee Laptop",
-            "description": "Standard employee laptop configuration",
-            "icon": "Laptop",
-            "asset_group_name": "Hardware",
-            "asset_type_name": "Laptop",
-            "custom_fields": [
-                {
-                    "id": "encryption_enabled",
-                    "name": "encryption_enabled",
-                    "label": "Full Disk Encryption",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                },
-                {
-                    "id": "vpn_configured",
-                    "name": "vpn_configured",
-                    "label": "VPN Configured",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                },
-                {
-                    "id": "assigned_user",
-                    "name": "assigned_user",
-                    "label": "Assigned User",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Database Server Instance",
-            "description": "Production database server setup",
-            "icon": "Database",
-            "asset_group_name": "Hardware",
-            "asset_type_name": "Server",
-            "custom_fields": [
-                {
-                    "id": "database_name",
-                    "name": "database_name",
-                    "label": "Database Name",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "backup_schedule",
-                    "name": "backup_schedule",
-                    "label": "Backup Schedule",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["Daily", "Weekly", "Monthly", "Real-time"],
-                    "default_value": "Daily"
-                },
-                {
-                    "id": "high_availability",
-                    "name": "high_availability",
-                    "label": "High Availability Setup",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": False
-                }
-            ]
-        },
-        {
-            "name": "Office Workstation",
-            "description": "Standard office desktop computer",
-            "icon": "Monitor",
-            "asset_group_name": "Hardware",
-            "asset_type_name": "Desktop Computer",
-            "custom_fields": [
-                {
-                    "id": "department",
-                    "name": "department",
-                    "label": "Department",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["IT", "Finance", "HR", "Sales", "Marketing", "Operations"],
-                    "default_value": "IT"
-                },
-                {
-                    "id": "primary_user",
-                    "name": "primary_user",
-                    "label": "Primary User",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "domain_joined",
-                    "name": "domain_joined",
-                    "label": "Domain Joined",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                }
-            ]
-        },
-        {
-            "name": "Network Switch Config",
-            "description": "Configured network switch",
-            "icon": "Network",
-            "asset_group_name": "Network Equipment",
-            "asset_type_name": "Network Switch",
-            "custom_fields": [
-                {
-                    "id": "switch_location",
-                    "name": "switch_location",
-                    "label": "Physical Location",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "uplink_port",
-                    "name": "uplink_port",
-                    "label": "Uplink Port",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "managed_switch",
-                    "name": "managed_switch",
-                    "label": "Managed Switch",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                }
-            ]
-        },
-        {
-            "name": "Wireless Access Point",
-            "description": "WiFi access point configuration",
-            "icon": "Wifi",
-            "asset_group_name": "Network Equipment",
-            "asset_type_name": "Router",
-            "custom_fields": [
-                {
-                    "id": "ssid_name",
-                    "name": "ssid_name",
-                    "label": "SSID Name",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "coverage_area",
-                    "name": "coverage_area",
-                    "label": "Coverage Area",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                },
-                {
-                    "id": "max_clients",
-                    "name": "max_clients",
-                    "label": "Maximum Clients",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 50
-                }
-            ]
-        },
-        {
-            "name": "Color Laser Printer",
-            "description": "Office color laser printer",
-            "icon": "Printer", 
-            "asset_group_name": "Hardware",
-            "asset_type_name": "Printer",
-            "custom_fields": [
-                {
-                    "id": "toner_levels",
-                    "name": "toner_levels",
-                    "label": "Toner Levels (%)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 100
-                },
-                {
-                    "id": "duplex_printing",
-                    "name": "duplex_printing",
-                    "label": "Duplex Printing",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": True
-                },
-                {
-                    "id": "paper_tray_capacity",
-                    "name": "paper_tray_capacity",
-                    "label": "Paper Tray Capacity",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 250
-                }
-            ]
-        },
-        {
-            "name": "Company iPhone",
-            "description": "Corporate mobile device",
-            "icon": "Smartphone",
-            "asset_group_name": "Hardware",
-            "asset_type_name": "Mobile Device",
-            "custom_fields": [
-                {
-                    "id": "mdm_enrolled",
-                    "name": "mdm_enrolled",
-                    "label": "MDM Enrolled",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                },
-                {
-                    "id": "data_plan",
-                    "name": "data_plan",
-                    "label": "Data Plan (GB)",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 10
-                },
-                {
-                    "id": "employee_assigned",
-                    "name": "employee_assigned",
-                    "label": "Assigned Employee",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Office Security Camera",
-            "description": "Indoor security camera for office monitoring",
-            "icon": "Camera",
-            "asset_group_name": "Security",
-            "asset_type_name": "Security Camera",
-            "custom_fields": [
-                {
-                    "id": "camera_location",
-                    "name": "camera_location",
-                    "label": "Camera Location",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "motion_detection",
-                    "name": "motion_detection",
-                    "label": "Motion Detection Enabled",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                },
-                {
-                    "id": "audio_recording",
-                    "name": "audio_recording",
-                    "label": "Audio Recording",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": False
-                }
-            ]
-        },
-        {
-            "name": "External Storage Drive",
-            "description": "Portable external storage device",
-            "icon": "HardDrive",
-            "asset_group_name": "Storage Devices",
-            "asset_type_name": "Storage Device",
-            "custom_fields": [
-                {
-                    "id": "encryption_enabled",
-                    "name": "encryption_enabled",
-                    "label": "Hardware Encryption",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": False
-                },
-                {
-                    "id": "backup_purpose",
-                    "name": "backup_purpose",
-                    "label": "Backup Purpose",
-                    "type": "dataset",
-                    "required": False,
-                    "dataset_values": ["System Backup", "User Data", "Archive", "Temporary", "Media Storage"],
-                    "default_value": "User Data"
-                },
-                {
-                    "id": "assigned_department",
-                    "name": "assigned_department",
-                    "label": "Assigned Department",
-                    "type": "text",
-                    "required": False,
-                    "default_value": None
-                }
-            ]
-        },
-        {
-            "name": "Conference Room Display",
-            "description": "Large display for conference rooms and presentations",
-            "icon": "Monitor",
-            "asset_group_name": "Hardware",
-            "asset_type_name": "Monitor",
-            "custom_fields": [
-                {
-                    "id": "room_location",
-                    "name": "room_location",
-                    "label": "Conference Room",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "wireless_display",
-                    "name": "wireless_display",
-                    "label": "Wireless Display Support",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": True
-                },
-                {
-                    "id": "touch_enabled",
-                    "name": "touch_enabled",
-                    "label": "Touch Screen Enabled",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": False
-                }
-            ]
-        },
-        {
-            "name": "Data Center UPS",
-            "description": "High-capacity UPS for data center equipment",
-            "icon": "Zap",
-            "asset_group_name": "Hardware", 
-            "asset_type_name": "UPS Device",
-            "custom_fields": [
-                {
-                    "id": "rack_location",
-                    "name": "rack_location",
-                    "label": "Rack Location",
-                    "type": "text",
-                    "required": True,
-                    "default_value": None
-                },
-                {
-                    "id": "redundancy_level",
-                    "name": "redundancy_level",
-                    "label": "Redundancy Level",
-                    "type": "dataset",
-                    "required": True,
-                    "dataset_values": ["N", "N+1", "2N", "2N+1"],
-                    "default_value": "N+1"
-                },
-                {
-                    "id": "maintenance_contract",
-                    "name": "maintenance_contract",
-                    "label": "Maintenance Contract Active",
-                    "type": "boolean",
-                    "required": False,
-                    "default_value": True
-                }
-            ]
-        },
-        {
-            "name": "Corporate Firewall",
-            "description": "Network firewall device for security",
-            "icon": "Shield",
-            "asset_group_name": "Network Equipment",
-            "asset_type_name": "Network Switch",
-            "custom_fields": [
-                {
-                    "id": "firewall_rules_count",
-                    "name": "firewall_rules_count",
-                    "label": "Number of Active Rules",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 50
-                },
-                {
-                    "id": "vpn_tunnels",
-                    "name": "vpn_tunnels",
-                    "label": "VPN Tunnels Supported",
-                    "type": "number",
-                    "required": False,
-                    "default_value": 10
-                },
-                {
-                    "id": "intrusion_detection",
-                    "name": "intrusion_detection",
-                    "label": "Intrusion Detection Enabled",
-                    "type": "boolean",
-                    "required": True,
-                    "default_value": True
-                }
-            ]
-        }
-    ]
+    return catalog_response(request, "asset", category)
 
 # ========== CUSTOM TEMPLATE MANAGEMENT ==========
 
@@ -2648,6 +1004,116 @@ async def delete_custom_template(template_id: str, current_user: User = Depends(
 
 # ========== AUTO-CREATE PARENT ENTITIES ==========
 
+async def instantiate_templates(
+    organization_id: str,
+    groups: Optional[List[dict]] = None,
+    types: Optional[List[dict]] = None,
+    assets: Optional[List[dict]] = None,
+    reuse_existing: bool = False
+) -> List[Dict[str, str]]:
+    """Create asset groups, types and assets from templates.
+
+    Parents named by asset_group_name / asset_type_name are resolved
+    against this batch first, then the organization's existing entities,
+    and auto-created when missing. Existing names are loaded with one
+    query per collection and new documents are written with one
+    insert_many per collection. With reuse_existing, templates whose name
+    already exists are skipped instead of duplicated.
+    """
+    groups, types, assets = groups or [], types or [], assets or []
+    
+    group_ids: Dict[str, str] = {}
+    async for group in db.asset_groups.find({"organization_id": organization_id}, {"_id": 0, "id": 1, "name": 1}):
+        group_ids.setdefault(group["name"], group["id"])
+    
+    type_ids: Dict[tuple, str] = {}
+    async for asset_type in db.asset_types.find(
+        {"organization_id": organization_id}, {"_id": 0, "id": 1, "name": 1, "asset_group_id": 1}
+    ):
+        type_ids.setdefault((asset_type["asset_group_id"], asset_type["name"]), asset_type["id"])
+    
+    existing_assets = set()
+    if reuse_existing and assets:
+        async for asset in db.assets.find(
+            {"organization_id": organization_id, "name": {"$in": [t["name"] for t in assets]}},
+            {"_id": 0, "name": 1, "asset_type_id": 1}
+        ):
+            existing_assets.add((asset["asset_type_id"], asset["name"]))
+    
+    new_docs: Dict[str, List[dict]] = {"asset_groups": [], "asset_types": [], "assets": []}
+    created: List[Dict[str, str]] = []
+    
+    def add_group(name: str, description: str, icon: Optional[str], custom_fields: list) -> str:
+        group = AssetGroup(
+            name=name,
+            description=description,
+            icon=icon,
+            organization_id=organization_id,
+            custom_fields=custom_fields
+        )
+        new_docs["asset_groups"].append(prepare_for_mongo(group.dict()))
+        group_ids[name] = group.id
+        created.append({"type": "asset_group", "id": group.id, "name": group.name})
+        return group.id
+    
+    def add_type(name: str, description: str, icon: Optional[str], group_id: str, custom_fields: list) -> str:
+        asset_type = AssetType(
+            name=name,
+            description=description,
+            icon=icon,
+            asset_group_id=group_id,
+            organization_id=organization_id,
+            custom_fields=custom_fields
+        )
+        new_docs["asset_types"].append(prepare_for_mongo(asset_type.dict()))
+        type_ids[(group_id, name)] = asset_type.id
+        created.append({"type": "asset_type", "id": asset_type.id, "name": asset_type.name})
+        return asset_type.id
+    
+    def resolve_group(name: str, for_name: str, kind: str) -> str:
+        if name in group_ids:
+            return group_ids[name]
+        return add_group(name, f"Auto-created for {for_name} {kind}", "Package", [])
+    
+    for template in groups:
+        if reuse_existing and template["name"] in group_ids:
+            continue
+        add_group(template["name"], template["description"], template.get("icon"), template.get("custom_fields", []))
+    
+    for template in types:
+        group_id = resolve_group(template.get("asset_group_name", "Hardware"), template["name"], "asset type")
+        if reuse_existing and (group_id, template["name"]) in type_ids:
+            continue
+        add_type(template["name"], template["description"], template.get("icon"), group_id,
+                 template.get("custom_fields", []))
+    
+    for template in assets:
+        group_id = resolve_group(template.get("asset_group_name", "Hardware"), template["name"], "asset")
+        type_name = template.get("asset_type_name", "Server")
+        type_id = type_ids.get((group_id, type_name)) or add_type(
+            type_name, f"Auto-created for {template['name']} asset", template.get("icon", "Server"), group_id, []
+        )
+        if reuse_existing and (type_id, template["name"]) in existing_assets:
+            continue
+        asset = Asset(
+            name=template["name"],
+            description=template["description"],
+            icon=template.get("icon"),
+            asset_type_id=type_id,
+            asset_group_id=group_id,
+            organization_id=organization_id,
+            custom_fields=template.get("custom_fields", [])
+        )
+        new_docs["assets"].append(prepare_for_mongo(asset.dict()))
+        created.append({"type": "asset", "id": asset.id, "name": asset.name})
+    
+    # Parents first so a partially failed batch never leaves dangling children
+    for collection in ("asset_groups", "asset_types", "assets"):
+        if new_docs[collection]:
+            await db[collection].insert_many(new_docs[collection], ordered=False)
+    
+    return created
+
 @api_router.post("/templates/create-from-template")
 async def create_from_template(
     template_type: str,
@@ -2662,19 +1128,14 @@ async def create_from_template(
     if organization_id not in current_user.organization_ids:
         raise HTTPException(status_code=403, detail="Access denied to organization")
     
+    if template_type not in TEMPLATE_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown template type: {template_type}")
+    
     template_data = None
     
     # Get template data
     if template_source == 'default':
-        if template_type == 'asset_group':
-            default_templates = await get_default_asset_group_templates()
-            template_data = next((t for t in default_templates if t['name'] == template_id_or_name), None)
-        elif template_type == 'asset_type':
-            default_templates = await get_default_asset_type_templates()
-            template_data = next((t for t in default_templates if t['name'] == template_id_or_name), None)
-        elif template_type == 'asset':
-            default_templates = await get_default_asset_templates()
-            template_data = next((t for t in default_templates if t['name'] == template_id_or_name), None)
+        template_data = template_catalog.get(template_type, template_id_or_name)
     else:
         # Custom template
         custom_template = await db.custom_templates.find_one({"id": template_id_or_name})
@@ -2684,142 +1145,37 @@ async def create_from_template(
     if not template_data:
         raise HTTPException(status_code=404, detail="Template not found")
     
-    result = {"created": []}
+    batch = {"asset_group": "groups", "asset_type": "types", "asset": "assets"}[template_type]
+    created = await instantiate_templates(organization_id, **{batch: [template_data]})
     
-    if template_type == 'asset_group':
-        # Create asset group directly
-        group_data = AssetGroupCreate(
-            name=template_data['name'],
-            description=template_data['description'],
-            icon=template_data.get('icon'),
-            organization_id=organization_id,
-            custom_fields=template_data.get('custom_fields', [])
-        )
-        
-        group = AssetGroup(**group_data.dict(), created_by=current_user.id)
-        group_store = prepare_for_mongo(group.dict())
-        await db.asset_groups.insert_one(group_store)
-        
-        result["created"].append({"type": "asset_group", "id": group.id, "name": group.name})
-        result["primary_entity"] = {"type": "asset_group", "id": group.id}
-    
-    elif template_type == 'asset_type':
-        # Ensure asset group exists
-        asset_group_name = template_data.get('asset_group_name', 'Hardware')
-        existing_group = await db.asset_groups.find_one({
-            "name": asset_group_name,
-            "organization_id": organization_id
-        })
-        
-        if not existing_group:
-            # Create the asset group
-            group_data = AssetGroupCreate(
-                name=asset_group_name,
-                description=f"Auto-created for {template_data['name']} asset type",
-                icon="Package",
-                organization_id=organization_id,
-                custom_fields=[]
-            )
-            
-            group = AssetGroup(**group_data.dict(), created_by=current_user.id)
-            group_store = prepare_for_mongo(group.dict())
-            await db.asset_groups.insert_one(group_store)
-            
-            result["created"].append({"type": "asset_group", "id": group.id, "name": group.name})
-            asset_group_id = group.id
-        else:
-            asset_group_id = existing_group["id"]
-        
-        # Create asset type
-        type_data = AssetTypeCreate(
-            name=template_data['name'],
-            description=template_data['description'],
-            icon=template_data.get('icon'),
-            asset_group_id=asset_group_id,
-            custom_fields=template_data.get('custom_fields', [])
-        )
-        
-        asset_type = AssetType(**type_data.dict(), organization_id=organization_id, created_by=current_user.id)
-        type_store = prepare_for_mongo(asset_type.dict())
-        await db.asset_types.insert_one(type_store)
-        
-        result["created"].append({"type": "asset_type", "id": asset_type.id, "name": asset_type.name})
-        result["primary_entity"] = {"type": "asset_type", "id": asset_type.id}
+    result = {"created": created}
+    result["primary_entity"] = {"type": template_type, "id": created[-1]["id"]}
+    return result
+
+class CatalogInstantiateRequest(BaseModel):
+    organization_id: str
+    category: Optional[str] = None
+    include_assets: bool = False
+
+@api_router.post("/templates/instantiate-catalog")
+async def instantiate_catalog(request_data: CatalogInstantiateRequest, current_user: User = Depends(get_current_user)):
+    """Create every default group and type (and optionally sample asset) in an organization.
+
+    Templates whose name already exists in the organization are skipped.
+    """
+    if request_data.organization_id not in current_user.organization_ids:
+        raise HTTPException(status_code=403, detail="Access denied to organization")
     
-    elif template_type == 'asset':
-        # Ensure asset group and type exist
-        asset_group_name = template_data.get('asset_group_name', 'Hardware')
-        asset_type_name = template_data.get('asset_type_name', 'Server')
-        
-        existing_group = await db.asset_groups.find_one({
-            "name": asset_group_name,
-            "organization_id": organization_id
-        })
-        
-        if not existing_group:
-            # Create the asset group
-            group_data = AssetGroupCreate(
-                name=asset_group_name,
-                description=f"Auto-created for {template_data['name']} asset",
-                icon="Package",
-                organization_id=organization_id,
-                custom_fields=[]
-            )
-            
-            group = AssetGroup(**group_data.dict(), created_by=current_user.id)
-            group_store = prepare_for_mongo(group.dict())
-            await db.asset_groups.insert_one(group_store)
-            
-            result["created"].append({"type": "asset_group", "id": group.id, "name": group.name})
-            asset_group_id = group.id
-        else:
-            asset_group_id = existing_group["id"]
-        
-        # Check for asset type
-        existing_type = await db.asset_types.find_one({
-            "name": asset_type_name,
-            "asset_group_id": asset_group_id
-        })
-        
-        if not existing_type:
-            # Create the asset type
-            type_data = AssetTypeCreate(
-                name=asset_type_name,
-                description=f"Auto-created for {template_data['name']} asset",
-                icon=template_data.get('icon', 'Server'),
-                asset_group_id=asset_group_id,
-                custom_fields=[]
-            )
-            
-            asset_type = AssetType(**type_data.dict(), organization_id=organization_id, created_by=current_user.id)
-            type_store = prepare_for_mongo(asset_type.dict())
-            await db.asset_types.insert_one(type_store)
-            
-            result["created"].append({"type": "asset_type", "id": asset_type.id, "name": asset_type.name})
-            asset_type_id = asset_type.id
-        else:
-            asset_type_id = existing_type["id"]
-        
-        # Create asset
-        asset_data = AssetCreate(
-            name=template_data['name'],
-            description=template_data['description'],
-            icon=template_data.get('icon'),
-            asset_type_id=asset_type_id,
-            custom_fields=template_data.get('custom_fields', []),
-            custom_data={},
-            tags=[],
-            relationships=[]
-        )
-        
-        asset = Asset(**asset_data.dict(), asset_group_id=asset_group_id, organization_id=organization_id)
-        asset_store = prepare_for_mongo(asset.dict())
-        await db.assets.insert_one(asset_store)
-        
-        result["created"].append({"type": "asset", "id": asset.id, "name": asset.name})
-        result["primary_entity"] = {"type": "asset", "id": asset.id}
+    created = await instantiate_templates(
+        request_data.organization_id,
+        groups=template_catalog.all("asset_group", request_data.category),
+        types=template_catalog.all("asset_type", request_data.category),
+        assets=template_catalog.all("asset", request_data.category) if request_data.include_assets else [],
+        reuse_existing=True
+    )
     
-    return result
+    counts = {kind: sum(1 for item in created if item["type"] == kind) for kind in TEMPLATE_KINDS}
+    return {"created": created, "counts": counts}
 
 # ========== MAIN APP SETUP ==========
 app.include_router(api_router)
@@ -2831,6 +1187,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
@@ -2840,6 +1197,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    # Detailed asset listing: equality filters, then the keyset sort on
+    # (field, id), for every filter and sort key the listing accepts
+    for filter_fields in DETAILED_INDEX_FILTERS:
+        for sort_field in DETAILED_SORT_FIELDS.values():
+            await db.assets.create_index(
+                [("organization_id", 1)]
+                + [(field, 1) for field in filter_fields]
+                + [(sort_field, 1), ("id", 1)]
+            )
+    await db.assets.create_index("id")
+    # $lookup targets
+    await db.asset_types.create_index("id")
+    await db.asset_groups.create_index("id")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
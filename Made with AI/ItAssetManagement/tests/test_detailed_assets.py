@@ -0,0 +1,201 @@
+import asyncio
+import copy
+import functools
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_assets")
+
+from fastapi import HTTPException, Response
+
+import server
+
+ORG = "org-1"
+
+
+def field_value(doc, path):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def matches(doc, query):
+    """The subset of $match the listing issues: equality, $ne/$gt/$lt, $or/$and."""
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        if key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        value = field_value(doc, key)
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == "$ne":
+                    ok = value != operand
+                elif value is None:
+                    ok = False
+                else:
+                    ok = value > operand if op == "$gt" else value < operand
+                if not ok:
+                    return False
+        elif isinstance(value, list):
+            if condition not in value:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def compare(spec, left, right):
+    # Null and missing sort before every other value, as in MongoDB
+    for field, direction in spec.items():
+        a, b = field_value(left, field), field_value(right, field)
+        a_key, b_key = (a is not None, a or ""), (b is not None, b or "")
+        if a_key != b_key:
+            return direction * (-1 if a_key < b_key else 1)
+    return 0
+
+
+class Assets:
+    """db.assets answering aggregate() with the $match/$sort/$limit stages applied."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.pipelines = []
+        self.indexes = []
+
+    def aggregate(self, pipeline, **kwargs):
+        self.pipelines.append(pipeline)
+        docs = [copy.deepcopy(doc) for doc in self.docs]
+        for stage in pipeline:
+            if "$match" in stage:
+                docs = [doc for doc in docs if matches(doc, stage["$match"])]
+            elif "$sort" in stage:
+                docs.sort(key=functools.cmp_to_key(functools.partial(compare, stage["$sort"])))
+            elif "$limit" in stage:
+                docs = docs[:stage["$limit"]]
+        return SimpleNamespace(to_list=lambda length: asyncio.sleep(0, docs[:length]))
+
+    async def create_index(self, keys, **kwargs):
+        self.indexes.append([key if isinstance(key, str) else key[0] for key in
+                             ([keys] if isinstance(keys, str) else keys)])
+
+
+def asset(id, name=..., **fields):
+    doc = {"id": id, "organization_id": ORG, "asset_type_id": "t1", "asset_group_id": "g1",
+           "created_at": f"2024-01-{id}", **fields}
+    if name is not ...:
+        doc["name"] = name
+    return doc
+
+
+# Ties on "b" and on null, a missing name and an asset of another organization
+ASSETS = [
+    asset("05", "b"), asset("02", None), asset("07", "a"), asset("01", "b"),
+    asset("04"), asset("06", None), asset("03", "c"), asset("08", "b", organization_id="org-2"),
+]
+ASCENDING = ["02", "04", "06", "07", "01", "05", "03"]
+
+
+def user():
+    return server.User(email="owner@example.com", name="Owner", organization_ids=[ORG])
+
+
+def fetch_page(monkeypatch, assets, cursor=None, **params):
+    monkeypatch.setattr(server, "db", SimpleNamespace(assets=assets))
+    response = Response()
+    arguments = {"asset_type_id": None, "asset_group_id": None, "tag": None, "sort": "created_at",
+                 "order": "asc", "limit": server.DETAILED_MAX_LIMIT, "fields": None, **params}
+    page = asyncio.run(server.get_assets_detailed(
+        ORG, SimpleNamespace(query_params={}), response, cursor=cursor, current_user=user(), **arguments))
+    return page, response.headers.get("X-Next-Cursor")
+
+
+def fetch_all(monkeypatch, assets, **params):
+    seen, cursor = [], None
+    while True:
+        page, cursor = fetch_page(monkeypatch, assets, cursor, **params)
+        seen.append([doc["id"] for doc in page])
+        if not cursor:
+            return seen
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 10])
+def test_cursor_pages_cover_ties_and_nulls_ascending(monkeypatch, limit):
+    pages = fetch_all(monkeypatch, Assets(ASSETS), sort="name", limit=limit)
+
+    assert sum(pages, []) == ASCENDING
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 10])
+def test_cursor_pages_cover_ties_and_nulls_descending(monkeypatch, limit):
+    # Nulls and missing names come last and must not be dropped by $lt
+    pages = fetch_all(monkeypatch, Assets(ASSETS), sort="name", order="desc", limit=limit)
+
+    assert sum(pages, []) == ASCENDING[::-1]
+
+
+def test_cursor_round_trips_through_the_header(monkeypatch):
+    page, cursor = fetch_page(monkeypatch, Assets(ASSETS), sort="name", limit=4)
+
+    assert [doc["id"] for doc in page] == ASCENDING[:4]
+    assert server.decode_cursor(cursor) == ["a", "07"]
+    rest, cursor = fetch_page(monkeypatch, Assets(ASSETS), cursor, sort="name", limit=4)
+    assert [doc["id"] for doc in rest] == ASCENDING[4:]
+    assert cursor is None
+
+
+def test_cursor_on_a_null_sort_value(monkeypatch):
+    page, cursor = fetch_page(monkeypatch, Assets(ASSETS), sort="name", limit=2)
+
+    assert server.decode_cursor(cursor) == [None, "04"]
+    rest, _ = fetch_page(monkeypatch, Assets(ASSETS), cursor, sort="name")
+    assert [doc["id"] for doc in rest] == ASCENDING[2:]
+
+
+def test_invalid_cursor_is_rejected(monkeypatch):
+    with pytest.raises(HTTPException) as error:
+        fetch_page(monkeypatch, Assets(ASSETS), cursor="not-a-cursor")
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("sort", ["type", "group", "asset_type_id", "custom."])
+def test_unindexed_or_unsortable_keys_are_rejected(sort):
+    with pytest.raises(HTTPException) as error:
+        server.resolve_sort_field(sort)
+    assert error.value.status_code == 400
+
+
+def test_indexes_cover_every_filter_and_sort_combination(monkeypatch):
+    assets = Assets([])
+    monkeypatch.setattr(server, "db", SimpleNamespace(assets=assets, asset_types=Assets([]),
+                                                      asset_groups=Assets([])))
+    asyncio.run(server.create_indexes())
+
+    for filter_field in [None, "asset_type_id", "asset_group_id", "tags"]:
+        for sort_field in server.DETAILED_SORT_FIELDS.values():
+            expected = ["organization_id"] + ([filter_field] if filter_field else []) + [sort_field, "id"]
+            assert expected in assets.indexes
+
+
+def test_next_cursor_header_is_exposed_to_browsers():
+    cors = next(m for m in server.app.user_middleware if m.cls is server.CORSMiddleware)
+    options = getattr(cors, "kwargs", None) or getattr(cors, "options", {})
+    assert "X-Next-Cursor" in options["expose_headers"]
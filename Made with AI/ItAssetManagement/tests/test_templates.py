@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_assets")
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import server
+
+ORG = "org-1"
+CATALOG = json.loads((Path(server.ROOT_DIR) / "template_catalog.json").read_text(encoding="utf-8"))
+
+
+def request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def get_listing(kind, category=None, if_none_match=None):
+    return server.catalog_response(request(if_none_match), kind, category)
+
+
+class Collection:
+    """Async find/insert_many over a list, recording each insert_many batch."""
+
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+        self.batches = []
+
+    def find(self, query, projection=None):
+        docs = [doc for doc in self.docs if all(
+            doc.get(key) in value["$in"] if isinstance(value, dict) else doc.get(key) == value
+            for key, value in query.items()
+        )]
+
+        async def iterate():
+            for doc in docs:
+                yield dict(doc)
+        return iterate()
+
+    async def insert_many(self, docs, ordered=True):
+        self.batches.append(docs)
+        self.docs.extend(docs)
+
+
+class Database(SimpleNamespace):
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    database = Database(asset_groups=Collection(), asset_types=Collection(), assets=Collection())
+    monkeypatch.setattr(server, "db", database)
+    return database
+
+
+def user():
+    return server.User(email="owner@example.com", name="Owner", organization_ids=[ORG])
+
+
+@pytest.mark.parametrize("kind", server.TEMPLATE_KINDS)
+def test_listings_serve_the_catalog_with_a_strong_etag(kind):
+    response = get_listing(kind)
+
+    assert response.status_code == 200
+    assert json.loads(response.body) == CATALOG[kind]
+    assert response.headers["etag"].startswith('"') and not response.headers["etag"].startswith("W/")
+    assert response.headers["cache-control"] == "public, max-age=3600"
+
+
+def test_matching_if_none_match_gets_a_304():
+    etag = get_listing("asset_type").headers["etag"]
+
+    for header in [etag, f"W/{etag}", f'"stale", {etag}', "*"]:
+        response = get_listing("asset_type", if_none_match=header)
+        assert response.status_code == 304, header
+        assert response.body == b""
+        assert response.headers["etag"] == etag
+
+    assert get_listing("asset_type", if_none_match='"stale"').status_code == 200
+
+
+def test_category_listings_have_their_own_etag():
+    everything = get_listing("asset_type")
+    hardware = get_listing("asset_type", "hardware")
+
+    assert json.loads(hardware.body) == [t for t in CATALOG["asset_type"] if t["asset_group_name"] == "Hardware"]
+    assert hardware.headers["etag"] != everything.headers["etag"]
+    # An ETag from one listing does not validate another
+    assert get_listing("asset_type", "Hardware", everything.headers["etag"]).status_code == 200
+    assert json.loads(get_listing("asset_type", "no such group").body) == []
+
+
+def test_single_templates_are_copies():
+    template = server.template_catalog.get("asset_type", "Laptop")
+    template["custom_fields"].clear()
+
+    assert server.template_catalog.get("asset_type", "Laptop")["custom_fields"]
+    assert server.template_catalog.get("asset_type", "No such template") is None
+
+
+def test_asset_template_creates_missing_parents_first(db):
+    result = asyncio.run(server.create_from_template(
+        "asset", "default", "Employee Laptop", ORG, current_user=user()))
+
+    assert [(item["type"], item["name"]) for item in result["created"]] == [
+        ("asset_group", "Hardware"), ("asset_type", "Laptop"), ("asset", "Employee Laptop")]
+    assert result["primary_entity"] == {"type": "asset", "id": result["created"][-1]["id"]}
+    (group,), (asset_type,), (asset,) = db.asset_groups.docs, db.asset_types.docs, db.assets.docs
+    assert asset_type["asset_group_id"] == group["id"]
+    assert (asset["asset_type_id"], asset["asset_group_id"]) == (asset_type["id"], group["id"])
+    assert asset["organization_id"] == ORG
+    # One insert_many per collection
+    assert [len(c.batches) for c in (db.asset_groups, db.asset_types, db.assets)] == [1, 1, 1]
+
+
+def test_templates_reuse_existing_parents(db):
+    db.asset_groups.docs.append({"id": "g-hw", "name": "Hardware", "organization_id": ORG})
+    db.asset_types.docs.append({"id": "t-laptop", "name": "Laptop", "asset_group_id": "g-hw",
+                                "organization_id": ORG})
+
+    result = asyncio.run(server.create_from_template(
+        "asset", "default", "Employee Laptop", ORG, current_user=user()))
+
+    assert [item["type"] for item in result["created"]] == ["asset"]
+    assert db.assets.docs[0]["asset_type_id"] == "t-laptop"
+    assert db.asset_groups.batches == [] and db.asset_types.batches == []
+
+
+def test_unknown_or_foreign_templates_are_rejected(db):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(server.create_from_template("asset", "default", "No such template", ORG, current_user=user()))
+    assert error.value.status_code == 404
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(server.create_from_template("widget", "default", "Laptop", ORG, current_user=user()))
+    assert error.value.status_code == 400
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(server.create_from_template("asset", "default", "Employee Laptop", "org-2",
+                                                current_user=user()))
+    assert error.value.status_code == 403
+
+
+def test_catalog_instantiation_skips_existing_names(db):
+    body = server.CatalogInstantiateRequest(organization_id=ORG, include_assets=True)
+    first = asyncio.run(server.instantiate_catalog(body, current_user=user()))
+
+    assert first["counts"]["asset_group"] == len(CATALOG["asset_group"])
+    assert first["counts"]["asset_type"] >= len(CATALOG["asset_type"])
+    assert first["counts"]["asset"] == len(CATALOG["asset"])
+    assert len({doc["name"] for doc in db.asset_groups.docs}) == len(db.asset_groups.docs)
+
+    second = asyncio.run(server.instantiate_catalog(body, current_user=user()))
+    assert second["created"] == []
+    assert second["counts"] == {"asset_group": 0, "asset_type": 0, "asset": 0}
@@ -0,0 +1,422 @@
+"""In-process command search index.
+
+An inverted token index scored with BM25F (per-field weights and length
+normalisation) plus a trigram index over the vocabulary, used to expand
+query tokens that are substrings of, or misspellings of, indexed terms.
+
+SyncedCommandIndex keeps one in step with the commands collection: the
+write routes update it directly, and a throttled version check rebuilds it
+when another process (or a seeding script) has changed the collection.
+"""
+
+import asyncio
+import base64
+import heapq
+import html
+import json
+import math
+import re
+import threading
+import time
+from operator import mul
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+FIELDS = ("name", "tags", "syntax", "description", "examples")
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "syntax": 1.5, "description": 1.0, "examples": 0.75}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Minimum trigram similarity for a vocabulary term to count as a fuzzy match
+FUZZY_THRESHOLD = 0.3
+# Score multiplier for substring/fuzzy expansions relative to exact terms
+SUBSTRING_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.5
+# Cap on prefix (short token) and fuzzy expansions; substring matches are not capped
+MAX_EXPANSIONS = 20
+
+IMPACT_CACHE_TERMS = 2048
+# Relative change in an average field length that invalidates cached norms
+NORM_DRIFT = 0.05
+SNIPPET_CHARS = 120
+# Seconds between checks of the collection version before a search
+REFRESH_INTERVAL = 5.0
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _field_text(command: Dict[str, Any], field: str) -> str:
+    value = command.get(field) or ""
+    if isinstance(value, list):
+        return "\n".join(str(v) for v in value)
+    return str(value)
+
+
+class CommandSearchIndex:
+    def __init__(self):
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        # term -> {command id -> per-field term frequencies}
+        self.postings: Dict[str, Dict[str, Tuple[int, ...]]] = {}
+        self.doc_terms: Dict[str, Set[str]] = {}
+        self.field_lengths: Dict[str, Tuple[int, ...]] = {}
+        self.total_lengths = [0] * len(FIELDS)
+        # trigram -> vocabulary terms containing it
+        self.trigram_terms: Dict[str, Set[str]] = {}
+        self._next_seq = 0
+        # BM25F field normalisation per command, computed against
+        # _norm_averages and dropped once the average field lengths drift
+        self._norm_cache: Dict[str, Tuple[float, ...]] = {}
+        self._norm_averages: Optional[List[float]] = None
+        # Per-term score impacts, cleared on every write
+        self._impact_cache: Dict[str, Dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def build(self, commands: Iterable[Dict[str, Any]]):
+        """Bulk-load commands and precompute field normalisation."""
+        for command in commands:
+            self.add(command)
+        for doc_id in self.docs:
+            self._norms(doc_id)
+
+    def add(self, command: Dict[str, Any]):
+        """Index a command, replacing any previous version with the same id."""
+        doc_id = command["id"]
+        if doc_id in self.docs:
+            self.remove(doc_id)
+
+        self._next_seq += 1
+        self.docs[doc_id] = {
+            "id": doc_id,
+            "seq": self._next_seq,
+            "category": command.get("category", ""),
+            "tags": list(command.get("tags") or []),
+            "is_public": command.get("is_public", True),
+            "created_by": command.get("created_by"),
+            "texts": {field: _field_text(command, field) for field in FIELDS},
+        }
+
+        frequencies: Dict[str, List[int]] = {}
+        lengths = []
+        for position, field in enumerate(FIELDS):
+            tokens = tokenize(self.docs[doc_id]["texts"][field])
+            lengths.append(len(tokens))
+            self.total_lengths[position] += len(tokens)
+            for token in tokens:
+                frequencies.setdefault(token, [0] * len(FIELDS))[position] += 1
+
+        self.field_lengths[doc_id] = tuple(lengths)
+        self.doc_terms[doc_id] = set(frequencies)
+        for term, counts in frequencies.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                for gram in trigrams(term):
+                    self.trigram_terms.setdefault(gram, set()).add(term)
+            postings[doc_id] = tuple(counts)
+        self._invalidate(doc_id)
+
+    def remove(self, doc_id: str):
+        if self.docs.pop(doc_id, None) is None:
+            return
+        for position, length in enumerate(self.field_lengths.pop(doc_id)):
+            self.total_lengths[position] -= length
+        for term in self.doc_terms.pop(doc_id):
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+                for gram in trigrams(term):
+                    terms = self.trigram_terms[gram]
+                    terms.discard(term)
+                    if not terms:
+                        del self.trigram_terms[gram]
+        self._invalidate(doc_id)
+
+    def _average_lengths(self) -> List[float]:
+        doc_count = max(len(self.docs), 1)
+        return [max(total / doc_count, 1.0) for total in self.total_lengths]
+
+    def _invalidate(self, doc_id: str):
+        """Drop cached scoring data affected by a write to one command."""
+        self._impact_cache.clear()
+        self._norm_cache.pop(doc_id, None)
+        if self._norm_averages is not None:
+            for used, current in zip(self._norm_averages, self._average_lengths()):
+                if abs(current - used) > NORM_DRIFT * used:
+                    self._norm_cache.clear()
+                    self._norm_averages = None
+                    break
+
+    def expand(self, token: str) -> Dict[str, float]:
+        """Vocabulary terms matching a query token, with a weight per term.
+
+        Exact and substring matches are used when there are any, all of
+        them, so every command the regex search matched is still found;
+        otherwise the token is treated as a typo and matched by trigram
+        similarity. Tokens too short to have an inner trigram match the
+        terms starting with them that are in the most commands instead.
+        """
+        matches = {token: 1.0} if token in self.postings else {}
+        if len(token) < 3:
+            # Every term is indexed under its padded leading trigram ("  s", " ss")
+            prefixed = self.trigram_terms.get(" " * (3 - len(token)) + token, set())
+            longer = (term for term in prefixed if term != token)
+            for term in heapq.nsmallest(MAX_EXPANSIONS, longer, key=lambda term: (-len(self.postings[term]), term)):
+                matches[term] = SUBSTRING_WEIGHT
+            return matches
+
+        # Substring matches: terms containing every trigram of the token
+        inner = sorted((self.trigram_terms.get(token[i:i + 3], set()) for i in range(len(token) - 2)), key=len)
+        candidates = set.intersection(*inner) if inner and inner[0] else set()
+        for term in sorted(candidates):
+            if term != token and token in term:
+                matches[term] = SUBSTRING_WEIGHT
+        if matches:
+            return matches
+
+        # Fuzzy matches: Jaccard similarity of padded trigram sets
+        grams = trigrams(token)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for term in self.trigram_terms.get(gram, ()):
+                shared[term] = shared.get(term, 0) + 1
+        fuzzy = []
+        min_shared = FUZZY_THRESHOLD * len(grams)
+        for term, count in shared.items():
+            if count < min_shared:
+                continue
+            similarity = count / (len(grams) + len(trigrams(term)) - count)
+            if similarity >= FUZZY_THRESHOLD:
+                fuzzy.append((similarity, term))
+        for similarity, term in heapq.nlargest(MAX_EXPANSIONS, fuzzy):
+            matches[term] = FUZZY_WEIGHT * similarity
+        return matches
+
+    def _norms(self, doc_id: str) -> Tuple[float, ...]:
+        """Per-field BM25F weight / length normalisation for a command."""
+        norms = self._norm_cache.get(doc_id)
+        if norms is None:
+            if self._norm_averages is None:
+                self._norm_averages = self._average_lengths()
+            norms = tuple(
+                FIELD_WEIGHTS[field] / (1 - B + B * length / average)
+                for field, length, average in zip(FIELDS, self.field_lengths[doc_id], self._norm_averages)
+            )
+            self._norm_cache[doc_id] = norms
+        return norms
+
+    def score(self, tokens: List[str]) -> Tuple[Dict[str, float], List[str]]:
+        """BM25F scores per command and the vocabulary terms that were matched."""
+        doc_count = len(self.docs)
+        if not doc_count:
+            return {}, []
+
+        scores: Dict[str, float] = {}
+        expanded: List[str] = []
+        for token in dict.fromkeys(tokens):
+            for term, term_weight in self.expand(token).items():
+                expanded.append(term)
+                for doc_id, impact in self._impacts(term).items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + term_weight * impact
+        return scores, expanded
+
+    def _impacts(self, term: str) -> Dict[str, float]:
+        """BM25F score contribution of a term to each command containing it."""
+        impacts = self._impact_cache.get(term)
+        if impacts is None:
+            postings = self.postings[term]
+            doc_count = len(self.docs)
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            factor = idf * (K1 + 1)
+            impacts = {}
+            for doc_id, counts in postings.items():
+                tf = sum(map(mul, counts, self._norms(doc_id)))
+                impacts[doc_id] = factor * tf / (tf + K1)
+            if len(self._impact_cache) >= IMPACT_CACHE_TERMS:
+                self._impact_cache.clear()
+            self._impact_cache[term] = impacts
+        return impacts
+
+    def _visible(self, doc: Dict[str, Any], category: Optional[str], tags: Optional[List[str]],
+                 user_id: Optional[str]) -> bool:
+        if not doc["is_public"] and (user_id is None or doc["created_by"] != user_id):
+            return False
+        if category and category.lower() not in doc["category"].lower():
+            return False
+        if tags and not set(tags).intersection(doc["tags"]):
+            return False
+        return True
+
+    def search(self, query: Optional[str] = None, category: Optional[str] = None,
+               tags: Optional[List[str]] = None, user_id: Optional[str] = None,
+               limit: int = 20, cursor: Optional[str] = None,
+               offset: int = 0, highlight: bool = True) -> Dict[str, Any]:
+        """Ranked search.
+
+        Results are ordered by descending score, then command id; without a
+        query, in insertion order. Pass the returned `next_cursor` to get the
+        following page; `offset` is only applied when no cursor is given.
+        """
+        tokens = tokenize(query or "")
+        if tokens:
+            scores, expanded = self.score(tokens)
+            keys = [(-score, doc_id) for doc_id, score in scores.items()]
+        else:
+            expanded = []
+            keys = [(doc["seq"], doc_id) for doc_id, doc in self.docs.items()]
+
+        after = self._decode_cursor(cursor) if cursor else None
+        docs = self.docs
+        keys = [
+            key for key in keys
+            if (after is None or key > after) and self._visible(docs[key[1]], category, tags, user_id)
+        ]
+        page = heapq.nsmallest(limit + (0 if after else offset) + 1, keys)
+        if not after:
+            page = page[offset:]
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        hits = []
+        for primary, doc_id in page:
+            hit = {"id": doc_id, "score": round(-primary, 4) if tokens else None, "highlights": {}}
+            if highlight:
+                matched = {term for term in expanded if doc_id in self.postings[term]}
+                hit["highlights"] = self.highlight(doc_id, matched)
+            hits.append(hit)
+
+        return {
+            "results": hits,
+            "total": len(keys) if after is None else None,
+            "next_cursor": self._encode_cursor(page[-1]) if has_more and page else None,
+        }
+
+    def highlight(self, doc_id: str, terms: Set[str]) -> Dict[str, str]:
+        """HTML snippets of matched fields with matches wrapped in <mark>."""
+        if not terms:
+            return {}
+        pattern = re.compile(r"\b(" + "|".join(sorted(map(re.escape, terms), key=len, reverse=True)) + r")",
+                             re.IGNORECASE)
+        snippets = {}
+        for field, text in self.docs[doc_id]["texts"].items():
+            match = pattern.search(text)
+            if not match:
+                continue
+            start = max(0, match.start() - SNIPPET_CHARS // 3)
+            end = min(len(text), start + SNIPPET_CHARS)
+            window = text[start:end]
+            parts = []
+            last = 0
+            for m in pattern.finditer(window):
+                parts.append(html.escape(window[last:m.start()]))
+                parts.append(f"<mark>{html.escape(m.group(0))}</mark>")
+                last = m.end()
+            parts.append(html.escape(window[last:]))
+            snippet = "".join(parts).replace("\n", " ")
+            snippets[field] = ("…" if start else "") + snippet + ("…" if end < len(text) else "")
+        return snippets
+
+    @staticmethod
+    def _encode_cursor(key: Tuple[float, str]) -> str:
+        raw = json.dumps(list(key)).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[float, str]:
+        try:
+            primary, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return primary, str(doc_id)
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid search cursor") from e
+
+
+class SyncedCommandIndex:
+    """A CommandSearchIndex kept in step with the commands collection.
+
+    `read_version` returns something that changes whenever the collection
+    does (the server uses the document count and newest `updated_at`).
+    Before a search, at most every `check_interval` seconds, it is compared
+    with the version the index was built from and the index is rebuilt from
+    `load_commands` when they differ. Scoring, writes and rebuilds run in
+    worker threads so they do not block the event loop.
+    """
+
+    def __init__(self, load_commands: Callable[[], Awaitable[List[Dict[str, Any]]]],
+                 read_version: Callable[[], Awaitable[Hashable]],
+                 check_interval: float = REFRESH_INTERVAL):
+        self.index = CommandSearchIndex()
+        self.version: Optional[Hashable] = None
+        self._load_commands = load_commands
+        self._read_version = read_version
+        self._check_interval = check_interval
+        self._checked_at: Optional[float] = None
+        # Held by whichever thread reads or mutates self.index
+        self._lock = threading.Lock()
+        self._refreshing = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _locked(self, method: str, *args, **kwargs):
+        with self._lock:
+            return getattr(self.index, method)(*args, **kwargs)
+
+    def _due(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self._check_interval
+
+    async def refresh(self, force: bool = False):
+        """Rebuild the index if the collection changed since it was built."""
+        if not force and not self._due():
+            return
+        async with self._refreshing:
+            if not force and not self._due():
+                return
+            # Read before loading: a write landing during the load bumps the
+            # version again and the next check picks it up
+            version = await self._read_version()
+            self._checked_at = time.monotonic()
+            if version == self.version and not force:
+                return
+            commands = await self._load_commands()
+            index = CommandSearchIndex()
+            await asyncio.to_thread(index.build, commands)
+            with self._lock:
+                self.index = index
+                self.version = version
+
+    async def search(self, **kwargs) -> Dict[str, Any]:
+        """CommandSearchIndex.search on a refreshed index, off the event loop."""
+        await self.refresh()
+        return await asyncio.to_thread(self._locked, "search", **kwargs)
+
+    async def add(self, command: Dict[str, Any]):
+        await self._write("add", command)
+
+    async def remove(self, doc_id: str):
+        await self._write("remove", doc_id)
+
+    async def _write(self, method: str, argument: Any):
+        """Apply this process's own write and adopt the version it produced.
+
+        A rebuild that swapped the index meanwhile keeps its own version; if
+        it loaded the collection before this write, that version is stale
+        and the next check rebuilds again. A change made by another process between the write
+        and the version read is picked up with the next change after it.
+        """
+        before = self.version
+        await asyncio.to_thread(self._locked, method, argument)
+        async with self._refreshing:
+            if self.version == before:
+                self.version = await self._read_version()
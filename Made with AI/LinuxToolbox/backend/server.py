@@ -13,6 +13,7 @@ from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Dict, Any
 import uuid
 import re
+from search_index import SyncedCommandIndex
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -29,6 +30,19 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-change-this")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+async def load_commands():
+    return await db.commands.find({}, {"_id": 0}).to_list(length=None)
+
+async def commands_version():
+    # Seeding scripts and other workers write db.commands directly; every
+    # write changes the count or the newest updated_at
+    newest = await db.commands.find_one({}, {"_id": 0, "updated_at": 1}, sort=[("updated_at", -1)])
+    return await db.commands.count_documents({}), newest.get("updated_at") if newest else None
+
+# In-process ranked search over commands, kept in sync by the write routes
+# and rebuilt when commands_version() shows a change made elsewhere
+search_index = SyncedCommandIndex(load_commands, commands_version)
+
 # Create the main app without a prefix
 app = FastAPI(title="Linux Admin Tool API")
 
@@ -130,6 +144,17 @@ class SearchQuery(BaseModel):
     tags: Optional[List[str]] = None
     limit: Optional[int] = 20
     offset: Optional[int] = 0
+    cursor: Optional[str] = None
+
+class SearchHit(BaseModel):
+    command: CommandResponse
+    score: Optional[float] = None
+    highlights: Dict[str, str] = {}
+
+class SearchResults(BaseModel):
+    results: List[SearchHit]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 # Helper functions
 def get_password_hash(password: str) -> str:
@@ -260,45 +285,52 @@ async def search_commands(
     offset: Optional[int] = Body(0), 
     current_user: Optional[UserResponse] = None
 ):
-    # Build the complete query with proper $and structure
-    conditions = []
-    
-    # Access control
-    access_condition = {"$or": [{"is_public": True}]}
-    if current_user:
-        access_condition["$or"].append({"created_by": current_user.id})
-    conditions.append(access_condition)
-    
-    # Full-text search
-    if query:
-        search_conditions = {
-            "$or": [
-                {"name": {"$regex": query, "$options": "i"}},
-                {"description": {"$regex": query, "$options": "i"}},
-                {"syntax": {"$regex": query, "$options": "i"}},
-                {"examples": {"$elemMatch": {"$regex": query, "$options": "i"}}},
-                {"tags": {"$elemMatch": {"$regex": query, "$options": "i"}}}
-            ]
-        }
-        conditions.append(search_conditions)
-    
-    # Category filter
-    if category:
-        conditions.append({"category": {"$regex": category, "$options": "i"}})
-    
-    # Tags filter
-    if tags:
-        conditions.append({"tags": {"$in": tags}})
-    
-    # Construct final query
-    if len(conditions) == 1:
-        mongo_query = conditions[0]
-    else:
-        mongo_query = {"$and": conditions}
-    
-    commands = await db.commands.find(mongo_query).skip(offset).limit(limit).to_list(length=None)
+    # Ranked lookup in the in-process index, then fetch the page by id
+    page = await search_index.search(
+        query=query,
+        category=category,
+        tags=tags,
+        user_id=current_user.id if current_user else None,
+        limit=limit,
+        offset=offset,
+        highlight=False
+    )
+    commands = await fetch_commands_in_order([hit["id"] for hit in page["results"]])
     return [CommandResponse(**cmd) for cmd in commands]
 
+@api_router.post("/commands/search/ranked", response_model=SearchResults)
+async def search_commands_ranked(search: SearchQuery, current_user: Optional[UserResponse] = None):
+    try:
+        page = await search_index.search(
+            query=search.query,
+            category=search.category,
+            tags=search.tags,
+            user_id=current_user.id if current_user else None,
+            limit=min(search.limit or 20, 100),
+            cursor=search.cursor,
+            offset=search.offset or 0
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    commands = await fetch_commands_in_order([hit["id"] for hit in page["results"]])
+    by_id = {cmd["id"]: cmd for cmd in commands}
+    return SearchResults(
+        results=[
+            SearchHit(command=CommandResponse(**by_id[hit["id"]]), score=hit["score"], highlights=hit["highlights"])
+            for hit in page["results"] if hit["id"] in by_id
+        ],
+        total=page["total"],
+        next_cursor=page["next_cursor"]
+    )
+
+async def fetch_commands_in_order(command_ids: List[str]) -> List[dict]:
+    if not command_ids:
+        return []
+    commands = await db.commands.find({"id": {"$in": command_ids}}).to_list(length=None)
+    by_id = {cmd["id"]: cmd for cmd in commands}
+    return [by_id[command_id] for command_id in command_ids if command_id in by_id]
+
 @api_router.post("/commands", response_model=CommandResponse)
 async def create_command(command_create: CommandCreate, current_user: UserResponse = Depends(get_current_user)):
     command_data = command_create.dict()
@@ -310,6 +342,7 @@ async def create_command(command_create: CommandCreate, current_user: UserRespon
     })
     
     await db.commands.insert_one(command_data)
+    await search_index.add(command_data)
     return CommandResponse(**command_data)
 
 @api_router.get("/commands/{command_id}", response_model=CommandResponse)
@@ -334,6 +367,7 @@ async def update_command(command_id: str, command_update: CommandUpdate, current
     await db.commands.update_one({"id": command_id}, {"$set": update_data})
     
     updated_command = await db.commands.find_one({"id": command_id})
+    await search_index.add(updated_command)
     return CommandResponse(**updated_command)
 
 @api_router.delete("/commands/{command_id}")
@@ -347,6 +381,7 @@ async def delete_command(command_id: str, current_user: UserResponse = Depends(g
     
     await db.commands.delete_one({"id": command_id})
     await db.saved_commands.delete_many({"command_id": command_id})
+    await search_index.remove(command_id)
     
     return {"message": "Command deleted successfully"}
 
@@ -480,6 +515,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def build_search_index():
+    await db.commands.create_index("updated_at")
+    await search_index.refresh(force=True)
+    logger.info(f"Search index built with {len(search_index)} commands")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
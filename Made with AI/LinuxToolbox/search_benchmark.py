@@ -0,0 +1,153 @@
+"""
+Benchmark the in-process search index against the regex search path.
+
+Builds a synthetic command corpus and times the `$or` of case-insensitive
+regexes used by the old /commands/search route against CommandSearchIndex,
+and checks that the index finds every command the regex path matched.
+The regex path runs on mongomock when it is installed, otherwise on a local
+stand-in that evaluates the same regexes over every document (which is what
+MongoDB does without a text index: a full collection scan).
+
+Usage:
+    python search_benchmark.py [--commands 50000] [--repeat 5]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from search_index import CommandSearchIndex, tokenize  # noqa: E402
+
+VERBS = ["list", "show", "copy", "move", "remove", "create", "monitor", "compress", "extract",
+         "search", "configure", "mount", "restart", "inspect", "trace", "sync", "download", "install"]
+NOUNS = ["files", "directories", "processes", "packages", "network interfaces", "disks", "services",
+         "users", "groups", "logs", "containers", "firewall rules", "kernel modules", "archives"]
+CATEGORIES = ["File Management", "Networking", "System Monitoring", "Package Management",
+              "Security", "Disk Management", "User Management", "Text Processing"]
+TAGS = ["ubuntu", "debian", "fedora", "arch", "kali", "freebsd", "essential", "admin", "network",
+        "storage", "security", "performance", "shell", "systemd"]
+QUERIES = ["docker", "systemctl", "compress", "netw", "instal", "fierwall", "log", "mount disks"]
+
+
+def make_corpus(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    base_names = ["ls", "cp", "mv", "rm", "tar", "grep", "find", "awk", "sed", "systemctl",
+                  "journalctl", "docker", "ip", "ss", "nmap", "iptables", "mount", "rsync"]
+    commands = []
+    for i in range(count):
+        name = f"{rng.choice(base_names)}{'' if i < len(base_names) else i}"
+        verb, noun = rng.choice(VERBS), rng.choice(NOUNS)
+        commands.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": name,
+            "description": f"{verb.capitalize()} {noun} using {name} with common options",
+            "syntax": f"{name} [OPTIONS] <{noun.split()[0]}>",
+            "examples": [f"{name} -v /var/{noun.split()[0]}", f"sudo {name} --{verb}"],
+            "category": rng.choice(CATEGORIES),
+            "tags": rng.sample(TAGS, 3),
+            "created_by": "system",
+            "is_public": True,
+        })
+    return commands
+
+
+def regex_query(query: str):
+    return {"$and": [
+        {"$or": [{"is_public": True}]},
+        {"$or": [
+            {"name": {"$regex": query, "$options": "i"}},
+            {"description": {"$regex": query, "$options": "i"}},
+            {"syntax": {"$regex": query, "$options": "i"}},
+            {"examples": {"$elemMatch": {"$regex": query, "$options": "i"}}},
+            {"tags": {"$elemMatch": {"$regex": query, "$options": "i"}}},
+        ]},
+    ]}
+
+
+def make_regex_search(commands):
+    try:
+        import mongomock
+    except ImportError:
+        mongomock = None
+
+    if mongomock is not None:
+        collection = mongomock.MongoClient().db.commands
+        collection.insert_many([dict(c) for c in commands])
+        return "mongomock", lambda q, limit: list(collection.find(regex_query(q)).limit(limit))
+
+    def scan(query, limit):
+        pattern = re.compile(query, re.IGNORECASE)
+        results = []
+        for command in commands:
+            if not command["is_public"]:
+                continue
+            if (pattern.search(command["name"]) or pattern.search(command["description"])
+                    or pattern.search(command["syntax"])
+                    or any(pattern.search(e) for e in command["examples"])
+                    or any(pattern.search(t) for t in command["tags"])):
+                results.append(command)
+                if len(results) >= limit:
+                    break
+        return results
+
+    return "stand-in scan", scan
+
+
+def timed(fn, repeat):
+    """Return (first run, best run, result) in seconds."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return times[0], min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    commands = make_corpus(args.commands)
+
+    start = time.perf_counter()
+    index = CommandSearchIndex()
+    index.build(commands)
+    build_time = time.perf_counter() - start
+
+    backend, regex_search = make_regex_search(commands)
+    print(f"{args.commands} commands, index built in {build_time:.2f}s, regex path: {backend}\n")
+    # The regex path stops at the route's default limit of 1000 unranked
+    # matches; the index ranks every match and returns the top page.
+    # "cold" is the first query for a term after a write, "warm" the best repeat.
+    # "recall" is the share of all regex matches (without the limit) the index also finds.
+    print(f"{'query':<14}{'regex ms':>10}{'hits':>7}{'cold ms':>10}{'warm ms':>10}{'matches':>9}"
+          f"{'recall':>8}{'speedup':>9}")
+
+    missed = {}
+    for query in QUERIES:
+        _, regex_time, regex_hits = timed(lambda: regex_search(query, 1000), args.repeat)
+        cold, warm, page = timed(lambda: index.search(query, limit=args.limit), args.repeat)
+        expected = {command["id"] for command in regex_search(query, len(commands))}
+        found = set(index.score(tokenize(query))[0])
+        recall = len(expected & found) / len(expected) if expected else 1.0
+        if expected - found:
+            missed[query] = len(expected - found)
+        print(f"{query:<14}{regex_time * 1000:>10.2f}{len(regex_hits):>7}"
+              f"{cold * 1000:>10.2f}{warm * 1000:>10.2f}{page['total']:>9}{recall:>8.1%}{regex_time / cold:>8.1f}x")
+
+    if missed:
+        sys.exit("Index misses regex matches: " + ", ".join(f"{q!r} ({n})" for q, n in missed.items()))
+
+
+if __name__ == "__main__":
+    main()
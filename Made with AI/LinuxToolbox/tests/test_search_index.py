@@ -0,0 +1,223 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from search_index import MAX_EXPANSIONS, CommandSearchIndex, SyncedCommandIndex
+
+
+def command(id, name, description="", tags=None, is_public=True, created_by="system", category="General"):
+    return {
+        "id": id,
+        "name": name,
+        "description": description,
+        "syntax": f"{name} [OPTIONS]",
+        "examples": [f"{name} --help"],
+        "category": category,
+        "tags": tags or [],
+        "is_public": is_public,
+        "created_by": created_by,
+    }
+
+
+def make_index():
+    index = CommandSearchIndex()
+    index.build([
+        command("1", "systemctl", "Control the systemd system and service manager", ["systemd"]),
+        command("2", "journalctl", "Query the systemd journal", ["systemd", "logs"]),
+        command("3", "iptables", "Administration tool for IPv4 firewall rules", ["firewall"], category="Security"),
+        command("4", "ufw", "Uncomplicated firewall frontend", ["firewall"], category="Security"),
+        command("5", "secret", "Private firewall helper", is_public=False, created_by="alice"),
+    ])
+    return index
+
+
+def ids(page):
+    return [hit["id"] for hit in page["results"]]
+
+
+def test_name_matches_rank_above_description_matches():
+    index = make_index()
+    index.add(command("6", "firewall-cmd", "Manage firewalld"))
+
+    assert ids(index.search("firewall"))[0] == "6"
+
+
+def test_substring_and_typo_matches():
+    index = make_index()
+
+    assert set(ids(index.search("ctl"))) == {"1", "2"}
+    assert "1" in ids(index.search("systemc"))
+    assert set(ids(index.search("fierwall"))) == {"3", "4"}
+
+
+def test_filters_and_access_control():
+    index = make_index()
+
+    assert set(ids(index.search("firewall"))) == {"3", "4"}
+    assert set(ids(index.search("firewall", user_id="alice"))) == {"3", "4", "5"}
+    assert ids(index.search("firewall", category="secur", tags=["firewall"])) != []
+    assert ids(index.search("firewall", tags=["systemd"])) == []
+
+
+def test_cursor_pagination_covers_every_result_once():
+    index = CommandSearchIndex()
+    index.build(command(str(i), f"tool{i}", "network helper") for i in range(25))
+
+    seen = []
+    cursor = None
+    while True:
+        page = index.search("network", limit=10, cursor=cursor)
+        seen.extend(ids(page))
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert sorted(seen) == sorted(str(i) for i in range(25))
+    assert ids(index.search(None, limit=5)) == ["0", "1", "2", "3", "4"]
+
+
+def test_updates_and_removals_stay_in_sync():
+    index = make_index()
+    index.add(command("4", "ufw", "Simple packet filter"))
+    index.remove("3")
+
+    assert ids(index.search("firewall")) == []
+    assert ids(index.search("packet")) == ["4"]
+    assert "iptables" not in index.postings
+
+
+def test_highlights_escape_and_mark_matches():
+    index = CommandSearchIndex()
+    index.add(command("1", "grep", "Search <files> for a pattern"))
+
+    highlights = index.search("pattern")["results"][0]["highlights"]
+
+    assert highlights["description"] == "Search &lt;files&gt; for a <mark>pattern</mark>"
+
+
+def test_short_tokens_match_by_prefix():
+    index = make_index()
+    index.add(command("6", "ss", "Socket statistics"))
+    index.add(command("7", "ssh", "OpenSSH client"))
+
+    # Exact term first, then longer terms starting with the token
+    assert ids(index.search("ss")) == ["6", "7"]
+    assert ids(index.search("u")) == ["4"]
+    assert set(ids(index.search("jo"))) == {"2"}
+    assert index.expand("sy") == {"systemctl": 0.8, "systemd": 0.8, "system": 0.8}
+
+
+def test_every_substring_match_is_scored():
+    index = CommandSearchIndex()
+    index.build(command(str(i), f"docker{i}", "Run containers") for i in range(MAX_EXPANSIONS * 3))
+
+    page = index.search("docker", limit=5)
+
+    assert page["total"] == MAX_EXPANSIONS * 3
+    assert len(index.expand("docker")) == MAX_EXPANSIONS * 3
+
+
+def test_short_token_expansions_prefer_common_terms():
+    index = CommandSearchIndex()
+    # More short, rare terms than the cap, and one longer term in many commands
+    index.build(command(f"r{i}", f"za{i:02d}") for i in range(MAX_EXPANSIONS + 5))
+    index.build(command(f"c{i}", f"tool{i}", "zebra helper") for i in range(10))
+
+    expansions = index.expand("z")
+
+    assert len(expansions) == MAX_EXPANSIONS
+    assert "zebra" in expansions
+    assert {f"c{i}" for i in range(10)} <= set(ids(index.search("z", limit=100)))
+
+
+class Collection:
+    """The commands collection as SyncedCommandIndex sees it, with a write counter as version."""
+
+    def __init__(self, commands):
+        self.commands = {c["id"]: c for c in commands}
+        self.writes = 0
+        self.loads = 0
+
+    def write(self, doc=None, remove=None):
+        if doc:
+            self.commands[doc["id"]] = doc
+        if remove:
+            self.commands.pop(remove)
+        self.writes += 1
+
+    async def load(self):
+        self.loads += 1
+        return list(self.commands.values())
+
+    async def version(self):
+        return self.writes
+
+
+def test_synced_index_rebuilds_after_writes_made_elsewhere():
+    collection = Collection([command("1", "systemctl", "Control systemd")])
+    synced = SyncedCommandIndex(collection.load, collection.version, check_interval=0)
+
+    async def main():
+        await synced.refresh(force=True)
+        before = ids(await synced.search(query="firewall"))
+        # A seeding script writes straight to the collection
+        collection.write(command("2", "ufw", "Uncomplicated firewall"))
+        return before, ids(await synced.search(query="firewall"))
+
+    assert asyncio.run(main()) == ([], ["2"])
+    assert collection.loads == 2
+
+
+def test_synced_index_throttles_version_checks():
+    collection = Collection([command("1", "systemctl", "Control systemd")])
+    synced = SyncedCommandIndex(collection.load, collection.version, check_interval=3600)
+
+    async def main():
+        await synced.refresh(force=True)
+        collection.write(command("2", "ufw", "Uncomplicated firewall"))
+        return ids(await synced.search(query="firewall"))
+
+    assert asyncio.run(main()) == []
+    assert collection.loads == 1
+
+
+def test_own_writes_apply_without_a_rebuild():
+    collection = Collection([command("1", "systemctl", "Control systemd")])
+    synced = SyncedCommandIndex(collection.load, collection.version, check_interval=0)
+
+    async def main():
+        await synced.refresh(force=True)
+        doc = command("2", "ufw", "Uncomplicated firewall")
+        collection.write(doc)
+        await synced.add(doc)
+        found = ids(await synced.search(query="firewall"))
+        collection.write(remove="2")
+        await synced.remove("2")
+        return found, ids(await synced.search(query="firewall"))
+
+    assert asyncio.run(main()) == (["2"], [])
+    assert collection.loads == 1
+
+
+def test_scoring_runs_off_the_event_loop(monkeypatch):
+    collection = Collection([command("1", "systemctl", "Control systemd")])
+    synced = SyncedCommandIndex(collection.load, collection.version)
+    threads = []
+    score = CommandSearchIndex.score
+
+    def recording_score(self, tokens):
+        threads.append(threading.get_ident())
+        return score(self, tokens)
+
+    monkeypatch.setattr(CommandSearchIndex, "score", recording_score)
+
+    async def main():
+        await synced.refresh(force=True)
+        await synced.search(query="systemd")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert threads and loop_thread not in threads
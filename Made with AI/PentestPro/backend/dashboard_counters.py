@@ -0,0 +1,172 @@
+"""Dashboard counters maintained with $inc on every write, plus a reconciliation job.
+
+The `dashboard_counters` collection holds a single document:
+
+    {"_id": "global", "templates": n, "assessments": n, "reports": n,
+     "assessments_by_status": {"draft": n, "in_progress": n, ...},
+     "version": n}
+
+and each assessment document carries its own `report_count`. Write paths
+call the `*_created` / `*_deleted` / `assessment_status_changed` hooks after
+the primary write succeeds; `reconcile()` recomputes everything from the
+source collections and runs periodically to correct any drift (e.g. a
+process dying between the two writes).
+
+Every $inc also bumps `version`. reconcile() only writes its totals if the
+version is still the one it read before counting, and recounts otherwise,
+so an increment landing mid-reconcile is never overwritten.
+"""
+
+import asyncio
+import os
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_ID = "global"
+STATUSES = ("draft", "in_progress", "completed", "archived")
+# Recounts reconcile() attempts while increments keep landing
+RECONCILE_ATTEMPTS = 3
+
+
+def _status_key(status: Any) -> str:
+    return f"assessments_by_status.{getattr(status, 'value', status)}"
+
+
+class DashboardCounters:
+    def __init__(self, db, reconcile_interval: float = 3600.0):
+        self.db = db
+        self.reconcile_interval = reconcile_interval
+        self._reconciler: Optional[asyncio.Task] = None
+        self.last_reconciled: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, db) -> "DashboardCounters":
+        return cls(db, reconcile_interval=float(os.environ.get("COUNTERS_RECONCILE_INTERVAL", 3600)))
+
+    async def _inc(self, changes: Dict[str, int]):
+        await self.db.dashboard_counters.update_one(
+            {"_id": GLOBAL_ID},
+            {"$inc": {**changes, "version": 1}, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True,
+        )
+
+    async def template_created(self):
+        await self._inc({"templates": 1})
+
+    async def template_deleted(self):
+        await self._inc({"templates": -1})
+
+    async def assessment_created(self, status: Any):
+        await self._inc({"assessments": 1, _status_key(status): 1})
+
+    async def assessment_status_changed(self, old_status: Any, new_status: Any):
+        if _status_key(old_status) != _status_key(new_status):
+            await self._inc({_status_key(old_status): -1, _status_key(new_status): 1})
+
+    async def assessment_deleted(self, status: Any):
+        await self._inc({"assessments": -1, _status_key(status): -1})
+
+    async def report_created(self, assessment_id: str):
+        await self._inc({"reports": 1})
+        await self.db.assessments.update_one({"id": assessment_id}, {"$inc": {"report_count": 1}})
+
+    async def get(self) -> Dict[str, Any]:
+        """Current counters, reconciling first if they have never been built."""
+        counters = await self.db.dashboard_counters.find_one({"_id": GLOBAL_ID}, {"_id": 0})
+        if counters is None or "reconciled_at" not in counters:
+            counters = await self.reconcile()
+        by_status = {status: 0 for status in STATUSES}
+        by_status.update(counters.get("assessments_by_status") or {})
+        return {
+            "templates": counters.get("templates", 0),
+            "assessments": counters.get("assessments", 0),
+            "reports": counters.get("reports", 0),
+            "assessments_by_status": by_status,
+        }
+
+    async def reconcile(self) -> Dict[str, Any]:
+        """Rebuild every counter from the source collections."""
+        for attempt in range(RECONCILE_ATTEMPTS):
+            current = await self.db.dashboard_counters.find_one({"_id": GLOBAL_ID}, {"version": 1})
+            version = current.get("version") if current else None
+            counters, report_counts = await self._count()
+            if await self._store(version, counters, upsert=current is None):
+                break
+            logger.info(f"Dashboard counters changed during reconciliation, recounting (attempt {attempt + 1})")
+        else:
+            # Increments keep landing: keep them, the next run corrects any drift
+            logger.warning("Dashboard counters not reconciled: still changing after "
+                           f"{RECONCILE_ATTEMPTS} attempts")
+            return await self.db.dashboard_counters.find_one({"_id": GLOBAL_ID}, {"_id": 0, "version": 0})
+
+        await self.db.assessments.update_many(
+            {"id": {"$nin": list(report_counts)}, "report_count": {"$ne": 0}},
+            {"$set": {"report_count": 0}},
+        )
+        if report_counts:
+            await self.db.assessments.bulk_write(
+                [UpdateOne({"id": assessment_id}, {"$set": {"report_count": count}})
+                 for assessment_id, count in report_counts.items()],
+                ordered=False,
+            )
+        self.last_reconciled = counters["reconciled_at"]
+        return counters
+
+    async def _store(self, version: Optional[int], counters: Dict[str, Any], upsert: bool) -> bool:
+        """$set the totals if no increment bumped the version since it was read."""
+        # A document from before versioning, or none at all, has no version
+        guard = version if version is not None else {"$exists": False}
+        try:
+            result = await self.db.dashboard_counters.update_one(
+                {"_id": GLOBAL_ID, "version": guard}, {"$set": counters}, upsert=upsert
+            )
+        except DuplicateKeyError:
+            # The first increment created the document after we found none
+            return False
+        return result.matched_count == 1 or result.upserted_id is not None
+
+    async def _count(self):
+        """Totals from the source collections, and report counts per assessment."""
+        by_status = {status: 0 for status in STATUSES}
+        async for row in self.db.assessments.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            if row["_id"] is not None:
+                by_status[row["_id"]] = row["count"]
+
+        report_counts = {}
+        async for row in self.db.reports.aggregate([{"$group": {"_id": "$assessment_id", "count": {"$sum": 1}}}]):
+            report_counts[row["_id"]] = row["count"]
+
+        now = datetime.now(timezone.utc).isoformat()
+        counters = {
+            "templates": await self.db.templates.count_documents({}),
+            "assessments": sum(by_status.values()),
+            "reports": sum(report_counts.values()),
+            "assessments_by_status": by_status,
+            "updated_at": now,
+            "reconciled_at": now,
+        }
+        return counters, report_counts
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.warning(f"Counter reconciliation failed: {e}")
+
+    def start(self):
+        """Start the periodic reconciliation task."""
+        if self.reconcile_interval > 0 and (self._reconciler is None or self._reconciler.done()):
+            self._reconciler = asyncio.get_running_loop().create_task(self._reconcile_loop())
+
+    async def stop(self):
+        if self._reconciler is not None:
+            self._reconciler.cancel()
+            self._reconciler = None
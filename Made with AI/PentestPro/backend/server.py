@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Response, status
 from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
@@ -13,12 +13,17 @@ import uuid
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 import io
+import json
+import base64
+from pymongo import ReturnDocument
 from weasyprint import HTML, CSS
 from jinja2 import Environment, BaseLoader
 import markdown2
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 
+from dashboard_counters import DashboardCounters
+
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -28,6 +33,9 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Dashboard totals, kept up to date by the write endpoints below
+counters = DashboardCounters.from_env(db)
+
 # Create the main app without a prefix
 app = FastAPI(title="PentestPro API", version="1.0.0")
 
@@ -192,6 +200,19 @@ class Template(BaseModel):
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
+class TemplateSummary(BaseModel):
+    """Template without its steps and report structure, for list views"""
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str
+    name: str
+    description: str
+    category: str = "General"
+    step_count: int = 0
+    created_at: datetime
+    updated_at: datetime
+
+
 class TemplateCreate(BaseModel):
     name: str
     description: str
@@ -223,6 +244,22 @@ class Assessment(BaseModel):
     completed_at: Optional[datetime] = None
 
 
+class AssessmentSummary(BaseModel):
+    """Assessment without its step data, for list views"""
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str
+    template_id: str
+    template_name: str
+    name: str
+    status: AssessmentStatus = AssessmentStatus.DRAFT
+    current_step: int = 0
+    report_count: int = 0
+    created_at: datetime
+    updated_at: datetime
+    completed_at: Optional[datetime] = None
+
+
 class AssessmentCreate(BaseModel):
     template_id: str
     name: str
@@ -715,14 +752,78 @@ def parse_from_mongo(item):
     return item
 
 
+# Keyset pagination
+#
+# List endpoints return newest first, ordered by (updated_at, id) descending.
+# When more results remain, the X-Next-Cursor response header holds an opaque
+# cursor; pass it back as `cursor` to get the following page.
+MAX_PAGE_SIZE = 1000
+
+ASSESSMENT_SUMMARY_PROJECTION = {"_id": 0, "data": 0}
+TEMPLATE_SUMMARY_PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "description": 1, "category": 1,
+    "created_at": 1, "updated_at": 1, "step_count": {"$size": {"$ifNull": ["$steps", []]}},
+}
+
+
+def encode_cursor(values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+async def fetch_page(collection, query: dict, projection: dict, limit: int, cursor: Optional[str],
+                     response: Response, sort_field: str = "updated_at") -> List[dict]:
+    """One page of `collection` in (sort_field, id) descending order."""
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        query = {"$and": [query, {"$or": [
+            {sort_field: {"$lt": value}},
+            {sort_field: value, "id": {"$lt": last_id}},
+        ]}]}
+    documents = await collection.find(query, projection).sort(
+        [(sort_field, -1), ("id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor([last.get(sort_field), last["id"]])
+    return documents
+
+
 # Template endpoints
 @api_router.get("/templates", response_model=List[Template])
-async def get_templates():
+async def get_templates(
+    response: Response,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     """Get all templates"""
-    templates = await db.templates.find({}, {"_id": 0}).to_list(1000)
+    templates = await fetch_page(db.templates, {}, {"_id": 0}, limit, cursor, response)
     return [Template(**parse_from_mongo(template)) for template in templates]
 
 
+@api_router.get("/templates/summary", response_model=List[TemplateSummary])
+async def get_template_summaries(
+    response: Response,
+    category: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """List templates without their steps and report structure"""
+    query = {"category": category} if category else {}
+    templates = await fetch_page(db.templates, query, TEMPLATE_SUMMARY_PROJECTION, limit, cursor, response)
+    return [TemplateSummary(**parse_from_mongo(template)) for template in templates]
+
+
 @api_router.get("/templates/{template_id}", response_model=Template)
 async def get_template(template_id: str):
     """Get a specific template"""
@@ -739,6 +840,7 @@ async def create_template(template_data: TemplateCreate):
     
     doc = prepare_for_mongo(template.model_dump())
     await db.templates.insert_one(doc)
+    await counters.template_created()
     
     return template
 
@@ -768,17 +870,42 @@ async def delete_template(template_id: str):
     result = await db.templates.delete_one({"id": template_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Template not found")
+    await counters.template_deleted()
     return {"message": "Template deleted successfully"}
 
 
 # Assessment endpoints
 @api_router.get("/assessments", response_model=List[Assessment])
-async def get_assessments():
+async def get_assessments(
+    response: Response,
+    status: Optional[AssessmentStatus] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     """Get all assessments"""
-    assessments = await db.assessments.find({}, {"_id": 0}).to_list(1000)
+    query = {"status": status.value} if status else {}
+    assessments = await fetch_page(db.assessments, query, {"_id": 0}, limit, cursor, response)
     return [Assessment(**parse_from_mongo(assessment)) for assessment in assessments]
 
 
+@api_router.get("/assessments/summary", response_model=List[AssessmentSummary])
+async def get_assessment_summaries(
+    response: Response,
+    status: Optional[AssessmentStatus] = None,
+    template_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """List assessments without their step data"""
+    query = {}
+    if status:
+        query["status"] = status.value
+    if template_id:
+        query["template_id"] = template_id
+    assessments = await fetch_page(db.assessments, query, ASSESSMENT_SUMMARY_PROJECTION, limit, cursor, response)
+    return [AssessmentSummary(**parse_from_mongo(assessment)) for assessment in assessments]
+
+
 @api_router.get("/assessments/{assessment_id}", response_model=Assessment)
 async def get_assessment(assessment_id: str):
     """Get a specific assessment"""
@@ -803,6 +930,7 @@ async def create_assessment(assessment_data: AssessmentCreate):
     
     doc = prepare_for_mongo(assessment.model_dump())
     await db.assessments.insert_one(doc)
+    await counters.assessment_created(assessment.status)
     
     return assessment
 
@@ -823,7 +951,14 @@ async def update_assessment(assessment_id: str, assessment_data: AssessmentUpdat
         update_data["completed_at"] = datetime.now(timezone.utc)
     
     prepared_data = prepare_for_mongo(update_data)
-    await db.assessments.update_one({"id": assessment_id}, {"$set": prepared_data})
+    previous = await db.assessments.find_one_and_update(
+        {"id": assessment_id}, {"$set": prepared_data},
+        projection={"_id": 0, "status": 1}, return_document=ReturnDocument.BEFORE
+    )
+    if not previous:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    if "status" in prepared_data:
+        await counters.assessment_status_changed(previous.get("status"), prepared_data["status"])
     
     # Return updated assessment
     updated_assessment = await db.assessments.find_one({"id": assessment_id}, {"_id": 0})
@@ -833,9 +968,10 @@ async def update_assessment(assessment_id: str, assessment_data: AssessmentUpdat
 @api_router.delete("/assessments/{assessment_id}")
 async def delete_assessment(assessment_id: str):
     """Delete an assessment"""
-    result = await db.assessments.delete_one({"id": assessment_id})
-    if result.deleted_count == 0:
+    deleted = await db.assessments.find_one_and_delete({"id": assessment_id}, projection={"_id": 0, "status": 1})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Assessment not found")
+    await counters.assessment_deleted(deleted.get("status"))
     return {"message": "Assessment deleted successfully"}
 
 
@@ -886,14 +1022,22 @@ async def generate_report(assessment_id: str):
     
     doc = prepare_for_mongo(report.model_dump())
     await db.reports.insert_one(doc)
+    await counters.report_created(assessment_id)
     
     return report
 
 
 @api_router.get("/assessments/{assessment_id}/reports", response_model=List[Report])
-async def get_assessment_reports(assessment_id: str):
+async def get_assessment_reports(
+    assessment_id: str,
+    response: Response,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     """Get all reports for an assessment"""
-    reports = await db.reports.find({"assessment_id": assessment_id}, {"_id": 0}).to_list(1000)
+    reports = await fetch_page(
+        db.reports, {"assessment_id": assessment_id}, {"_id": 0}, limit, cursor, response, sort_field="generated_at"
+    )
     return [Report(**parse_from_mongo(report)) for report in reports]
 
 
@@ -921,26 +1065,36 @@ async def download_report_pdf(report_id: str):
 async def get_dashboard():
     """Get dashboard data"""
     # Get counts
-    templates_count = await db.templates.count_documents({})
-    assessments_count = await db.assessments.count_documents({})
-    completed_count = await db.assessments.count_documents({"status": "completed"})
+    stats = await counters.get()
+    assessments_count = stats["assessments"]
+    completed_count = stats["assessments_by_status"]["completed"]
     
     # Get recent assessments
     recent_assessments = await db.assessments.find(
-        {}, {"_id": 0}
+        {}, ASSESSMENT_SUMMARY_PROJECTION
     ).sort("updated_at", -1).limit(5).to_list(5)
     
     return {
         "stats": {
-            "templates": templates_count,
+            "templates": stats["templates"],
             "assessments": assessments_count,
             "completed": completed_count,
-            "in_progress": assessments_count - completed_count
+            "in_progress": assessments_count - completed_count,
+            "reports": stats["reports"],
+            "by_status": stats["assessments_by_status"]
         },
-        "recent_assessments": [Assessment(**parse_from_mongo(a)) for a in recent_assessments]
+        "recent_assessments": [AssessmentSummary(**parse_from_mongo(a)) for a in recent_assessments]
     }
 
 
+@api_router.post("/dashboard/reconcile")
+async def reconcile_dashboard_counters():
+    """Rebuild the dashboard counters from the source collections"""
+    rebuilt = await counters.reconcile()
+    rebuilt.pop("_id", None)
+    return rebuilt
+
+
 # Clear all data endpoint
 @api_router.post("/clear-data")
 async def clear_all_data():
@@ -948,6 +1102,7 @@ async def clear_all_data():
     await db.templates.delete_many({})
     await db.assessments.delete_many({})
     await db.reports.delete_many({})
+    await counters.reconcile()
     return {"message": "All data cleared successfully"}
 
 # Authentication endpoints
@@ -4495,6 +4650,7 @@ async def initialize_sample_data():
     
     doc = prepare_for_mongo(sample_assessment.model_dump())
     await db.assessments.insert_one(doc)
+    await counters.reconcile()
     
     return {"message": "Sample data initialized successfully"}
 
@@ -4517,6 +4673,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def start_services():
+    await db.assessments.create_index([("updated_at", -1), ("id", -1)])
+    await db.assessments.create_index([("status", 1), ("updated_at", -1), ("id", -1)])
+    await db.templates.create_index([("updated_at", -1), ("id", -1)])
+    await db.reports.create_index([("assessment_id", 1), ("generated_at", -1), ("id", -1)])
+    counters.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await counters.stop()
     client.close()
\ No newline at end of file
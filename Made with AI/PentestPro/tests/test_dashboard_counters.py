@@ -0,0 +1,231 @@
+import asyncio
+import copy
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+pytest.importorskip("pymongo")
+
+from pymongo.errors import DuplicateKeyError
+
+from dashboard_counters import GLOBAL_ID, RECONCILE_ATTEMPTS, DashboardCounters
+
+
+def get_path(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return None, False
+        doc = doc[part]
+    return doc, True
+
+
+def set_path(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        value, present = get_path(doc, key)
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == "$exists" and present != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+class Collection:
+    """The motor calls DashboardCounters issues, over a list of documents."""
+
+    def __init__(self, docs=None):
+        self.docs = docs or []
+        # Called once an aggregate has read its snapshot, before it yields
+        self.after_snapshot = None
+
+    async def find_one(self, query, projection=None):
+        for doc in self.docs:
+            if matches(doc, query):
+                doc = copy.deepcopy(doc)
+                for key, flag in (projection or {}).items():
+                    if not flag:
+                        doc.pop(key, None)
+                return doc
+        return None
+
+    async def count_documents(self, query):
+        return sum(1 for doc in self.docs if matches(doc, query))
+
+    async def update_one(self, query, update, upsert=False):
+        doc = next((doc for doc in self.docs if matches(doc, query)), None)
+        upserted_id = None
+        if doc is None:
+            if not upsert:
+                return SimpleNamespace(matched_count=0, upserted_id=None)
+            if any(existing["_id"] == query.get("_id") for existing in self.docs if "_id" in existing):
+                raise DuplicateKeyError("E11000 duplicate key")
+            doc = {key: value for key, value in query.items() if not isinstance(value, dict)}
+            self.docs.append(doc)
+            upserted_id = doc.get("_id")
+        for path, amount in update.get("$inc", {}).items():
+            current, _ = get_path(doc, path)
+            set_path(doc, path, (current or 0) + amount)
+        for path, value in update.get("$set", {}).items():
+            set_path(doc, path, copy.deepcopy(value))
+        return SimpleNamespace(matched_count=0 if upserted_id else 1, upserted_id=upserted_id)
+
+    async def update_many(self, query, update):
+        for doc in self.docs:
+            if matches(doc, query):
+                doc.update(copy.deepcopy(update["$set"]))
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            await self.update_one(request._filter, request._doc)
+
+    async def aggregate(self, pipeline):
+        field = pipeline[0]["$group"]["_id"].lstrip("$")
+        groups = {}
+        for doc in self.docs:
+            groups[doc.get(field)] = groups.get(doc.get(field), 0) + 1
+        if self.after_snapshot:
+            await self.after_snapshot()
+        for key, count in groups.items():
+            yield {"_id": key, "count": count}
+
+
+def make_db():
+    return SimpleNamespace(dashboard_counters=Collection(), templates=Collection(),
+                           assessments=Collection(), reports=Collection())
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def stored(db):
+    counters = copy.deepcopy(db.dashboard_counters.docs[0])
+    return {key: counters.get(key) for key in ("templates", "assessments", "reports", "assessments_by_status")}
+
+
+def test_hooks_increment_counters_and_version():
+    db = make_db()
+    db.assessments.docs.append({"id": "a1", "status": "draft"})
+    counters = DashboardCounters(db)
+
+    async def main():
+        await counters.template_created()
+        await counters.template_created()
+        await counters.template_deleted()
+        await counters.assessment_created("draft")
+        await counters.assessment_created(SimpleNamespace(value="in_progress"))
+        await counters.assessment_status_changed("draft", "completed")
+        await counters.assessment_status_changed("completed", "completed")
+        await counters.assessment_deleted("in_progress")
+        await counters.report_created("a1")
+
+    run(main())
+    assert stored(db) == {
+        "templates": 1, "assessments": 1, "reports": 1,
+        "assessments_by_status": {"draft": 0, "in_progress": 0, "completed": 1},
+    }
+    # The unchanged status transition wrote nothing
+    assert db.dashboard_counters.docs[0]["version"] == 8
+    assert db.assessments.docs[0]["report_count"] == 1
+
+
+def test_get_reconciles_once_then_reads_the_document():
+    db = make_db()
+    db.templates.docs.extend([{"id": "t1"}, {"id": "t2"}])
+    db.assessments.docs.extend([{"id": "a1", "status": "draft"}, {"id": "a2", "status": "completed"}])
+    db.reports.docs.extend([{"assessment_id": "a1"}, {"assessment_id": "a1"}])
+    counters = DashboardCounters(db)
+
+    first = run(counters.get())
+    assert first == {"templates": 2, "assessments": 2, "reports": 2, "assessments_by_status": {
+        "draft": 1, "in_progress": 0, "completed": 1, "archived": 0}}
+    assert counters.last_reconciled is not None
+
+    db.templates.docs.append({"id": "t3"})
+    run(counters.template_created())
+    assert run(counters.get())["templates"] == 3
+
+
+def test_reconcile_corrects_drift_and_report_counts():
+    db = make_db()
+    db.assessments.docs.extend([{"id": "a1", "status": "draft", "report_count": 5},
+                                {"id": "a2", "status": "archived", "report_count": 0}])
+    db.reports.docs.append({"assessment_id": "a2"})
+    db.dashboard_counters.docs.append({"_id": GLOBAL_ID, "templates": 9, "assessments": 7, "version": 4})
+
+    rebuilt = run(DashboardCounters(db).reconcile())
+
+    assert rebuilt["assessments"] == 2 and rebuilt["templates"] == 0
+    assert stored(db)["assessments_by_status"] == {"draft": 1, "in_progress": 0, "completed": 0, "archived": 1}
+    # Reconciling does not bump the version; only increments do
+    assert db.dashboard_counters.docs[0]["version"] == 4
+    assert [doc["report_count"] for doc in db.assessments.docs] == [0, 1]
+
+
+def test_increment_during_reconcile_is_not_lost():
+    db = make_db()
+    db.assessments.docs.append({"id": "a1", "status": "draft"})
+    counters = DashboardCounters(db)
+    run(counters.reconcile())
+
+    async def concurrent_create():
+        # An assessment is written and counted after reconcile took its snapshot
+        db.assessments.after_snapshot = None
+        db.assessments.docs.append({"id": "a2", "status": "draft"})
+        await counters.assessment_created("draft")
+
+    db.assessments.after_snapshot = concurrent_create
+    run(counters.reconcile())
+
+    assert stored(db)["assessments"] == 2
+    assert stored(db)["assessments_by_status"]["draft"] == 2
+
+
+def test_first_increment_racing_the_first_reconcile():
+    db = make_db()
+    counters = DashboardCounters(db)
+
+    async def first_template():
+        db.assessments.after_snapshot = None
+        db.templates.docs.append({"id": "t1"})
+        await counters.template_created()
+
+    db.assessments.after_snapshot = first_template
+    run(counters.reconcile())
+
+    assert len(db.dashboard_counters.docs) == 1
+    assert stored(db)["templates"] == 1
+    assert "reconciled_at" in db.dashboard_counters.docs[0]
+
+
+def test_reconcile_gives_up_while_increments_keep_landing():
+    db = make_db()
+    db.dashboard_counters.docs.append({"_id": GLOBAL_ID, "templates": 1, "version": 1})
+    counters = DashboardCounters(db)
+
+    async def another_template():
+        await counters.template_created()
+
+    db.assessments.after_snapshot = another_template
+    result = run(counters.reconcile())
+
+    # Every increment is kept and the document was never overwritten
+    assert result["templates"] == 1 + RECONCILE_ATTEMPTS
+    assert "reconciled_at" not in db.dashboard_counters.docs[0]
+    assert counters.last_reconciled is None